@@ -0,0 +1,70 @@
+# app/api/routers/changes.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.endpoints.invoices import _build_invoice_out
+from app.core.config import settings
+from app.database import get_read_db
+from app.schemas.changes import ChangeEntityType, ChangeOperation, ChangeOut, ChangePageOut, ChangePageResponse
+from app.schemas.companies import CompanyOut
+from app.schemas.customers import CustomerOut
+from app.schemas.products import ProductOut
+from app.services import changes as change_service
+from app.services.users import get_current_active_user
+from app.services.customers import get_current_company
+from app.models.users import Users
+from app.models.companies import Companies
+from app.core.rate_limit import admission_cost
+
+router = APIRouter(prefix="/companies/{company_id}/changes", tags=["Changes"])
+
+ENTITY_OUTPUTS = {
+    ChangeEntityType.company: ("company", CompanyOut.from_orm),
+    ChangeEntityType.customer: ("customer", CustomerOut.from_orm),
+    ChangeEntityType.product: ("product", ProductOut.from_orm),
+    ChangeEntityType.invoice: ("invoice", _build_invoice_out),
+}
+
+
+@router.get("/", response_model=ChangePageResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
+async def get_changes_endpoint(
+    company_id: str,
+    since: int = Query(0, description="Sequence number of the last change already synced; 0 for a full sync"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.CHANGE_FEED_MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Changes to the company and its customers, products and invoices after `since`,
+    in the order they were made, with the current state of each changed entity.
+    Only the latest change to an entity is kept, so a full sync from since=0 returns
+    each live entity once. Keep requesting with `next_since` while `has_more`.
+    """
+    page = await change_service.get_change_page(
+        db, current_company, since, limit or settings.CHANGE_FEED_PAGE_SIZE
+    )
+    changes = []
+    for change in page.changes:
+        entity_type = ChangeEntityType(change.entity_type)
+        entity = page.entities.get(entity_type, {}).get(change.entity_id)
+        change_out = ChangeOut(
+            sequence=change.sequence,
+            entity_type=entity_type,
+            entity_id=change.entity_id,
+            # An upserted entity that no longer exists has since been removed
+            operation=ChangeOperation.upsert if entity is not None else ChangeOperation.delete,
+            changed_at=change.changed_at
+        )
+        if entity is not None:
+            field, build = ENTITY_OUTPUTS[entity_type]
+            setattr(change_out, field, build(entity))
+        changes.append(change_out)
+    return ChangePageResponse(
+        status_code=status.HTTP_200_OK,
+        message="Changes retrieved successfully",
+        data=ChangePageOut(changes=changes, next_since=page.next_since, has_more=page.has_more)
+    )
@@ -9,6 +9,8 @@ from app.schemas.common import APIResponse # Import APIResponse
 from app.services.companies import add_company, delete_company, list_companies, modify_company_details, get_company_by_id
 from app.services.users import get_current_active_user # Import authentication dependency
 from app.models.users import Users # Import Users model for type hinting
+from app.core.config import settings
+from app.core.rate_limit import admission_cost
 
 # Define the router here. Do not import from app.api.router.companies
 router = APIRouter(prefix="/companies", tags=["Companies"])
@@ -67,6 +69,7 @@ async def remove_company_endpoint(
     )
 
 @router.get("/", response_model=ListCompanyResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
 async def get_companies_endpoint(
     db: AsyncSession = Depends(get_db),
     current_user: Users = Depends(get_current_active_user) # Add authentication
@@ -1,24 +1,30 @@
 # app/api/routers/customers.py
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Query, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.customers import CreateCustomer, UpdateCustomer, CustomerOut, SingleCustomerResponse, ListCustomerResponse
 from app.schemas.common import APIResponse # Import APIResponse
+from app.schemas.imports import SingleImportReportResponse
+from app.services.imports import import_customers
 from app.services.customers import list_all_customers, create_new_customer, modify_customer_details, remove_customer, get_customer_by_id, get_current_company # Import new services and dependency
+from app.services.search import search_customers
+from app.core.config import settings
 from app.services.users import get_current_active_user # Import user authentication
 from app.models.users import Users
 from app.models.companies import Companies # Import Companies model
+from app.core.rate_limit import admission_cost
 
 # Define the router here. Do not import from app.api.router.customers
 router = APIRouter(prefix="/companies/{company_id}/customers", tags=["Customers"])
 
 
 @router.get("/", response_model=ListCustomerResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
 async def show_customers_endpoint(
     company_id: str, # To be used by get_current_company dependency
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Users = Depends(get_current_active_user), # Authenticate user
     current_company: Companies = Depends(get_current_company) # Authenticate and get company
 ):
@@ -88,6 +94,46 @@ async def add_new_customer_endpoint(
         )
     )
 
+@router.post("/import", response_model=SingleImportReportResponse)
+@admission_cost(settings.ADMISSION_COST_EXPORT)
+async def import_customers_endpoint(
+    company_id: str,
+    file: UploadFile = File(..., description="CSV (or .xlsx) file whose header row names the CreateCustomer fields"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Bulk import customers for a specific company from a CSV or Excel file.
+    Invalid rows and GSTINs the company already has are skipped and listed in the report.
+    """
+    report = await import_customers(file, db, current_company)
+    return SingleImportReportResponse(
+        status_code=status.HTTP_200_OK,
+        message=f"Imported {report.imported_rows} of {report.total_rows} customers",
+        data=report
+    )
+
+@router.get("/search", response_model=ListCustomerResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
+async def search_customers_endpoint(
+    company_id: str,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(settings.SEARCH_DEFAULT_LIMIT, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Search the company's customers by name, GSTIN, city or email, best matches first.
+    """
+    customers = await search_customers(q, limit, db, current_company)
+    return ListCustomerResponse(
+        status_code=status.HTTP_200_OK,
+        message="Customers retrieved successfully",
+        data=[CustomerOut.from_orm(c) for c in customers]
+    )
+
 @router.get("/{customer_id}", response_model=SingleCustomerResponse)
 async def get_single_customer_endpoint(
     company_id: str,
@@ -0,0 +1,93 @@
+# app/api/routers/document_batches.py
+import os
+from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.schemas.documents import CreateDocumentBatch, DocumentBatchJobOut, SingleDocumentBatchJobResponse
+from app.services import document_batches as document_batch_service
+from app.services.users import get_current_active_user
+from app.services.customers import get_current_company
+from app.models.users import Users
+from app.models.companies import Companies
+from app.models.document_batches import DocumentBatchJobs
+from app.core.config import settings
+from app.core.rate_limit import admission_cost
+
+router = APIRouter(prefix="/invoices/document-batches", tags=["Invoice Documents"])
+
+def _build_job_out(job: DocumentBatchJobs) -> DocumentBatchJobOut:
+    progress_percent = 100.0 if job.job_status == 'completed' else (
+        round(job.rendered_invoices * 100 / job.total_invoices, 1) if job.total_invoices else 0.0
+    )
+    return DocumentBatchJobOut(
+        job_id=str(job.job_id),
+        company_id=str(job.company_id),
+        date_from=job.date_from,
+        date_to=job.date_to,
+        document_format=job.document_format,
+        job_status=job.job_status,
+        total_invoices=job.total_invoices,
+        rendered_invoices=job.rendered_invoices,
+        progress_percent=progress_percent,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at
+    )
+
+@router.post("/", response_model=SingleDocumentBatchJobResponse, status_code=status.HTTP_202_ACCEPTED)
+@admission_cost(settings.ADMISSION_COST_EXPORT)
+async def create_document_batch_endpoint(
+    batch_data: CreateDocumentBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Start rendering every invoice of your company in a date range into a ZIP archive.
+    Poll the returned job for progress and download the archive once it is completed.
+    """
+    job = await document_batch_service.create_document_batch_job(batch_data, db, current_company, current_user)
+    return SingleDocumentBatchJobResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        message="Document batch job queued",
+        data=_build_job_out(job)
+    )
+
+@router.get("/{job_id}", response_model=SingleDocumentBatchJobResponse)
+async def get_document_batch_endpoint(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """Get the status and progress of a document batch job."""
+    job = await document_batch_service.get_document_batch_job(job_id, db, current_company)
+    return SingleDocumentBatchJobResponse(
+        status_code=status.HTTP_200_OK,
+        message="Document batch job retrieved successfully",
+        data=_build_job_out(job)
+    )
+
+@router.get("/{job_id}/archive")
+@admission_cost(settings.ADMISSION_COST_EXPORT)
+async def download_document_batch_endpoint(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """Download the ZIP archive of a completed document batch job."""
+    job = await document_batch_service.get_document_batch_job(job_id, db, current_company)
+    if job.job_status != 'completed' or not job.archive_path or not os.path.exists(job.archive_path):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Archive is not available; the job is {job.job_status}."
+        )
+    return FileResponse(
+        job.archive_path,
+        media_type="application/zip",
+        filename=f"invoices-{job.date_from}-{job.date_to}.zip"
+    )
@@ -0,0 +1,75 @@
+# app/api/routers/events.py
+import asyncio
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.event_bus import EventSubscription, hub
+from app.database import get_db
+from app.services.users import get_current_active_user
+from app.services.customers import get_current_company
+from app.models.users import Users
+from app.models.companies import Companies
+from app.core.rate_limit import admission_cost
+
+router = APIRouter(prefix="/companies/{company_id}/events", tags=["Events"])
+
+
+async def _stream_events(request: Request, subscription: EventSubscription) -> AsyncIterator[str]:
+    try:
+        # Tells EventSource clients how long to wait before reconnecting
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                live_event = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=settings.EVENT_STREAM_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                # Comment line keeping proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            if live_event is None:
+                # Events were dropped for this client: it must catch up from the change feed
+                yield "event: resync\ndata: {}\n\n"
+                return
+            yield f"id: {live_event.event_id}\nevent: {live_event.event_type}\ndata: {live_event.data}\n\n"
+    finally:
+        hub.unsubscribe(subscription)
+
+
+@router.get("/stream")
+@admission_cost(settings.ADMISSION_COST_DEFAULT, concurrency_gated=False)
+async def stream_events_endpoint(
+    company_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Server-sent events stream of the company's invoice events (invoice.created,
+    invoice.updated, invoice.status_changed, invoice.cancelled), with the same
+    payloads as webhooks. A client that falls too far behind gets a `resync` event
+    and is disconnected; it should catch up from the change feed and reconnect.
+    """
+    # The stream may stay open for hours; don't hold a pooled connection for it
+    await db.close()
+    subscription = hub.subscribe(current_company.company_id)
+    if subscription is None:
+        metrics.increment("event_stream_rejections_total")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open event streams on this server; retry shortly.",
+            headers={"Retry-After": "5"}
+        )
+    return StreamingResponse(
+        _stream_events(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
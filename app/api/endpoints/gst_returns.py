@@ -0,0 +1,64 @@
+# app/api/routers/gst_returns.py
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.database import read_session_factory
+from app.schemas.gst_returns import ReturnFormat, Gstr1Section
+from app.services import gst_returns as gst_return_service
+from app.services.users import get_current_active_user
+from app.services.customers import get_current_company
+from app.models.users import Users
+from app.models.companies import Companies
+from app.core.config import settings
+from app.core.rate_limit import admission_cost
+
+router = APIRouter(prefix="/companies/{company_id}/gst-returns", tags=["GST Returns"])
+
+
+@router.get("/gstr1")
+@admission_cost(settings.ADMISSION_COST_EXPORT)
+async def get_gstr1_endpoint(
+    company_id: str,
+    request: Request,
+    date_from: date = Query(..., description="First day of the return period"),
+    date_to: date = Query(..., description="Last day of the return period, inclusive"),
+    output_format: ReturnFormat = Query(ReturnFormat.json, alias="format"),
+    section: Optional[Gstr1Section] = Query(None, description="Section to export; required for CSV"),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    GSTR-1 style data for the period: B2B supplies by customer GSTIN, B2C supplies by
+    place of supply, credit/debit notes, the HSN summary and intra/inter-state totals.
+    JSON returns every section (or the one asked for); CSV returns one section.
+    The response is streamed while the sections are aggregated in the database.
+    """
+    scope = gst_return_service.ReturnScope(
+        company_id=current_company.company_id,
+        company_gstin=current_company.company_gstin,
+        company_state=current_company.company_state,
+        date_from=date_from,
+        date_to=date_to
+    )
+    gst_return_service.check_return_scope(scope)
+    file_name = f"gstr1-{current_company.company_gstin}-{date_from}-{date_to}"
+
+    if output_format == ReturnFormat.csv:
+        if section is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Choose a section to export as CSV."
+            )
+        return StreamingResponse(
+            gst_return_service.stream_gstr1_csv(scope, section.value, read_session_factory(request)),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="{file_name}-{section.value}.csv"'}
+        )
+    return StreamingResponse(
+        gst_return_service.stream_gstr1_json(scope, section.value if section else None, read_session_factory(request)),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{file_name}.json"'}
+    )
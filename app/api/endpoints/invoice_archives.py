@@ -0,0 +1,64 @@
+# app/api/routers/invoice_archives.py
+import os
+
+from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db, get_read_db
+from app.core.financial_year import financial_year_label
+from app.schemas.invoice_archives import InvoiceArchiveOut, ListInvoiceArchiveResponse
+from app.services import invoice_archives as invoice_archive_service
+from app.services.users import get_current_active_user
+from app.services.customers import get_current_company
+from app.models.users import Users
+from app.models.companies import Companies
+from app.core.config import settings
+from app.core.rate_limit import admission_cost
+
+router = APIRouter(prefix="/companies/{company_id}/invoice-archives", tags=["Invoice Archives"])
+
+
+@router.get("/", response_model=ListInvoiceArchiveResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
+async def list_invoice_archives_endpoint(
+    company_id: str,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    List the archive files holding the company's settled invoices from closed financial years.
+    """
+    archives = await invoice_archive_service.list_invoice_archives(db, current_company)
+    return ListInvoiceArchiveResponse(
+        status_code=status.HTTP_200_OK,
+        message="Invoice archives retrieved successfully",
+        data=[InvoiceArchiveOut.from_orm(archive) for archive in archives]
+    )
+
+
+@router.get("/{archive_id}/download")
+@admission_cost(settings.ADMISSION_COST_EXPORT)
+async def download_invoice_archive_endpoint(
+    company_id: str,
+    archive_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Download an archive: gzip-compressed JSON Lines, one invoice per line with its
+    items, credit notes and payment allocations.
+    """
+    archive = await invoice_archive_service.get_invoice_archive(archive_id, db, current_company)
+    if not os.path.exists(archive.archive_path):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="The archive file is no longer available on this server."
+        )
+    return FileResponse(
+        archive.archive_path,
+        media_type="application/gzip",
+        filename=f"invoices-{financial_year_label(archive.financial_year)}-{archive.archive_id}.jsonl.gz"
+    )
@@ -1,30 +1,121 @@
 
 # app/api/routers/invoices.py
-from fastapi import APIRouter, Depends, status, HTTPException
+import json
+from decimal import Decimal
+from fastapi import APIRouter, Depends, status, HTTPException, Header, Query, Request
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.core.config import settings
 from app.schemas.invoices import (
     CreateInvoiceWithItems,
     UpdateInvoice,
     InvoiceOut,
     SingleInvoiceResponse,
     ListInvoiceResponse,
+    InvoiceSummaryOut,
+    ListInvoiceSummaryResponse,
+    InvoiceStatusTransition,
+    BulkInvoiceStatusTransition,
+    InvoiceStatusOut,
+    InvoiceStatusTransitionError,
+    BulkInvoiceStatusReport,
+    SingleInvoiceStatusResponse,
+    BulkInvoiceStatusResponse,
     InvoiceItemOut # For consistent item output
 )
 from app.schemas.common import APIResponse # Assuming this exists
+from app.schemas.credit_notes import (
+    CreateCreditNote,
+    CreditNoteOut,
+    SingleCreditNoteResponse,
+    ListCreditNoteResponse,
+)
+from app.schemas.documents import DocumentFormat, DOCUMENT_MEDIA_TYPES
 from app.services import invoices as invoice_service
+from app.services import idempotency as idempotency_service
+from app.services import documents as document_service
+from app.services import invoice_status as invoice_status_service
+from app.services import credit_notes as credit_note_service
+from app.core.invoice_status import InvoiceStatus
 from app.services.users import get_current_active_user # For user authentication
 from app.services.customers import get_current_company # Corrected import for company context
 from app.models.users import Users
 from app.models.companies import Companies
+from app.models.invoices import Invoices
+from app.models.invoice_items import InvoiceItems
+from app.models.idempotency_keys import IdempotencyKeys
+from app.core.rate_limit import admission_cost
+from app.core.compression import etag_matches
 
 router = APIRouter(prefix="/invoices", tags=["Invoices"])
 
+def _replay_idempotent_response(record: IdempotencyKeys) -> JSONResponse:
+    """Return the response stored for a request that already completed under the same Idempotency-Key."""
+    return JSONResponse(
+        status_code=record.response_status,
+        content=json.loads(record.response_body),
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+def _build_invoice_item_out(item: InvoiceItems) -> InvoiceItemOut:
+    """Build the output for an invoice item from the amounts stored on it at invoicing time."""
+    return InvoiceItemOut(
+        invoice_item_id=str(item.invoice_item_id),
+        invoice_id=str(item.invoice_id),
+        product_id=str(item.product_id),
+        invoice_item_quantity=item.invoice_item_quantity,
+        invoice_item_cgst_rate=item.invoice_item_cgst_rate,
+        invoice_item_sgst_rate=item.invoice_item_sgst_rate,
+        invoice_item_igst_rate=item.invoice_item_igst_rate,
+        invoice_item_unit_price=item.invoice_item_unit_price,
+        invoice_item_total_amount_before_tax=item.invoice_item_taxable_value,
+        invoice_item_cgst_amount=item.invoice_item_cgst_amount,
+        invoice_item_sgst_amount=item.invoice_item_sgst_amount,
+        invoice_item_igst_amount=item.invoice_item_igst_amount,
+        invoice_item_total_amount=item.invoice_item_total_amount,
+        created_at=item.created_at,
+        # product=ProductOut.model_validate(item.product) # If ProductOut is needed here
+    )
+
+def _build_invoice_out(invoice: Invoices) -> InvoiceOut:
+    """Build the output for an invoice with its company, client and items loaded."""
+    return InvoiceOut(
+        invoice_id=str(invoice.invoice_id),
+        owner_company=str(invoice.owner_company),
+        customer_company=str(invoice.customer_company),
+        invoice_number=invoice.invoice_number,
+        invoice_date=invoice.invoice_date,
+        invoice_due_date=invoice.invoice_due_date,
+        invoice_terms=invoice.invoice_terms,
+        invoice_place_of_supply=invoice.invoice_place_of_supply,
+        invoice_notes=invoice.invoice_notes,
+        invoice_subtotal=invoice.invoice_subtotal,
+        invoice_total_cgst=invoice.invoice_total_cgst,
+        invoice_total_sgst=invoice.invoice_total_sgst,
+        invoice_total_igst=invoice.invoice_total_igst,
+        invoice_total=invoice.invoice_total,
+        invoice_amount_paid=invoice.invoice_amount_paid,
+        invoice_amount_credited=invoice.invoice_amount_credited,
+        invoice_amount_debited=invoice.invoice_amount_debited,
+        invoice_balance_due=invoice.invoice_balance_due,
+        invoice_status=invoice.invoice_status,
+        user_reference_notes=invoice.user_reference_notes,
+        invoice_version=invoice.invoice_version,
+        invoice_cancelled_at=invoice.invoice_cancelled_at,
+        created_at=invoice.created_at,
+        invoice_by=invoice.owner_company_rel,
+        client=invoice.client,
+        products=[_build_invoice_item_out(item) for item in invoice.invoice_items]
+    )
+
 @router.post("/", response_model=SingleInvoiceResponse, status_code=status.HTTP_201_CREATED)
 async def create_invoice_endpoint(
+    request: Request,
     invoice_data_with_items: CreateInvoiceWithItems,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: AsyncSession = Depends(get_db),
     current_user: Users = Depends(get_current_active_user), # Authenticate user
     current_company: Companies = Depends(get_current_company) # Get current company
@@ -32,129 +123,56 @@ async def create_invoice_endpoint(
     """
     Create a new invoice along with its items.
     The invoice owner_company must match the authenticated user's current company.
+    Retries sent with the same Idempotency-Key return the original response.
     """
-    new_invoice = await invoice_service.create_invoice_with_items(
-        invoice_data_with_items, db, current_company
-    )
+    idempotency_key_id = None
+    if idempotency_key:
+        record = await idempotency_service.claim_idempotency_key(
+            idempotency_key, request.method, request.url.path, invoice_data_with_items.json(), db, current_company
+        )
+        if record.response_status is not None:
+            return _replay_idempotent_response(record)
+        idempotency_key_id = record.idempotency_key_id
 
-    # Prepare InvoiceItemOut objects for the response
-    products_out_list = []
-    for item in new_invoice.invoice_items: # Corrected from .products
-        item_base_total = item.product.product_unit_price * item.invoice_item_quantity
-        item_cgst_amount = item_base_total * (item.invoice_item_cgst_rate / 100)
-        item_sgst_amount = item_base_total * (item.invoice_item_sgst_rate / 100)
-        item_igst_amount = item_base_total * (item.invoice_item_igst_rate / 100)
-        item_total_amount = item_base_total + item_cgst_amount + item_sgst_amount + item_igst_amount
-
-        products_out_list.append(
-            InvoiceItemOut(
-                invoice_item_id=str(item.invoice_item_id),
-                invoice_id=str(item.invoice_id),
-                product_id=str(item.product_id),
-                invoice_item_quantity=item.invoice_item_quantity,
-                invoice_item_cgst_rate=item.invoice_item_cgst_rate,
-                invoice_item_sgst_rate=item.invoice_item_sgst_rate,
-                invoice_item_igst_rate=item.invoice_item_igst_rate,
-                invoice_item_unit_price=item.product.product_unit_price, # Add unit price
-                invoice_item_total_amount_before_tax=item_base_total,
-                invoice_item_cgst_amount=item_cgst_amount,
-                invoice_item_sgst_amount=item_sgst_amount,
-                invoice_item_igst_amount=item_igst_amount,
-                invoice_item_total_amount=item_total_amount,
-                created_at=item.created_at,
-                # product=ProductOut.model_validate(item.product) # If ProductOut is needed here
-            )
+    try:
+        new_invoice = await invoice_service.create_invoice_with_items(
+            invoice_data_with_items, db, current_company
         )
+    except Exception:
+        if idempotency_key_id:
+            await idempotency_service.release_idempotency_key(idempotency_key_id, db)
+        raise
 
-    return SingleInvoiceResponse(
+    response = SingleInvoiceResponse(
         status_code=status.HTTP_201_CREATED,
         message="Invoice created successfully",
-        data=InvoiceOut(
-            invoice_id=str(new_invoice.invoice_id),
-            owner_company=str(new_invoice.owner_company),
-            customer_company=str(new_invoice.customer_company),
-            invoice_number=new_invoice.invoice_number,
-            invoice_date=new_invoice.invoice_date,
-            invoice_due_date=new_invoice.invoice_due_date,
-            invoice_terms=new_invoice.invoice_terms,
-            invoice_place_of_supply=new_invoice.invoice_place_of_supply,
-            invoice_notes=new_invoice.invoice_notes,
-            invoice_subtotal=new_invoice.invoice_subtotal,
-            invoice_total_cgst=new_invoice.invoice_total_cgst,
-            invoice_total_sgst=new_invoice.invoice_total_sgst,
-            invoice_total_igst=new_invoice.invoice_total_igst,
-            invoice_total=new_invoice.invoice_total,
-            invoice_status=new_invoice.invoice_status, # Added invoice_status
-            created_at=new_invoice.created_at,
-            invoice_by=new_invoice.owner_company_rel, # Corrected
-            client=new_invoice.client,
-            products=products_out_list
-        )
+        data=_build_invoice_out(new_invoice)
     )
+    if idempotency_key_id:
+        await idempotency_service.complete_idempotent_request(
+            idempotency_key_id, status.HTTP_201_CREATED, response.json(), db
+        )
+    return response
 
 @router.get("/", response_model=ListInvoiceResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
 async def get_all_invoices_endpoint(
-    db: AsyncSession = Depends(get_db),
+    include_cancelled: bool = Query(False),
+    financial_year: Optional[int] = Query(None, ge=2000, le=2100, description="Financial year by its starting calendar year, e.g. 2025 for 2025-26; defaults to the current one"),
+    all_years: bool = Query(False, description="Ignore financial_year and return invoices from every year still held in the database"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Users = Depends(get_current_active_user),
     current_company: Companies = Depends(get_current_company)
 ):
     """
-    Get all invoices relevant to the authenticated user's company (owner or customer).
+    Get the invoices relevant to the authenticated user's company (owner or customer)
+    for one financial year, the current one unless financial_year or all_years is given.
     """
-    invoices = await invoice_service.show_all_invoices(db, current_company)
-
-    invoices_out_list = []
-    for invoice in invoices:
-        products_out_list = []
-        for item in invoice.invoice_items:
-            item_base_total = item.product.product_unit_price * item.invoice_item_quantity
-            item_cgst_amount = item_base_total * (item.invoice_item_cgst_rate / 100)
-            item_sgst_amount = item_base_total * (item.invoice_item_sgst_rate / 100)
-            item_igst_amount = item_base_total * (item.invoice_item_igst_rate / 100)
-            item_total_amount = item_base_total + item_cgst_amount + item_sgst_amount + item_igst_amount
-
-            products_out_list.append(
-                InvoiceItemOut(
-                    invoice_item_id=str(item.invoice_item_id),
-                    invoice_id=str(item.invoice_id),
-                    product_id=str(item.product_id),
-                    invoice_item_quantity=item.invoice_item_quantity,
-                    invoice_item_cgst_rate=item.invoice_item_cgst_rate,
-                    invoice_item_sgst_rate=item.invoice_item_sgst_rate,
-                    invoice_item_igst_rate=item.invoice_item_igst_rate,
-                    invoice_item_unit_price=item.product.product_unit_price,
-                    invoice_item_total_amount_before_tax=item_base_total,
-                    invoice_item_cgst_amount=item_cgst_amount,
-                    invoice_item_sgst_amount=item_sgst_amount,
-                    invoice_item_igst_amount=item_igst_amount,
-                    invoice_item_total_amount=item_total_amount,
-                    created_at=item.created_at,
-                    # product=ProductOut.model_validate(item.product)
-                )
-            )
-        invoices_out_list.append(
-            InvoiceOut(
-                invoice_id=str(invoice.invoice_id),
-                owner_company=str(invoice.owner_company),
-                customer_company=str(invoice.customer_company),
-                invoice_number=invoice.invoice_number,
-                invoice_date=invoice.invoice_date,
-                invoice_due_date=invoice.invoice_due_date,
-                invoice_terms=invoice.invoice_terms,
-                invoice_place_of_supply=invoice.invoice_place_of_supply,
-                invoice_notes=invoice.invoice_notes,
-                invoice_subtotal=invoice.invoice_subtotal,
-                invoice_total_cgst=invoice.invoice_total_cgst,
-                invoice_total_sgst=invoice.invoice_total_sgst,
-                invoice_total_igst=invoice.invoice_total_igst,
-                invoice_total=invoice.invoice_total,
-                invoice_status=invoice.invoice_status, # Added invoice_status
-                created_at=invoice.created_at,
-                invoice_by=invoice.owner_company_rel, # Corrected
-                client=invoice.client,
-                products=products_out_list
-            )
-        )
+    invoices = await invoice_service.show_all_invoices(
+        db, current_company, include_cancelled, financial_year, all_years
+    )
+
+    invoices_out_list = [_build_invoice_out(invoice) for invoice in invoices]
 
     return ListInvoiceResponse(
         status_code=status.HTTP_200_OK,
@@ -162,6 +180,73 @@ async def get_all_invoices_endpoint(
         data=invoices_out_list
     )
 
+@router.get("/search", response_model=ListInvoiceSummaryResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
+async def search_invoices_endpoint(
+    invoice_number: Optional[str] = Query(None, min_length=1, max_length=100, description="Invoice number prefix"),
+    customer_name: Optional[str] = Query(None, min_length=1, max_length=100),
+    min_total: Optional[Decimal] = Query(None, ge=0),
+    max_total: Optional[Decimal] = Query(None, ge=0),
+    notes: Optional[str] = Query(None, min_length=1, max_length=200, description="Words to find in the invoice notes"),
+    invoice_status: Optional[InvoiceStatus] = Query(None),
+    include_cancelled: bool = Query(False, description="Also search cancelled invoices; implied when filtering on the cancelled status"),
+    financial_year: Optional[int] = Query(None, ge=2000, le=2100, description="Financial year by its starting calendar year, e.g. 2025 for 2025-26; defaults to the current one"),
+    all_years: bool = Query(False, description="Ignore financial_year and return invoices from every year still held in the database"),
+    limit: int = Query(settings.SEARCH_DEFAULT_LIMIT, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Search the invoices issued by your company by number prefix, customer name,
+    total amount range, notes and status. Returns summaries without items.
+    """
+    rows = await invoice_service.search_invoices(
+        db,
+        current_company,
+        invoice_number=invoice_number,
+        customer_name=customer_name,
+        min_total=min_total,
+        max_total=max_total,
+        notes=notes,
+        invoice_status=invoice_status,
+        include_cancelled=include_cancelled,
+        financial_year=financial_year,
+        all_years=all_years,
+        limit=limit,
+        offset=offset
+    )
+    return ListInvoiceSummaryResponse(
+        status_code=status.HTTP_200_OK,
+        message="Invoices retrieved successfully",
+        data=[InvoiceSummaryOut(**row._mapping) for row in rows]
+    )
+
+@router.post("/bulk/status", response_model=BulkInvoiceStatusResponse)
+@admission_cost(settings.ADMISSION_COST_EXPORT)
+async def bulk_transition_invoice_status_endpoint(
+    transition: BulkInvoiceStatusTransition,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Move many of your company's invoices to a new status at once, e.g. mark them paid.
+    Invoices that can't make the transition are reported and left unchanged.
+    """
+    updated, failures = await invoice_status_service.transition_invoice_statuses(
+        transition.invoice_ids, transition.invoice_status, db, current_company
+    )
+    return BulkInvoiceStatusResponse(
+        status_code=status.HTTP_200_OK,
+        message=f"Updated {len(updated)} of {len(updated) + len(failures)} invoices",
+        data=BulkInvoiceStatusReport(
+            updated=[InvoiceStatusOut(**row._mapping) for row in updated],
+            failed=[InvoiceStatusTransitionError(invoice_id=invoice_id, error=error) for invoice_id, error in failures]
+        )
+    )
+
 @router.get("/{invoice_id}", response_model=SingleInvoiceResponse)
 async def get_invoice_endpoint(
     invoice_id: str,
@@ -172,209 +257,206 @@ async def get_invoice_endpoint(
     """Get a specific invoice by ID, ensuring it belongs to or is related to your company."""
     invoice = await invoice_service.get_invoice_by_id(invoice_id, db, current_company)
 
-    products_out_list = []
-    for item in invoice.invoice_items:
-        item_base_total = item.product.product_unit_price * item.invoice_item_quantity
-        item_cgst_amount = item_base_total * (item.invoice_item_cgst_rate / 100)
-        item_sgst_amount = item_base_total * (item.invoice_item_sgst_rate / 100)
-        item_igst_amount = item_base_total * (item.invoice_item_igst_rate / 100)
-        item_total_amount = item_base_total + item_cgst_amount + item_sgst_amount + item_igst_amount
-
-        products_out_list.append(
-            InvoiceItemOut(
-                invoice_item_id=str(item.invoice_item_id),
-                invoice_id=str(item.invoice_id),
-                product_id=str(item.product_id),
-                invoice_item_quantity=item.invoice_item_quantity,
-                invoice_item_cgst_rate=item.invoice_item_cgst_rate,
-                invoice_item_sgst_rate=item.invoice_item_sgst_rate,
-                invoice_item_igst_rate=item.invoice_item_igst_rate,
-                invoice_item_unit_price=item.product.product_unit_price,
-                invoice_item_total_amount_before_tax=item_base_total,
-                invoice_item_cgst_amount=item_cgst_amount,
-                invoice_item_sgst_amount=item_sgst_amount,
-                invoice_item_igst_amount=item_igst_amount,
-                invoice_item_total_amount=item_total_amount,
-                created_at=item.created_at,
-                # product=ProductOut.model_validate(item.product)
-            )
-        )
-
     return SingleInvoiceResponse(
         status_code=status.HTTP_200_OK,
         message="Invoice retrieved successfully",
-        data=InvoiceOut(
-            invoice_id=str(invoice.invoice_id),
-            owner_company=str(invoice.owner_company),
-            customer_company=str(invoice.customer_company),
-            invoice_number=invoice.invoice_number,
-            invoice_date=invoice.invoice_date,
-            invoice_due_date=invoice.invoice_due_date,
-            invoice_terms=invoice.invoice_terms,
-            invoice_place_of_supply=invoice.invoice_place_of_supply,
-            invoice_notes=invoice.invoice_notes,
-            invoice_subtotal=invoice.invoice_subtotal,
-            invoice_total_cgst=invoice.invoice_total_cgst,
-            invoice_total_sgst=invoice.invoice_total_sgst,
-            invoice_total_igst=invoice.invoice_total_igst,
-            invoice_total=invoice.invoice_total,
-            invoice_status=invoice.invoice_status, # Added invoice_status
-            created_at=invoice.created_at,
-            invoice_by=invoice.owner_company_rel, # Corrected
-            client=invoice.client,
-            products=products_out_list
+        data=_build_invoice_out(invoice)
+    )
+
+@router.get("/{invoice_id}/document")
+async def get_invoice_document_endpoint(
+    invoice_id: str,
+    document_format: DocumentFormat = Query(DocumentFormat.html, alias="format"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Get a printable HTML or PDF document for an invoice.
+    Documents are rendered in a worker process and cached until the invoice, or the
+    company, customer or products it shows, change.
+    """
+    invoice = await invoice_service.get_invoice_by_id(invoice_id, db, current_company)
+
+    etag = f'"{document_service.document_fingerprint(invoice, document_format)}"'
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    document = await document_service.render_invoice(invoice, document_format)
+    return Response(
+        content=document,
+        media_type=DOCUMENT_MEDIA_TYPES[document_format],
+        headers={
+            "ETag": etag,
+            "Content-Disposition": f'inline; filename="invoice-{invoice.invoice_id}.{document_format.value}"'
+        }
+    )
+
+@router.post("/{invoice_id}/status", response_model=SingleInvoiceStatusResponse)
+async def transition_invoice_status_endpoint(
+    invoice_id: str,
+    transition: InvoiceStatusTransition,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Move an invoice along its lifecycle: draft -> issued -> paid, or to cancelled.
+    Partially paid is set by recording payments.
+    """
+    updated, failures = await invoice_status_service.transition_invoice_statuses(
+        [invoice_id], transition.invoice_status, db, current_company
+    )
+    if failures:
+        _, error = failures[0]
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND if error == invoice_status_service.INVOICE_NOT_FOUND else status.HTTP_409_CONFLICT,
+            detail=error
         )
+    return SingleInvoiceStatusResponse(
+        status_code=status.HTTP_200_OK,
+        message="Invoice status updated successfully",
+        data=InvoiceStatusOut(**updated[0]._mapping)
+    )
+
+@router.post("/{invoice_id}/credit-notes", response_model=SingleCreditNoteResponse, status_code=status.HTTP_201_CREATED)
+async def create_credit_note_endpoint(
+    invoice_id: str,
+    note_data: CreateCreditNote,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Raise a credit note (returns, price reductions) or debit note (additional charges)
+    against an invoice. The invoice's balance and the customer's ledger are adjusted.
+    """
+    note = await credit_note_service.create_credit_note(invoice_id, note_data, db, current_company)
+    return SingleCreditNoteResponse(
+        status_code=status.HTTP_201_CREATED,
+        message=f"{note_data.note_type.value.capitalize()} note created successfully",
+        data=CreditNoteOut.from_orm(note)
+    )
+
+@router.get("/{invoice_id}/credit-notes", response_model=ListCreditNoteResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
+async def list_credit_notes_endpoint(
+    invoice_id: str,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    List the credit and debit notes raised against an invoice.
+    """
+    notes = await credit_note_service.list_credit_notes(invoice_id, db, current_company)
+    return ListCreditNoteResponse(
+        status_code=status.HTTP_200_OK,
+        message="Credit notes retrieved successfully",
+        data=[CreditNoteOut.from_orm(note) for note in notes]
     )
 
 @router.put("/{invoice_id}", response_model=SingleInvoiceResponse)
 async def update_invoice_endpoint(
+    request: Request,
     invoice_id: str,
     updated_details: UpdateInvoice,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: AsyncSession = Depends(get_db),
     current_user: Users = Depends(get_current_active_user),
     current_company: Companies = Depends(get_current_company)
 ):
     """Update an existing invoice's header details, ensuring it belongs to your company."""
-    invoice = await invoice_service.update_invoice_details(
-        invoice_id, updated_details, db, current_company
-    )
+    idempotency_key_id = None
+    if idempotency_key:
+        record = await idempotency_service.claim_idempotency_key(
+            idempotency_key, request.method, request.url.path, updated_details.json(exclude_unset=True), db, current_company
+        )
+        if record.response_status is not None:
+            return _replay_idempotent_response(record)
+        idempotency_key_id = record.idempotency_key_id
 
-    products_out_list = []
-    for item in invoice.invoice_items:
-        item_base_total = item.product.product_unit_price * item.invoice_item_quantity
-        item_cgst_amount = item_base_total * (item.invoice_item_cgst_rate / 100)
-        item_sgst_amount = item_base_total * (item.invoice_item_sgst_rate / 100)
-        item_igst_amount = item_base_total * (item.invoice_item_igst_rate / 100)
-        item_total_amount = item_base_total + item_cgst_amount + item_sgst_amount + item_igst_amount
-
-        products_out_list.append(
-            InvoiceItemOut(
-                invoice_item_id=str(item.invoice_item_id),
-                invoice_id=str(item.invoice_id),
-                product_id=str(item.product_id),
-                invoice_item_quantity=item.invoice_item_quantity,
-                invoice_item_cgst_rate=item.invoice_item_cgst_rate,
-                invoice_item_sgst_rate=item.invoice_item_sgst_rate,
-                invoice_item_igst_rate=item.invoice_item_igst_rate,
-                invoice_item_unit_price=item.product.product_unit_price,
-                invoice_item_total_amount_before_tax=item_base_total,
-                invoice_item_cgst_amount=item_cgst_amount,
-                invoice_item_sgst_amount=item_sgst_amount,
-                invoice_item_igst_amount=item_igst_amount,
-                invoice_item_total_amount=item_total_amount,
-                created_at=item.created_at,
-                # product=ProductOut.model_validate(item.product)
-            )
+    try:
+        invoice = await invoice_service.update_invoice_details(
+            invoice_id, updated_details, db, current_company
         )
+    except Exception:
+        if idempotency_key_id:
+            await idempotency_service.release_idempotency_key(idempotency_key_id, db)
+        raise
 
-    return SingleInvoiceResponse(
+    response = SingleInvoiceResponse(
         status_code=status.HTTP_200_OK,
         message="Invoice updated successfully",
-        data=InvoiceOut(
-            invoice_id=str(invoice.invoice_id),
-            owner_company=str(invoice.owner_company),
-            customer_company=str(invoice.customer_company),
-            invoice_number=invoice.invoice_number,
-            invoice_date=invoice.invoice_date,
-            invoice_due_date=invoice.invoice_due_date,
-            invoice_terms=invoice.invoice_terms,
-            invoice_place_of_supply=invoice.invoice_place_of_supply,
-            invoice_notes=invoice.invoice_notes,
-            invoice_subtotal=invoice.invoice_subtotal,
-            invoice_total_cgst=invoice.invoice_total_cgst,
-            invoice_total_sgst=invoice.invoice_total_sgst,
-            invoice_total_igst=invoice.invoice_total_igst,
-            invoice_total=invoice.invoice_total,
-            invoice_status=invoice.invoice_status, # Added invoice_status
-            created_at=invoice.created_at,
-            invoice_by=invoice.owner_company_rel, # Corrected
-            client=invoice.client,
-            products=products_out_list
-        )
+        data=_build_invoice_out(invoice)
     )
+    if idempotency_key_id:
+        await idempotency_service.complete_idempotent_request(
+            idempotency_key_id, status.HTTP_200_OK, response.json(), db
+        )
+    return response
 
 @router.delete("/{invoice_id}", response_model=APIResponse[None])
 async def delete_invoice_endpoint(
+    request: Request,
     invoice_id: str,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: AsyncSession = Depends(get_db),
     current_user: Users = Depends(get_current_active_user),
     current_company: Companies = Depends(get_current_company)
 ):
-    """Delete an invoice and its associated items, ensuring it belongs to your company."""
-    await invoice_service.delete_invoice(invoice_id, db, current_company)
-    return APIResponse(
+    """
+    Cancel an invoice. It is kept with its items and can still be listed with
+    include_cancelled; its balance is written off in the customer's ledger.
+    """
+    idempotency_key_id = None
+    if idempotency_key:
+        record = await idempotency_service.claim_idempotency_key(
+            idempotency_key, request.method, request.url.path, "", db, current_company
+        )
+        if record.response_status is not None:
+            return _replay_idempotent_response(record)
+        idempotency_key_id = record.idempotency_key_id
+
+    try:
+        await invoice_service.cancel_invoice(invoice_id, db, current_company)
+    except Exception:
+        if idempotency_key_id:
+            await idempotency_service.release_idempotency_key(idempotency_key_id, db)
+        raise
+
+    response = APIResponse(
         status_code=status.HTTP_200_OK,
-        message="Invoice successfully deleted",
+        message="Invoice successfully cancelled",
         data=None
     )
+    if idempotency_key_id:
+        await idempotency_service.complete_idempotent_request(
+            idempotency_key_id, status.HTTP_200_OK, response.json(), db
+        )
+    return response
 
 @router.get("/company/{company_id_param}", response_model=ListInvoiceResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
 async def get_invoices_by_owner_company_endpoint(
     company_id_param: str,
-    db: AsyncSession = Depends(get_db),
+    include_cancelled: bool = Query(False),
+    financial_year: Optional[int] = Query(None, ge=2000, le=2100, description="Financial year by its starting calendar year, e.g. 2025 for 2025-26; defaults to the current one"),
+    all_years: bool = Query(False, description="Ignore financial_year and return invoices from every year still held in the database"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Users = Depends(get_current_active_user),
     current_company: Companies = Depends(get_current_company)
 ):
     """
-    Get all invoices where the authenticated company is the owner.
+    Get the invoices of one financial year where the authenticated company is the owner.
     `company_id_param` must match the authenticated user's `current_company.company_id`.
     """
     invoices = await invoice_service.get_invoices_by_specific_company_role(
-        company_id_param, db, current_company, 'owner'
+        company_id_param, db, current_company, 'owner', include_cancelled, financial_year, all_years
     )
 
-    invoices_out_list = []
-    for invoice in invoices:
-        products_out_list = []
-        for item in invoice.invoice_items:
-            item_base_total = item.product.product_unit_price * item.invoice_item_quantity
-            item_cgst_amount = item_base_total * (item.invoice_item_cgst_rate / 100)
-            item_sgst_amount = item_base_total * (item.invoice_item_sgst_rate / 100)
-            item_igst_amount = item_base_total * (item.invoice_item_igst_rate / 100)
-            item_total_amount = item_base_total + item_cgst_amount + item_sgst_amount + item_igst_amount
-
-            products_out_list.append(
-                InvoiceItemOut(
-                    invoice_item_id=str(item.invoice_item_id),
-                    invoice_id=str(item.invoice_id),
-                    product_id=str(item.product_id),
-                    invoice_item_quantity=item.invoice_item_quantity,
-                    invoice_item_cgst_rate=item.invoice_item_cgst_rate,
-                    invoice_item_sgst_rate=item.invoice_item_sgst_rate,
-                    invoice_item_igst_rate=item.invoice_item_igst_rate,
-                    invoice_item_unit_price=item.product.product_unit_price,
-                    invoice_item_total_amount_before_tax=item_base_total,
-                    invoice_item_cgst_amount=item_cgst_amount,
-                    invoice_item_sgst_amount=item_sgst_amount,
-                    invoice_item_igst_amount=item_igst_amount,
-                    invoice_item_total_amount=item_total_amount,
-                    created_at=item.created_at,
-                    # product=ProductOut.model_validate(item.product)
-                )
-            )
-        invoices_out_list.append(
-            InvoiceOut(
-                invoice_id=str(invoice.invoice_id),
-                owner_company=str(invoice.owner_company),
-                customer_company=str(invoice.customer_company),
-                invoice_number=invoice.invoice_number,
-                invoice_date=invoice.invoice_date,
-                invoice_due_date=invoice.invoice_due_date,
-                invoice_terms=invoice.invoice_terms,
-                invoice_place_of_supply=invoice.invoice_place_of_supply,
-                invoice_notes=invoice.invoice_notes,
-                invoice_subtotal=invoice.invoice_subtotal,
-                invoice_total_cgst=invoice.invoice_total_cgst,
-                invoice_total_sgst=invoice.invoice_total_sgst,
-                invoice_total_igst=invoice.invoice_total_igst,
-                invoice_total=invoice.invoice_total,
-                invoice_status=invoice.invoice_status, # Added invoice_status
-                created_at=invoice.created_at,
-                invoice_by=invoice.owner_company_rel, # Corrected
-                client=invoice.client,
-                products=products_out_list
-            )
-        )
+    invoices_out_list = [_build_invoice_out(invoice) for invoice in invoices]
     return ListInvoiceResponse(
         status_code=status.HTTP_200_OK,
         message="Invoices by owner company retrieved successfully",
@@ -382,14 +464,18 @@ async def get_invoices_by_owner_company_endpoint(
     )
 
 @router.get("/customer/{customer_id_param}", response_model=ListInvoiceResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
 async def get_invoices_by_customer_company_endpoint(
     customer_id_param: str, # Changed to str for UUID
-    db: AsyncSession = Depends(get_db),
+    include_cancelled: bool = Query(False),
+    financial_year: Optional[int] = Query(None, ge=2000, le=2100, description="Financial year by its starting calendar year, e.g. 2025 for 2025-26; defaults to the current one"),
+    all_years: bool = Query(False, description="Ignore financial_year and return invoices from every year still held in the database"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Users = Depends(get_current_active_user),
     current_company: Companies = Depends(get_current_company)
 ):
     """
-    Get all invoices where the authenticated company is the customer.
+    Get the invoices of one financial year where the authenticated company is the customer.
     `customer_id_param` must match the authenticated user's `current_company.company_id`.
     """
     # This endpoint specifically for when the current company IS the customer.
@@ -401,61 +487,10 @@ async def get_invoices_by_customer_company_endpoint(
         )
 
     invoices = await invoice_service.get_invoices_by_specific_company_role(
-        current_company.company_id, db, current_company, 'customer'
+        current_company.company_id, db, current_company, 'customer', include_cancelled, financial_year, all_years
     )
 
-    invoices_out_list = []
-    for invoice in invoices:
-        products_out_list = []
-        for item in invoice.invoice_items:
-            item_base_total = item.product.product_unit_price * item.invoice_item_quantity
-            item_cgst_amount = item_base_total * (item.invoice_item_cgst_rate / 100)
-            item_sgst_amount = item_base_total * (item.invoice_item_sgst_rate / 100)
-            item_igst_amount = item_base_total * (item.invoice_item_igst_rate / 100)
-            item_total_amount = item_base_total + item_cgst_amount + item_sgst_amount + item_igst_amount
-
-            products_out_list.append(
-                InvoiceItemOut(
-                    invoice_item_id=str(item.invoice_item_id),
-                    invoice_id=str(item.invoice_id),
-                    product_id=str(item.product_id),
-                    invoice_item_quantity=item.invoice_item_quantity,
-                    invoice_item_cgst_rate=item.invoice_item_cgst_rate,
-                    invoice_item_sgst_rate=item.invoice_item_sgst_rate,
-                    invoice_item_igst_rate=item.invoice_item_igst_rate,
-                    invoice_item_unit_price=item.product.product_unit_price,
-                    invoice_item_total_amount_before_tax=item_base_total,
-                    invoice_item_cgst_amount=item_cgst_amount,
-                    invoice_item_sgst_amount=item_sgst_amount,
-                    invoice_item_igst_amount=item_igst_amount,
-                    invoice_item_total_amount=item_total_amount,
-                    created_at=item.created_at,
-                    # product=ProductOut.model_validate(item.product)
-                )
-            )
-        invoices_out_list.append(
-            InvoiceOut(
-                invoice_id=str(invoice.invoice_id),
-                owner_company=str(invoice.owner_company),
-                customer_company=str(invoice.customer_company),
-                invoice_number=invoice.invoice_number,
-                invoice_date=invoice.invoice_date,
-                invoice_due_date=invoice.invoice_due_date,
-                invoice_terms=invoice.invoice_terms,
-                invoice_place_of_supply=invoice.invoice_place_of_supply,
-                invoice_notes=invoice.invoice_notes,
-                invoice_subtotal=invoice.invoice_subtotal,
-                invoice_total_cgst=invoice.invoice_total_cgst,
-                invoice_total_sgst=invoice.invoice_total_sgst,
-                invoice_total_igst=invoice.invoice_total_igst,
-                invoice_total=invoice.invoice_total,
-                invoice_status=invoice.invoice_status, # Added invoice_status
-                created_at=invoice.created_at,
-                invoice_by=invoice.owner_company_rel, # Corrected
-                client=invoice.client,
-                products=products_out_list
-            )
-        )
+    invoices_out_list = [_build_invoice_out(invoice) for invoice in invoices]
     return ListInvoiceResponse(
         status_code=status.HTTP_200_OK,
         message="Invoices where your company is the customer retrieved successfully",
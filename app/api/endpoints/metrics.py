@@ -0,0 +1,26 @@
+# app/api/routers/metrics.py
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.task_queue import get_queue_depth
+from app.database import get_db
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/")
+async def get_metrics_endpoint():
+    """
+    Operational metrics of this worker process: counters, gauges and timing summaries.
+    """
+    return metrics.snapshot()
+
+
+@router.get("/task-queue")
+async def get_task_queue_endpoint(db: AsyncSession = Depends(get_db)):
+    """
+    Queued and running background tasks per task name, across all workers.
+    Wait and run times are in the task_queue_* summaries of each process's metrics.
+    """
+    return await get_queue_depth(db)
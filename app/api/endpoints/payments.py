@@ -0,0 +1,106 @@
+# app/api/routers/payments.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db, get_read_db
+from app.schemas.payments import (
+    CreatePayment,
+    CreatePaymentBatch,
+    PaymentOut,
+    SinglePaymentResponse,
+    ListPaymentResponse,
+    SinglePaymentBatchReportResponse,
+)
+from app.services import payments as payment_service
+from app.services.users import get_current_active_user
+from app.services.customers import get_current_company
+from app.models.users import Users
+from app.models.companies import Companies
+from app.core.config import settings
+from app.core.rate_limit import admission_cost
+
+router = APIRouter(prefix="/companies/{company_id}/payments", tags=["Payments"])
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=SinglePaymentResponse)
+async def record_payment_endpoint(
+    company_id: str,
+    payment_data: CreatePayment,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Record a payment from a customer. It is applied to the given invoices, or to the
+    customer's oldest open invoices first; any remainder is kept as customer credit.
+    """
+    payment = await payment_service.record_payment(payment_data, db, current_company)
+    return SinglePaymentResponse(
+        status_code=status.HTTP_201_CREATED,
+        message="Payment recorded successfully",
+        data=PaymentOut.from_orm(payment)
+    )
+
+
+@router.post("/batch", response_model=SinglePaymentBatchReportResponse)
+@admission_cost(settings.ADMISSION_COST_EXPORT)
+async def record_payment_batch_endpoint(
+    company_id: str,
+    batch_data: CreatePaymentBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Record a batch of payments, e.g. from a bank statement, in a single transaction.
+    Lines that can't be recorded are rejected individually and listed in the report.
+    """
+    report = await payment_service.record_payment_batch(batch_data, db, current_company)
+    return SinglePaymentBatchReportResponse(
+        status_code=status.HTTP_200_OK,
+        message=f"Recorded {report.recorded_payments} of {report.total_payments} payments",
+        data=report
+    )
+
+
+@router.get("/", response_model=ListPaymentResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
+async def list_payments_endpoint(
+    company_id: str,
+    customer_id: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    List the company's payments, newest first, optionally for one customer.
+    """
+    payments = await payment_service.list_payments(db, current_company, customer_id, limit, offset)
+    return ListPaymentResponse(
+        status_code=status.HTTP_200_OK,
+        message="Payments retrieved successfully",
+        data=[PaymentOut.from_orm(payment) for payment in payments]
+    )
+
+
+@router.get("/{payment_id}", response_model=SinglePaymentResponse)
+async def get_payment_endpoint(
+    company_id: str,
+    payment_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Retrieve a payment with its invoice allocations.
+    """
+    payment = await payment_service.get_payment_by_id(payment_id, db, current_company)
+    return SinglePaymentResponse(
+        status_code=status.HTTP_200_OK,
+        message="Payment retrieved successfully",
+        data=PaymentOut.from_orm(payment)
+    )
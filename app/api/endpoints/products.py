@@ -1,25 +1,31 @@
 # app/api/routers/products.py
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Query, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.products import CreateProduct, UpdateProduct, ProductOut, SingleProductResponse, ListProductResponse
 from app.schemas.common import APIResponse # Import APIResponse
+from app.schemas.imports import SingleImportReportResponse
+from app.services.imports import import_products
 from app.services.products import show_products, create_products, modify_product_details, remove_products, get_product_by_id
+from app.services.search import search_products
+from app.core.config import settings
 from app.services.users import get_current_active_user # For user authentication
 from app.services.customers import get_current_company # Reusing current_company dependency
 from app.models.users import Users
 from app.models.companies import Companies # Import Companies model
+from app.core.rate_limit import admission_cost
 
 # Define the router with a nested prefix
 router = APIRouter(prefix="/companies/{company_id}/products", tags=["Products"])
 
 
 @router.get("/", response_model=ListProductResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
 async def get_products_endpoint(
     company_id: str, # Path parameter for company_id
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Users = Depends(get_current_active_user), # Authenticate user
     current_company: Companies = Depends(get_current_company) # Authenticate and get company
 ):
@@ -85,6 +91,46 @@ async def add_product_endpoint(
         )
     )
 
+@router.post("/import", response_model=SingleImportReportResponse)
+@admission_cost(settings.ADMISSION_COST_EXPORT)
+async def import_products_endpoint(
+    company_id: str,
+    file: UploadFile = File(..., description="CSV (or .xlsx) file whose header row names the CreateProduct fields"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Bulk import products for a specific company from a CSV or Excel file.
+    Invalid rows and product names the company already has are skipped and listed in the report.
+    """
+    report = await import_products(file, db, current_company)
+    return SingleImportReportResponse(
+        status_code=status.HTTP_200_OK,
+        message=f"Imported {report.imported_rows} of {report.total_rows} products",
+        data=report
+    )
+
+@router.get("/search", response_model=ListProductResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
+async def search_products_endpoint(
+    company_id: str,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(settings.SEARCH_DEFAULT_LIMIT, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Search the company's products by name or HSN/SAC code, best matches first.
+    """
+    products = await search_products(q, limit, db, current_company)
+    return ListProductResponse(
+        status_code=status.HTTP_200_OK,
+        message="Products retrieved successfully",
+        data=[ProductOut.from_orm(p) for p in products]
+    )
+
 @router.get("/{product_id}", response_model=SingleProductResponse)
 async def get_single_product_endpoint(
     company_id: str,
@@ -0,0 +1,89 @@
+# app/api/routers/receivables.py
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_db
+from app.core.money import ZERO
+from app.schemas.receivables import (
+    AgingBucketsOut,
+    AgingReportOut,
+    CustomerAgingOut,
+    CustomerLedgerOut,
+    LedgerEntryOut,
+    SingleAgingReportResponse,
+    SingleCustomerLedgerResponse,
+)
+from app.services import ledger as ledger_service
+from app.services.users import get_current_active_user
+from app.services.customers import get_current_company
+from app.models.users import Users
+from app.models.companies import Companies
+from app.core.config import settings
+from app.core.rate_limit import admission_cost
+
+router = APIRouter(prefix="/companies/{company_id}/receivables", tags=["Receivables"])
+
+AGING_BUCKETS = ("not_due", "days_0_30", "days_31_60", "days_61_90", "days_over_90", "total")
+
+
+@router.get("/aging", response_model=SingleAgingReportResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
+async def get_aging_report_endpoint(
+    company_id: str,
+    as_of: Optional[date] = Query(None, description="Date to age balances at; defaults to today"),
+    customer_id: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Outstanding invoice balances per customer in 0-30, 31-60, 61-90 and 90+ days
+    past due buckets, with company-wide totals.
+    """
+    as_of = as_of or date.today()
+    rows = await ledger_service.get_aging_report(db, current_company, as_of, customer_id)
+    customers = [CustomerAgingOut(**row._mapping) for row in rows]
+    totals = AgingBucketsOut(**{
+        bucket: sum((getattr(customer, bucket) for customer in customers), ZERO)
+        for bucket in AGING_BUCKETS
+    })
+    return SingleAgingReportResponse(
+        status_code=status.HTTP_200_OK,
+        message="Aging report generated successfully",
+        data=AgingReportOut(as_of=as_of, totals=totals, customers=customers)
+    )
+
+
+@router.get("/customers/{customer_id}/ledger", response_model=SingleCustomerLedgerResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
+async def get_customer_ledger_endpoint(
+    company_id: str,
+    customer_id: str,
+    before_sequence: Optional[int] = Query(None, ge=1),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    A customer's current balance and ledger entries (invoices, payments, credit notes
+    and adjustments) with running balances, newest first.
+    """
+    customer, balance, entries = await ledger_service.get_customer_ledger(
+        customer_id, db, current_company, before_sequence, limit
+    )
+    next_before_sequence = entries[-1].entry_sequence if len(entries) == limit and entries[-1].entry_sequence > 1 else None
+    return SingleCustomerLedgerResponse(
+        status_code=status.HTTP_200_OK,
+        message="Customer ledger retrieved successfully",
+        data=CustomerLedgerOut(
+            customer_id=customer.customer_id,
+            customer_name=customer.customer_name,
+            balance=balance,
+            entries=[LedgerEntryOut.from_orm(entry) for entry in entries],
+            next_before_sequence=next_before_sequence
+        )
+    )
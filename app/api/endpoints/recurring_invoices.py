@@ -0,0 +1,142 @@
+# app/api/routers/recurring_invoices.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.schemas.common import APIResponse
+from app.schemas.recurring_invoices import (
+    CreateRecurringInvoiceTemplate,
+    UpdateRecurringInvoiceTemplate,
+    RecurringInvoiceTemplateOut,
+    SingleRecurringInvoiceTemplateResponse,
+    ListRecurringInvoiceTemplateResponse,
+    SingleRecurringGenerationReportResponse,
+)
+from app.services import recurring_invoices as recurring_service
+from app.services.users import get_current_active_user
+from app.services.customers import get_current_company
+from app.models.users import Users
+from app.models.companies import Companies
+from app.core.config import settings
+from app.core.rate_limit import admission_cost
+
+router = APIRouter(prefix="/companies/{company_id}/recurring-invoices", tags=["Recurring Invoices"])
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=SingleRecurringInvoiceTemplateResponse)
+async def create_recurring_template_endpoint(
+    company_id: str,
+    template_data: CreateRecurringInvoiceTemplate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Create a template that invoices a customer for the same items on a schedule.
+    """
+    template = await recurring_service.create_recurring_template(template_data, db, current_company)
+    return SingleRecurringInvoiceTemplateResponse(
+        status_code=status.HTTP_201_CREATED,
+        message="Recurring invoice template created successfully",
+        data=RecurringInvoiceTemplateOut.from_orm(template)
+    )
+
+
+@router.get("/", response_model=ListRecurringInvoiceTemplateResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
+async def list_recurring_templates_endpoint(
+    company_id: str,
+    is_active: Optional[bool] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    List the company's recurring invoice templates.
+    """
+    templates = await recurring_service.list_recurring_templates(db, current_company, is_active)
+    return ListRecurringInvoiceTemplateResponse(
+        status_code=status.HTTP_200_OK,
+        message="Recurring invoice templates retrieved successfully",
+        data=[RecurringInvoiceTemplateOut.from_orm(template) for template in templates]
+    )
+
+
+@router.post("/generate", response_model=SingleRecurringGenerationReportResponse)
+@admission_cost(settings.ADMISSION_COST_EXPORT)
+async def generate_recurring_invoices_endpoint(
+    company_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Generate the company's due recurring invoices now, including periods missed
+    while generation was not running. Already generated periods are skipped.
+    """
+    report = await recurring_service.run_recurring_generation(db, current_company)
+    return SingleRecurringGenerationReportResponse(
+        status_code=status.HTTP_200_OK,
+        message=f"Generated {report.invoices_generated} invoices",
+        data=report
+    )
+
+
+@router.get("/{template_id}", response_model=SingleRecurringInvoiceTemplateResponse)
+async def get_recurring_template_endpoint(
+    company_id: str,
+    template_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Retrieve a recurring invoice template with its items and schedule.
+    """
+    template = await recurring_service.get_recurring_template_by_id(template_id, db, current_company)
+    return SingleRecurringInvoiceTemplateResponse(
+        status_code=status.HTTP_200_OK,
+        message="Recurring invoice template retrieved successfully",
+        data=RecurringInvoiceTemplateOut.from_orm(template)
+    )
+
+
+@router.put("/{template_id}", response_model=SingleRecurringInvoiceTemplateResponse)
+async def update_recurring_template_endpoint(
+    company_id: str,
+    template_id: str,
+    updated_details: UpdateRecurringInvoiceTemplate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Update a recurring invoice template, or pause and resume it.
+    """
+    template = await recurring_service.update_recurring_template(template_id, updated_details, db, current_company)
+    return SingleRecurringInvoiceTemplateResponse(
+        status_code=status.HTTP_200_OK,
+        message="Recurring invoice template updated successfully",
+        data=RecurringInvoiceTemplateOut.from_orm(template)
+    )
+
+
+@router.delete("/{template_id}", response_model=APIResponse[None])
+async def delete_recurring_template_endpoint(
+    company_id: str,
+    template_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Delete a recurring invoice template. Invoices it already generated are kept.
+    """
+    await recurring_service.delete_recurring_template(template_id, db, current_company)
+    return APIResponse(
+        status_code=status.HTTP_200_OK,
+        message="Recurring invoice template successfully deleted",
+        data=None
+    )
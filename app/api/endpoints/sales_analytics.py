@@ -0,0 +1,75 @@
+# app/api/routers/sales_analytics.py
+from datetime import date
+
+from fastapi import APIRouter, Depends, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db, get_read_db
+from app.schemas.sales_analytics import (
+    SalesAnalyticsResponse,
+    SalesAnalyticsRow,
+    SalesGranularity,
+    SalesGroupBy,
+    SalesRollupRebuild,
+    SalesRollupRebuildResponse,
+)
+from app.services import sales_rollups as sales_rollup_service
+from app.services.users import get_current_active_user
+from app.services.customers import get_current_company
+from app.models.users import Users
+from app.models.companies import Companies
+from app.core.config import settings
+from app.core.rate_limit import admission_cost
+
+router = APIRouter(prefix="/companies/{company_id}/analytics", tags=["Sales Analytics"])
+
+
+@router.get("/sales", response_model=SalesAnalyticsResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
+async def get_sales_analytics_endpoint(
+    company_id: str,
+    date_from: date = Query(..., description="First day of sales to include"),
+    date_to: date = Query(..., description="Last day of sales to include"),
+    group_by: SalesGroupBy = Query(SalesGroupBy.product),
+    granularity: SalesGranularity = Query(SalesGranularity.total),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Quantity, taxable value and tax sold per product or HSN/SAC code and tax rate
+    slab, by day, by month or over the whole range, net of credit and debit notes.
+    Within each period the best sellers by taxable value come first.
+    """
+    rows = await sales_rollup_service.get_sales_analytics(
+        db, current_company, date_from, date_to, group_by, granularity, limit
+    )
+    return SalesAnalyticsResponse(
+        status_code=status.HTTP_200_OK,
+        message="Sales analytics generated successfully",
+        data=[
+            SalesAnalyticsRow(**row._mapping, tax_rate=row.igst_rate + row.cgst_rate + row.sgst_rate)
+            for row in rows
+        ]
+    )
+
+
+@router.post("/sales/rebuild", response_model=SalesRollupRebuildResponse)
+@admission_cost(settings.ADMISSION_COST_EXPORT)
+async def rebuild_sales_rollups_endpoint(
+    company_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Recompute the company's sales rollups from its invoices and notes. Only needed
+    once for invoices written before sales analytics existed.
+    """
+    rollup_rows = await sales_rollup_service.rebuild_sales_rollups(db, current_company)
+    return SalesRollupRebuildResponse(
+        status_code=status.HTTP_200_OK,
+        message="Sales rollups rebuilt successfully",
+        data=SalesRollupRebuild(rollup_rows=rollup_rows)
+    )
@@ -0,0 +1,147 @@
+# app/api/routers/webhooks.py
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.schemas.common import APIResponse
+from app.schemas.webhooks import (
+    CreateWebhookSubscription,
+    UpdateWebhookSubscription,
+    WebhookSubscriptionOut,
+    WebhookSubscriptionCreatedOut,
+    WebhookPingOut,
+    SingleWebhookSubscriptionResponse,
+    CreatedWebhookSubscriptionResponse,
+    ListWebhookSubscriptionResponse,
+    WebhookPingResponse,
+)
+from app.services import webhooks as webhook_service
+from app.services.users import get_current_active_user
+from app.services.customers import get_current_company
+from app.models.users import Users
+from app.models.companies import Companies
+from app.core.config import settings
+from app.core.rate_limit import admission_cost
+
+router = APIRouter(prefix="/companies/{company_id}/webhooks", tags=["Webhooks"])
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=CreatedWebhookSubscriptionResponse)
+async def create_webhook_subscription_endpoint(
+    company_id: str,
+    subscription_data: CreateWebhookSubscription,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Subscribe a URL to your company's invoice events. Events are POSTed in batches as
+    {"delivery_id", "events": [...]}, signed in the X-Webhook-Signature header with the
+    secret returned here, which is not shown again.
+    """
+    subscription = await webhook_service.create_webhook_subscription(subscription_data, db, current_company)
+    return CreatedWebhookSubscriptionResponse(
+        status_code=status.HTTP_201_CREATED,
+        message="Webhook subscription created successfully",
+        data=WebhookSubscriptionCreatedOut.from_orm(subscription)
+    )
+
+
+@router.get("/", response_model=ListWebhookSubscriptionResponse)
+@admission_cost(settings.ADMISSION_COST_LIST)
+async def list_webhook_subscriptions_endpoint(
+    company_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    List your company's webhook subscriptions and their delivery health.
+    """
+    subscriptions = await webhook_service.list_webhook_subscriptions(db, current_company)
+    return ListWebhookSubscriptionResponse(
+        status_code=status.HTTP_200_OK,
+        message="Webhook subscriptions retrieved successfully",
+        data=[WebhookSubscriptionOut.from_orm(subscription) for subscription in subscriptions]
+    )
+
+
+@router.get("/{subscription_id}", response_model=SingleWebhookSubscriptionResponse)
+async def get_webhook_subscription_endpoint(
+    company_id: str,
+    subscription_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Retrieve a webhook subscription.
+    """
+    subscription = await webhook_service.get_webhook_subscription(subscription_id, db, current_company)
+    return SingleWebhookSubscriptionResponse(
+        status_code=status.HTTP_200_OK,
+        message="Webhook subscription retrieved successfully",
+        data=WebhookSubscriptionOut.from_orm(subscription)
+    )
+
+
+@router.put("/{subscription_id}", response_model=SingleWebhookSubscriptionResponse)
+async def update_webhook_subscription_endpoint(
+    company_id: str,
+    subscription_id: str,
+    updated_details: UpdateWebhookSubscription,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Change a subscription's URL, events or description, or re-activate one that was
+    disabled after repeated failed deliveries.
+    """
+    subscription = await webhook_service.update_webhook_subscription(
+        subscription_id, updated_details, db, current_company
+    )
+    return SingleWebhookSubscriptionResponse(
+        status_code=status.HTTP_200_OK,
+        message="Webhook subscription updated successfully",
+        data=WebhookSubscriptionOut.from_orm(subscription)
+    )
+
+
+@router.delete("/{subscription_id}", response_model=APIResponse[None])
+async def delete_webhook_subscription_endpoint(
+    company_id: str,
+    subscription_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Delete a webhook subscription. Deliveries not yet made to it are dropped.
+    """
+    await webhook_service.delete_webhook_subscription(subscription_id, db, current_company)
+    return APIResponse(
+        status_code=status.HTTP_200_OK,
+        message="Webhook subscription successfully deleted",
+        data=None
+    )
+
+
+@router.post("/{subscription_id}/ping", status_code=status.HTTP_202_ACCEPTED, response_model=WebhookPingResponse)
+async def ping_webhook_subscription_endpoint(
+    company_id: str,
+    subscription_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Users = Depends(get_current_active_user),
+    current_company: Companies = Depends(get_current_company)
+):
+    """
+    Send the subscription a signed test delivery holding one webhook.ping event,
+    e.g. to check a receiver's signature verification.
+    """
+    delivery_id = await webhook_service.ping_webhook_subscription(subscription_id, db, current_company)
+    return WebhookPingResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        message="Test delivery queued",
+        data=WebhookPingOut(delivery_id=delivery_id)
+    )
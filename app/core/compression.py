@@ -0,0 +1,241 @@
+# app/core/compression.py
+# Response compression, negotiated with the client: zstd and brotli when their
+# packages are installed, gzip always.
+import asyncio
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional: brotli is only offered when installed
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: zstd is only offered when installed
+    zstandard = None
+
+# Server preference among encodings the client accepts equally
+SUPPORTED_ENCODINGS: List[str] = (["zstd"] if zstandard else []) + (["br"] if brotli else []) + ["gzip"]
+
+# Never compressed: already compressed, or must reach the client chunk by chunk
+_EXCLUDED_CONTENT_TYPES = ("text/event-stream",)
+_COMPRESSIBLE_CONTENT_TYPES = ("application/json", "text/", "application/xml", "application/javascript")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding the Accept-Encoding header allows, or None for identity."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compression_level(content_type: str, encoding: str) -> int:
+    levels = settings.COMPRESSION_LEVELS.get(content_type.split(";")[0].strip(), settings.COMPRESSION_LEVELS["default"])
+    return levels[encoding]
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return _gzip_bytes(body, level)
+
+
+def _gzip_compressor(level: int):
+    # wbits 31: zlib stream with a gzip header and trailer
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+def _gzip_bytes(body: bytes, level: int) -> bytes:
+    compressor = _gzip_compressor(level)
+    return compressor.compress(body) + compressor.flush()
+
+
+class _StreamCompressor:
+    """Incremental compressor for streamed bodies, e.g. GSTR-1 exports."""
+
+    def __init__(self, encoding: str, level: int):
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+            self._finish: Callable[[], bytes] = self._compressor.flush
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+            self._finish = self._compressor.finish
+        else:
+            self._compressor = _gzip_compressor(level)
+            self._finish = self._compressor.flush
+        self._encoding = encoding
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self._encoding == "br":
+            return self._compressor.process(chunk)
+        return self._compressor.compress(chunk)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def _timed_compress(body: bytes, encoding: str, level: int) -> Tuple[bytes, float]:
+    started = time.thread_time()
+    compressed = compress(body, encoding, level)
+    return compressed, time.thread_time() - started
+
+
+def _record(encoding: str, content_type: str, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+    kind = content_type.split(";")[0].strip() or "unknown"
+    metrics.increment("http_compression_bytes_in_total", bytes_in, encoding=encoding, content_type=kind)
+    metrics.increment("http_compression_bytes_out_total", bytes_out, encoding=encoding, content_type=kind)
+    metrics.observe("http_compression_cpu_seconds", cpu_seconds, encoding=encoding, content_type=kind)
+    if bytes_in:
+        metrics.observe("http_compression_ratio", bytes_out / bytes_in, encoding=encoding, content_type=kind)
+
+
+def _is_compressible(headers: List[Tuple[bytes, bytes]]) -> Tuple[bool, str]:
+    content_type = ""
+    for name, value in headers:
+        name = name.lower()
+        if name == b"content-encoding":
+            return False, ""
+        if name == b"content-type":
+            content_type = value.decode("latin-1")
+    if content_type.startswith(_EXCLUDED_CONTENT_TYPES):
+        return False, content_type
+    return content_type.startswith(_COMPRESSIBLE_CONTENT_TYPES), content_type
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header with a response's ETag, which the
+    middleware weakens when it compresses the response.
+    """
+    if not if_none_match:
+        return False
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == opaque_tag
+        for candidate in (part.strip() for part in if_none_match.split(","))
+    )
+
+
+def _with_encoding(headers: List[Tuple[bytes, bytes]], encoding: str, length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+    vary = [value for name, value in headers if name.lower() == b"vary"]
+    # The compressed bytes differ from the ones the strong ETag names, so it becomes weak
+    headers = [
+        (name, b"W/" + value if name.lower() == b"etag" and not value.startswith(b"W/") else value)
+        for name, value in headers
+        if name.lower() not in (b"content-length", b"vary")
+    ]
+    headers.append((b"content-encoding", encoding.encode()))
+    headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+    if length is not None:
+        headers.append((b"content-length", str(length).encode()))
+    return headers
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON, CSV and other text responses of at least COMPRESSION_MIN_BYTES
+    with the best encoding the client accepts, at the level configured for the
+    content type. Bodies of COMPRESSION_THREAD_MIN_BYTES or more are compressed in a
+    thread, so large invoice lists don't stall the event loop; streamed responses
+    are compressed chunk by chunk. Bytes in and out and CPU time go to metrics.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[dict] = None
+        content_type = ""
+        stream: Optional[_StreamCompressor] = None
+        stream_in = stream_out = 0
+        stream_cpu = 0.0
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, content_type, stream, stream_in, stream_out, stream_cpu, passthrough
+            if message["type"] == "http.response.start":
+                compressible, content_type = _is_compressible(message.get("headers", []))
+                if not compressible:
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether to compress
+                    start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            level = compression_level(content_type, encoding)
+
+            if start_message is not None and stream is None:
+                if not more_body:
+                    # Whole body at once
+                    first, start_message = start_message, None
+                    if len(body) < settings.COMPRESSION_MIN_BYTES:
+                        await send(first)
+                        await send(message)
+                        return
+                    if len(body) >= settings.COMPRESSION_THREAD_MIN_BYTES:
+                        compressed, cpu_seconds = await asyncio.to_thread(_timed_compress, body, encoding, level)
+                    else:
+                        compressed, cpu_seconds = _timed_compress(body, encoding, level)
+                    _record(encoding, content_type, len(body), len(compressed), cpu_seconds)
+                    first["headers"] = _with_encoding(first.get("headers", []), encoding, len(compressed))
+                    await send(first)
+                    await send({"type": "http.response.body", "body": compressed, "more_body": False})
+                    return
+                first, start_message = start_message, None
+                first["headers"] = _with_encoding(first.get("headers", []), encoding, None)
+                stream = _StreamCompressor(encoding, level)
+                await send(first)
+
+            started = time.thread_time()
+            chunk = stream.compress(body) if body else b""
+            if not more_body:
+                chunk += stream.finish()
+            stream_cpu += time.thread_time() - started
+            stream_in += len(body)
+            stream_out += len(chunk)
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            if not more_body:
+                _record(encoding, content_type, stream_in, stream_out, stream_cpu)
+
+        await self.app(scope, receive, send_compressed)
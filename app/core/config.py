@@ -1,6 +1,162 @@
+from typing import Dict, Optional
+
+
 class Settings:
     SECRET_KEY: str = "your-super-secret-jwt-key-change-in-production-123456789"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
-settings = Settings()
\ No newline at end of file
+    # Invoice numbering
+    FINANCIAL_YEAR_START_MONTH: int = 4 # April, Indian financial year
+    INVOICE_NUMBER_FORMAT: str = "{financial_year}/{sequence:05d}"
+    # 1 keeps numbers strictly gapless (the counter row stays locked until the invoice commits).
+    # Larger values reserve numbers in blocks per worker, trading gaplessness for throughput.
+    INVOICE_NUMBER_BLOCK_SIZE: int = 1
+
+    # How long a stored response is replayed for a retried Idempotency-Key
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    # A key claimed by a request that has not finished within this lease (e.g. its
+    # worker died) is taken over by the next retry. Keep it above the request timeout.
+    IDEMPOTENCY_CLAIM_LEASE_SECONDS: int = 120
+
+    # Invoice document rendering
+    DOCUMENT_RENDER_WORKERS: int = 2
+    DOCUMENT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LOGO_CACHE_SIZE: int = 512
+    LOGO_CACHE_TTL_SECONDS: int = 3600
+    LOGO_FETCH_TIMEOUT_SECONDS: float = 5.0
+    LOGO_MAX_BYTES: int = 512 * 1024
+    LOGO_MAX_REDIRECTS: int = 3
+    DOCUMENT_BATCH_DIR: str = "var/document_batches"
+    DOCUMENT_BATCH_PROGRESS_EVERY: int = 50 # Rendered documents between progress updates
+
+    # Customer, product and invoice search
+    SEARCH_DEFAULT_LIMIT: int = 10
+    SEARCH_MAX_LIMIT: int = 50
+    # In-memory prefix indexes, used when the database has no trigram support (SQLite)
+    SEARCH_INDEX_MAX_COMPANIES: int = 256
+    SEARCH_INDEX_TTL_SECONDS: int = 300
+
+    # Bulk CSV/Excel import of customers and products
+    IMPORT_CHUNK_SIZE: int = 500 # Rows validated, checked for duplicates and inserted together
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+
+    # Payments
+    PAYMENT_BATCH_MAX_SIZE: int = 5000
+
+    # Most invoices a single bulk status transition may change
+    INVOICE_STATUS_BULK_MAX_SIZE: int = 1000
+
+    # Background scheduler; one worker at a time holds the lease and runs the jobs.
+    # The lease must outlast the longest job run.
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_TICK_SECONDS: float = 15
+    SCHEDULER_LEASE_SECONDS: int = 60
+    OVERDUE_CHECK_INTERVAL_SECONDS: int = 300
+    OVERDUE_BATCH_SIZE: int = 500
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: int = 3600
+
+    # Recurring invoices; each batch of templates is generated and committed together.
+    # A template that missed many periods is caught up at most RECURRING_INVOICE_MAX_CATCH_UP periods per batch.
+    RECURRING_INVOICE_INTERVAL_SECONDS: int = 900
+    RECURRING_INVOICE_BATCH_SIZE: int = 100
+    RECURRING_INVOICE_MAX_CATCH_UP: int = 24
+
+    # Archival of closed financial years. Settled invoices older than the hot years are
+    # moved into compressed JSON Lines files, at most INVOICE_ARCHIVE_MAX_INVOICES per file.
+    INVOICE_HOT_FINANCIAL_YEARS: int = 2 # The current year and the one before stay in the database
+    INVOICE_ARCHIVE_DIR: str = "var/invoice_archives"
+    INVOICE_ARCHIVE_MAX_INVOICES: int = 5000
+    INVOICE_ARCHIVE_INTERVAL_SECONDS: int = 24 * 3600
+
+    # Background task queue, stored in the queued_tasks table. Workers run inside the
+    # API process when TASK_WORKER_ENABLED, or separately with `python -m app.worker`.
+    # A running task's lock is renewed while it runs; a worker that dies loses it after
+    # TASK_LOCK_SECONDS and the task is retried. Failed attempts back off exponentially.
+    TASK_WORKER_ENABLED: bool = True
+    TASK_WORKER_CONCURRENCY: int = 4
+    TASK_POLL_INTERVAL_SECONDS: float = 1.0
+    TASK_LOCK_SECONDS: int = 120
+    TASK_MAX_ATTEMPTS: int = 5
+    TASK_RETRY_BASE_SECONDS: float = 10
+    TASK_RETRY_MAX_SECONDS: float = 3600
+    TASK_RETENTION_HOURS: int = 7 * 24 # Finished tasks are purged after this
+    TASK_PURGE_INTERVAL_SECONDS: int = 3600
+
+    # Outbound HTTP: one connection pool per process, shared by webhooks and logo fetches
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_CLIENT_TIMEOUT_SECONDS: float = 10.0
+
+    # Webhooks. Invoice events are written to the outbox with the invoice change and
+    # relayed by the scheduler (so within SCHEDULER_TICK_SECONDS) into delivery tasks
+    # of up to WEBHOOK_BATCH_SIZE events per subscription. Subscriptions are disabled
+    # after WEBHOOK_DISABLE_AFTER_FAILURES failed attempts in a row.
+    WEBHOOK_RELAY_INTERVAL_SECONDS: int = 5
+    WEBHOOK_RELAY_BATCH_SIZE: int = 1000
+    WEBHOOK_BATCH_SIZE: int = 100
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_MAX_ATTEMPTS: int = 10
+    WEBHOOK_DISABLE_AFTER_FAILURES: int = 50
+
+    # Live invoice event streams (SSE). Each stream buffers up to EVENT_STREAM_QUEUE_SIZE
+    # events; a client that falls further behind is told to resync and disconnected.
+    # EVENT_BUS_BACKEND "local" serves events of this process only; "postgres" shares
+    # them between workers over LISTEN/NOTIFY on EVENT_BUS_CHANNEL.
+    EVENT_BUS_BACKEND: str = "local"
+    EVENT_BUS_CHANNEL: str = "invoice_events"
+    EVENT_BUS_RECONNECT_SECONDS: float = 5.0
+    EVENT_STREAM_QUEUE_SIZE: int = 256
+    EVENT_STREAM_MAX_SUBSCRIBERS: int = 1000 # Per process
+    EVENT_STREAM_KEEPALIVE_SECONDS: float = 15.0
+
+    # Change feed pages for incremental sync
+    CHANGE_FEED_PAGE_SIZE: int = 500
+    CHANGE_FEED_MAX_PAGE_SIZE: int = 2000
+
+    # Optional read replica (e.g. "postgresql+asyncpg://.../invoice_db") for list, report
+    # and export endpoints. After a write, the client's and the company's reads stay on
+    # the primary for READ_REPLICA_PIN_SECONDS, which should exceed the replication lag.
+    READ_DATABASE_URL: Optional[str] = None
+    READ_REPLICA_PIN_SECONDS: int = 10
+
+    # Sharding companies across databases: name -> URL of the shards besides the default
+    # database, which also holds users and the company -> shard directory. Empty keeps
+    # everything in the default database. New companies go to NEW_COMPANY_SHARD if set,
+    # otherwise to the shard holding the fewest companies. Moving a company between
+    # shards waits SHARD_DIRECTORY_CACHE_TTL_SECONDS for every worker to see the move.
+    SHARD_DATABASE_URLS: Dict[str, str] = {}
+    NEW_COMPANY_SHARD: Optional[str] = None
+    SHARD_DIRECTORY_CACHE_SIZE: int = 10000
+    SHARD_DIRECTORY_CACHE_TTL_SECONDS: int = 30
+    SHARD_MIGRATION_BATCH_SIZE: int = 1000
+
+    # Per-tenant rate limiting and admission control (per worker process). A request
+    # costs ADMISSION_COST_* tokens, by kind of endpoint, from both its user's and its
+    # company's buckets, which hold up to RATE_LIMIT_BURST tokens and refill at
+    # RATE_LIMIT_TOKENS_PER_SECOND. At most TENANT_MAX_CONCURRENT_REQUESTS of a company's
+    # requests run at once; the rest wait up to TENANT_QUEUE_TIMEOUT_SECONDS, then get 429.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_TOKENS_PER_SECOND: float = 20.0
+    RATE_LIMIT_BURST: float = 100.0
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    ADMISSION_COST_DEFAULT: int = 1 # Point reads and single writes
+    ADMISSION_COST_LIST: int = 5 # Lists, searches and reports
+    ADMISSION_COST_EXPORT: int = 20 # Bulk writes, exports and rebuilds
+    TENANT_MAX_CONCURRENT_REQUESTS: int = 8
+    TENANT_QUEUE_TIMEOUT_SECONDS: float = 2.0
+
+    # Response compression (zstd and brotli when installed, gzip always). Bodies under
+    # COMPRESSION_MIN_BYTES aren't worth it; from COMPRESSION_THREAD_MIN_BYTES they are
+    # compressed in a thread instead of on the event loop. Levels per content type and
+    # encoding: gzip 1-9, br 0-11, zstd 1-22.
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_THREAD_MIN_BYTES: int = 256 * 1024
+    COMPRESSION_LEVELS: Dict[str, Dict[str, int]] = {
+        "application/json": {"gzip": 6, "br": 5, "zstd": 6}, # Repetitive invoice lists compress well
+        "text/csv": {"gzip": 6, "br": 5, "zstd": 6},
+        "default": {"gzip": 5, "br": 4, "zstd": 3},
+    }
+
+settings = Settings()
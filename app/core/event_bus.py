@@ -0,0 +1,217 @@
+# app/core/event_bus.py
+import asyncio
+import json
+import logging
+from typing import Dict, List, NamedTuple, Optional, Set
+
+import asyncpg
+from sqlalchemy import event, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.database import shard_engines
+
+logger = logging.getLogger(__name__)
+
+# Session.info key of the events published once the session's transaction commits
+_PENDING_EVENTS = "pending_live_events"
+
+# PostgreSQL NOTIFY payloads must stay under 8000 bytes
+_NOTIFY_MAX_BYTES = 7500
+
+
+class LiveEvent(NamedTuple):
+    company_id: str
+    event_id: str
+    event_type: str
+    data: str # JSON, sent to subscribers as is
+
+
+class EventSubscription:
+    """One stream's view of a company's events, with a bounded queue."""
+
+    def __init__(self, company_id: str):
+        self.company_id = company_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.EVENT_STREAM_QUEUE_SIZE)
+        # Set when events had to be dropped; the client must resync and reconnect
+        self.overflowed = False
+
+    def offer(self, live_event: LiveEvent) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(live_event)
+        except asyncio.QueueFull:
+            # A slow client must not hold up publishers or grow memory without bound:
+            # drop what it hasn't read and tell it to resync instead
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            metrics.increment("event_stream_overflows_total")
+
+
+class EventHub:
+    """Fans events out to the streams subscribed to each company in this process."""
+
+    def __init__(self):
+        self._subscriptions: Dict[str, Set[EventSubscription]] = {}
+        self._count = 0
+
+    def subscribe(self, company_id: str) -> Optional[EventSubscription]:
+        """Returns None if this process already serves EVENT_STREAM_MAX_SUBSCRIBERS streams."""
+        if self._count >= settings.EVENT_STREAM_MAX_SUBSCRIBERS:
+            return None
+        subscription = EventSubscription(company_id)
+        self._subscriptions.setdefault(company_id, set()).add(subscription)
+        self._count += 1
+        metrics.set_gauge("event_stream_subscribers", self._count)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.company_id)
+        if subscriptions and subscription in subscriptions:
+            subscriptions.discard(subscription)
+            self._count -= 1
+            if not subscriptions:
+                del self._subscriptions[subscription.company_id]
+        metrics.set_gauge("event_stream_subscribers", self._count)
+
+    def publish(self, live_event: LiveEvent) -> None:
+        for subscription in self._subscriptions.get(live_event.company_id, ()):
+            subscription.offer(live_event)
+        metrics.increment("event_stream_events_published_total")
+
+    def resync_all(self) -> None:
+        """Tell every stream to resync, e.g. after events may have been missed."""
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                if not subscription.overflowed:
+                    subscription.overflowed = True
+                    try:
+                        subscription.queue.put_nowait(None)
+                    except asyncio.QueueFull:
+                        subscription.queue.get_nowait()
+                        subscription.queue.put_nowait(None)
+
+
+hub = EventHub()
+
+
+class LocalEventBus:
+    """Delivers events to this process's hub only; enough for a single worker."""
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def stage(self, db: AsyncSession, live_events: List[LiveEvent]) -> None:
+        db.info.setdefault(_PENDING_EVENTS, []).extend(live_events)
+
+    def on_commit(self, live_events: List[LiveEvent]) -> None:
+        for live_event in live_events:
+            hub.publish(live_event)
+
+
+class PostgresEventBus:
+    """
+    Shares events between workers with PostgreSQL LISTEN/NOTIFY. Events are sent
+    with pg_notify in the writing transaction, which PostgreSQL delivers only if it
+    commits, and every worker (this one included) feeds its hub from a dedicated
+    listening connection to each shard.
+    """
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self._connections: Dict[str, object] = {}
+        self._supervisors: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if not self._supervisors:
+            # Events are sent on the shard of the company they concern
+            self._supervisors = [asyncio.create_task(self._supervise(shard_name)) for shard_name in shard_engines]
+
+    async def stop(self) -> None:
+        for supervisor in self._supervisors:
+            supervisor.cancel()
+        await asyncio.gather(*self._supervisors, return_exceptions=True)
+        self._supervisors = []
+        for connection in self._connections.values():
+            if not connection.is_closed():
+                await connection.close()
+        self._connections = {}
+
+    async def stage(self, db: AsyncSession, live_events: List[LiveEvent]) -> None:
+        for payload in self._payloads(live_events):
+            await db.execute(select(func.pg_notify(self.channel, payload)))
+
+    def on_commit(self, live_events: List[LiveEvent]) -> None:
+        pass # Delivered by the listener
+
+    def _payloads(self, live_events: List[LiveEvent]) -> List[str]:
+        """Pack events into as few NOTIFY payloads as the size limit allows."""
+        payloads, batch, size = [], [], 2
+        for live_event in live_events:
+            encoded = json.dumps(list(live_event), separators=(",", ":"))
+            if len(encoded.encode()) > _NOTIFY_MAX_BYTES:
+                logger.warning("Live event %s is too large to send; streams will miss it", live_event.event_id)
+                continue
+            if batch and size + len(encoded.encode()) + 1 > _NOTIFY_MAX_BYTES:
+                payloads.append("[" + ",".join(batch) + "]")
+                batch, size = [], 2
+            batch.append(encoded)
+            size += len(encoded.encode()) + 1
+        if batch:
+            payloads.append("[" + ",".join(batch) + "]")
+        return payloads
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        for fields in json.loads(payload):
+            hub.publish(LiveEvent(*fields))
+
+    async def _supervise(self, shard_name: str) -> None:
+        dsn = shard_engines[shard_name].url.set(drivername="postgresql").render_as_string(hide_password=False)
+        reconnecting = False
+        while True:
+            try:
+                connection = self._connections.get(shard_name)
+                if connection is None or connection.is_closed():
+                    connection = await asyncpg.connect(dsn)
+                    self._connections[shard_name] = connection
+                    await connection.add_listener(self.channel, self._on_notification)
+                    if reconnecting:
+                        # Events sent while we weren't listening are lost
+                        hub.resync_all()
+                    reconnecting = True
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event bus listener connection to shard %s failed", shard_name)
+            await asyncio.sleep(settings.EVENT_BUS_RECONNECT_SECONDS)
+
+
+event_bus = PostgresEventBus(settings.EVENT_BUS_CHANNEL) if settings.EVENT_BUS_BACKEND == "postgres" else LocalEventBus()
+
+
+async def publish_after_commit(db: AsyncSession, live_events: List[LiveEvent]) -> None:
+    """Send events to live streams if, and once, the session's transaction commits."""
+    if live_events:
+        await event_bus.stage(db, live_events)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session: Session) -> None:
+    live_events = session.info.pop(_PENDING_EVENTS, None)
+    if live_events:
+        event_bus.on_commit(live_events)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_events(session: Session, transaction) -> None:
+    # Events of a rolled back transaction are never published; savepoints don't count
+    if transaction.parent is None:
+        session.info.pop(_PENDING_EVENTS, None)
@@ -0,0 +1,27 @@
+# app/core/financial_year.py
+from datetime import date, datetime
+from typing import Tuple, Union
+
+from app.core.config import settings
+
+# Financial years are identified by the calendar year they start in,
+# e.g. 2025 is the Indian financial year April 2025 - March 2026 ("2025-26").
+
+
+def financial_year_for(value: Union[date, datetime]) -> int:
+    """Return the financial year a date falls in."""
+    if value.month >= settings.FINANCIAL_YEAR_START_MONTH:
+        return value.year
+    return value.year - 1
+
+
+def financial_year_label(financial_year: int) -> str:
+    """Format a financial year the way it is printed on invoices, e.g. 2025 -> "2025-26"."""
+    return f"{financial_year}-{(financial_year + 1) % 100:02d}"
+
+
+def financial_year_bounds(financial_year: int) -> Tuple[datetime, datetime]:
+    """Return the [start, end) datetimes of a financial year."""
+    start = datetime(financial_year, settings.FINANCIAL_YEAR_START_MONTH, 1)
+    end = datetime(financial_year + 1, settings.FINANCIAL_YEAR_START_MONTH, 1)
+    return start, end
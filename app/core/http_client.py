@@ -0,0 +1,124 @@
+# app/core/http_client.py
+# Outbound HTTP to URLs users supply, which must only ever reach public hosts. One
+# process-wide client reuses pooled keep-alive connections.
+import asyncio
+import ipaddress
+import socket
+from typing import List, Optional
+
+import httpcore
+import httpx
+
+from app.core.config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+async def public_addresses(host: str, port: int) -> List[str]:
+    """
+    The addresses `host` resolves to, or [] unless every one of them is public, so
+    requests to user-supplied URLs can't reach loopback, private networks or cloud
+    metadata.
+    """
+    try:
+        addresses = [ipaddress.ip_address(host)]
+    except ValueError:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            return []
+        addresses = [ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos]
+    if not addresses or not all(address.is_global and not address.is_multicast for address in addresses):
+        return []
+    return list(dict.fromkeys(str(address) for address in addresses))
+
+
+async def is_public_url(url: str) -> bool:
+    """Whether a URL is http(s) and its host resolves only to public addresses."""
+    try:
+        parsed = httpx.URL(url)
+    except httpx.InvalidURL:
+        return False
+    if parsed.scheme not in ("http", "https") or not parsed.host:
+        return False
+    return bool(await public_addresses(parsed.host, parsed.port or (443 if parsed.scheme == "https" else 80)))
+
+
+class _PublicNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    Connects only to public addresses, and to the very addresses it checked, so a host
+    can't resolve to a public address for the check and a private one for the
+    connection (DNS rebinding). The Host header, TLS SNI and certificate checks still
+    use the URL's hostname, as httpcore takes them from the request.
+    """
+
+    def __init__(self):
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options=None
+    ) -> httpcore.AsyncNetworkStream:
+        addresses = await public_addresses(host, port)
+        if not addresses:
+            raise httpcore.ConnectError(f"{host} does not resolve to a public address")
+        for address in addresses[:-1]:
+            try:
+                return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout):
+                continue
+        return await self._backend.connect_tcp(addresses[-1], port, timeout, local_address, socket_options)
+
+    async def connect_unix_socket(
+        self, path: str, timeout: Optional[float] = None, socket_options=None
+    ) -> httpcore.AsyncNetworkStream:
+        raise httpcore.ConnectError("Unix sockets are not public")
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class PublicHTTPTransport(httpx.AsyncHTTPTransport):
+    """
+    Transport for requests to user-supplied URLs, connecting only to public addresses.
+    Proxy settings from the environment are ignored, so the check sees the real host.
+    """
+
+    def __init__(self, limits: httpx.Limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)):
+        super().__init__(trust_env=False, limits=limits)
+        # httpx has no option for the network backend, so its pool is replaced by one using ours
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(trust_env=False),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=_PublicNetworkBackend()
+        )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Shared AsyncClient, created on first use, that only connects to public addresses.
+    Pass a per-request timeout to override the default.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            transport=PublicHTTPTransport(limits=httpx.Limits(
+                max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS
+            )),
+            timeout=settings.HTTP_CLIENT_TIMEOUT_SECONDS
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
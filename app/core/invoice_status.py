@@ -0,0 +1,48 @@
+# app/core/invoice_status.py
+import enum
+from typing import Dict, FrozenSet
+
+
+class InvoiceStatus(str, enum.Enum):
+    draft = "draft"
+    issued = "issued"
+    partially_paid = "partially_paid"
+    overdue = "overdue"
+    paid = "paid"
+    cancelled = "cancelled"
+
+    @property
+    def label(self) -> str:
+        return self.value.replace("_", " ").capitalize()
+
+
+# Statuses each status may move to. paid and cancelled are final.
+INVOICE_STATUS_TRANSITIONS: Dict[InvoiceStatus, FrozenSet[InvoiceStatus]] = {
+    InvoiceStatus.draft: frozenset({InvoiceStatus.issued, InvoiceStatus.cancelled}),
+    InvoiceStatus.issued: frozenset({
+        InvoiceStatus.partially_paid, InvoiceStatus.overdue, InvoiceStatus.paid, InvoiceStatus.cancelled
+    }),
+    InvoiceStatus.partially_paid: frozenset({InvoiceStatus.overdue, InvoiceStatus.paid}),
+    # Part payments leave an overdue invoice overdue, so it can only be cancelled
+    # while invoice_amount_paid is 0; transition_invoice_statuses enforces that
+    InvoiceStatus.overdue: frozenset({InvoiceStatus.paid, InvoiceStatus.cancelled}),
+    InvoiceStatus.paid: frozenset(),
+    InvoiceStatus.cancelled: frozenset(),
+}
+
+# Statuses an invoice can be created in
+INITIAL_INVOICE_STATUSES = frozenset({InvoiceStatus.draft, InvoiceStatus.issued})
+
+# Statuses whose balance is owed by the customer, i.e. that appear in the ledger and aging
+RECEIVABLE_INVOICE_STATUSES = frozenset({
+    InvoiceStatus.issued, InvoiceStatus.partially_paid, InvoiceStatus.overdue, InvoiceStatus.paid
+})
+
+
+def can_transition(current: InvoiceStatus, target: InvoiceStatus) -> bool:
+    return target in INVOICE_STATUS_TRANSITIONS[current]
+
+
+def statuses_allowing(target: InvoiceStatus) -> FrozenSet[InvoiceStatus]:
+    """Statuses an invoice must be in to move to `target`."""
+    return frozenset(status for status, targets in INVOICE_STATUS_TRANSITIONS.items() if target in targets)
@@ -0,0 +1,52 @@
+# app/core/metrics.py
+# In-process metrics registry. Values are per worker process and reset on restart.
+import threading
+from typing import Dict, Tuple
+
+_MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_lock = threading.Lock()
+_counters: Dict[_MetricKey, float] = {}
+_gauges: Dict[_MetricKey, float] = {}
+_summaries: Dict[_MetricKey, Dict[str, float]] = {}
+
+
+def _key(name: str, labels: Dict[str, str]) -> _MetricKey:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def increment(name: str, value: float = 1, **labels) -> None:
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Record one observation (e.g. a duration) into a count/sum/max summary."""
+    key = _key(name, labels)
+    with _lock:
+        summary = _summaries.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+        summary["count"] += 1
+        summary["sum"] += value
+        summary["max"] = max(summary["max"], value)
+
+
+def _format_key(key: _MetricKey) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{label}="{value}"' for label, value in labels) + "}"
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "counters": {_format_key(key): value for key, value in _counters.items()},
+            "gauges": {_format_key(key): value for key, value in _gauges.items()},
+            "summaries": {_format_key(key): dict(summary) for key, summary in _summaries.items()},
+        }
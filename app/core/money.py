@@ -0,0 +1,72 @@
+# app/core/money.py
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Union
+
+from pydantic import condecimal
+from sqlalchemy import BigInteger, Integer
+from sqlalchemy.types import TypeDecorator
+
+# Amounts are stored as integer paise and tax rates as integer hundredths of a percent,
+# so SUM() in SQL is exact and never needs recomputing in Python.
+MINOR_UNITS = 100
+PAISE = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+Number = Union[Decimal, int, float, str]
+
+# Pydantic field types shared by all schemas that carry money or tax rates
+MoneyAmount = condecimal(max_digits=14, decimal_places=2)
+TaxRate = condecimal(ge=0, le=100, max_digits=5, decimal_places=2)
+
+
+def to_money(value: Number) -> Decimal:
+    """Round a number to whole paise (half-up), the way amounts are printed on an invoice."""
+    if value is None:
+        return ZERO
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(PAISE, rounding=ROUND_HALF_UP)
+
+
+def to_minor_units(value: Number) -> int:
+    """Convert rupees to integer paise."""
+    return int(to_money(value) * MINOR_UNITS)
+
+
+def from_minor_units(units: int) -> Decimal:
+    """Convert integer paise back to rupees."""
+    return (Decimal(int(units)) / MINOR_UNITS).quantize(PAISE)
+
+
+class Money(TypeDecorator):
+    """Column type for currency amounts: Decimal in Python, integer paise in the database."""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_minor_units(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return from_minor_units(value)
+
+
+class Rate(TypeDecorator):
+    """Column type for percentage tax rates: Decimal in Python, hundredths of a percent in the database."""
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_minor_units(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return from_minor_units(value)
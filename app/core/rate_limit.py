@@ -0,0 +1,152 @@
+# app/core/rate_limit.py
+# Per-tenant rate limiting and admission control. State is per worker process, so
+# with N workers a tenant gets up to N times the configured rates.
+import asyncio
+import math
+import time
+from typing import Callable, Dict, List
+
+from cachetools import TTLCache
+from fastapi import HTTPException, Request, status
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.security import verify_token
+from app.database import request_company_id
+
+
+class TokenBucket:
+    """Holds up to `burst` tokens, refilled at `rate` tokens per second."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def seconds_until(self, cost: float) -> float:
+        """Seconds until `cost` tokens are available; 0 if they are now."""
+        self.refill()
+        if self.tokens >= cost:
+            return 0.0
+        return (min(cost, self.burst) - self.tokens) / self.rate
+
+
+# An idle bucket is full again after burst / rate seconds, so it can be forgotten then
+_buckets: TTLCache = TTLCache(
+    maxsize=settings.RATE_LIMIT_MAX_KEYS,
+    ttl=settings.RATE_LIMIT_BURST / settings.RATE_LIMIT_TOKENS_PER_SECOND
+)
+
+
+class _Gate:
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0 # Requests holding or waiting for a slot
+
+
+# Tenant -> concurrency gate, dropped when no request holds or waits for it
+_gates: Dict[str, _Gate] = {}
+
+
+def admission_cost(cost: int, concurrency_gated: bool = True) -> Callable:
+    """
+    Mark an endpoint's cost in rate limit tokens, e.g. ADMISSION_COST_LIST for list
+    endpoints. Endpoints that don't use the database for long, such as event streams,
+    can skip the per-tenant concurrency gate.
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.admission_cost = cost
+        endpoint.concurrency_gated = concurrency_gated
+        return endpoint
+    return decorator
+
+
+def _request_user(request: Request) -> str:
+    # The token is only decoded here, not checked against the database
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    username = verify_token(token) if scheme.lower() == "bearer" and token else None
+    if username is not None:
+        return f"user:{username}"
+    return f"client:{request.client.host if request.client else 'unknown'}"
+
+
+def _take_tokens(keys: List[str], cost: int) -> float:
+    """Take `cost` tokens from every key's bucket, or none; returns the wait if short."""
+    buckets = []
+    for key in keys:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(settings.RATE_LIMIT_TOKENS_PER_SECOND, settings.RATE_LIMIT_BURST)
+        buckets.append((key, bucket))
+    wait = max(bucket.seconds_until(cost) for _, bucket in buckets)
+    if wait == 0:
+        for key, bucket in buckets:
+            bucket.tokens -= cost
+            _buckets[key] = bucket # Also restarts the bucket's idle expiry
+    return wait
+
+
+def _too_many_requests(detail: str, retry_after: float, reason: str, kind: str) -> HTTPException:
+    metrics.increment("admission_throttled_total", reason=reason, tenant=kind)
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+async def admit_request(request: Request):
+    """
+    App-wide dependency admitting a request before it reaches the database. It takes
+    the endpoint's cost in tokens from the user's and the company's buckets, then
+    holds one of the tenant's concurrency slots until the response has been sent.
+    Requests over a limit get 429 with Retry-After.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        yield
+        return
+
+    endpoint = request.scope.get("endpoint")
+    cost = getattr(endpoint, "admission_cost", settings.ADMISSION_COST_DEFAULT)
+    user_key = _request_user(request)
+    company_id = request_company_id(request.scope)
+    keys = [user_key] + ([f"company:{company_id}"] if company_id else [])
+    kind = "company" if company_id else "user"
+
+    wait = _take_tokens(keys, cost)
+    if wait > 0:
+        raise _too_many_requests("Rate limit exceeded; slow down and retry later.", wait, "rate", kind)
+    metrics.increment("admission_tokens_spent_total", cost, tenant=kind)
+
+    if not getattr(endpoint, "concurrency_gated", True):
+        yield
+        return
+
+    tenant = keys[-1]
+    gate = _gates.get(tenant)
+    if gate is None:
+        gate = _gates[tenant] = _Gate(settings.TENANT_MAX_CONCURRENT_REQUESTS)
+    gate.users += 1
+    try:
+        try:
+            await asyncio.wait_for(gate.semaphore.acquire(), timeout=settings.TENANT_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise _too_many_requests(
+                "Too many concurrent requests; retry shortly.",
+                settings.TENANT_QUEUE_TIMEOUT_SECONDS, "concurrency", kind
+            )
+        try:
+            yield
+        finally:
+            gate.semaphore.release()
+    finally:
+        gate.users -= 1
+        if gate.users == 0:
+            _gates.pop(tenant, None)
@@ -0,0 +1,44 @@
+# app/core/rendering.py
+# Runs inside the document rendering worker processes, so it must only depend
+# on plain data passed in and must not import the database or the web app.
+import os
+from decimal import Decimal
+from typing import Optional
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+INVOICE_TEMPLATE = "invoice_document.html"
+
+_environment: Optional[Environment] = None
+
+
+def _format_money(value) -> str:
+    return f"{Decimal(value):,.2f}"
+
+
+def _get_environment() -> Environment:
+    """Build the template environment once per worker process; compiled templates are cached on it."""
+    global _environment
+    if _environment is None:
+        _environment = Environment(
+            loader=FileSystemLoader(TEMPLATES_DIR),
+            autoescape=select_autoescape(["html"]),
+            auto_reload=False
+        )
+        _environment.filters["money"] = _format_money
+    return _environment
+
+
+def render_invoice_html(context: dict) -> str:
+    return _get_environment().get_template(INVOICE_TEMPLATE).render(**context)
+
+
+def render_invoice_document(context: dict, document_format: str) -> bytes:
+    """Render an invoice document context to HTML or PDF bytes."""
+    html = render_invoice_html(context)
+    if document_format == "pdf":
+        # PDF output needs the optional WeasyPrint package
+        from weasyprint import HTML
+        return HTML(string=html).write_pdf()
+    return html.encode("utf-8")
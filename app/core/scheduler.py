@@ -0,0 +1,162 @@
+# app/core/scheduler.py
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import update, delete, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.database import AsyncSessionLocal, shard_engines, use_shard
+from app.models.scheduler_leases import SchedulerLeases
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledJob(NamedTuple):
+    name: str
+    interval_seconds: float
+    run: Callable[[AsyncSession], Awaitable[int]] # Returns the number of rows it touched
+
+
+class Scheduler:
+    """
+    Runs periodic jobs inside the API process. Every worker runs a scheduler, but
+    only the one holding the database lease runs jobs, so each job runs once per
+    interval across the deployment. If the leader dies its lease expires and
+    another worker takes over.
+    """
+
+    def __init__(self, lease_name: str = "scheduler"):
+        self.lease_name = lease_name
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._jobs: List[ScheduledJob] = []
+        self._next_run: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add_job(self, name: str, interval_seconds: float, run: Callable[[AsyncSession], Awaitable[int]]) -> None:
+        self._jobs.append(ScheduledJob(name, interval_seconds, run))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self.is_leader:
+            await self._release_lease()
+
+    async def _acquire_lease(self) -> bool:
+        """Take or renew the lease; returns whether this worker is the leader."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(SchedulerLeases)
+                .where(
+                    SchedulerLeases.lease_name == self.lease_name,
+                    or_(SchedulerLeases.holder_id == self.holder_id, SchedulerLeases.expires_at < now)
+                )
+                .values(holder_id=self.holder_id, expires_at=expires_at)
+            )
+            if result.rowcount:
+                await db.commit()
+                return True
+            db.add(SchedulerLeases(lease_name=self.lease_name, holder_id=self.holder_id, expires_at=expires_at))
+            try:
+                await db.commit()
+                return True
+            except IntegrityError:
+                # Another worker holds an unexpired lease
+                await db.rollback()
+                return False
+
+    async def _release_lease(self) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(SchedulerLeases).where(
+                    SchedulerLeases.lease_name == self.lease_name,
+                    SchedulerLeases.holder_id == self.holder_id
+                )
+            )
+            await db.commit()
+        self.is_leader = False
+
+    async def _run_job(self, job: ScheduledJob) -> None:
+        started = time.perf_counter()
+        try:
+            # Jobs work through every shard in turn
+            rows = 0
+            for shard_name in shard_engines:
+                with use_shard(shard_name):
+                    async with AsyncSessionLocal() as db:
+                        rows += await job.run(db)
+        except Exception:
+            logger.exception("Scheduled job %s failed", job.name)
+            metrics.increment("scheduler_job_runs_total", job=job.name, outcome="failed")
+            return
+        duration = time.perf_counter() - started
+        metrics.increment("scheduler_job_runs_total", job=job.name, outcome="succeeded")
+        metrics.increment("scheduler_job_rows_total", rows, job=job.name)
+        metrics.observe("scheduler_job_duration_seconds", duration, job=job.name)
+        metrics.set_gauge("scheduler_job_last_rows", rows, job=job.name)
+        metrics.set_gauge("scheduler_job_last_success_timestamp", time.time(), job=job.name)
+        logger.info("Scheduled job %s touched %s rows in %.3fs", job.name, rows, duration)
+
+    async def _renew_lease(self) -> None:
+        """Keep the lease while jobs run, which may take longer than SCHEDULER_LEASE_SECONDS."""
+        while True:
+            await asyncio.sleep(settings.SCHEDULER_LEASE_SECONDS / 3)
+            try:
+                self.is_leader = await self._acquire_lease()
+            except Exception:
+                logger.exception("Failed to renew the scheduler lease")
+                continue
+            if not self.is_leader:
+                logger.warning("Lost the scheduler lease while running jobs")
+                return
+
+    async def _run_due_jobs(self) -> None:
+        renewer = asyncio.create_task(self._renew_lease())
+        try:
+            now = time.monotonic()
+            for job in self._jobs:
+                if not self.is_leader:
+                    # Another worker took the lease over; it runs the remaining jobs
+                    break
+                if self._next_run.get(job.name, 0) <= now:
+                    self._next_run[job.name] = now + job.interval_seconds
+                    await self._run_job(job)
+        finally:
+            renewer.cancel()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                self.is_leader = await self._acquire_lease()
+                metrics.set_gauge("scheduler_is_leader", 1 if self.is_leader else 0)
+                if self.is_leader:
+                    await self._run_due_jobs()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            await asyncio.sleep(settings.SCHEDULER_TICK_SECONDS)
+
+
+scheduler = Scheduler()
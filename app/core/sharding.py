@@ -0,0 +1,293 @@
+# app/core/sharding.py
+# Placement of companies on database shards, the company -> shard directory and
+# moving companies between shards. Sessions themselves come from app.database.
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from cachetools import TTLCache
+from fastapi import HTTPException, status
+from sqlalchemy import select, insert, delete, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+
+from app.core import metrics
+from app.core.config import settings
+from app.database import AsyncSessionLocal, Base, DEFAULT_SHARD, DIRECTORY_TABLES, is_sharded, shard_engines
+from app.models.companies import Companies
+from app.models.company_shards import CompanyShards
+from app.models.queued_tasks import QueuedTasks
+from app.models.users import Users
+
+logger = logging.getLogger(__name__)
+
+# company_id -> shard_name. Entries of companies being moved are never cached.
+_directory_cache: TTLCache = TTLCache(
+    maxsize=settings.SHARD_DIRECTORY_CACHE_SIZE, ttl=settings.SHARD_DIRECTORY_CACHE_TTL_SECONDS
+)
+
+# Company column of the tables that don't call it company_id
+_COMPANY_COLUMNS = {"companies": "company_id", "customers": "customer_to", "invoices": "owner_company"}
+
+# Placeholder password of the owner rows copied to shards; no hash ever matches it
+_SHARD_USER_PASSWORD = "!"
+
+
+class CompanyMove(NamedTuple):
+    company_id: str
+    source_shard: str
+    target_shard: str
+
+
+async def lookup_company_shard(company_id: str) -> Tuple[str, bool]:
+    """The company's shard and whether it is being moved, read from the directory."""
+    async with AsyncSessionLocal(DEFAULT_SHARD) as db:
+        result = await db.execute(
+            select(CompanyShards.shard_name, CompanyShards.is_moving).where(CompanyShards.company_id == company_id)
+        )
+        row = result.first()
+    if row is None:
+        # Companies created before sharding was set up
+        return DEFAULT_SHARD, False
+    return row.shard_name, row.is_moving
+
+
+async def moving_company_ids() -> List[str]:
+    """
+    Companies being moved between shards. Scheduled jobs and task workers leave them
+    alone until the move is done; they ask again for every batch, as a move can
+    start at any time.
+    """
+    if not is_sharded():
+        return []
+    async with AsyncSessionLocal(DEFAULT_SHARD) as db:
+        result = await db.execute(select(CompanyShards.company_id).where(CompanyShards.is_moving.is_(True)))
+        return list(result.scalars().all())
+
+
+async def resolve_company_shard(company_id: str) -> str:
+    """Shard to serve a request about the company on, refusing requests while it is moved."""
+    shard_name = _directory_cache.get(company_id)
+    if shard_name is not None:
+        return shard_name
+
+    metrics.increment("shard_directory_lookups_total")
+    shard_name, is_moving = await lookup_company_shard(company_id)
+    if is_moving:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="This company is being moved to another database; retry shortly.",
+            headers={"Retry-After": str(settings.SHARD_DIRECTORY_CACHE_TTL_SECONDS)}
+        )
+    if shard_name not in shard_engines:
+        logger.error("Company %s is on shard %s, which is not configured", company_id, shard_name)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="This company's database is not available."
+        )
+    _directory_cache[company_id] = shard_name
+    return shard_name
+
+
+async def _set_directory_entry(company_id: str, company_owner: str, shard_name: str, is_moving: bool = False) -> None:
+    async with AsyncSessionLocal(DEFAULT_SHARD) as db:
+        result = await db.execute(
+            update(CompanyShards)
+            .where(CompanyShards.company_id == company_id)
+            .values(shard_name=shard_name, is_moving=is_moving)
+        )
+        if not result.rowcount:
+            await db.execute(insert(CompanyShards).values(
+                company_id=company_id, company_owner=company_owner, shard_name=shard_name, is_moving=is_moving
+            ))
+        await db.commit()
+    _directory_cache.pop(company_id, None)
+
+
+async def register_company_shard(company_id: str, company_owner: str, shard_name: str) -> None:
+    """Record a new company's shard in the directory. Not needed without sharding."""
+    if is_sharded():
+        await _set_directory_entry(company_id, company_owner, shard_name)
+
+
+async def forget_company_shard(company_id: str) -> None:
+    if not is_sharded():
+        return
+    async with AsyncSessionLocal(DEFAULT_SHARD) as db:
+        await db.execute(delete(CompanyShards).where(CompanyShards.company_id == company_id))
+        await db.commit()
+    _directory_cache.pop(company_id, None)
+
+
+async def owner_company_shards(db: AsyncSession, user_id: str) -> List[str]:
+    """Shards holding any of the user's companies; always includes the default shard."""
+    if not is_sharded():
+        return [DEFAULT_SHARD]
+    result = await db.execute(
+        select(CompanyShards.shard_name).where(CompanyShards.company_owner == user_id).distinct()
+    )
+    shard_names = [DEFAULT_SHARD] + [name for name in result.scalars().all() if name != DEFAULT_SHARD]
+    return [name for name in shard_names if name in shard_engines]
+
+
+async def count_companies_per_shard() -> Dict[str, int]:
+    counts = {}
+    for shard_name in shard_engines:
+        async with AsyncSessionLocal(shard_name) as db:
+            counts[shard_name] = (await db.execute(select(func.count()).select_from(Companies))).scalar_one()
+    return counts
+
+
+async def choose_company_shard() -> str:
+    """Shard for a new company: NEW_COMPANY_SHARD if set, else the one holding the fewest companies."""
+    if not is_sharded():
+        return DEFAULT_SHARD
+    if settings.NEW_COMPANY_SHARD:
+        return settings.NEW_COMPANY_SHARD
+    counts = await count_companies_per_shard()
+    return min(counts, key=counts.get)
+
+
+async def ensure_user_on_shard(db: AsyncSession, shard_name: str, user: Users) -> None:
+    """
+    Copy the user's row to a shard, in `db`'s transaction, so the shard's foreign
+    keys to users hold. Logins only ever read the default database's users.
+    """
+    if shard_name == DEFAULT_SHARD:
+        return
+    # Users are bound to the default database; these statements target the shard itself
+    on_shard = {"bind": shard_engines[shard_name].sync_engine}
+    result = await db.execute(select(Users.user_id).where(Users.user_id == user.user_id), bind_arguments=on_shard)
+    if result.first() is None:
+        await db.execute(
+            insert(Users).values(
+                user_id=user.user_id,
+                user_name=user.user_name,
+                hashed_password=_SHARD_USER_PASSWORD,
+                created_at=user.created_at
+            ),
+            bind_arguments=on_shard
+        )
+
+
+def _company_condition(table, company_id: str):
+    """Condition selecting the company's rows of `table`, or None if it holds none."""
+    column_name = _COMPANY_COLUMNS.get(table.name, "company_id")
+    if column_name in table.c:
+        return table.c[column_name] == company_id
+    # Child tables (e.g. invoice_items) belong to the company through their parent
+    for foreign_key in sorted(table.foreign_keys, key=lambda fk: fk.parent.name):
+        parent = foreign_key.column.table
+        if parent is table or parent.name in DIRECTORY_TABLES:
+            continue
+        parent_condition = _company_condition(parent, company_id)
+        if parent_condition is not None:
+            return foreign_key.parent.in_(select(foreign_key.column).where(parent_condition))
+    return None
+
+
+def _company_tables(company_id: str):
+    """The company's tables in foreign key order, parents first, with their row conditions."""
+    for table in Base.metadata.sorted_tables:
+        if table.name in DIRECTORY_TABLES:
+            continue
+        condition = _company_condition(table, company_id)
+        if condition is not None:
+            yield table, condition
+
+
+async def _wait_for_running_tasks(shard_name: str, company_id: str) -> None:
+    """Wait until no task of the company runs on the shard; workers claim none while it is moving."""
+    while True:
+        async with AsyncSessionLocal(shard_name) as db:
+            result = await db.execute(
+                select(func.count()).select_from(QueuedTasks).where(
+                    QueuedTasks.company_id == company_id,
+                    QueuedTasks.task_status == "running",
+                    QueuedTasks.locked_until >= datetime.utcnow()
+                )
+            )
+            if not result.scalar_one():
+                return
+        await asyncio.sleep(1)
+
+
+async def migrate_company(company_id: str, target_shard: str) -> Dict[str, int]:
+    """
+    Move a company's rows to another shard. Requests about the company get 503 for
+    the duration: the directory marks it moving, and the copy starts once every
+    worker's directory cache has expired and the company's running tasks have
+    finished. Scheduled jobs and task workers skip the company while it is marked
+    moving. Rows, queued tasks included, are copied in one transaction on the
+    target and deleted from the source before the directory is switched.
+    Returns the rows copied per table.
+    """
+    if target_shard not in shard_engines:
+        raise ValueError(f"Unknown shard {target_shard}")
+    source_shard, is_moving = await lookup_company_shard(company_id)
+    if is_moving:
+        raise ValueError(f"Company {company_id} is already being moved")
+    if source_shard == target_shard:
+        return {}
+
+    async with AsyncSessionLocal(source_shard) as source_db:
+        company = await source_db.get(Companies, company_id, options=[noload("*")])
+        if company is None:
+            raise LookupError(f"Company {company_id} not found on shard {source_shard}")
+        company_owner = company.company_owner
+
+    await _set_directory_entry(company_id, company_owner, source_shard, is_moving=True)
+    copied: Dict[str, int] = {}
+    try:
+        await asyncio.sleep(settings.SHARD_DIRECTORY_CACHE_TTL_SECONDS)
+        await _wait_for_running_tasks(source_shard, company_id)
+        async with AsyncSessionLocal(source_shard) as source_db, AsyncSessionLocal(target_shard) as target_db:
+            owner = await source_db.get(Users, company_owner)
+            await ensure_user_on_shard(target_db, target_shard, owner)
+            for table, condition in _company_tables(company_id):
+                result = await source_db.stream(
+                    select(table).where(condition).execution_options(yield_per=settings.SHARD_MIGRATION_BATCH_SIZE)
+                )
+                copied[table.name] = 0
+                async for partition in result.mappings().partitions():
+                    await target_db.execute(insert(table), [dict(row) for row in partition])
+                    copied[table.name] += len(partition)
+            await target_db.commit()
+    except BaseException:
+        await _set_directory_entry(company_id, company_owner, source_shard, is_moving=False)
+        raise
+
+    try:
+        # Still marked moving, so no background job writes to the rows being deleted
+        async with AsyncSessionLocal(source_shard) as source_db:
+            for table, condition in reversed(list(_company_tables(company_id))):
+                await source_db.execute(delete(table).where(condition))
+            await source_db.commit()
+    finally:
+        # The target holds the company from here on, even if the source kept a stale copy
+        await _set_directory_entry(company_id, company_owner, target_shard, is_moving=False)
+    metrics.increment("shard_company_moves_total", source=source_shard, target=target_shard)
+    logger.info("Moved company %s from shard %s to %s: %s", company_id, source_shard, target_shard, copied)
+    return copied
+
+
+async def plan_rebalance(max_moves: Optional[int] = None) -> List[CompanyMove]:
+    """Moves that even out the number of companies per shard, to within one."""
+    companies: Dict[str, List[str]] = {}
+    for shard_name in shard_engines:
+        async with AsyncSessionLocal(shard_name) as db:
+            result = await db.execute(select(Companies.company_id).order_by(Companies.created_at.desc()))
+            companies[shard_name] = list(result.scalars().all())
+
+    moves: List[CompanyMove] = []
+    while max_moves is None or len(moves) < max_moves:
+        fullest = max(companies, key=lambda name: len(companies[name]))
+        emptiest = min(companies, key=lambda name: len(companies[name]))
+        if len(companies[fullest]) - len(companies[emptiest]) <= 1:
+            break
+        # Newest companies first: they tend to be the smallest to copy
+        company_id = companies[fullest].pop(0)
+        companies[emptiest].append(company_id)
+        moves.append(CompanyMove(company_id, fullest, emptiest))
+    return moves
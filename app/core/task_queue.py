@@ -0,0 +1,309 @@
+# app/core/task_queue.py
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import select, update, delete, func, and_, or_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.sharding import moving_company_ids
+from app.database import AsyncSessionLocal, shard_engines, use_shard
+from app.models.queued_tasks import QueuedTasks
+
+logger = logging.getLogger(__name__)
+
+TASK_QUEUED = "queued"
+TASK_RUNNING = "running"
+TASK_SUCCEEDED = "succeeded"
+TASK_FAILED = "failed"
+
+# Seconds between queue depth gauge refreshes
+DEPTH_REFRESH_SECONDS = 15
+
+TaskHandler = Callable[[dict], Awaitable[None]]
+
+_handlers: Dict[str, TaskHandler] = {}
+
+
+def task_handler(task_name: str) -> Callable[[TaskHandler], TaskHandler]:
+    """
+    Register the coroutine that runs tasks called `task_name`. It receives the task's
+    JSON payload; raising an exception fails the attempt and the task is retried.
+    Handlers may run more than once for a task, so they must be idempotent.
+    """
+    def register(handler: TaskHandler) -> TaskHandler:
+        _handlers[task_name] = handler
+        return handler
+    return register
+
+
+async def enqueue_task(
+    db: AsyncSession,
+    task_name: str,
+    payload: Optional[dict] = None,
+    delay_seconds: float = 0,
+    max_attempts: Optional[int] = None,
+    company_id: Optional[str] = None
+) -> QueuedTasks:
+    """
+    Queue a task in the caller's transaction. Workers only see it once that commits,
+    so a task is never run for a write that was rolled back. Pass the company a task
+    works on, so that it isn't run while the company is moved to another shard.
+    """
+    now = datetime.utcnow()
+    task = QueuedTasks(
+        task_id=str(uuid.uuid4()),
+        task_name=task_name,
+        payload=json.dumps(payload or {}),
+        company_id=company_id,
+        task_status=TASK_QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or settings.TASK_MAX_ATTEMPTS,
+        run_after=now + timedelta(seconds=delay_seconds),
+        enqueued_at=now
+    )
+    db.add(task)
+    metrics.increment("task_queue_enqueued_total", task=task_name)
+    return task
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    """Exponential backoff with jitter, so tasks failing together don't retry together."""
+    delay = min(settings.TASK_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.TASK_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def get_queue_depth(db: AsyncSession) -> Dict[str, Dict[str, int]]:
+    """Queued and running tasks per task name, e.g. {"queued": {"render_document_batch": 3}}."""
+    result = await db.execute(
+        select(QueuedTasks.task_status, QueuedTasks.task_name, func.count())
+        .where(QueuedTasks.task_status.in_((TASK_QUEUED, TASK_RUNNING)))
+        .group_by(QueuedTasks.task_status, QueuedTasks.task_name)
+    )
+    depth: Dict[str, Dict[str, int]] = {TASK_QUEUED: {}, TASK_RUNNING: {}}
+    for task_status, task_name, count in result.all():
+        depth[task_status][task_name] = count
+    return depth
+
+
+async def purge_finished_tasks(db: AsyncSession) -> int:
+    """Scheduled job: delete tasks that finished more than TASK_RETENTION_HOURS ago."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.TASK_RETENTION_HOURS)
+    result = await db.execute(
+        delete(QueuedTasks).where(
+            QueuedTasks.task_status.in_((TASK_SUCCEEDED, TASK_FAILED)),
+            QueuedTasks.finished_at < cutoff
+        )
+    )
+    await db.commit()
+    return result.rowcount
+
+
+class TaskWorker:
+    """
+    Claims due tasks from the queued_tasks table and runs up to `concurrency` of
+    them at a time. Any number of workers, in API processes or standalone, can share
+    the queue: a task is claimed by a conditional UPDATE, so only one worker gets it.
+    With several shards each has its own queue, polled in turn, and a task runs
+    on the shard it was queued on.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = concurrency or settings.TASK_WORKER_CONCURRENCY
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._depth_refreshed_at = 0.0
+        self._next_shard = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop claiming tasks and hand the running ones back to the queue."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        for running in list(self._running):
+            running.cancel()
+        await asyncio.gather(self._task, *self._running, return_exceptions=True)
+        self._task = None
+
+    def _claimable(self, now: datetime, moving_company_ids: List[str]):
+        # Due tasks, and running tasks whose worker stopped renewing the lock
+        claimable = or_(
+            and_(QueuedTasks.task_status == TASK_QUEUED, QueuedTasks.run_after <= now),
+            and_(QueuedTasks.task_status == TASK_RUNNING, QueuedTasks.locked_until < now)
+        )
+        if moving_company_ids:
+            # Tasks of companies being moved between shards wait, and are moved with them
+            claimable = and_(
+                claimable,
+                or_(QueuedTasks.company_id.is_(None), QueuedTasks.company_id.notin_(moving_company_ids))
+            )
+        return claimable
+
+    async def _claim(self, limit: int) -> List[Row]:
+        now = datetime.utcnow()
+        moving = await moving_company_ids()
+        async with AsyncSessionLocal() as db:
+            # SKIP LOCKED keeps workers from queueing behind each other on PostgreSQL;
+            # the conditional UPDATE is what guarantees a task is claimed only once.
+            candidates = await db.execute(
+                select(QueuedTasks.task_id)
+                .where(self._claimable(now, moving))
+                .order_by(QueuedTasks.run_after)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            task_ids = candidates.scalars().all()
+            if not task_ids:
+                await db.rollback()
+                return []
+            result = await db.execute(
+                update(QueuedTasks)
+                .where(QueuedTasks.task_id.in_(task_ids), self._claimable(now, moving))
+                .values(
+                    task_status=TASK_RUNNING,
+                    attempts=QueuedTasks.attempts + 1,
+                    locked_by=self.worker_id,
+                    locked_until=now + timedelta(seconds=settings.TASK_LOCK_SECONDS),
+                    started_at=now
+                )
+                .returning(
+                    QueuedTasks.task_id,
+                    QueuedTasks.task_name,
+                    QueuedTasks.payload,
+                    QueuedTasks.attempts,
+                    QueuedTasks.max_attempts,
+                    QueuedTasks.run_after
+                )
+                .execution_options(synchronize_session=False)
+            )
+            claimed = result.all()
+            await db.commit()
+            return claimed
+
+    async def _update_own_task(self, task_id: str, **values) -> None:
+        """Update a task this worker still holds; a worker that lost its lock changes nothing."""
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(QueuedTasks)
+                .where(QueuedTasks.task_id == task_id, QueuedTasks.locked_by == self.worker_id)
+                .values(**values)
+            )
+            await db.commit()
+
+    async def _renew_lock(self, task_id: str) -> None:
+        while True:
+            await asyncio.sleep(settings.TASK_LOCK_SECONDS / 3)
+            try:
+                await self._update_own_task(
+                    task_id, locked_until=datetime.utcnow() + timedelta(seconds=settings.TASK_LOCK_SECONDS)
+                )
+            except Exception:
+                logger.exception("Failed to renew the lock on task %s", task_id)
+
+    async def _run_task(self, task: Row) -> None:
+        metrics.observe(
+            "task_queue_wait_seconds", (datetime.utcnow() - task.run_after).total_seconds(), task=task.task_name
+        )
+        started = time.perf_counter()
+        renewer = asyncio.create_task(self._renew_lock(task.task_id))
+        outcome = "succeeded"
+        try:
+            handler = _handlers.get(task.task_name)
+            if handler is None:
+                raise LookupError(f"No handler is registered for task {task.task_name}")
+            await handler(json.loads(task.payload))
+            await self._update_own_task(
+                task.task_id, task_status=TASK_SUCCEEDED, locked_by=None, locked_until=None,
+                finished_at=datetime.utcnow()
+            )
+        except asyncio.CancelledError:
+            # Worker shutting down: return the task to the queue without using up an attempt
+            outcome = "released"
+            await asyncio.shield(self._update_own_task(
+                task.task_id, task_status=TASK_QUEUED, attempts=QueuedTasks.attempts - 1,
+                locked_by=None, locked_until=None
+            ))
+            raise
+        except Exception as e:
+            logger.exception("Task %s (%s) failed on attempt %s", task.task_id, task.task_name, task.attempts)
+            if task.attempts >= task.max_attempts:
+                outcome = "failed"
+                values = dict(task_status=TASK_FAILED, finished_at=datetime.utcnow())
+            else:
+                outcome = "retried"
+                values = dict(
+                    task_status=TASK_QUEUED,
+                    run_after=datetime.utcnow() + timedelta(seconds=retry_delay_seconds(task.attempts))
+                )
+            await self._update_own_task(
+                task.task_id, locked_by=None, locked_until=None, last_error=str(e)[:2000], **values
+            )
+        finally:
+            renewer.cancel()
+            metrics.increment("task_queue_runs_total", task=task.task_name, outcome=outcome)
+            metrics.observe("task_queue_run_seconds", time.perf_counter() - started, task=task.task_name)
+            self._wakeup.set()
+
+    async def _refresh_depth(self) -> None:
+        if time.monotonic() - self._depth_refreshed_at < DEPTH_REFRESH_SECONDS:
+            return
+        self._depth_refreshed_at = time.monotonic()
+        depth: Dict[str, Dict[str, int]] = {TASK_QUEUED: {}, TASK_RUNNING: {}}
+        for shard_name in shard_engines:
+            async with AsyncSessionLocal(shard_name) as db:
+                shard_depth = await get_queue_depth(db)
+            for task_status, by_name in shard_depth.items():
+                for task_name, count in by_name.items():
+                    depth[task_status][task_name] = depth[task_status].get(task_name, 0) + count
+        for task_status, by_name in depth.items():
+            for task_name in _handlers.keys() | by_name.keys():
+                metrics.set_gauge("task_queue_depth", by_name.get(task_name, 0), task=task_name, status=task_status)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                # Start at a different shard each poll so no shard's queue starves the others
+                shard_names = list(shard_engines)
+                self._next_shard = (self._next_shard + 1) % len(shard_names)
+                for shard_name in shard_names[self._next_shard:] + shard_names[:self._next_shard]:
+                    free = self.concurrency - len(self._running)
+                    if free <= 0:
+                        break
+                    with use_shard(shard_name):
+                        # Tasks copy this context, so their handlers' sessions are on this shard
+                        for task in await self._claim(free):
+                            running = asyncio.create_task(self._run_task(task))
+                            self._running.add(running)
+                            running.add_done_callback(self._running.discard)
+                metrics.set_gauge("task_queue_worker_busy", len(self._running))
+                await self._refresh_depth()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Task queue poll failed")
+            # Woken early when a running task finishes and frees a slot
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.TASK_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+task_worker = TaskWorker()
@@ -1,14 +1,44 @@
-from fastapi import FastAPI
-from app.database import Base, engine
+from fastapi import FastAPI, Depends
+from sqlalchemy import text
+from app.database import Base, shard_engines, PrimaryPinMiddleware
 from app.models.users import Users
 from app.models.companies import Companies
+from app.models.customers import Customers
 from app.models.products import Products
 from app.models.invoices import Invoices
 from app.models.invoice_items import InvoiceItems
-from app.api.endpoints import users, companies, customers, products, invoices
+from app.models.invoice_sequences import InvoiceNumberSequences
+from app.models.idempotency_keys import IdempotencyKeys
+from app.models.document_batches import DocumentBatchJobs
+from app.models.customer_ledger import CustomerLedgerEntries, CustomerBalances
+from app.models.payments import Payments, PaymentAllocations
+from app.models.scheduler_leases import SchedulerLeases
+from app.models.recurring_invoices import RecurringInvoiceTemplates, RecurringInvoiceTemplateItems
+from app.models.credit_notes import CreditNotes, CreditNoteItems
+from app.models.invoice_archives import InvoiceArchives
+from app.models.sales_rollups import SalesDailyRollups
+from app.models.queued_tasks import QueuedTasks
+from app.models.webhooks import WebhookSubscriptions, WebhookOutbox
+from app.models.changes import CompanyChangeCounters, ChangeLog
+from app.models.company_shards import CompanyShards
+from app.api.endpoints import users, companies, customers, products, invoices, document_batches, receivables, payments, metrics, recurring_invoices, invoice_archives, gst_returns, sales_analytics, webhooks, changes, events
+from app.core.config import settings
+from app.core.scheduler import scheduler
+from app.core.task_queue import task_worker, purge_finished_tasks
+from app.core.http_client import close_http_client
+from app.core.event_bus import event_bus
+from app.core.rate_limit import admit_request
+from app.core.compression import CompressionMiddleware
+from app.services.idempotency import purge_expired_idempotency_keys
+from app.services.invoice_status import mark_overdue_invoices
+from app.services.recurring_invoices import generate_all_recurring_invoices
+from app.services.invoice_archives import archive_closed_invoices
+from app.services.webhooks import relay_webhook_outbox
+from app.services.documents import shutdown_render_pool
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+# Every request is admitted by the per-tenant rate limiter first
+app = FastAPI(dependencies=[Depends(admit_request)])
 
 @app.get('/api')
 def test_route():
@@ -22,16 +52,74 @@ app.add_middleware(
     allow_methods=["*"],          # Allow all HTTP methods
     allow_headers=["*"],          # Allow all headers
 )
+app.add_middleware(PrimaryPinMiddleware)
+app.add_middleware(CompressionMiddleware)
 
 app.include_router(users.router, prefix='/api', tags=['Users'])
 app.include_router(companies.router, prefix='/api', tags=['Companies'])
 app.include_router(customers.router, prefix='/api', tags=['Customers'])
 app.include_router(products.router, prefix='/api', tags=['Products'])
+app.include_router(document_batches.router, prefix='/api', tags=['Invoice Documents'])
 app.include_router(invoices.router, prefix='/api', tags=['Invoices'])
+app.include_router(receivables.router, prefix='/api', tags=['Receivables'])
+app.include_router(payments.router, prefix='/api', tags=['Payments'])
+app.include_router(recurring_invoices.router, prefix='/api', tags=['Recurring Invoices'])
+app.include_router(invoice_archives.router, prefix='/api', tags=['Invoice Archives'])
+app.include_router(gst_returns.router, prefix='/api', tags=['GST Returns'])
+app.include_router(sales_analytics.router, prefix='/api', tags=['Sales Analytics'])
+app.include_router(webhooks.router, prefix='/api', tags=['Webhooks'])
+app.include_router(changes.router, prefix='/api', tags=['Changes'])
+app.include_router(events.router, prefix='/api', tags=['Events'])
+app.include_router(metrics.router, prefix='/api', tags=['Metrics'])
 # app.include_router(invoice_items., prefix='/api', tags=['Invoices'])
 
 @app.on_event('startup')
 async def create_db_tables():
-    async with engine.begin() as conn:
-        print("----&->   ", Base.metadata.tables.keys())
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+    for shard_engine in shard_engines.values():
+        async with shard_engine.begin() as conn:
+            print("----&->   ", Base.metadata.tables.keys())
+            if conn.dialect.name == 'postgresql':
+                # Trigram search indexes on customers and products need pg_trgm
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            await conn.run_sync(Base.metadata.create_all)
+
+@app.on_event('startup')
+async def start_scheduler():
+    if not settings.SCHEDULER_ENABLED:
+        return
+    scheduler.add_job("mark_overdue_invoices", settings.OVERDUE_CHECK_INTERVAL_SECONDS, mark_overdue_invoices)
+    scheduler.add_job("generate_recurring_invoices", settings.RECURRING_INVOICE_INTERVAL_SECONDS, generate_all_recurring_invoices)
+    scheduler.add_job("archive_closed_invoices", settings.INVOICE_ARCHIVE_INTERVAL_SECONDS, archive_closed_invoices)
+    scheduler.add_job("purge_expired_idempotency_keys", settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS, purge_expired_idempotency_keys)
+    scheduler.add_job("relay_webhook_outbox", settings.WEBHOOK_RELAY_INTERVAL_SECONDS, relay_webhook_outbox)
+    scheduler.add_job("purge_finished_tasks", settings.TASK_PURGE_INTERVAL_SECONDS, purge_finished_tasks)
+    scheduler.start()
+
+@app.on_event('startup')
+async def start_event_bus():
+    await event_bus.start()
+
+@app.on_event('startup')
+async def start_task_worker():
+    if settings.TASK_WORKER_ENABLED:
+        task_worker.start()
+
+@app.on_event('shutdown')
+async def stop_task_worker():
+    await task_worker.stop()
+
+@app.on_event('shutdown')
+async def stop_event_bus():
+    await event_bus.stop()
+
+@app.on_event('shutdown')
+async def close_outbound_http():
+    await close_http_client()
+
+@app.on_event('shutdown')
+async def stop_document_renderers():
+    shutdown_render_pool()
+
+@app.on_event('shutdown')
+async def stop_scheduler():
+    await scheduler.stop()
@@ -0,0 +1,30 @@
+# app/models/changes.py
+from sqlalchemy import Column, String, BigInteger, DateTime, ForeignKey, Index
+from app.database import Base
+
+class CompanyChangeCounters(Base):
+    """Last change sequence number handed out for a company"""
+
+    __tablename__ = 'company_change_counters'
+
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), primary_key=True)
+    last_sequence = Column(BigInteger, nullable=False, default=0)
+
+class ChangeLog(Base):
+    """
+    Latest change to each of a company's entities, for incremental sync. A new change
+    to an entity replaces its row, so the log stays compacted to one row per entity.
+    """
+
+    __tablename__ = 'change_log'
+    __table_args__ = (
+        # Serves the change feed: a company's changes after a sequence number, in order
+        Index('ix_change_log_company_id_sequence', 'company_id', 'sequence', unique=True),
+    )
+
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), primary_key=True)
+    entity_type = Column(String(20), primary_key=True) # company, customer, product, invoice
+    entity_id = Column(String(36), primary_key=True)
+    sequence = Column(BigInteger, nullable=False)
+    operation = Column(String(10), nullable=False) # upsert, delete
+    changed_at = Column(DateTime, nullable=False)
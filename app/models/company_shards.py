@@ -0,0 +1,17 @@
+# app/models/company_shards.py
+from sqlalchemy import Column, String, Boolean, DateTime, func
+from app.database import Base
+
+class CompanyShards(Base):
+    """
+    Directory entry naming the database shard that holds a company's data. Kept in
+    the default database; companies without an entry live on the default shard.
+    """
+
+    __tablename__ = 'company_shards'
+
+    company_id = Column(String(36), primary_key=True)
+    company_owner = Column(String(36), nullable=False, index=True) # Lists a user's companies across shards
+    shard_name = Column(String(100), nullable=False)
+    is_moving = Column(Boolean, nullable=False, default=False) # Requests are refused while the company is migrated
+    placed_at = Column(DateTime, nullable=False, server_default=func.now())
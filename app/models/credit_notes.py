@@ -0,0 +1,58 @@
+# app/models/credit_notes.py
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy.orm import relationship
+from app.database import Base
+from app.core.money import Money, Rate
+import uuid
+
+class CreditNotes(Base):
+    """Credit or debit note adjusting an issued invoice; the invoice's own lines are never changed"""
+
+    __tablename__ = 'credit_notes'
+    __table_args__ = (
+        UniqueConstraint('company_id', 'note_number', name='uq_credit_notes_company_id_note_number'),
+    )
+
+    note_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), nullable=False)
+    customer_id = Column(String(36), ForeignKey('customers.customer_id', ondelete='CASCADE'), nullable=False)
+    invoice_id = Column(String(36), ForeignKey('invoices.invoice_id', ondelete='CASCADE'), nullable=False, index=True)
+    note_type = Column(String(10), nullable=False) # "credit" lowers what the customer owes, "debit" raises it
+    note_number = Column(String(120), nullable=False) # e.g. "CN-2025-26/00042-1"
+    note_date = Column(DateTime, nullable=False)
+    note_reason = Column(Text, nullable=False)
+
+    note_subtotal = Column(Money, nullable=False, default=0)
+    note_total_cgst = Column(Money, nullable=False, default=0)
+    note_total_sgst = Column(Money, nullable=False, default=0)
+    note_total_igst = Column(Money, nullable=False, default=0)
+    note_total = Column(Money, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    items = relationship(
+        'CreditNoteItems',
+        back_populates='note',
+        lazy='selectin',
+        cascade='all, delete-orphan'
+    )
+
+class CreditNoteItems(Base):
+    """Line of a credit or debit note, taxed at the rates of the invoice item it adjusts"""
+
+    __tablename__ = 'credit_note_items'
+
+    note_item_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    note_id = Column(String(36), ForeignKey('credit_notes.note_id', ondelete='CASCADE'), nullable=False, index=True)
+    invoice_item_id = Column(String(36), ForeignKey('invoice_items.invoice_item_id', ondelete='RESTRICT'), nullable=False, index=True) # Lines a note adjusts can't be deleted
+    quantity = Column(Integer, nullable=True) # None for a change in value rather than in quantity
+    unit_price = Column(Money, nullable=False, default=0)
+    cgst_rate = Column(Rate, nullable=False, default=0)
+    sgst_rate = Column(Rate, nullable=False, default=0)
+    igst_rate = Column(Rate, nullable=False, default=0)
+    taxable_value = Column(Money, nullable=False, default=0)
+    cgst_amount = Column(Money, nullable=False, default=0)
+    sgst_amount = Column(Money, nullable=False, default=0)
+    igst_amount = Column(Money, nullable=False, default=0)
+    total_amount = Column(Money, nullable=False, default=0)
+
+    note = relationship('CreditNotes', back_populates='items')
@@ -0,0 +1,37 @@
+# app/models/customer_ledger.py
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, UniqueConstraint, func
+from app.database import Base
+from app.core.money import Money
+import uuid
+
+class CustomerLedgerEntries(Base):
+    """Append-only receivables ledger of a customer: invoices debit it, payments and credit notes credit it"""
+
+    __tablename__ = 'customer_ledger_entries'
+    __table_args__ = (
+        UniqueConstraint('company_id', 'customer_id', 'entry_sequence', name='uq_customer_ledger_entries_sequence'),
+    )
+
+    entry_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), nullable=False)
+    customer_id = Column(String(36), ForeignKey('customers.customer_id', ondelete='CASCADE'), nullable=False)
+    entry_sequence = Column(Integer, nullable=False) # 1, 2, 3... per customer, in posting order
+    entry_type = Column(String(20), nullable=False) # "invoice", "payment", "credit_note", "adjustment"
+    reference_id = Column(String(36), nullable=True) # Id of the invoice, payment or note that caused the entry
+    entry_date = Column(DateTime, nullable=False)
+    description = Column(Text, nullable=True)
+    debit = Column(Money, nullable=False, default=0)
+    credit = Column(Money, nullable=False, default=0)
+    running_balance = Column(Money, nullable=False) # Customer balance after this entry
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+class CustomerBalances(Base):
+    """Materialized current balance of a customer's ledger, advanced with every posting"""
+
+    __tablename__ = 'customer_balances'
+
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), primary_key=True)
+    customer_id = Column(String(36), ForeignKey('customers.customer_id', ondelete='CASCADE'), primary_key=True)
+    balance = Column(Money, nullable=False, default=0) # Positive when the customer owes the company
+    last_sequence = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
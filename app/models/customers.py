@@ -1,5 +1,5 @@
 # app/models/customers.py
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, func
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -7,6 +7,18 @@ import uuid
 
 class Customers(Base):
     __tablename__ = 'customers'
+    __table_args__ = (
+        Index('ix_customers_customer_to_customer_gstin', 'customer_to', 'customer_gstin'),
+        # Trigram indexes back customer search on PostgreSQL (needs the pg_trgm extension)
+        Index('ix_customers_customer_name_trgm', 'customer_name',
+              postgresql_using='gin', postgresql_ops={'customer_name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_customers_customer_email_trgm', 'customer_email',
+              postgresql_using='gin', postgresql_ops={'customer_email': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_customers_customer_city_trgm', 'customer_city',
+              postgresql_using='gin', postgresql_ops={'customer_city': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_customers_customer_gstin_trgm', 'customer_gstin',
+              postgresql_using='gin', postgresql_ops={'customer_gstin': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
     customer_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     customer_to = Column(String(36), ForeignKey("companies.company_id", ondelete="CASCADE"))
     customer_name = Column(String, nullable=False)
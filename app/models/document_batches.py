@@ -0,0 +1,24 @@
+# app/models/document_batches.py
+from sqlalchemy import Column, String, Integer, Text, Date, DateTime, ForeignKey, func
+from app.database import Base
+import uuid
+
+class DocumentBatchJobs(Base):
+    """Background job rendering all invoices of a company in a date range into one ZIP archive"""
+
+    __tablename__ = 'document_batch_jobs'
+
+    job_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), nullable=False, index=True)
+    requested_by = Column(String(36), ForeignKey('users.user_id', ondelete='SET NULL'), nullable=True)
+    date_from = Column(Date, nullable=False)
+    date_to = Column(Date, nullable=False)
+    document_format = Column(String(10), nullable=False, default='html')
+    job_status = Column(String(20), nullable=False, default='queued') # queued, running, completed, failed
+    total_invoices = Column(Integer, nullable=False, default=0)
+    rendered_invoices = Column(Integer, nullable=False, default=0)
+    archive_path = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
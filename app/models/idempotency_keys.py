@@ -0,0 +1,24 @@
+# app/models/idempotency_keys.py
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, UniqueConstraint, func
+from app.database import Base
+import uuid
+
+class IdempotencyKeys(Base):
+    """Stored outcome of a mutating request, replayed when the client retries with the same Idempotency-Key"""
+
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        UniqueConstraint('company_id', 'idempotency_key', name='uq_idempotency_keys_company_key'),
+    )
+
+    idempotency_key_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), nullable=False)
+    idempotency_key = Column(String(255), nullable=False)
+    request_method = Column(String(10), nullable=False)
+    request_path = Column(Text, nullable=False)
+    request_hash = Column(String(64), nullable=False) # sha256 of the request payload, to reject key reuse
+    response_status = Column(Integer, nullable=True) # NULL while the original request is still running
+    response_body = Column(Text, nullable=True)
+    locked_until = Column(DateTime, nullable=True) # Lease of the request running it; a retry takes over once it expires
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,23 @@
+# app/models/invoice_archives.py
+from sqlalchemy import Column, String, Integer, BigInteger, Text, DateTime, ForeignKey, Index, func
+from app.database import Base
+import uuid
+
+class InvoiceArchives(Base):
+    """Manifest of a compressed file holding invoices moved out of the database"""
+
+    __tablename__ = 'invoice_archives'
+    __table_args__ = (
+        Index('ix_invoice_archives_company_id_financial_year', 'company_id', 'financial_year'),
+    )
+
+    archive_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), nullable=False)
+    financial_year = Column(Integer, nullable=False)
+    archive_path = Column(Text, nullable=False) # gzip-compressed JSON Lines, one invoice with its items per line
+    invoice_count = Column(Integer, nullable=False)
+    first_invoice_date = Column(DateTime, nullable=False)
+    last_invoice_date = Column(DateTime, nullable=False)
+    archive_bytes = Column(BigInteger, nullable=False)
+    archive_sha256 = Column(String(64), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,23 +1,37 @@
 # app/models/invoice_items.py
 from app.database import Base
-from sqlalchemy import Column, String, ForeignKey, DateTime, Float, Integer, func
+from sqlalchemy import Column, String, ForeignKey, DateTime, Integer, Index, func
 from datetime import datetime
 from sqlalchemy.orm import relationship
+from app.core.money import Money, Rate
 import uuid
 
 class InvoiceItems(Base):
     __tablename__ = 'invoice_items'
+    __table_args__ = (
+        # Joins from invoices to their items, e.g. tax return aggregation by product
+        Index('ix_invoice_items_invoice_id_product_id', 'invoice_id', 'product_id'),
+    )
 
     invoice_id = Column(String(36), ForeignKey('invoices.invoice_id', ondelete='CASCADE'), nullable=False)
-    product_id = Column(String(36), ForeignKey('products.product_id', ondelete='CASCADE'), nullable=False)
+    product_id = Column(String(36), ForeignKey('products.product_id', ondelete='RESTRICT'), nullable=False) # Products on invoices can't be deleted
     invoice_item_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
 
     invoice_item_quantity = Column(Integer, nullable=False)
-    invoice_item_cgst_rate = Column(Float, default=0.0)
-    invoice_item_sgst_rate = Column(Float, default=0.0)
-    invoice_item_igst_rate = Column(Float, default=0.0)
+    invoice_item_cgst_rate = Column(Rate, default=0)
+    invoice_item_sgst_rate = Column(Rate, default=0)
+    invoice_item_igst_rate = Column(Rate, default=0)
+
+    # Amounts are snapshotted at invoicing time so later product price changes
+    # don't alter issued invoices and line totals can be summed in SQL.
+    invoice_item_unit_price = Column(Money, nullable=False, default=0)
+    invoice_item_taxable_value = Column(Money, nullable=False, default=0)
+    invoice_item_cgst_amount = Column(Money, nullable=False, default=0)
+    invoice_item_sgst_amount = Column(Money, nullable=False, default=0)
+    invoice_item_igst_amount = Column(Money, nullable=False, default=0)
+    invoice_item_total_amount = Column(Money, nullable=False, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relationships
     invoice = relationship('Invoices', back_populates='invoice_items', lazy='selectin')
-    product = relationship('Products', back_populates='invoice_items', lazy='selectin')
\ No newline at end of file
+    product = relationship('Products', back_populates='invoice_items', lazy='selectin')
@@ -0,0 +1,13 @@
+# app/models/invoice_sequences.py
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, func
+from app.database import Base
+
+class InvoiceNumberSequences(Base):
+    """Per-company, per-financial-year counter used to allocate invoice numbers"""
+
+    __tablename__ = 'invoice_number_sequences'
+
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), primary_key=True)
+    financial_year = Column(Integer, primary_key=True) # Calendar year the financial year starts in
+    next_number = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
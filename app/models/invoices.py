@@ -1,12 +1,38 @@
 # app/models/invoices.py
 from app.database import Base
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Float, func
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, Index, UniqueConstraint, Enum, func, text, literal_column
 from datetime import datetime
 from sqlalchemy.orm import relationship
+from app.core.money import Money
+from app.core.invoice_status import InvoiceStatus
 import uuid
 
 class Invoices(Base):
     __tablename__ = 'invoices'
+    __table_args__ = (
+        UniqueConstraint('owner_company', 'invoice_number', name='uq_invoices_owner_company_invoice_number'),
+        # A recurring template generates at most one invoice per period
+        UniqueConstraint('recurring_template_id', 'recurring_period_date', name='uq_invoices_recurring_template_period'),
+        # Invoice search: number prefix, amount range and status within a company
+        Index('ix_invoices_owner_company_invoice_number_pattern', 'owner_company', 'invoice_number',
+              postgresql_ops={'invoice_number': 'text_pattern_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_invoices_owner_company_invoice_total', 'owner_company', 'invoice_total'),
+        Index('ix_invoices_owner_company_invoice_status_invoice_due_date', 'owner_company', 'invoice_status', 'invoice_due_date'),
+        # Overdue detection across all companies
+        Index('ix_invoices_invoice_status_invoice_due_date', 'invoice_status', 'invoice_due_date'),
+        Index('ix_invoices_owner_company_invoice_date', 'owner_company', 'invoice_date'),
+        # Invoice listings skip cancelled invoices, so they are left out of these indexes
+        # and the archive of cancellations doesn't slow listings down. See ACTIVE_INVOICES.
+        Index('ix_invoices_owner_company_invoice_date_active', 'owner_company', 'invoice_date',
+              postgresql_where=text("invoice_status <> 'cancelled'"),
+              sqlite_where=text("invoice_status <> 'cancelled'")),
+        Index('ix_invoices_customer_company_invoice_date_active', 'customer_company', 'invoice_date',
+              postgresql_where=text("invoice_status <> 'cancelled'"),
+              sqlite_where=text("invoice_status <> 'cancelled'")),
+        # Receivables aging per customer
+        Index('ix_invoices_owner_company_customer_company_invoice_due_date',
+              'owner_company', 'customer_company', 'invoice_due_date'),
+    )
 
     invoice_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
     owner_company = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), nullable=False)
@@ -19,16 +45,29 @@ class Invoices(Base):
     invoice_place_of_supply = Column(String(100), nullable=False)
     invoice_notes = Column(Text, nullable=False)
 
-    invoice_subtotal = Column(Float, nullable=False, default=0.0)
-    invoice_total_cgst = Column(Float, nullable=False, default=0.0)
-    invoice_total_sgst = Column(Float, nullable=False, default=0.0)
-    invoice_total_igst = Column(Float, nullable=False, default=0.0)
-    invoice_total = Column(Float, nullable=False, default=0.0)
+    invoice_subtotal = Column(Money, nullable=False, default=0)
+    invoice_total_cgst = Column(Money, nullable=False, default=0)
+    invoice_total_sgst = Column(Money, nullable=False, default=0)
+    invoice_total_igst = Column(Money, nullable=False, default=0)
+    invoice_total = Column(Money, nullable=False, default=0)
+    invoice_amount_paid = Column(Money, nullable=False, default=0)
+    invoice_amount_credited = Column(Money, nullable=False, default=0) # Total of credit notes against the invoice
+    invoice_amount_debited = Column(Money, nullable=False, default=0) # Total of debit notes against the invoice
+    invoice_balance_due = Column(Money, nullable=False, default=0) # invoice_total plus debit notes, less payments and credit notes
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # New fields for production standard
-    invoice_status = Column(String(50), nullable=False, default="pending") # e.g., "pending", "paid", "partially paid", "cancelled"
+    # Stored as a short string rather than a native enum type so states can be added without a migration
+    invoice_status = Column(
+        Enum(InvoiceStatus, native_enum=False, length=20, values_callable=lambda statuses: [s.value for s in statuses]),
+        nullable=False,
+        default=InvoiceStatus.issued
+    ) # Changed only through the status transitions in app.core.invoice_status
     user_reference_notes = Column(Text, nullable=True) # Internal notes for user reference, not for invoice form
+    invoice_version = Column(Integer, nullable=False, default=1) # Bumped on every change; keys cached documents
+    invoice_cancelled_at = Column(DateTime, nullable=True) # Cancelled invoices are kept, never deleted
+    recurring_template_id = Column(String(36), ForeignKey('recurring_invoice_templates.template_id', ondelete='SET NULL'), nullable=True)
+    recurring_period_date = Column(DateTime, nullable=True) # Schedule date this invoice was generated for
 
     # Relationships:
     owner_company_rel = relationship(
@@ -50,4 +89,21 @@ class Invoices(Base):
         back_populates='invoice',
         lazy='selectin',
         cascade='all, delete-orphan' # Ensure items are deleted with invoice
-    )
\ No newline at end of file
+    )
+
+
+# Filter for listings that leave out cancelled invoices. It compares against a literal,
+# not a bound parameter, so PostgreSQL can match it to the partial indexes' predicate.
+ACTIVE_INVOICES = Invoices.invoice_status != literal_column("'cancelled'")
+
+
+# Full-text search over invoice notes on PostgreSQL. The text search configuration is
+# a literal rather than a bound parameter, so the index DDL can render it and search
+# queries use the very expression the index is built on.
+INVOICE_NOTES_DOCUMENT = func.to_tsvector(text("'simple'"), Invoices.invoice_notes)
+
+Index(
+    'ix_invoices_invoice_notes_fts',
+    INVOICE_NOTES_DOCUMENT,
+    postgresql_using='gin'
+).ddl_if(dialect='postgresql')
@@ -0,0 +1,48 @@
+# app/models/payments.py
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index, UniqueConstraint, func
+from sqlalchemy.orm import relationship
+from app.database import Base
+from app.core.money import Money
+import uuid
+
+class Payments(Base):
+    """Money received from a customer, allocated across one or more of their invoices"""
+
+    __tablename__ = 'payments'
+    __table_args__ = (
+        # Lets a bank statement line be recorded only once
+        UniqueConstraint('company_id', 'payment_reference', name='uq_payments_company_reference'),
+        Index('ix_payments_company_id_customer_id_payment_date', 'company_id', 'customer_id', 'payment_date'),
+    )
+
+    payment_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), nullable=False)
+    customer_id = Column(String(36), ForeignKey('customers.customer_id', ondelete='CASCADE'), nullable=False)
+    payment_date = Column(DateTime, nullable=False)
+    payment_amount = Column(Money, nullable=False)
+    payment_method = Column(String(30), nullable=False, default='bank_transfer') # e.g. "bank_transfer", "upi", "cheque", "cash"
+    payment_reference = Column(String(100), nullable=True) # Bank/UTR reference
+    payment_notes = Column(Text, nullable=True)
+    amount_allocated = Column(Money, nullable=False, default=0)
+    amount_unallocated = Column(Money, nullable=False, default=0) # Held on account as customer credit
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    allocations = relationship(
+        'PaymentAllocations',
+        back_populates='payment',
+        lazy='selectin',
+        cascade='all, delete-orphan'
+    )
+
+class PaymentAllocations(Base):
+    """Part of a payment applied to a single invoice"""
+
+    __tablename__ = 'payment_allocations'
+
+    allocation_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    payment_id = Column(String(36), ForeignKey('payments.payment_id', ondelete='CASCADE'), nullable=False, index=True)
+    invoice_id = Column(String(36), ForeignKey('invoices.invoice_id', ondelete='CASCADE'), nullable=False, index=True)
+    allocation_amount = Column(Money, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    payment = relationship('Payments', back_populates='allocations')
@@ -1,24 +1,35 @@
 # app/models/products.py
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Float, func
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.core.money import Money, Rate
 from datetime import datetime
 import uuid
 
 class Products(Base):
     __tablename__ = 'products'
+    __table_args__ = (
+        # Names are unique per company, for products created one at a time and imported alike
+        UniqueConstraint('company_id', 'product_name', name='uq_products_company_id_product_name'),
+        # Trigram indexes back product search on PostgreSQL (needs the pg_trgm extension)
+        Index('ix_products_product_name_trgm', 'product_name',
+              postgresql_using='gin', postgresql_ops={'product_name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_products_product_hsn_sac_code_trgm', 'product_hsn_sac_code',
+              postgresql_using='gin', postgresql_ops={'product_hsn_sac_code': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
     company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'))
     product_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     product_name = Column(String, nullable=False)
     product_description = Column(Text, nullable=False)
     product_hsn_sac_code = Column(String, nullable=False)
     product_unit_of_measure = Column(String, nullable=False, default='set')
-    product_unit_price = Column(Float, nullable=False)
-    product_default_cgst_rate = Column(Float, nullable=False)
-    product_default_sgst_rate = Column(Float, nullable=False)
-    product_default_igst_rate = Column(Float, nullable=False)
+    product_unit_price = Column(Money, nullable=False)
+    product_default_cgst_rate = Column(Rate, nullable=False)
+    product_default_sgst_rate = Column(Rate, nullable=False)
+    product_default_igst_rate = Column(Rate, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     product_by = relationship('Companies', back_populates='products')
     # Relationship to InvoiceItems for products included in invoices
-    invoice_items = relationship('InvoiceItems', back_populates='product', lazy='selectin')
\ No newline at end of file
+    # The database refuses to delete a product invoice lines still use, rather than the ORM clearing their product_id
+    invoice_items = relationship('InvoiceItems', back_populates='product', lazy='selectin', passive_deletes='all')
\ No newline at end of file
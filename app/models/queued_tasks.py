@@ -0,0 +1,30 @@
+# app/models/queued_tasks.py
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, Index, func
+from app.database import Base
+import uuid
+
+class QueuedTasks(Base):
+    """Durable background task, claimed and run by a task queue worker"""
+
+    __tablename__ = 'queued_tasks'
+    __table_args__ = (
+        # Serves the workers' claim query and the queue depth gauges
+        Index('ix_queued_tasks_task_status_run_after', 'task_status', 'run_after'),
+    )
+
+    task_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    task_name = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False, default='{}') # JSON arguments for the task handler
+    # Company the task works for, if any: its tasks wait while it is moved between shards, and move with it
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), nullable=True, index=True)
+    task_status = Column(String(20), nullable=False, default='queued') # queued, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(DateTime, nullable=False) # Not claimed before this time; pushed back on retry
+    locked_by = Column(String(255), nullable=True) # host:pid:random of the worker running the task
+    locked_until = Column(DateTime, nullable=True) # Reclaimed by another worker if not renewed in time
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    enqueued_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
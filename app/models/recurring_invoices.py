@@ -0,0 +1,63 @@
+# app/models/recurring_invoices.py
+from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, ForeignKey, Index, Enum, func
+from sqlalchemy.orm import relationship
+from app.database import Base
+from app.core.invoice_status import InvoiceStatus
+import uuid
+
+class RecurringInvoiceTemplates(Base):
+    """Invoice issued to a customer on a schedule, e.g. a monthly retainer"""
+
+    __tablename__ = 'recurring_invoice_templates'
+    __table_args__ = (
+        # Finds the templates due for generation
+        Index('ix_recurring_invoice_templates_is_active_next_run_date', 'is_active', 'next_run_date'),
+    )
+
+    template_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), nullable=False, index=True)
+    customer_id = Column(String(36), ForeignKey('customers.customer_id', ondelete='CASCADE'), nullable=False)
+    template_name = Column(String(100), nullable=False)
+
+    # Schedule: an invoice every `interval_count` units of `frequency`, starting on start_date.
+    # Period n falls on start_date + n intervals, so month-end dates don't drift.
+    frequency = Column(String(10), nullable=False, default='monthly') # weekly, monthly, quarterly, yearly
+    interval_count = Column(Integer, nullable=False, default=1)
+    start_date = Column(DateTime, nullable=False)
+    end_date = Column(DateTime, nullable=True) # Last date an invoice may be generated for
+    periods_generated = Column(Integer, nullable=False, default=0)
+    next_run_date = Column(DateTime, nullable=True) # None once the schedule has ended
+    last_generated_at = Column(DateTime, nullable=True)
+    is_active = Column(Boolean, nullable=False, default=True)
+
+    # Copied onto every generated invoice
+    due_in_days = Column(Integer, nullable=False, default=30)
+    invoice_terms = Column(Text, nullable=False)
+    invoice_place_of_supply = Column(String(100), nullable=False)
+    invoice_notes = Column(Text, nullable=False)
+    user_reference_notes = Column(Text, nullable=True)
+    invoice_status = Column(
+        Enum(InvoiceStatus, native_enum=False, length=20, values_callable=lambda statuses: [s.value for s in statuses]),
+        nullable=False,
+        default=InvoiceStatus.issued
+    )
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    items = relationship(
+        'RecurringInvoiceTemplateItems',
+        back_populates='template',
+        lazy='selectin',
+        cascade='all, delete-orphan'
+    )
+
+class RecurringInvoiceTemplateItems(Base):
+    """Product line of a recurring invoice; priced when each invoice is generated"""
+
+    __tablename__ = 'recurring_invoice_template_items'
+
+    template_item_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    template_id = Column(String(36), ForeignKey('recurring_invoice_templates.template_id', ondelete='CASCADE'), nullable=False, index=True)
+    product_id = Column(String(36), ForeignKey('products.product_id', ondelete='CASCADE'), nullable=False)
+    quantity = Column(Integer, nullable=False)
+
+    template = relationship('RecurringInvoiceTemplates', back_populates='items')
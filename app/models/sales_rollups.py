@@ -0,0 +1,31 @@
+# app/models/sales_rollups.py
+from sqlalchemy import Column, String, Date, BigInteger, Integer, ForeignKey, Index
+from app.database import Base
+from app.core.money import Money, Rate
+
+class SalesDailyRollups(Base):
+    """
+    Sales of a product on one day at one tax rate, pre-aggregated from invoice items
+    and credit/debit notes as they are written, for sales analytics
+    """
+
+    __tablename__ = 'sales_daily_rollups'
+    __table_args__ = (
+        Index('ix_sales_daily_rollups_company_id_sales_date', 'company_id', 'sales_date'),
+    )
+
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), primary_key=True)
+    sales_date = Column(Date, primary_key=True)
+    product_id = Column(String(36), ForeignKey('products.product_id', ondelete='CASCADE'), primary_key=True)
+    hsn_sac_code = Column(String, primary_key=True) # Product's code when sold
+    igst_rate = Column(Rate, primary_key=True)
+    cgst_rate = Column(Rate, primary_key=True)
+    sgst_rate = Column(Rate, primary_key=True)
+
+    quantity = Column(BigInteger, nullable=False, default=0)
+    taxable_value = Column(Money, nullable=False, default=0)
+    igst_amount = Column(Money, nullable=False, default=0)
+    cgst_amount = Column(Money, nullable=False, default=0)
+    sgst_amount = Column(Money, nullable=False, default=0)
+    total_amount = Column(Money, nullable=False, default=0)
+    line_count = Column(Integer, nullable=False, default=0) # Invoice lines less credited lines
@@ -0,0 +1,12 @@
+# app/models/scheduler_leases.py
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+
+class SchedulerLeases(Base):
+    """Time-limited lease naming the worker allowed to run the background scheduler"""
+
+    __tablename__ = 'scheduler_leases'
+
+    lease_name = Column(String(100), primary_key=True)
+    holder_id = Column(String(255), nullable=False) # host:pid:random of the worker holding the lease
+    expires_at = Column(DateTime, nullable=False)
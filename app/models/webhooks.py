@@ -0,0 +1,40 @@
+# app/models/webhooks.py
+from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, ForeignKey, Index, func
+from app.database import Base
+from datetime import datetime
+import uuid
+
+class WebhookSubscriptions(Base):
+    """Endpoint of a company's integration that is sent its invoice events"""
+
+    __tablename__ = 'webhook_subscriptions'
+
+    subscription_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), nullable=False, index=True)
+    target_url = Column(Text, nullable=False)
+    secret = Column(String(64), nullable=False) # Signs deliveries; shown to the company once, on creation
+    event_types = Column(Text, nullable=False) # Comma-separated, e.g. "invoice.created,invoice.updated"
+    description = Column(Text, nullable=True)
+    is_active = Column(Boolean, nullable=False, default=True)
+    consecutive_failures = Column(Integer, nullable=False, default=0) # Failed attempts since the last delivery
+    last_delivery_at = Column(DateTime, nullable=True)
+    last_failure_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+class WebhookOutbox(Base):
+    """
+    Invoice event waiting to be relayed to webhook subscriptions, written in the
+    transaction that changed the invoice
+    """
+
+    __tablename__ = 'webhook_outbox'
+    __table_args__ = (
+        Index('ix_webhook_outbox_created_at', 'created_at'),
+    )
+
+    event_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String(36), ForeignKey('companies.company_id', ondelete='CASCADE'), nullable=False)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False) # JSON event body as delivered
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
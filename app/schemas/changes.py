@@ -0,0 +1,42 @@
+# app/schemas/changes.py
+from pydantic import BaseModel, Field
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from app.schemas.common import APIResponse
+from app.schemas.companies import CompanyOut
+from app.schemas.customers import CustomerOut
+from app.schemas.products import ProductOut
+from app.schemas.invoices import InvoiceOut
+
+class ChangeEntityType(str, Enum):
+    company = "company"
+    customer = "customer"
+    product = "product"
+    invoice = "invoice"
+
+class ChangeOperation(str, Enum):
+    upsert = "upsert" # Created or changed; the entity's current state is included
+    delete = "delete"
+
+class ChangeOut(BaseModel):
+    sequence: int
+    entity_type: ChangeEntityType
+    entity_id: str
+    operation: ChangeOperation
+    changed_at: datetime
+    # The one matching entity_type is set for upserts
+    company: Optional[CompanyOut] = None
+    customer: Optional[CustomerOut] = None
+    product: Optional[ProductOut] = None
+    invoice: Optional[InvoiceOut] = None
+
+class ChangePageOut(BaseModel):
+    changes: List[ChangeOut]
+    next_since: int = Field(..., description="Pass as `since` to fetch the next page or, later, newer changes.")
+    has_more: bool
+
+class ChangePageResponse(APIResponse[ChangePageOut]):
+    """Response model for a page of the change feed."""
+    pass
@@ -0,0 +1,78 @@
+# app/schemas/credit_notes.py
+from pydantic import BaseModel, Field, condecimal, root_validator
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from app.schemas.common import APIResponse
+from app.core.money import MoneyAmount, TaxRate
+
+class NoteType(str, Enum):
+    credit = "credit" # Goods returned or price reduced; lowers what the customer owes
+    debit = "debit" # Additional charge on the invoice; raises what the customer owes
+
+class CreditNoteLineInput(BaseModel):
+    invoice_item_id: str
+    quantity: Optional[int] = Field(None, gt=0, description="Units returned (credit) or additionally supplied (debit).")
+    taxable_value: Optional[condecimal(gt=0, max_digits=14, decimal_places=2)] = Field(
+        None, description="Change in value before tax, for price adjustments that don't change the quantity."
+    )
+
+    @root_validator(skip_on_failure=True)
+    def check_quantity_or_value(cls, values):
+        if (values.get("quantity") is None) == (values.get("taxable_value") is None):
+            raise ValueError("give either quantity or taxable_value")
+        return values
+
+class CreateCreditNote(BaseModel):
+    note_type: NoteType = NoteType.credit
+    note_date: Optional[datetime] = Field(None, description="Defaults to now.")
+    note_reason: str = Field(..., min_length=1)
+    items: List[CreditNoteLineInput] = Field(..., min_items=1)
+
+class CreditNoteItemOut(BaseModel):
+    note_item_id: str
+    invoice_item_id: str
+    quantity: Optional[int] = None
+    unit_price: MoneyAmount
+    cgst_rate: TaxRate
+    sgst_rate: TaxRate
+    igst_rate: TaxRate
+    taxable_value: MoneyAmount
+    cgst_amount: MoneyAmount
+    sgst_amount: MoneyAmount
+    igst_amount: MoneyAmount
+    total_amount: MoneyAmount
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class CreditNoteOut(BaseModel):
+    note_id: str
+    company_id: str
+    customer_id: str
+    invoice_id: str
+    note_type: NoteType
+    note_number: str
+    note_date: datetime
+    note_reason: str
+    note_subtotal: MoneyAmount
+    note_total_cgst: MoneyAmount
+    note_total_sgst: MoneyAmount
+    note_total_igst: MoneyAmount
+    note_total: MoneyAmount
+    created_at: datetime
+    items: List[CreditNoteItemOut] = []
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class SingleCreditNoteResponse(APIResponse[CreditNoteOut]):
+    """Response model for a single credit or debit note."""
+    pass
+
+class ListCreditNoteResponse(APIResponse[List[CreditNoteOut]]):
+    """Response model for a list of credit and debit notes."""
+    pass
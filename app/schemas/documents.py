@@ -0,0 +1,49 @@
+# app/schemas/documents.py
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from enum import Enum
+from typing import Optional
+
+from app.schemas.common import APIResponse
+
+
+class DocumentFormat(str, Enum):
+    html = "html"
+    pdf = "pdf"
+
+
+DOCUMENT_MEDIA_TYPES = {
+    DocumentFormat.html: "text/html; charset=utf-8",
+    DocumentFormat.pdf: "application/pdf",
+}
+
+
+class CreateDocumentBatch(BaseModel):
+    date_from: date
+    date_to: date = Field(..., description="Inclusive end of the invoice date range.")
+    document_format: DocumentFormat = DocumentFormat.html
+
+
+class DocumentBatchJobOut(BaseModel):
+    job_id: str
+    company_id: str
+    date_from: date
+    date_to: date
+    document_format: DocumentFormat
+    job_status: str
+    total_invoices: int
+    rendered_invoices: int
+    progress_percent: float
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+
+class SingleDocumentBatchJobResponse(APIResponse[DocumentBatchJobOut]):
+    """Response model for a document batch job."""
+    pass
@@ -0,0 +1,15 @@
+# app/schemas/gst_returns.py
+from enum import Enum
+
+
+class ReturnFormat(str, Enum):
+    json = "json"
+    csv = "csv"
+
+
+class Gstr1Section(str, Enum):
+    b2b = "b2b" # Invoices to registered customers, by customer GSTIN
+    b2cs = "b2cs" # Supplies to unregistered customers, by place of supply
+    cdnr = "cdnr" # Credit and debit notes to registered customers
+    hsn = "hsn" # Summary by HSN/SAC code
+    supply_summary = "supply_summary" # Intra- vs inter-state totals
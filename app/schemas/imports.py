@@ -0,0 +1,22 @@
+# app/schemas/imports.py
+from pydantic import BaseModel
+from typing import List
+
+from app.schemas.common import APIResponse
+
+class ImportRowError(BaseModel):
+    row: int # Row number in the uploaded file, the header being row 1
+    errors: List[str]
+
+class ImportReport(BaseModel):
+    total_rows: int
+    imported_rows: int
+    failed_rows: int
+    duration_seconds: float
+    rows_per_second: float
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False # True when more rows failed than are listed in errors
+
+class SingleImportReportResponse(APIResponse[ImportReport]):
+    """Response model for a bulk import report."""
+    pass
@@ -0,0 +1,25 @@
+# app/schemas/invoice_archives.py
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List
+
+from app.schemas.common import APIResponse
+
+class InvoiceArchiveOut(BaseModel):
+    archive_id: str
+    company_id: str
+    financial_year: int
+    invoice_count: int
+    first_invoice_date: datetime
+    last_invoice_date: datetime
+    archive_bytes: int
+    archive_sha256: str
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class ListInvoiceArchiveResponse(APIResponse[List[InvoiceArchiveOut]]):
+    """Response model for a list of invoice archives."""
+    pass
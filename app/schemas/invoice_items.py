@@ -4,22 +4,23 @@ from datetime import datetime
 from typing import Optional
 
 from app.schemas.products import ProductOut
+from app.core.money import MoneyAmount, TaxRate
 
 class InvoiceItemOut(BaseModel):
     invoice_item_id: str
     invoice_id: str
     product_id: str
     invoice_item_quantity: int
-    invoice_item_cgst_rate: float
-    invoice_item_sgst_rate: float
-    invoice_item_igst_rate: float # Added for IGST
+    invoice_item_cgst_rate: TaxRate
+    invoice_item_sgst_rate: TaxRate
+    invoice_item_igst_rate: TaxRate # Added for IGST
     # Calculated fields for output only
-    invoice_item_unit_price: float
-    invoice_item_total_amount_before_tax: float
-    invoice_item_cgst_amount: float
-    invoice_item_sgst_amount: float
-    invoice_item_igst_amount: float # Added for IGST amount
-    invoice_item_total_amount: float
+    invoice_item_unit_price: MoneyAmount
+    invoice_item_total_amount_before_tax: MoneyAmount
+    invoice_item_cgst_amount: MoneyAmount
+    invoice_item_sgst_amount: MoneyAmount
+    invoice_item_igst_amount: MoneyAmount # Added for IGST amount
+    invoice_item_total_amount: MoneyAmount
     created_at: datetime
     product: Optional[ProductOut] = None # UNCOMMENT THIS LINE
 
@@ -224,7 +224,7 @@
 #     pass
 
 # app/schemas/invoices.py
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from datetime import datetime
 from typing import List, Optional
 
@@ -233,6 +233,8 @@ from app.schemas.companies import CompanyOut
 from app.schemas.customers import CustomerOut
 from app.schemas.products import ProductOut
 from app.schemas.invoice_items import InvoiceItemOut
+from app.core.money import MoneyAmount, TaxRate
+from app.core.invoice_status import InvoiceStatus, INITIAL_INVOICE_STATUSES
 
 # Schema for creating/updating invoice items within an invoice
 class InvoiceItemInput(BaseModel):
@@ -246,7 +248,7 @@ class InvoiceItemInput(BaseModel):
 class CreateInvoiceWithItems(BaseModel):
     owner_company: str
     customer_company: str
-    invoice_number: str
+    invoice_number: Optional[str] = Field(None, description="Leave empty to have the next number in the company's financial year sequence allocated.")
     invoice_date: datetime
     invoice_due_date: datetime
     invoice_terms: str
@@ -255,9 +257,15 @@ class CreateInvoiceWithItems(BaseModel):
     invoice_items: List[InvoiceItemInput] = Field(..., description="An invoice must have at least one item.")
 
     # New fields for creation
-    invoice_status: str = Field("pending", description="Current status of the invoice (e.g., pending, paid, partially paid).")
+    invoice_status: InvoiceStatus = Field(InvoiceStatus.issued, description="Create as draft or issued; later changes go through the status endpoint.")
     user_reference_notes: Optional[str] = Field(None, description="Internal notes for user reference, not displayed on invoice.")
 
+    @validator("invoice_status")
+    def check_initial_status(cls, value):
+        if value not in INITIAL_INVOICE_STATUSES:
+            raise ValueError("an invoice can only be created as draft or issued")
+        return value
+
     class Config:
         from_attributes = True
 
@@ -271,7 +279,6 @@ class UpdateInvoice(BaseModel):
     invoice_notes: Optional[str] = None
 
     # New fields for update
-    invoice_status: Optional[str] = None
     user_reference_notes: Optional[str] = None
     
     # Add invoice_items for updating quantities
@@ -286,16 +293,16 @@ class InvoiceItemOut(BaseModel):
     invoice_id: str
     product_id: str
     invoice_item_quantity: int
-    invoice_item_cgst_rate: float
-    invoice_item_sgst_rate: float
-    invoice_item_igst_rate: float
+    invoice_item_cgst_rate: TaxRate
+    invoice_item_sgst_rate: TaxRate
+    invoice_item_igst_rate: TaxRate
     # Calculated fields for output only
-    invoice_item_unit_price: float
-    invoice_item_total_amount_before_tax: float
-    invoice_item_cgst_amount: float
-    invoice_item_sgst_amount: float
-    invoice_item_igst_amount: float
-    invoice_item_total_amount: float
+    invoice_item_unit_price: MoneyAmount
+    invoice_item_total_amount_before_tax: MoneyAmount
+    invoice_item_cgst_amount: MoneyAmount
+    invoice_item_sgst_amount: MoneyAmount
+    invoice_item_igst_amount: MoneyAmount
+    invoice_item_total_amount: MoneyAmount
     created_at: datetime
     product: Optional[ProductOut] = None
 
@@ -313,16 +320,22 @@ class InvoiceOut(BaseModel):
     invoice_terms: str
     invoice_place_of_supply: str
     invoice_notes: str
-    invoice_subtotal: float
-    invoice_total_cgst: float
-    invoice_total_sgst: float
-    invoice_total_igst: float
-    invoice_total: float
+    invoice_subtotal: MoneyAmount
+    invoice_total_cgst: MoneyAmount
+    invoice_total_sgst: MoneyAmount
+    invoice_total_igst: MoneyAmount
+    invoice_total: MoneyAmount
+    invoice_amount_paid: MoneyAmount = 0
+    invoice_amount_credited: MoneyAmount = 0
+    invoice_amount_debited: MoneyAmount = 0
+    invoice_balance_due: MoneyAmount = 0
     created_at: datetime
 
     # New fields for output
-    invoice_status: str
+    invoice_status: InvoiceStatus
     user_reference_notes: Optional[str] = None
+    invoice_version: int = 1
+    invoice_cancelled_at: Optional[datetime] = None
 
     invoice_by: Optional[CompanyOut] = None
     client: Optional[CustomerOut] = None
@@ -331,6 +344,23 @@ class InvoiceOut(BaseModel):
     class Config:
         from_attributes = True
 
+# Lightweight output for invoice search results, without company or items
+class InvoiceSummaryOut(BaseModel):
+    invoice_id: str
+    invoice_number: str
+    invoice_date: datetime
+    invoice_due_date: datetime
+    customer_company: str
+    customer_name: str
+    invoice_total: MoneyAmount
+    invoice_balance_due: MoneyAmount
+    invoice_status: InvoiceStatus
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
 # API Response Models
 class SingleInvoiceResponse(APIResponse[InvoiceOut]):
     """Response model for a single invoice."""
@@ -338,4 +368,42 @@ class SingleInvoiceResponse(APIResponse[InvoiceOut]):
 
 class ListInvoiceResponse(APIResponse[List[InvoiceOut]]):
     """Response model for a list of invoices."""
-    pass
\ No newline at end of file
+    pass
+
+class ListInvoiceSummaryResponse(APIResponse[List[InvoiceSummaryOut]]):
+    """Response model for invoice search results."""
+    pass
+
+# Schemas for status transitions
+class InvoiceStatusTransition(BaseModel):
+    invoice_status: InvoiceStatus
+
+class BulkInvoiceStatusTransition(BaseModel):
+    invoice_ids: List[str] = Field(..., min_items=1, description="Invoices to move to the new status.")
+    invoice_status: InvoiceStatus
+
+class InvoiceStatusOut(BaseModel):
+    invoice_id: str
+    invoice_status: InvoiceStatus
+    invoice_balance_due: MoneyAmount
+    invoice_version: int
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class InvoiceStatusTransitionError(BaseModel):
+    invoice_id: str
+    error: str
+
+class BulkInvoiceStatusReport(BaseModel):
+    updated: List[InvoiceStatusOut] = []
+    failed: List[InvoiceStatusTransitionError] = []
+
+class SingleInvoiceStatusResponse(APIResponse[InvoiceStatusOut]):
+    """Response model for an invoice status transition."""
+    pass
+
+class BulkInvoiceStatusResponse(APIResponse[BulkInvoiceStatusReport]):
+    """Response model for a bulk invoice status transition."""
+    pass
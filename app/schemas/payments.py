@@ -0,0 +1,90 @@
+# app/schemas/payments.py
+from pydantic import BaseModel, Field, condecimal
+from datetime import datetime
+from typing import List, Optional
+
+from app.schemas.common import APIResponse
+from app.core.money import MoneyAmount
+
+PaymentAmount = condecimal(gt=0, max_digits=14, decimal_places=2)
+
+class PaymentAllocationInput(BaseModel):
+    invoice_id: str
+    allocation_amount: PaymentAmount
+
+class CreatePayment(BaseModel):
+    customer_id: str
+    payment_date: datetime
+    payment_amount: PaymentAmount
+    payment_method: str = Field("bank_transfer", max_length=30)
+    payment_reference: Optional[str] = Field(None, max_length=100, description="Bank/UTR reference; a reference can only be recorded once.")
+    payment_notes: Optional[str] = None
+    allocations: Optional[List[PaymentAllocationInput]] = Field(
+        None,
+        description="Invoices to apply the payment to. Leave empty to apply it to the customer's oldest open invoices first."
+    )
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class CreatePaymentBatch(BaseModel):
+    payments: List[CreatePayment] = Field(..., min_items=1, description="Payments from a bank statement, applied in order.")
+
+class PaymentAllocationOut(BaseModel):
+    allocation_id: str
+    invoice_id: str
+    allocation_amount: MoneyAmount
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class PaymentOut(BaseModel):
+    payment_id: str
+    company_id: str
+    customer_id: str
+    payment_date: datetime
+    payment_amount: MoneyAmount
+    payment_method: str
+    payment_reference: Optional[str] = None
+    payment_notes: Optional[str] = None
+    amount_allocated: MoneyAmount
+    amount_unallocated: MoneyAmount
+    created_at: datetime
+    allocations: List[PaymentAllocationOut] = []
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class PaymentBatchLineResult(BaseModel):
+    line: int # Position of the payment in the batch, starting at 1
+    payment_id: Optional[str] = None # None when the line was rejected
+    amount_allocated: MoneyAmount = 0
+    amount_unallocated: MoneyAmount = 0
+    errors: List[str] = []
+
+class PaymentBatchReport(BaseModel):
+    total_payments: int
+    recorded_payments: int
+    rejected_payments: int
+    amount_allocated: MoneyAmount
+    amount_unallocated: MoneyAmount
+    invoices_updated: int
+    duration_seconds: float
+    payments_per_second: float
+    results: List[PaymentBatchLineResult] = []
+
+class SinglePaymentResponse(APIResponse[PaymentOut]):
+    """Response model for a single payment."""
+    pass
+
+class ListPaymentResponse(APIResponse[List[PaymentOut]]):
+    """Response model for a list of payments."""
+    pass
+
+class SinglePaymentBatchReportResponse(APIResponse[PaymentBatchReport]):
+    """Response model for a payment batch report."""
+    pass
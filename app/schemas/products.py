@@ -5,6 +5,7 @@ from datetime import datetime
 
 # Import APIResponse for consistent responses (assuming app.schemas.common exists)
 from app.schemas.common import APIResponse
+from app.core.money import MoneyAmount, TaxRate
 
 class CreateProduct(BaseModel):
     company_id: str # Changed to str for UUID
@@ -12,10 +13,10 @@ class CreateProduct(BaseModel):
     product_description: str
     product_hsn_sac_code: str
     product_unit_of_measure: str
-    product_unit_price: float
-    product_default_cgst_rate: float
-    product_default_sgst_rate: float
-    product_default_igst_rate: float
+    product_unit_price: MoneyAmount
+    product_default_cgst_rate: TaxRate
+    product_default_sgst_rate: TaxRate
+    product_default_igst_rate: TaxRate
 
     class Config:
         orm_mode = True
@@ -26,10 +27,10 @@ class UpdateProduct(BaseModel): # Changed to allow partial updates
     product_description: Optional[str] = None
     product_hsn_sac_code: Optional[str] = None
     product_unit_of_measure: Optional[str] = None
-    product_unit_price: Optional[float] = None
-    product_default_cgst_rate: Optional[float] = None
-    product_default_sgst_rate: Optional[float] = None
-    product_default_igst_rate: Optional[float] = None
+    product_unit_price: Optional[MoneyAmount] = None
+    product_default_cgst_rate: Optional[TaxRate] = None
+    product_default_sgst_rate: Optional[TaxRate] = None
+    product_default_igst_rate: Optional[TaxRate] = None
 
     class Config:
         orm_mode = True
@@ -42,10 +43,10 @@ class ProductOut(BaseModel):
     product_description: str
     product_hsn_sac_code: str
     product_unit_of_measure: str
-    product_unit_price: float
-    product_default_cgst_rate: float
-    product_default_sgst_rate: float
-    product_default_igst_rate: float
+    product_unit_price: MoneyAmount
+    product_default_cgst_rate: TaxRate
+    product_default_sgst_rate: TaxRate
+    product_default_igst_rate: TaxRate
     created_at: datetime
 
     class Config:
@@ -0,0 +1,60 @@
+# app/schemas/receivables.py
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import List, Optional
+
+from app.schemas.common import APIResponse
+from app.core.money import MoneyAmount
+
+class LedgerEntryOut(BaseModel):
+    entry_id: str
+    entry_sequence: int
+    entry_type: str
+    reference_id: Optional[str] = None
+    entry_date: datetime
+    description: Optional[str] = None
+    debit: MoneyAmount
+    credit: MoneyAmount
+    running_balance: MoneyAmount
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class CustomerLedgerOut(BaseModel):
+    customer_id: str
+    customer_name: str
+    balance: MoneyAmount # Positive when the customer owes the company
+    entries: List[LedgerEntryOut] = [] # Newest first
+    next_before_sequence: Optional[int] = None # Pass as before_sequence for the next page, None on the last page
+
+class AgingBucketsOut(BaseModel):
+    not_due: MoneyAmount
+    days_0_30: MoneyAmount
+    days_31_60: MoneyAmount
+    days_61_90: MoneyAmount
+    days_over_90: MoneyAmount
+    total: MoneyAmount
+
+class CustomerAgingOut(AgingBucketsOut):
+    customer_id: str
+    customer_name: str
+    open_invoices: int
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class AgingReportOut(BaseModel):
+    as_of: date
+    totals: AgingBucketsOut
+    customers: List[CustomerAgingOut] = []
+
+class SingleCustomerLedgerResponse(APIResponse[CustomerLedgerOut]):
+    """Response model for a page of a customer's ledger."""
+    pass
+
+class SingleAgingReportResponse(APIResponse[AgingReportOut]):
+    """Response model for a receivables aging report."""
+    pass
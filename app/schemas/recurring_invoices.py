@@ -0,0 +1,121 @@
+# app/schemas/recurring_invoices.py
+from pydantic import BaseModel, Field, validator
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from app.schemas.common import APIResponse
+from app.core.invoice_status import InvoiceStatus, INITIAL_INVOICE_STATUSES
+
+class RecurrenceFrequency(str, Enum):
+    weekly = "weekly"
+    monthly = "monthly"
+    quarterly = "quarterly"
+    yearly = "yearly"
+
+class RecurringInvoiceItemInput(BaseModel):
+    product_id: str
+    quantity: int = Field(..., gt=0, description="Quantity must be greater than zero")
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class CreateRecurringInvoiceTemplate(BaseModel):
+    customer_id: str
+    template_name: str = Field(..., max_length=100)
+    frequency: RecurrenceFrequency = RecurrenceFrequency.monthly
+    interval_count: int = Field(1, ge=1, le=36, description="Generate an invoice every this many periods.")
+    start_date: datetime = Field(..., description="Date of the first invoice; later invoices fall on the same day of the period.")
+    end_date: Optional[datetime] = Field(None, description="No invoices are generated for dates after this.")
+    due_in_days: int = Field(30, ge=0, le=365)
+    invoice_terms: str
+    invoice_place_of_supply: str
+    invoice_notes: str
+    user_reference_notes: Optional[str] = None
+    invoice_status: InvoiceStatus = Field(InvoiceStatus.issued, description="Generate invoices as draft or issued.")
+    items: List[RecurringInvoiceItemInput] = Field(..., min_items=1)
+
+    @validator("invoice_status")
+    def check_initial_status(cls, value):
+        if value not in INITIAL_INVOICE_STATUSES:
+            raise ValueError("recurring invoices can only be generated as draft or issued")
+        return value
+
+    @validator("end_date")
+    def check_end_date(cls, value, values):
+        start_date = values.get("start_date")
+        if value is not None and start_date is not None and value < start_date:
+            raise ValueError("end_date must not be before start_date")
+        return value
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class UpdateRecurringInvoiceTemplate(BaseModel):
+    template_name: Optional[str] = Field(None, max_length=100)
+    end_date: Optional[datetime] = None
+    due_in_days: Optional[int] = Field(None, ge=0, le=365)
+    invoice_terms: Optional[str] = None
+    invoice_place_of_supply: Optional[str] = None
+    invoice_notes: Optional[str] = None
+    user_reference_notes: Optional[str] = None
+    is_active: Optional[bool] = Field(None, description="Paused templates generate nothing; resuming catches up missed periods.")
+    items: Optional[List[RecurringInvoiceItemInput]] = Field(None, min_items=1, description="If provided, replaces all items.")
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class RecurringInvoiceItemOut(BaseModel):
+    template_item_id: str
+    product_id: str
+    quantity: int
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class RecurringInvoiceTemplateOut(BaseModel):
+    template_id: str
+    company_id: str
+    customer_id: str
+    template_name: str
+    frequency: RecurrenceFrequency
+    interval_count: int
+    start_date: datetime
+    end_date: Optional[datetime] = None
+    periods_generated: int
+    next_run_date: Optional[datetime] = None
+    last_generated_at: Optional[datetime] = None
+    is_active: bool
+    due_in_days: int
+    invoice_terms: str
+    invoice_place_of_supply: str
+    invoice_notes: str
+    user_reference_notes: Optional[str] = None
+    invoice_status: InvoiceStatus
+    created_at: datetime
+    items: List[RecurringInvoiceItemOut] = []
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class RecurringGenerationReport(BaseModel):
+    templates_processed: int
+    invoices_generated: int
+    duration_seconds: float
+
+class SingleRecurringInvoiceTemplateResponse(APIResponse[RecurringInvoiceTemplateOut]):
+    """Response model for a single recurring invoice template."""
+    pass
+
+class ListRecurringInvoiceTemplateResponse(APIResponse[List[RecurringInvoiceTemplateOut]]):
+    """Response model for a list of recurring invoice templates."""
+    pass
+
+class SingleRecurringGenerationReportResponse(APIResponse[RecurringGenerationReport]):
+    """Response model for a recurring invoice generation run."""
+    pass
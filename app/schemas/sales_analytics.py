@@ -0,0 +1,47 @@
+# app/schemas/sales_analytics.py
+from pydantic import BaseModel
+from enum import Enum
+from typing import List, Optional
+
+from app.schemas.common import APIResponse
+from app.core.money import MoneyAmount, TaxRate
+
+class SalesGroupBy(str, Enum):
+    product = "product"
+    hsn = "hsn" # HSN/SAC code
+
+class SalesGranularity(str, Enum):
+    day = "day"
+    month = "month"
+    total = "total" # The whole date range as one period
+
+class SalesAnalyticsRow(BaseModel):
+    period: Optional[str] = None # e.g. "2025-07" by month; absent for totals
+    product_id: Optional[str] = None
+    product_name: Optional[str] = None
+    hsn_sac_code: str
+    igst_rate: TaxRate
+    cgst_rate: TaxRate
+    sgst_rate: TaxRate
+    tax_rate: TaxRate # Rate slab: IGST, or CGST + SGST
+    quantity: int
+    taxable_value: MoneyAmount
+    igst_amount: MoneyAmount
+    cgst_amount: MoneyAmount
+    sgst_amount: MoneyAmount
+    total_amount: MoneyAmount
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class SalesRollupRebuild(BaseModel):
+    rollup_rows: int
+
+class SalesAnalyticsResponse(APIResponse[List[SalesAnalyticsRow]]):
+    """Response model for sales analytics."""
+    pass
+
+class SalesRollupRebuildResponse(APIResponse[SalesRollupRebuild]):
+    """Response model for a sales rollup rebuild."""
+    pass
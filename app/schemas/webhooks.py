@@ -0,0 +1,69 @@
+# app/schemas/webhooks.py
+from pydantic import BaseModel, Field, AnyHttpUrl, validator
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from app.schemas.common import APIResponse
+
+class WebhookEventType(str, Enum):
+    invoice_created = "invoice.created"
+    invoice_updated = "invoice.updated" # Details, items, payments or notes changed
+    invoice_status_changed = "invoice.status_changed"
+    invoice_cancelled = "invoice.cancelled" # Invoices are cancelled rather than deleted
+
+class CreateWebhookSubscription(BaseModel):
+    target_url: AnyHttpUrl
+    event_types: List[WebhookEventType] = Field(..., min_items=1)
+    description: Optional[str] = None
+
+class UpdateWebhookSubscription(BaseModel):
+    target_url: Optional[AnyHttpUrl] = None
+    event_types: Optional[List[WebhookEventType]] = Field(None, min_items=1)
+    description: Optional[str] = None
+    is_active: Optional[bool] = Field(None, description="Re-activating a subscription resets its failure count.")
+
+class WebhookSubscriptionOut(BaseModel):
+    subscription_id: str
+    company_id: str
+    target_url: str
+    event_types: List[WebhookEventType]
+    description: Optional[str] = None
+    is_active: bool
+    consecutive_failures: int
+    last_delivery_at: Optional[datetime] = None
+    last_failure_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+
+    @validator("event_types", pre=True)
+    def split_event_types(cls, value):
+        if isinstance(value, str):
+            return value.split(",")
+        return value
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class WebhookSubscriptionCreatedOut(WebhookSubscriptionOut):
+    secret: str = Field(..., description="Verifies the X-Webhook-Signature header; not shown again.")
+
+class SingleWebhookSubscriptionResponse(APIResponse[WebhookSubscriptionOut]):
+    """Response model for a single webhook subscription."""
+    pass
+
+class CreatedWebhookSubscriptionResponse(APIResponse[WebhookSubscriptionCreatedOut]):
+    """Response model for a new webhook subscription, including its signing secret."""
+    pass
+
+class ListWebhookSubscriptionResponse(APIResponse[List[WebhookSubscriptionOut]]):
+    """Response model for a list of webhook subscriptions."""
+    pass
+
+class WebhookPingOut(BaseModel):
+    delivery_id: str
+
+class WebhookPingResponse(APIResponse[WebhookPingOut]):
+    """Response model for a queued test delivery."""
+    pass
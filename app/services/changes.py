@@ -0,0 +1,175 @@
+# app/services/changes.py
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Load, noload, selectinload
+
+from app.models.changes import ChangeLog, CompanyChangeCounters
+from app.models.companies import Companies
+from app.models.customers import Customers
+from app.models.invoices import Invoices
+from app.models.products import Products
+from app.schemas.changes import ChangeEntityType, ChangeOperation
+
+
+class ChangePage(NamedTuple):
+    changes: List[Row]
+    entities: Dict[ChangeEntityType, dict] # entity_id -> current entity, per type; deleted entities are absent
+    next_since: int
+    has_more: bool
+
+
+async def _advance_change_counter(db: AsyncSession, company_id: str, count: int) -> int:
+    """
+    Advance the company's change counter by `count` and return the new last sequence.
+    The counter row stays locked until the transaction ends, so a company's changes
+    commit in sequence order and a reader never skips one that commits late.
+    """
+    while True:
+        result = await db.execute(
+            update(CompanyChangeCounters)
+            .where(CompanyChangeCounters.company_id == company_id)
+            .values(last_sequence=CompanyChangeCounters.last_sequence + count)
+            .returning(CompanyChangeCounters.last_sequence)
+        )
+        last_sequence = result.scalar_one_or_none()
+        if last_sequence is not None:
+            return last_sequence
+
+        # First change of the company. A concurrent write may create the counter first,
+        # in which case the savepoint is discarded and we retry the update.
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(CompanyChangeCounters).values(company_id=company_id, last_sequence=count))
+            return count
+        except IntegrityError:
+            continue
+
+
+async def record_changes(
+    db: AsyncSession,
+    company_id: str,
+    entity_type: ChangeEntityType,
+    entity_ids: Iterable[str],
+    operation: ChangeOperation = ChangeOperation.upsert
+) -> None:
+    """
+    Record changes to a company's entities in the caller's transaction, replacing
+    any earlier change to the same entity. Call it as the last write before commit:
+    it locks the company's change counter until the transaction ends.
+    """
+    entity_ids = list(dict.fromkeys(entity_ids))
+    if not entity_ids:
+        return
+    last_sequence = await _advance_change_counter(db, company_id, len(entity_ids))
+    first_sequence = last_sequence - len(entity_ids) + 1
+    now = datetime.utcnow()
+
+    existing_result = await db.execute(
+        select(ChangeLog.entity_id).where(
+            ChangeLog.company_id == company_id,
+            ChangeLog.entity_type == entity_type.value,
+            ChangeLog.entity_id.in_(entity_ids)
+        )
+    )
+    existing = set(existing_result.scalars().all())
+    rows = [
+        {
+            "company_id": company_id,
+            "entity_type": entity_type.value,
+            "entity_id": entity_id,
+            "sequence": sequence,
+            "operation": operation.value,
+            "changed_at": now,
+        }
+        for sequence, entity_id in enumerate(entity_ids, start=first_sequence)
+    ]
+    updated_rows = [row for row in rows if row["entity_id"] in existing]
+    new_rows = [row for row in rows if row["entity_id"] not in existing]
+    if updated_rows:
+        await db.execute(update(ChangeLog), updated_rows)
+    if new_rows:
+        await db.execute(insert(ChangeLog), new_rows)
+
+
+async def record_invoice_changes(db: AsyncSession, invoice_ids: Iterable[str]) -> None:
+    """Record changes to invoices that may belong to several companies, e.g. from a scheduled job."""
+    invoice_ids = list(invoice_ids)
+    if not invoice_ids:
+        return
+    result = await db.execute(
+        select(Invoices.owner_company, Invoices.invoice_id).where(Invoices.invoice_id.in_(invoice_ids))
+    )
+    by_company: Dict[str, List[str]] = defaultdict(list)
+    for company_id, invoice_id in result.all():
+        by_company[company_id].append(invoice_id)
+    # Counters are locked in company order so concurrent jobs can't deadlock each other
+    for company_id in sorted(by_company):
+        await record_changes(db, company_id, ChangeEntityType.invoice, by_company[company_id])
+
+
+async def _load_entities(db: AsyncSession, entity_type: ChangeEntityType, entity_ids: List[str]) -> dict:
+    if entity_type == ChangeEntityType.company:
+        query = select(Companies).options(Load(Companies).noload('*')).where(Companies.company_id.in_(entity_ids))
+        key = "company_id"
+    elif entity_type == ChangeEntityType.customer:
+        query = select(Customers).options(Load(Customers).noload('*')).where(Customers.customer_id.in_(entity_ids))
+        key = "customer_id"
+    elif entity_type == ChangeEntityType.product:
+        query = select(Products).options(Load(Products).noload('*')).where(Products.product_id.in_(entity_ids))
+        key = "product_id"
+    else:
+        # Items are part of an invoice's state; the company and customer sync on their own
+        query = (
+            select(Invoices)
+            .options(
+                noload(Invoices.owner_company_rel),
+                noload(Invoices.client),
+                selectinload(Invoices.invoice_items).noload('*')
+            )
+            .where(Invoices.invoice_id.in_(entity_ids))
+        )
+        key = "invoice_id"
+    result = await db.execute(query)
+    return {getattr(entity, key): entity for entity in result.scalars().all()}
+
+
+async def get_change_page(db: AsyncSession, current_company: Companies, since: int, limit: int) -> ChangePage:
+    """
+    The company's changes after sequence `since`, oldest first, with the current state
+    of every upserted entity loaded in one query per entity type. An entity whose
+    change was recorded but that is gone by now (e.g. archived) is absent from
+    `entities` and should be treated as deleted.
+    """
+    if since < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must not be negative.")
+    result = await db.execute(
+        select(ChangeLog.sequence, ChangeLog.entity_type, ChangeLog.entity_id, ChangeLog.operation, ChangeLog.changed_at)
+        .where(ChangeLog.company_id == current_company.company_id, ChangeLog.sequence > since)
+        .order_by(ChangeLog.sequence)
+        .limit(limit + 1)
+    )
+    changes = result.all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    upserted: Dict[ChangeEntityType, List[str]] = defaultdict(list)
+    for change in changes:
+        if change.operation == ChangeOperation.upsert.value:
+            upserted[ChangeEntityType(change.entity_type)].append(change.entity_id)
+    entities = {
+        entity_type: await _load_entities(db, entity_type, entity_ids)
+        for entity_type, entity_ids in upserted.items()
+    }
+    return ChangePage(
+        changes=changes,
+        entities=entities,
+        next_since=changes[-1].sequence if changes else since,
+        has_more=has_more
+    )
@@ -1,5 +1,6 @@
 # app/services/companies.py
 from app.models.companies import Companies
+from app.models.credit_notes import CreditNotes, CreditNoteItems
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete, update
 from fastapi import HTTPException, status
@@ -7,6 +8,30 @@ from app.schemas.companies import CreateCompany, UpdateCompany, CompanyOut
 from app.services.users import get_current_active_user # Import the dependency for authentication
 from app.models.users import Users # Import Users model for type hinting
 from typing import List
+import uuid
+from app.database import AsyncSessionLocal, DEFAULT_SHARD, shard_engines, use_shard
+from app.core.sharding import (
+    choose_company_shard,
+    ensure_user_on_shard,
+    forget_company_shard,
+    owner_company_shards,
+    register_company_shard,
+)
+from app.services.changes import record_changes
+from app.schemas.changes import ChangeEntityType
+
+async def _gstin_in_use(gstin: str, db: AsyncSession) -> bool:
+    """Whether any shard already has a company with this GSTIN."""
+    statement = select(Companies.company_id).where(Companies.company_gstin == gstin)
+    for shard_name in shard_engines:
+        if shard_name == DEFAULT_SHARD:
+            found = (await db.execute(statement)).first()
+        else:
+            async with AsyncSessionLocal(shard_name) as shard_db:
+                found = (await shard_db.execute(statement)).first()
+        if found is not None:
+            return True
+    return False
 
 async def add_company(company: CreateCompany, db: AsyncSession, current_user: Users) -> Companies:
     """Service function to add a new company, associated with the current user."""
@@ -18,27 +43,35 @@ async def add_company(company: CreateCompany, db: AsyncSession, current_user: Us
         )
 
     # Check if a company with the same GSTIN already exists (if provided)
-    if company.company_gstin:
-        existing_company_query = select(Companies).where(Companies.company_gstin == company.company_gstin)
-        existing_company_result = await db.execute(existing_company_query)
-        if existing_company_result.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Company with this GSTIN already exists."
-            )
+    if company.company_gstin and await _gstin_in_use(company.company_gstin, db):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Company with this GSTIN already exists."
+        )
 
     new_company_data = company.dict() # Use dict for Pydantic v2
-    new_company = Companies(**new_company_data)
-    db.add(new_company)
+    new_company = Companies(**new_company_data, company_id=str(uuid.uuid4()))
+    shard_name = await choose_company_shard()
+    # The request isn't about a company yet, so db is on the default shard
+    shard_db = db if shard_name == DEFAULT_SHARD else AsyncSessionLocal(shard_name)
     try:
-        await db.commit()
-        await db.refresh(new_company)
+        with use_shard(shard_name):
+            await ensure_user_on_shard(shard_db, shard_name, current_user)
+            shard_db.add(new_company)
+            await shard_db.flush()
+            await record_changes(shard_db, new_company.company_id, ChangeEntityType.company, [new_company.company_id])
+            await shard_db.commit()
+            await shard_db.refresh(new_company)
+        await register_company_shard(new_company.company_id, new_company.company_owner, shard_name)
     except Exception as e:
-        await db.rollback()
+        await shard_db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create company: {e}"
         )
+    finally:
+        if shard_db is not db:
+            await shard_db.close()
     return new_company
 
 async def delete_company(company_id: str, db: AsyncSession, current_user: Users) -> bool:
@@ -53,9 +86,14 @@ async def delete_company(company_id: str, db: AsyncSession, current_user: Users)
     if not company:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Specified company not found or you don't have permission to delete it.")
 
+    # Note lines restrict deleting the invoice items they adjust, so they go first
+    company_notes = select(CreditNotes.note_id).where(CreditNotes.company_id == company_id)
+    await db.execute(delete(CreditNoteItems).where(CreditNoteItems.note_id.in_(company_notes)))
+    await db.execute(delete(CreditNotes).where(CreditNotes.company_id == company_id))
     await db.delete(company)
     try:
         await db.commit()
+        await forget_company_shard(company_id)
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -65,11 +103,15 @@ async def delete_company(company_id: str, db: AsyncSession, current_user: Users)
     return True
 
 async def list_companies(db: AsyncSession, current_user: Users) -> List[Companies]:
-    """Service function to list all companies owned by the current user."""
-    result = await db.execute(
-        select(Companies).where(Companies.company_owner == str(current_user.user_id))
-    )
-    companies = result.scalars().all()
+    """Service function to list all companies owned by the current user, on every shard."""
+    companies = []
+    for shard_name in await owner_company_shards(db, str(current_user.user_id)):
+        statement = select(Companies).where(Companies.company_owner == str(current_user.user_id))
+        if shard_name == DEFAULT_SHARD:
+            companies.extend((await db.execute(statement)).scalars().all())
+        else:
+            async with AsyncSessionLocal(shard_name) as shard_db:
+                companies.extend((await shard_db.execute(statement)).scalars().all())
     return companies
 
 async def get_company_by_id(company_id: str, db: AsyncSession, current_user: Users) -> Companies | None:
@@ -101,6 +143,7 @@ async def modify_company_details(company_id: str, updated_details: UpdateCompany
         setattr(company, key, value)
 
     try:
+        await record_changes(db, company.company_id, ChangeEntityType.company, [company.company_id])
         await db.commit()
         await db.refresh(company)
     except Exception as e:
@@ -0,0 +1,232 @@
+# app/services/credit_notes.py
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+
+from app.core.invoice_status import InvoiceStatus, RECEIVABLE_INVOICE_STATUSES
+from app.core.money import ZERO
+from app.models.companies import Companies
+from app.models.credit_notes import CreditNotes, CreditNoteItems
+from app.models.invoice_items import InvoiceItems
+from app.models.invoices import Invoices
+from app.schemas.changes import ChangeEntityType
+from app.schemas.credit_notes import CreateCreditNote, NoteType
+from app.schemas.webhooks import WebhookEventType
+from app.services.invoice_status import INVOICE_NOT_FOUND
+from app.services.invoices import _to_naive_datetime
+from app.services.ledger import CREDIT_NOTE_ENTRY, DEBIT_NOTE_ENTRY, LedgerPosting, post_ledger_entries
+from app.services.changes import record_changes
+from app.services.sales_rollups import record_note_sales
+from app.services.webhooks import record_invoice_events
+from app.services.tax import calculate_line, sum_lines
+
+NOTE_NUMBER_PREFIXES = {NoteType.credit: "CN", NoteType.debit: "DN"}
+
+# Invoices a note may be raised against. Paid invoices can be credited (the excess
+# becomes customer credit) but not debited, since paid is a final status.
+NOTE_INVOICE_STATUSES = {
+    NoteType.credit: RECEIVABLE_INVOICE_STATUSES,
+    NoteType.debit: RECEIVABLE_INVOICE_STATUSES - {InvoiceStatus.paid},
+}
+
+
+async def _get_owned_invoice_for_update(invoice_id: str, db: AsyncSession, current_company: Companies) -> Invoices:
+    result = await db.execute(
+        select(Invoices)
+        .options(noload(Invoices.owner_company_rel), noload(Invoices.client), noload(Invoices.invoice_items))
+        .where(
+            Invoices.invoice_id == invoice_id,
+            Invoices.owner_company == current_company.company_id
+        )
+        .with_for_update()
+    )
+    invoice = result.scalar_one_or_none()
+    if not invoice:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=INVOICE_NOT_FOUND)
+    return invoice
+
+
+async def create_credit_note(
+    invoice_id: str,
+    note_data: CreateCreditNote,
+    db: AsyncSession,
+    current_company: Companies
+) -> CreditNotes:
+    """
+    Raise a credit or debit note against one of the company's invoices. Lines are
+    taxed at the rates of the invoice items they adjust. The invoice's balance and
+    the customer's ledger are updated; the invoice's own lines stay as issued.
+    """
+    note_type = note_data.note_type
+    try:
+        invoice = await _get_owned_invoice_for_update(invoice_id, db, current_company)
+        if invoice.invoice_status not in NOTE_INVOICE_STATUSES[note_type]:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"A {note_type.value} note can't be raised against a {invoice.invoice_status.value} invoice."
+            )
+
+        items_result = await db.execute(
+            select(InvoiceItems)
+            .options(noload(InvoiceItems.invoice), noload(InvoiceItems.product))
+            .where(InvoiceItems.invoice_id == invoice_id)
+        )
+        invoice_items: Dict[str, InvoiceItems] = {item.invoice_item_id: item for item in items_result.scalars().all()}
+        unknown_items = [line.invoice_item_id for line in note_data.items if line.invoice_item_id not in invoice_items]
+        if unknown_items:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Items not on this invoice: {', '.join(unknown_items)}"
+            )
+
+        if note_type == NoteType.credit:
+            # Units can't be credited more often than they were invoiced
+            credited_result = await db.execute(
+                select(CreditNoteItems.invoice_item_id, func.sum(CreditNoteItems.quantity))
+                .join(CreditNotes, CreditNotes.note_id == CreditNoteItems.note_id)
+                .where(CreditNotes.invoice_id == invoice_id, CreditNotes.note_type == NoteType.credit.value)
+                .group_by(CreditNoteItems.invoice_item_id)
+            )
+            credited_quantities = defaultdict(int, {item_id: quantity or 0 for item_id, quantity in credited_result.all()})
+            for line in note_data.items:
+                if line.quantity is None:
+                    continue
+                credited_quantities[line.invoice_item_id] += line.quantity
+                if credited_quantities[line.invoice_item_id] > invoice_items[line.invoice_item_id].invoice_item_quantity:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"More units of item {line.invoice_item_id} would be credited than were invoiced."
+                    )
+
+        note_items: List[CreditNoteItems] = []
+        lines = []
+        for line_input in note_data.items:
+            item = invoice_items[line_input.invoice_item_id]
+            if line_input.quantity is not None:
+                unit_price, quantity = item.invoice_item_unit_price, line_input.quantity
+            else:
+                unit_price, quantity = line_input.taxable_value, 1
+            line = calculate_line(
+                unit_price, quantity,
+                item.invoice_item_cgst_rate, item.invoice_item_sgst_rate, item.invoice_item_igst_rate
+            )
+            lines.append(line)
+            note_items.append(CreditNoteItems(
+                invoice_item_id=item.invoice_item_id,
+                quantity=line_input.quantity,
+                unit_price=line.unit_price,
+                cgst_rate=line.cgst_rate,
+                sgst_rate=line.sgst_rate,
+                igst_rate=line.igst_rate,
+                taxable_value=line.taxable_value,
+                cgst_amount=line.cgst_amount,
+                sgst_amount=line.sgst_amount,
+                igst_amount=line.igst_amount,
+                total_amount=line.total_amount,
+            ))
+        totals = sum_lines(lines)
+
+        if note_type == NoteType.credit:
+            creditable = invoice.invoice_total + invoice.invoice_amount_debited - invoice.invoice_amount_credited
+            if totals.total > creditable:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Credit of {totals.total} exceeds the {creditable} left to credit on this invoice."
+                )
+
+        existing_result = await db.execute(
+            select(func.count()).select_from(CreditNotes).where(
+                CreditNotes.invoice_id == invoice_id,
+                CreditNotes.note_type == note_type.value
+            )
+        )
+        note_number = f"{NOTE_NUMBER_PREFIXES[note_type]}-{invoice.invoice_number}-{existing_result.scalar_one() + 1}"
+        note_date = _to_naive_datetime(note_data.note_date) or datetime.utcnow()
+
+        note = CreditNotes(
+            note_id=str(uuid.uuid4()),
+            company_id=current_company.company_id,
+            customer_id=invoice.customer_company,
+            invoice_id=invoice.invoice_id,
+            note_type=note_type.value,
+            note_number=note_number,
+            note_date=note_date,
+            note_reason=note_data.note_reason,
+            note_subtotal=totals.subtotal,
+            note_total_cgst=totals.total_cgst,
+            note_total_sgst=totals.total_sgst,
+            note_total_igst=totals.total_igst,
+            note_total=totals.total,
+        )
+        note.items = note_items
+        db.add(note)
+
+        if note_type == NoteType.credit:
+            invoice.invoice_amount_credited = invoice.invoice_amount_credited + totals.total
+            invoice.invoice_balance_due = max(invoice.invoice_balance_due - totals.total, ZERO)
+            posting = LedgerPosting(
+                entry_type=CREDIT_NOTE_ENTRY,
+                reference_id=note.note_id,
+                entry_date=note_date,
+                description=f"Credit note {note_number}",
+                credit=totals.total
+            )
+        else:
+            invoice.invoice_amount_debited = invoice.invoice_amount_debited + totals.total
+            invoice.invoice_balance_due = invoice.invoice_balance_due + totals.total
+            posting = LedgerPosting(
+                entry_type=DEBIT_NOTE_ENTRY,
+                reference_id=note.note_id,
+                entry_date=note_date,
+                description=f"Debit note {note_number}",
+                debit=totals.total
+            )
+        invoice.invoice_version = invoice.invoice_version + 1
+        await post_ledger_entries(db, current_company.company_id, invoice.customer_company, [posting])
+        await record_note_sales(db, note.note_id)
+        await record_invoice_events(db, WebhookEventType.invoice_updated, [invoice.invoice_id])
+        await record_changes(db, current_company.company_id, ChangeEntityType.invoice, [invoice.invoice_id])
+
+        await db.commit()
+        await db.refresh(note)
+        return note
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another note was raised against this invoice at the same time; try again."
+        )
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating {note_type.value} note: {str(e)}"
+        )
+
+
+async def list_credit_notes(invoice_id: str, db: AsyncSession, current_company: Companies) -> List[CreditNotes]:
+    """Credit and debit notes raised against one of the company's invoices, oldest first."""
+    invoice_result = await db.execute(
+        select(Invoices.invoice_id).where(
+            Invoices.invoice_id == invoice_id,
+            Invoices.owner_company == current_company.company_id
+        )
+    )
+    if invoice_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=INVOICE_NOT_FOUND)
+    result = await db.execute(
+        select(CreditNotes)
+        .where(CreditNotes.invoice_id == invoice_id)
+        .order_by(CreditNotes.note_date, CreditNotes.created_at)
+    )
+    return result.scalars().all()
@@ -9,6 +9,9 @@ from app.models.users import Users
 from app.models.companies import Companies # Import Companies model
 from app.services.companies import get_company_by_id as get_company_by_id_service # Import the service function
 from typing import List
+from app.services.search import invalidate_search_index, CUSTOMERS
+from app.services.changes import record_changes
+from app.schemas.changes import ChangeEntityType, ChangeOperation
 from app.database import get_db
 
 # Dependency to get the current company the user is managing
@@ -72,6 +75,8 @@ async def create_new_customer(
     new_customer = Customers(**new_customer_dict)
     db.add(new_customer)
     try:
+        await db.flush()
+        await record_changes(db, current_company.company_id, ChangeEntityType.customer, [new_customer.customer_id])
         await db.commit()
         await db.refresh(new_customer)
     except Exception as e:
@@ -80,6 +85,7 @@ async def create_new_customer(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create customer: {e}"
         )
+    invalidate_search_index(CUSTOMERS, current_company.company_id)
     return new_customer
 
 async def get_customer_by_id(customer_id: str, db: AsyncSession, current_company: Companies) -> Customers | None:
@@ -117,6 +123,7 @@ async def modify_customer_details(
         setattr(customer, key, value)
 
     try:
+        await record_changes(db, current_company.company_id, ChangeEntityType.customer, [customer.customer_id])
         await db.commit()
         await db.refresh(customer)
     except Exception as e:
@@ -125,6 +132,7 @@ async def modify_customer_details(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update customer: {e}"
         )
+    invalidate_search_index(CUSTOMERS, current_company.company_id)
     return customer
 
 async def remove_customer(
@@ -144,6 +152,9 @@ async def remove_customer(
 
     await db.delete(customer)
     try:
+        await record_changes(
+            db, current_company.company_id, ChangeEntityType.customer, [customer_id], ChangeOperation.delete
+        )
         await db.commit()
     except Exception as e:
         await db.rollback()
@@ -151,4 +162,5 @@ async def remove_customer(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete customer: {e}"
         )
+    invalidate_search_index(CUSTOMERS, current_company.company_id)
     return True
\ No newline at end of file
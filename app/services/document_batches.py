@@ -0,0 +1,232 @@
+# app/services/document_batches.py
+import asyncio
+import logging
+import os
+import zipfile
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Load
+
+from app.core.config import settings
+from app.core.task_queue import enqueue_task, task_handler
+from app.database import AsyncSessionLocal
+from app.models.companies import Companies
+from app.models.customers import Customers
+from app.models.document_batches import DocumentBatchJobs
+from app.models.invoice_items import InvoiceItems
+from app.models.invoices import Invoices
+from app.models.products import Products
+from app.models.users import Users
+from app.schemas.documents import CreateDocumentBatch, DocumentFormat
+from app.services.documents import (
+    build_invoice_document_context,
+    ensure_format_supported,
+    get_company_logo,
+    render_in_pool,
+)
+
+logger = logging.getLogger(__name__)
+
+RENDER_DOCUMENT_BATCH_TASK = "render_document_batch"
+
+
+def _date_range_filter(date_from: date, date_to: date):
+    """Invoice date filter for an inclusive date range, usable by the invoice_date index."""
+    start = datetime.combine(date_from, time.min)
+    end = datetime.combine(date_to + timedelta(days=1), time.min)
+    return Invoices.invoice_date >= start, Invoices.invoice_date < end
+
+
+async def create_document_batch_job(
+    batch_data: CreateDocumentBatch,
+    db: AsyncSession,
+    current_company: Companies,
+    current_user: Users
+) -> DocumentBatchJobs:
+    """Queue a job rendering every invoice of the company in the date range into a ZIP archive."""
+    if batch_data.date_to < batch_data.date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_to must not be before date_from."
+        )
+    ensure_format_supported(batch_data.document_format)
+
+    total_result = await db.execute(
+        select(func.count(Invoices.invoice_id)).where(
+            Invoices.owner_company == current_company.company_id,
+            *_date_range_filter(batch_data.date_from, batch_data.date_to)
+        )
+    )
+
+    job = DocumentBatchJobs(
+        company_id=current_company.company_id,
+        requested_by=current_user.user_id,
+        date_from=batch_data.date_from,
+        date_to=batch_data.date_to,
+        document_format=batch_data.document_format.value,
+        job_status='queued',
+        total_invoices=total_result.scalar_one()
+    )
+    db.add(job)
+    try:
+        await db.flush()
+        # Queued with the job row, so a job is never left without a task to run it
+        await enqueue_task(
+            db, RENDER_DOCUMENT_BATCH_TASK, {"job_id": job.job_id}, company_id=current_company.company_id
+        )
+        await db.commit()
+        await db.refresh(job)
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create document batch job: {e}"
+        )
+    return job
+
+
+async def get_document_batch_job(job_id: str, db: AsyncSession, current_company: Companies) -> DocumentBatchJobs:
+    result = await db.execute(
+        select(DocumentBatchJobs).where(
+            DocumentBatchJobs.job_id == job_id,
+            DocumentBatchJobs.company_id == current_company.company_id
+        )
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document batch job not found."
+        )
+    return job
+
+
+async def _stream_invoices(
+    db: AsyncSession,
+    company_id: str,
+    date_from: date,
+    date_to: date
+) -> AsyncIterator[Tuple[Invoices, Customers, List[Tuple[InvoiceItems, Products]]]]:
+    """
+    Stream the company's invoices in the range with their client and items from a single
+    joined query, grouping the item rows back into invoices as they arrive.
+    Relationship loading is switched off so no per-invoice queries are issued.
+    """
+    statement = (
+        select(Invoices, Customers, InvoiceItems, Products)
+        .join(Customers, Customers.customer_id == Invoices.customer_company)
+        .outerjoin(InvoiceItems, InvoiceItems.invoice_id == Invoices.invoice_id)
+        .outerjoin(Products, Products.product_id == InvoiceItems.product_id)
+        .where(Invoices.owner_company == company_id, *_date_range_filter(date_from, date_to))
+        .order_by(Invoices.invoice_date, Invoices.invoice_id, InvoiceItems.created_at)
+        .options(
+            Load(Invoices).noload('*'),
+            Load(Customers).noload('*'),
+            Load(InvoiceItems).noload('*'),
+            Load(Products).noload('*')
+        )
+        .execution_options(yield_per=500)
+    )
+
+    current: Optional[Tuple[Invoices, Customers, List[Tuple[InvoiceItems, Products]]]] = None
+    result = await db.stream(statement)
+    async for invoice, customer, item, product in result:
+        if current is None or current[0].invoice_id != invoice.invoice_id:
+            if current is not None:
+                yield current
+            current = (invoice, customer, [])
+        if item is not None:
+            current[2].append((item, product))
+    if current is not None:
+        yield current
+
+
+async def _set_job_fields(job_id: str, **values) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(DocumentBatchJobs).where(DocumentBatchJobs.job_id == job_id).values(**values)
+        )
+        await session.commit()
+
+
+async def run_document_batch_job(job_id: str) -> None:
+    """
+    Render a batch job's invoices across the render process pool, appending each
+    document to the ZIP archive as soon as it is ready and recording progress.
+    A failed run leaves the job failed and raises, so the task queue retries it.
+    """
+    async with AsyncSessionLocal() as db:
+        job = await db.get(DocumentBatchJobs, job_id)
+        if job is None or job.job_status == 'completed':
+            # Company deleted, or a retry of a run that finished
+            return
+        company = await db.get(Companies, job.company_id, options=[Load(Companies).noload('*')])
+        document_format = DocumentFormat(job.document_format)
+
+        os.makedirs(settings.DOCUMENT_BATCH_DIR, exist_ok=True)
+        archive_path = os.path.join(settings.DOCUMENT_BATCH_DIR, f"{job_id}.zip")
+        partial_path = f"{archive_path}.partial"
+        await _set_job_fields(job_id, job_status='running', started_at=datetime.utcnow(), rendered_invoices=0)
+
+        rendered = 0
+        pending: Set[asyncio.Task] = set()
+        max_in_flight = max(1, settings.DOCUMENT_RENDER_WORKERS * 2)
+
+        async def write_completed(done: Set[asyncio.Task]) -> None:
+            nonlocal rendered
+            for task in done:
+                file_name, document = task.result()
+                await asyncio.to_thread(archive.writestr, file_name, document)
+                rendered += 1
+                if rendered % settings.DOCUMENT_BATCH_PROGRESS_EVERY == 0:
+                    await _set_job_fields(job_id, rendered_invoices=rendered)
+
+        async def render(file_name: str, context: dict) -> Tuple[str, bytes]:
+            return file_name, await render_in_pool(context, document_format)
+
+        try:
+            logo = await get_company_logo(company.company_logo)
+            with zipfile.ZipFile(partial_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                async for invoice, customer, lines in _stream_invoices(db, job.company_id, job.date_from, job.date_to):
+                    context = build_invoice_document_context(invoice, company, customer, lines, logo)
+                    safe_number = "".join(c if c.isalnum() or c in "-_" else "_" for c in invoice.invoice_number)
+                    file_name = f"{safe_number}-{invoice.invoice_id}.{document_format.value}"
+                    pending.add(asyncio.create_task(render(file_name, context)))
+                    if len(pending) >= max_in_flight:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        await write_completed(done)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    await write_completed(done)
+            os.replace(partial_path, archive_path)
+            await _set_job_fields(
+                job_id,
+                job_status='completed',
+                rendered_invoices=rendered,
+                total_invoices=rendered,
+                archive_path=archive_path,
+                finished_at=datetime.utcnow()
+            )
+        except Exception as e:
+            logger.exception("Document batch job %s failed", job_id)
+            for task in pending:
+                task.cancel()
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            await _set_job_fields(
+                job_id,
+                job_status='failed',
+                rendered_invoices=rendered,
+                error=str(e),
+                finished_at=datetime.utcnow()
+            )
+            raise
+
+
+@task_handler(RENDER_DOCUMENT_BATCH_TASK)
+async def _render_document_batch_task(payload: dict) -> None:
+    await run_document_batch_job(payload["job_id"])
@@ -0,0 +1,267 @@
+# app/services/documents.py
+import asyncio
+import base64
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+import httpx
+from cachetools import LRUCache, TTLCache
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.http_client import get_http_client, is_public_url
+from app.core.rendering import render_invoice_document
+from app.models.companies import Companies
+from app.models.customers import Customers
+from app.models.invoice_items import InvoiceItems
+from app.models.invoices import Invoices
+from app.models.products import Products
+from app.schemas.documents import DocumentFormat
+
+DATE_FORMAT = "%d %b %Y"
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+
+# Rendered documents keyed by (invoice_id, document_fingerprint); bounded by total bytes.
+_document_cache: LRUCache = LRUCache(maxsize=settings.DOCUMENT_CACHE_MAX_BYTES, getsizeof=len)
+_documents_in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+# Company logos as data URIs keyed by logo URL, so workers never fetch them. Failed fetches cache None.
+_logo_cache: TTLCache = TTLCache(maxsize=settings.LOGO_CACHE_SIZE, ttl=settings.LOGO_CACHE_TTL_SECONDS)
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Process pool that renders documents off the event loop, created on first use."""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(
+            max_workers=settings.DOCUMENT_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+def pdf_rendering_available() -> bool:
+    return importlib.util.find_spec("weasyprint") is not None
+
+
+def ensure_format_supported(document_format: DocumentFormat) -> None:
+    if document_format == DocumentFormat.pdf and not pdf_rendering_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="PDF rendering is not available on this server; request format=html instead."
+        )
+
+
+async def render_in_pool(context: dict, document_format: DocumentFormat) -> bytes:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_render_pool(), render_invoice_document, context, document_format.value)
+
+
+async def _fetch_logo(logo_url: str) -> Optional[str]:
+    """
+    Fetch a logo as a data URI. Only http(s) URLs of public hosts are fetched, checked
+    again at every redirect, and the body is read no further than LOGO_MAX_BYTES.
+    """
+    url = logo_url
+    client = get_http_client()
+    for _ in range(settings.LOGO_MAX_REDIRECTS + 1):
+        if not await is_public_url(url):
+            return None
+        async with client.stream(
+            "GET", url, follow_redirects=False, timeout=settings.LOGO_FETCH_TIMEOUT_SECONDS
+        ) as response:
+            if response.is_redirect:
+                url = str(response.url.join(response.headers["location"]))
+                continue
+            content_type = response.headers.get("content-type", "").split(";")[0].strip()
+            if response.status_code != 200 or not content_type.startswith("image/"):
+                return None
+            if int(response.headers.get("content-length") or 0) > settings.LOGO_MAX_BYTES:
+                return None
+            content = bytearray()
+            async for chunk in response.aiter_bytes():
+                content += chunk
+                if len(content) > settings.LOGO_MAX_BYTES:
+                    return None
+            return f"data:{content_type};base64,{base64.b64encode(bytes(content)).decode()}"
+    return None
+
+
+async def get_company_logo(logo_url: Optional[str]) -> Optional[str]:
+    """
+    Return the company logo as a data URI ready to embed in a document,
+    fetching and caching remote logos in memory. Returns None if it can't be loaded.
+    """
+    if not logo_url:
+        return None
+    if logo_url.startswith("data:"):
+        return logo_url
+    if logo_url in _logo_cache:
+        return _logo_cache[logo_url]
+
+    try:
+        data_uri = await _fetch_logo(logo_url)
+    except (httpx.HTTPError, ValueError):
+        # ValueError: a malformed Content-Length
+        data_uri = None
+
+    _logo_cache[logo_url] = data_uri
+    return data_uri
+
+
+def build_invoice_document_context(
+    invoice: Invoices,
+    company: Companies,
+    customer: Customers,
+    lines: Iterable[Tuple[InvoiceItems, Products]],
+    logo: Optional[str]
+) -> dict:
+    """
+    Flatten an invoice into plain, picklable data for the template,
+    so it can be shipped to a rendering worker process.
+    """
+    line_contexts = []
+    is_intrastate = True
+    for item, product in lines:
+        if item.invoice_item_igst_rate:
+            is_intrastate = False
+        line_contexts.append({
+            "product_name": product.product_name,
+            "product_description": product.product_description,
+            "hsn_sac_code": product.product_hsn_sac_code,
+            "unit_of_measure": product.product_unit_of_measure,
+            "quantity": item.invoice_item_quantity,
+            "unit_price": item.invoice_item_unit_price,
+            "taxable_value": item.invoice_item_taxable_value,
+            "cgst_rate": item.invoice_item_cgst_rate,
+            "sgst_rate": item.invoice_item_sgst_rate,
+            "igst_rate": item.invoice_item_igst_rate,
+            "cgst_amount": item.invoice_item_cgst_amount,
+            "sgst_amount": item.invoice_item_sgst_amount,
+            "igst_amount": item.invoice_item_igst_amount,
+            "total_amount": item.invoice_item_total_amount,
+        })
+
+    return {
+        "invoice": {
+            "invoice_number": invoice.invoice_number,
+            "invoice_date": invoice.invoice_date.strftime(DATE_FORMAT) if invoice.invoice_date else "",
+            "invoice_due_date": invoice.invoice_due_date.strftime(DATE_FORMAT) if invoice.invoice_due_date else "",
+            "invoice_terms": invoice.invoice_terms,
+            "invoice_place_of_supply": invoice.invoice_place_of_supply,
+            "invoice_notes": invoice.invoice_notes,
+            "invoice_status": invoice.invoice_status.label,
+            "invoice_subtotal": invoice.invoice_subtotal,
+            "invoice_total_cgst": invoice.invoice_total_cgst,
+            "invoice_total_sgst": invoice.invoice_total_sgst,
+            "invoice_total_igst": invoice.invoice_total_igst,
+            "invoice_total": invoice.invoice_total,
+            "is_intrastate": is_intrastate,
+        },
+        "company": {
+            "name": company.company_name,
+            "address": company.company_address,
+            "city": company.company_city,
+            "state": company.company_state,
+            "gstin": company.company_gstin,
+            "msme": company.company_msme,
+            "email": company.company_email,
+            "logo": logo,
+            "bank_account_no": company.company_bank_account_no,
+            "bank_name": company.company_bank_name,
+            "account_holder": company.company_account_holder,
+            "branch": company.company_branch,
+            "ifsc_code": company.company_ifsc_code,
+        },
+        "customer": {
+            "name": customer.customer_name,
+            "address_line1": customer.customer_address_line1,
+            "address_line2": customer.customer_address_line2,
+            "city": customer.customer_city,
+            "state": customer.customer_state,
+            "postal_code": customer.customer_postal_code,
+            "country": customer.customer_country,
+            "gstin": customer.customer_gstin,
+            "email": customer.customer_email,
+            "phone": customer.customer_phone,
+        },
+        "lines": line_contexts,
+    }
+
+
+def document_fingerprint(invoice: Invoices, document_format: DocumentFormat) -> str:
+    """
+    Hash of everything an invoice's document shows: the invoice and its lines, and its
+    company, customer and products as they are now, logo URL included. It keys the
+    document cache and the ETag, so editing any of them gives a fresh document.
+    """
+    company = invoice.owner_company_rel
+    context = build_invoice_document_context(
+        invoice,
+        company,
+        invoice.client,
+        [(item, item.product) for item in invoice.invoice_items],
+        company.company_logo
+    )
+    inputs = json.dumps([document_format.value, context], sort_keys=True, default=str)
+    return hashlib.sha256(inputs.encode()).hexdigest()[:32]
+
+
+async def render_invoice(invoice: Invoices, document_format: DocumentFormat) -> bytes:
+    """
+    Render an invoice loaded with its company, client and items.
+    Documents are cached by document_fingerprint, and concurrent requests for
+    the same document share a single render.
+    """
+    ensure_format_supported(document_format)
+
+    cache_key = (invoice.invoice_id, document_fingerprint(invoice, document_format))
+    cached = _document_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    in_flight = _documents_in_flight.get(cache_key)
+    if in_flight is not None:
+        return await asyncio.shield(in_flight)
+
+    future = asyncio.get_running_loop().create_future()
+    _documents_in_flight[cache_key] = future
+    try:
+        company = invoice.owner_company_rel
+        logo = await get_company_logo(company.company_logo)
+        context = build_invoice_document_context(
+            invoice,
+            company,
+            invoice.client,
+            [(item, item.product) for item in invoice.invoice_items],
+            logo
+        )
+        document = await render_in_pool(context, document_format)
+        try:
+            _document_cache[cache_key] = document
+        except ValueError:
+            pass # Larger than the whole cache; serve it uncached
+        future.set_result(document)
+        return document
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Retrieve the exception so it isn't reported as never retrieved when nobody else waited
+        future.exception()
+        raise
+    finally:
+        _documents_in_flight.pop(cache_key, None)
@@ -0,0 +1,323 @@
+# app/services/gst_returns.py
+import csv
+import io
+import json
+import logging
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Dict, NamedTuple, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, func, case, literal, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.core import metrics
+from app.core.invoice_status import RECEIVABLE_INVOICE_STATUSES
+from app.database import AsyncSessionLocal
+from app.models.credit_notes import CreditNotes, CreditNoteItems
+from app.models.customers import Customers
+from app.models.invoice_items import InvoiceItems
+from app.models.invoices import Invoices
+from app.models.products import Products
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the database at a time while streaming a section
+STREAM_BATCH_SIZE = 1000
+
+
+class ReturnScope(NamedTuple):
+    """What a return covers: one company's supplies between two dates (inclusive)."""
+    company_id: str
+    company_gstin: str
+    company_state: str
+    date_from: date
+    date_to: date
+
+    @property
+    def start(self) -> datetime:
+        return datetime.combine(self.date_from, datetime.min.time())
+
+    @property
+    def end(self) -> datetime:
+        return datetime.combine(self.date_to + timedelta(days=1), datetime.min.time())
+
+
+def _is_registered(gstin_column):
+    """Customers with a GSTIN are B2B; the rest are unregistered (B2C) buyers."""
+    return func.coalesce(func.trim(gstin_column), literal_column("''")) != literal_column("''")
+
+
+def _supply_type(scope: ReturnScope):
+    """
+    Intra-state when the customer is in the company's state, as when the invoice was taxed.
+    The state is rendered inline so the expression is identical in SELECT and GROUP BY.
+    """
+    return case(
+        (Customers.customer_state == literal(scope.company_state, literal_execute=True), literal_column("'intra'")),
+        else_=literal_column("'inter'")
+    )
+
+
+def _invoice_conditions(scope: ReturnScope) -> list:
+    # Drafts and cancelled invoices are not reported
+    return [
+        Invoices.owner_company == scope.company_id,
+        Invoices.invoice_date >= scope.start,
+        Invoices.invoice_date < scope.end,
+        Invoices.invoice_status.in_(RECEIVABLE_INVOICE_STATUSES),
+    ]
+
+
+def _tax_sums(item_table) -> list:
+    return [
+        func.sum(item_table.taxable_value).label("taxable_value"),
+        func.sum(item_table.igst_amount).label("igst_amount"),
+        func.sum(item_table.cgst_amount).label("cgst_amount"),
+        func.sum(item_table.sgst_amount).label("sgst_amount"),
+    ]
+
+
+def _invoice_item_tax_sums() -> list:
+    return [
+        func.sum(InvoiceItems.invoice_item_taxable_value).label("taxable_value"),
+        func.sum(InvoiceItems.invoice_item_igst_amount).label("igst_amount"),
+        func.sum(InvoiceItems.invoice_item_cgst_amount).label("cgst_amount"),
+        func.sum(InvoiceItems.invoice_item_sgst_amount).label("sgst_amount"),
+    ]
+
+
+def _b2b_statement(scope: ReturnScope) -> Select:
+    """Invoices to registered customers, one row per invoice and tax rate."""
+    supply_type = _supply_type(scope)
+    rates = (InvoiceItems.invoice_item_igst_rate, InvoiceItems.invoice_item_cgst_rate, InvoiceItems.invoice_item_sgst_rate)
+    return (
+        select(
+            Customers.customer_gstin,
+            Customers.customer_name,
+            Invoices.invoice_number,
+            Invoices.invoice_date,
+            Invoices.invoice_total,
+            Invoices.invoice_place_of_supply,
+            supply_type.label("supply_type"),
+            InvoiceItems.invoice_item_igst_rate.label("igst_rate"),
+            InvoiceItems.invoice_item_cgst_rate.label("cgst_rate"),
+            InvoiceItems.invoice_item_sgst_rate.label("sgst_rate"),
+            *_invoice_item_tax_sums()
+        )
+        .select_from(Invoices)
+        .join(Customers, Customers.customer_id == Invoices.customer_company)
+        .join(InvoiceItems, InvoiceItems.invoice_id == Invoices.invoice_id)
+        .where(*_invoice_conditions(scope), _is_registered(Customers.customer_gstin))
+        .group_by(
+            Customers.customer_gstin, Customers.customer_name, Customers.customer_state,
+            Invoices.invoice_id, Invoices.invoice_number, Invoices.invoice_date,
+            Invoices.invoice_total, Invoices.invoice_place_of_supply, *rates
+        )
+        .order_by(Customers.customer_gstin, Invoices.invoice_date, Invoices.invoice_number, *rates)
+    )
+
+
+def _b2cs_statement(scope: ReturnScope) -> Select:
+    """Supplies to unregistered customers, summarised by place of supply and tax rate."""
+    supply_type = _supply_type(scope)
+    rates = (InvoiceItems.invoice_item_igst_rate, InvoiceItems.invoice_item_cgst_rate, InvoiceItems.invoice_item_sgst_rate)
+    return (
+        select(
+            Invoices.invoice_place_of_supply,
+            supply_type.label("supply_type"),
+            InvoiceItems.invoice_item_igst_rate.label("igst_rate"),
+            InvoiceItems.invoice_item_cgst_rate.label("cgst_rate"),
+            InvoiceItems.invoice_item_sgst_rate.label("sgst_rate"),
+            *_invoice_item_tax_sums()
+        )
+        .select_from(Invoices)
+        .join(Customers, Customers.customer_id == Invoices.customer_company)
+        .join(InvoiceItems, InvoiceItems.invoice_id == Invoices.invoice_id)
+        .where(*_invoice_conditions(scope), ~_is_registered(Customers.customer_gstin))
+        .group_by(Invoices.invoice_place_of_supply, supply_type, *rates)
+        .order_by(Invoices.invoice_place_of_supply, supply_type, *rates)
+    )
+
+
+def _hsn_statement(scope: ReturnScope) -> Select:
+    """Summary of all supplies by HSN/SAC code, unit and tax rate."""
+    rates = (InvoiceItems.invoice_item_igst_rate, InvoiceItems.invoice_item_cgst_rate, InvoiceItems.invoice_item_sgst_rate)
+    return (
+        select(
+            Products.product_hsn_sac_code.label("hsn_sac_code"),
+            Products.product_unit_of_measure.label("unit_of_measure"),
+            InvoiceItems.invoice_item_igst_rate.label("igst_rate"),
+            InvoiceItems.invoice_item_cgst_rate.label("cgst_rate"),
+            InvoiceItems.invoice_item_sgst_rate.label("sgst_rate"),
+            func.sum(InvoiceItems.invoice_item_quantity).label("total_quantity"),
+            *_invoice_item_tax_sums(),
+            func.sum(InvoiceItems.invoice_item_total_amount).label("total_value")
+        )
+        .select_from(Invoices)
+        .join(InvoiceItems, InvoiceItems.invoice_id == Invoices.invoice_id)
+        .join(Products, Products.product_id == InvoiceItems.product_id)
+        .where(*_invoice_conditions(scope))
+        .group_by(Products.product_hsn_sac_code, Products.product_unit_of_measure, *rates)
+        .order_by(Products.product_hsn_sac_code, Products.product_unit_of_measure, *rates)
+    )
+
+
+def _cdnr_statement(scope: ReturnScope) -> Select:
+    """Credit and debit notes issued to registered customers, one row per note and tax rate."""
+    supply_type = _supply_type(scope)
+    rates = (CreditNoteItems.igst_rate, CreditNoteItems.cgst_rate, CreditNoteItems.sgst_rate)
+    return (
+        select(
+            Customers.customer_gstin,
+            Customers.customer_name,
+            CreditNotes.note_type,
+            CreditNotes.note_number,
+            CreditNotes.note_date,
+            CreditNotes.note_total,
+            Invoices.invoice_number,
+            Invoices.invoice_date,
+            supply_type.label("supply_type"),
+            CreditNoteItems.igst_rate,
+            CreditNoteItems.cgst_rate,
+            CreditNoteItems.sgst_rate,
+            *_tax_sums(CreditNoteItems)
+        )
+        .select_from(CreditNotes)
+        .join(Customers, Customers.customer_id == CreditNotes.customer_id)
+        .join(Invoices, Invoices.invoice_id == CreditNotes.invoice_id)
+        .join(CreditNoteItems, CreditNoteItems.note_id == CreditNotes.note_id)
+        .where(
+            CreditNotes.company_id == scope.company_id,
+            CreditNotes.note_date >= scope.start,
+            CreditNotes.note_date < scope.end,
+            _is_registered(Customers.customer_gstin)
+        )
+        .group_by(
+            Customers.customer_gstin, Customers.customer_name, Customers.customer_state,
+            CreditNotes.note_id, CreditNotes.note_type, CreditNotes.note_number, CreditNotes.note_date,
+            CreditNotes.note_total, Invoices.invoice_number, Invoices.invoice_date, *rates
+        )
+        .order_by(Customers.customer_gstin, CreditNotes.note_date, CreditNotes.note_number, *rates)
+    )
+
+
+def _supply_summary_statement(scope: ReturnScope) -> Select:
+    """Totals split into intra- and inter-state supplies to registered and unregistered customers."""
+    supply_type = _supply_type(scope)
+    registered = case((_is_registered(Customers.customer_gstin), literal_column("'b2b'")), else_=literal_column("'b2c'"))
+    return (
+        select(
+            supply_type.label("supply_type"),
+            registered.label("customer_type"),
+            func.count(func.distinct(Invoices.invoice_id)).label("invoice_count"),
+            *_invoice_item_tax_sums(),
+            func.sum(InvoiceItems.invoice_item_total_amount).label("total_value")
+        )
+        .select_from(Invoices)
+        .join(Customers, Customers.customer_id == Invoices.customer_company)
+        .join(InvoiceItems, InvoiceItems.invoice_id == Invoices.invoice_id)
+        .where(*_invoice_conditions(scope))
+        .group_by(supply_type, registered)
+        .order_by(supply_type, registered)
+    )
+
+
+GSTR1_SECTIONS: Dict[str, Callable[[ReturnScope], Select]] = {
+    "b2b": _b2b_statement,
+    "b2cs": _b2cs_statement,
+    "cdnr": _cdnr_statement,
+    "hsn": _hsn_statement,
+    "supply_summary": _supply_summary_statement,
+}
+
+
+def check_return_scope(scope: ReturnScope) -> None:
+    if scope.date_to < scope.date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_to must not be before date_from."
+        )
+    if (scope.date_to - scope.date_from).days > 366:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A return can cover at most one year."
+        )
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+async def stream_gstr1_json(
+    scope: ReturnScope,
+    section: Optional[str] = None,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+) -> AsyncIterator[bytes]:
+    """
+    Stream the GSTR-1 sections (or just `section`) as one JSON document. Each
+    section is aggregated in SQL and its rows are written as they arrive, so memory
+    use doesn't depend on the number of invoices in the period.
+    """
+    started = time.perf_counter()
+    rows_written = 0
+    header = {
+        "gstin": scope.company_gstin,
+        "date_from": scope.date_from.isoformat(),
+        "date_to": scope.date_to.isoformat(),
+    }
+    yield json.dumps(header)[:-1].encode()
+    async with session_factory() as db:
+        for section_name, build_statement in GSTR1_SECTIONS.items():
+            if section is not None and section_name != section:
+                continue
+            yield f',"{section_name}":['.encode()
+            first = True
+            result = await db.stream(build_statement(scope).execution_options(yield_per=STREAM_BATCH_SIZE))
+            async for partition in result.mappings().partitions():
+                chunk = ",".join(
+                    json.dumps({key: _json_value(value) for key, value in row.items()}) for row in partition
+                )
+                yield (chunk if first else "," + chunk).encode()
+                first = False
+                rows_written += len(partition)
+            yield b"]"
+    yield b"}"
+    _record_generation("json", started, rows_written)
+
+
+async def stream_gstr1_csv(
+    scope: ReturnScope,
+    section: str,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+) -> AsyncIterator[bytes]:
+    """Stream one GSTR-1 section as CSV with a header row."""
+    started = time.perf_counter()
+    rows_written = 0
+    async with session_factory() as db:
+        result = await db.stream(GSTR1_SECTIONS[section](scope).execution_options(yield_per=STREAM_BATCH_SIZE))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(result.keys())
+        async for partition in result.partitions():
+            writer.writerows([[_json_value(value) for value in row] for row in partition])
+            rows_written += len(partition)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    _record_generation("csv", started, rows_written)
+
+
+def _record_generation(output_format: str, started: float, rows_written: int) -> None:
+    duration = time.perf_counter() - started
+    metrics.observe("gstr1_generation_seconds", duration, format=output_format)
+    metrics.increment("gstr1_rows_total", rows_written, format=output_format)
+    logger.info("Generated GSTR-1 %s with %s rows in %.3fs", output_format, rows_written, duration)
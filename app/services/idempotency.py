@@ -0,0 +1,141 @@
+# app/services/idempotency.py
+import hashlib
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.companies import Companies
+from app.models.idempotency_keys import IdempotencyKeys
+
+
+def _hash_request(request_method: str, request_path: str, request_payload: str) -> str:
+    return hashlib.sha256(f"{request_method} {request_path}\n{request_payload}".encode()).hexdigest()
+
+
+def _lease_end() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_CLAIM_LEASE_SECONDS)
+
+
+async def _take_over_claim(record: IdempotencyKeys, db: AsyncSession) -> None:
+    """Renew the lease of an in-progress claim whose lease expired, or refuse with 409 while it holds."""
+    lease = record.locked_until
+    if lease is not None and lease > datetime.utcnow():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed."
+        )
+    # Only one retry may take the claim over: the update matches the expired lease it saw
+    result = await db.execute(
+        update(IdempotencyKeys)
+        .where(
+            IdempotencyKeys.idempotency_key_id == record.idempotency_key_id,
+            IdempotencyKeys.response_status.is_(None),
+            IdempotencyKeys.locked_until.is_(None) if lease is None else IdempotencyKeys.locked_until == lease
+        )
+        .values(locked_until=_lease_end())
+    )
+    await db.commit()
+    if not result.rowcount:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed."
+        )
+
+
+async def claim_idempotency_key(
+    idempotency_key: str,
+    request_method: str,
+    request_path: str,
+    request_payload: str,
+    db: AsyncSession,
+    current_company: Companies
+) -> IdempotencyKeys:
+    """
+    Look up an Idempotency-Key for the company, claiming it if it is new.
+
+    Returns the stored record; if its response_status is set the request already
+    completed and the stored response should be replayed instead of running it again.
+    A claim whose lease expired before its request completed is taken over, so a
+    worker dying mid-request doesn't leave the key stuck.
+    """
+    request_hash = _hash_request(request_method, request_path, request_payload)
+
+    result = await db.execute(
+        select(IdempotencyKeys).where(
+            IdempotencyKeys.company_id == current_company.company_id,
+            IdempotencyKeys.idempotency_key == idempotency_key
+        )
+    )
+    record = result.scalar_one_or_none()
+
+    if record and record.expires_at <= datetime.utcnow():
+        await db.delete(record)
+        await db.flush()
+        record = None
+
+    if record:
+        if record.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request."
+            )
+        if record.response_status is None:
+            await _take_over_claim(record, db)
+        return record
+
+    record = IdempotencyKeys(
+        company_id=current_company.company_id,
+        idempotency_key=idempotency_key,
+        request_method=request_method,
+        request_path=request_path,
+        request_hash=request_hash,
+        locked_until=_lease_end(),
+        expires_at=datetime.utcnow() + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    )
+    db.add(record)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another request claimed the same key between our lookup and insert
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed."
+        )
+    return record
+
+
+async def complete_idempotent_request(
+    idempotency_key_id: str,
+    response_status: int,
+    response_body: str,
+    db: AsyncSession
+) -> None:
+    """Store the response of a claimed request so retries can replay it."""
+    await db.execute(
+        update(IdempotencyKeys)
+        .where(IdempotencyKeys.idempotency_key_id == idempotency_key_id)
+        .values(response_status=response_status, response_body=response_body, locked_until=None)
+    )
+    await db.commit()
+
+
+async def release_idempotency_key(idempotency_key_id: str, db: AsyncSession) -> None:
+    """Forget a claimed key after its request failed, so the client can retry it."""
+    await db.execute(
+        delete(IdempotencyKeys).where(IdempotencyKeys.idempotency_key_id == idempotency_key_id)
+    )
+    await db.commit()
+
+
+async def purge_expired_idempotency_keys(db: AsyncSession) -> int:
+    """Delete all stored responses past their TTL. Returns the number of keys removed."""
+    result = await db.execute(
+        delete(IdempotencyKeys).where(IdempotencyKeys.expires_at <= datetime.utcnow())
+    )
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,225 @@
+# app/services/imports.py
+import asyncio
+import csv
+import importlib.util
+import io
+import time
+import uuid
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Set, Tuple, Type
+
+from fastapi import HTTPException, UploadFile, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.companies import Companies
+from app.models.customers import Customers
+from app.models.products import Products
+from app.schemas.changes import ChangeEntityType
+from app.schemas.customers import CreateCustomer
+from app.schemas.imports import ImportReport, ImportRowError
+from app.schemas.products import CreateProduct
+from app.services.changes import record_changes
+from app.services.search import invalidate_search_index, CUSTOMERS, PRODUCTS
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+RowIterator = Iterator[Tuple[int, Dict[str, Any]]]
+
+
+def excel_import_available() -> bool:
+    return importlib.util.find_spec("openpyxl") is not None
+
+
+def _iter_csv_rows(file) -> RowIterator:
+    """Yield (row number, values) from a UTF-8 CSV file whose header row names the fields."""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Missing trailing cells come back as None; leave them out so schema defaults apply
+            yield reader.line_num, {
+                key.strip(): value.strip()
+                for key, value in row.items()
+                if key and isinstance(value, str)
+            }
+    finally:
+        # Leave the upload's file open for the framework to close
+        text.detach()
+
+
+def _iter_excel_rows(file) -> RowIterator:
+    """Yield (row number, values) from the first sheet of a workbook whose header row names the fields."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(cell).strip() if cell is not None else None for cell in header]
+        for row_number, cells in enumerate(rows, start=2):
+            if all(cell is None for cell in cells):
+                continue
+            yield row_number, {
+                column: cell.strip() if isinstance(cell, str) else cell
+                for column, cell in zip(columns, cells)
+                if column and cell is not None
+            }
+    finally:
+        workbook.close()
+
+
+def _open_rows(upload: UploadFile) -> RowIterator:
+    file_name = (upload.filename or "").lower()
+    if file_name.endswith(EXCEL_EXTENSIONS):
+        if not excel_import_available():
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail="Excel import is not available on this server; upload the data as CSV instead."
+            )
+        return _iter_excel_rows(upload.file)
+    if file_name.endswith(".xls"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Legacy .xls workbooks are not supported; save the sheet as .xlsx or CSV."
+        )
+    return _iter_csv_rows(upload.file)
+
+
+def _next_chunk(rows: RowIterator, size: int) -> List[Tuple[int, Dict[str, Any]]]:
+    return list(islice(rows, size))
+
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    ]
+
+
+async def _import_rows(
+    upload: UploadFile,
+    db: AsyncSession,
+    current_company: Companies,
+    schema: Type[BaseModel],
+    model,
+    owner_field: str,
+    key_field: str,
+    entity_type: ChangeEntityType
+) -> ImportReport:
+    """
+    Stream rows from an uploaded file in chunks: validate each row against the create
+    schema, reject rows whose key already exists with one query per chunk, then insert
+    the remaining rows of the chunk in a single executemany and commit.
+    """
+    owner_column = getattr(model, owner_field)
+    key_column = getattr(model, key_field)
+    # Ids are assigned here rather than by the column default so the change feed can record them
+    id_field = model.__mapper__.primary_key[0].key
+
+    started = time.perf_counter()
+    rows = _open_rows(upload)
+    seen_keys: Set[str] = set()
+    errors: List[ImportRowError] = []
+    total_rows = imported_rows = failed_rows = 0
+
+    def reject(row_number: int, messages: List[str]) -> None:
+        nonlocal failed_rows
+        failed_rows += 1
+        if len(errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            errors.append(ImportRowError(row=row_number, errors=messages))
+
+    while True:
+        try:
+            chunk = await asyncio.to_thread(_next_chunk, rows, settings.IMPORT_CHUNK_SIZE)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Could not read the file after row {total_rows + 1}: {e}. "
+                       f"{imported_rows} rows were imported before the error."
+            )
+        if not chunk:
+            break
+        total_rows += len(chunk)
+
+        valid_rows = []
+        for row_number, values in chunk:
+            values[owner_field] = current_company.company_id
+            try:
+                valid_rows.append((row_number, schema(**values)))
+            except ValidationError as e:
+                reject(row_number, _validation_messages(e))
+
+        chunk_keys = {getattr(record, key_field) for _, record in valid_rows if getattr(record, key_field)}
+        existing_keys = set()
+        if chunk_keys:
+            result = await db.execute(
+                select(key_column).where(owner_column == current_company.company_id, key_column.in_(chunk_keys))
+            )
+            existing_keys = set(result.scalars().all())
+
+        new_records = []
+        new_row_numbers = []
+        for row_number, record in valid_rows:
+            key = getattr(record, key_field)
+            if key and key in existing_keys:
+                reject(row_number, [f"{key_field}: already exists for this company"])
+                continue
+            if key and key in seen_keys:
+                reject(row_number, [f"{key_field}: duplicates an earlier row in the file"])
+                continue
+            if key:
+                seen_keys.add(key)
+            new_records.append(dict(record.dict(), **{id_field: str(uuid.uuid4())}))
+            new_row_numbers.append(row_number)
+
+        if not new_records:
+            continue
+        try:
+            await db.execute(insert(model), new_records)
+            await record_changes(
+                db, current_company.company_id, entity_type, [record[id_field] for record in new_records]
+            )
+            await db.commit()
+            imported_rows += len(new_records)
+        except Exception as e:
+            await db.rollback()
+            for row_number in new_row_numbers:
+                reject(row_number, [f"Failed to save the chunk containing this row: {e.__class__.__name__}"])
+
+    duration = time.perf_counter() - started
+    return ImportReport(
+        total_rows=total_rows,
+        imported_rows=imported_rows,
+        failed_rows=failed_rows,
+        duration_seconds=round(duration, 3),
+        rows_per_second=round(total_rows / duration, 1) if duration > 0 else float(total_rows),
+        errors=errors,
+        errors_truncated=failed_rows > len(errors)
+    )
+
+
+async def import_customers(upload: UploadFile, db: AsyncSession, current_company: Companies) -> ImportReport:
+    """Bulk import customers from a CSV or Excel upload, skipping GSTINs the company already has."""
+    try:
+        return await _import_rows(
+            upload, db, current_company, CreateCustomer, Customers, "customer_to", "customer_gstin",
+            ChangeEntityType.customer
+        )
+    finally:
+        invalidate_search_index(CUSTOMERS, current_company.company_id)
+
+
+async def import_products(upload: UploadFile, db: AsyncSession, current_company: Companies) -> ImportReport:
+    """Bulk import products from a CSV or Excel upload, skipping product names the company already has."""
+    try:
+        return await _import_rows(
+            upload, db, current_company, CreateProduct, Products, "company_id", "product_name",
+            ChangeEntityType.product
+        )
+    finally:
+        invalidate_search_index(PRODUCTS, current_company.company_id)
@@ -0,0 +1,206 @@
+# app/services/invoice_archives.py
+import asyncio
+import enum
+import gzip
+import hashlib
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.financial_year import financial_year_bounds, financial_year_for, financial_year_label
+from app.core.invoice_status import InvoiceStatus
+from app.core.sharding import moving_company_ids
+from app.models.companies import Companies
+from app.models.credit_notes import CreditNotes, CreditNoteItems
+from app.models.invoice_archives import InvoiceArchives
+from app.models.invoice_items import InvoiceItems
+from app.models.invoices import Invoices
+from app.models.payments import PaymentAllocations
+
+logger = logging.getLogger(__name__)
+
+# Only settled invoices are archived; anything that may still change stays in the database
+ARCHIVABLE_INVOICE_STATUSES = frozenset({InvoiceStatus.paid, InvoiceStatus.cancelled})
+
+ARCHIVE_NOT_FOUND = "Invoice archive not found."
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Can't archive value of type {type(value).__name__}")
+
+
+def _group_rows(rows, key: str) -> Dict[str, List[dict]]:
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row[key]].append(dict(row))
+    return grouped
+
+
+def _write_archive(path: str, payload: bytes) -> Tuple[int, str]:
+    """Compress and write an archive file atomically; returns its size and SHA-256."""
+    compressed = gzip.compress(payload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial_path = f"{path}.partial"
+    with open(partial_path, "wb") as archive_file:
+        archive_file.write(compressed)
+        archive_file.flush()
+        os.fsync(archive_file.fileno())
+    os.replace(partial_path, path)
+    return len(compressed), hashlib.sha256(compressed).hexdigest()
+
+
+async def _archive_invoice_batch(db: AsyncSession, company_id: str, invoices: List[dict]) -> None:
+    """
+    Write a batch of one company's invoices from a single financial year to an
+    archive file, with their items, credit notes and payment allocations, then
+    delete them from the database in the same transaction as the manifest insert.
+    """
+    invoice_ids = [invoice["invoice_id"] for invoice in invoices]
+    items = _group_rows(
+        (await db.execute(select(InvoiceItems.__table__).where(InvoiceItems.invoice_id.in_(invoice_ids)))).mappings(),
+        "invoice_id"
+    )
+    allocations = _group_rows(
+        (await db.execute(select(PaymentAllocations.__table__).where(PaymentAllocations.invoice_id.in_(invoice_ids)))).mappings(),
+        "invoice_id"
+    )
+    notes = _group_rows(
+        (await db.execute(select(CreditNotes.__table__).where(CreditNotes.invoice_id.in_(invoice_ids)))).mappings(),
+        "invoice_id"
+    )
+    note_ids = [note["note_id"] for invoice_notes in notes.values() for note in invoice_notes]
+    note_items = _group_rows(
+        (await db.execute(select(CreditNoteItems.__table__).where(CreditNoteItems.note_id.in_(note_ids)))).mappings(),
+        "note_id"
+    ) if note_ids else {}
+
+    lines = []
+    for invoice in invoices:
+        invoice_id = invoice["invoice_id"]
+        record = {
+            "invoice": invoice,
+            "items": items.get(invoice_id, []),
+            "credit_notes": [
+                dict(note, items=note_items.get(note["note_id"], [])) for note in notes.get(invoice_id, [])
+            ],
+            "payment_allocations": allocations.get(invoice_id, []),
+        }
+        lines.append(json.dumps(record, default=_json_default, separators=(",", ":")))
+    payload = ("\n".join(lines) + "\n").encode("utf-8")
+
+    financial_year = financial_year_for(invoices[0]["invoice_date"])
+    archive_id = str(uuid.uuid4())
+    archive_path = os.path.join(
+        settings.INVOICE_ARCHIVE_DIR, company_id, f"{financial_year_label(financial_year)}-{archive_id}.jsonl.gz"
+    )
+    archive_bytes, archive_sha256 = await asyncio.to_thread(_write_archive, archive_path, payload)
+
+    try:
+        await db.execute(insert(InvoiceArchives).values(
+            archive_id=archive_id,
+            company_id=company_id,
+            financial_year=financial_year,
+            archive_path=archive_path,
+            invoice_count=len(invoices),
+            first_invoice_date=invoices[0]["invoice_date"],
+            last_invoice_date=invoices[-1]["invoice_date"],
+            archive_bytes=archive_bytes,
+            archive_sha256=archive_sha256
+        ))
+        # Children are deleted explicitly rather than relying on ON DELETE CASCADE,
+        # which SQLite doesn't enforce by default
+        if note_ids:
+            await db.execute(delete(CreditNoteItems).where(CreditNoteItems.note_id.in_(note_ids)))
+            await db.execute(delete(CreditNotes).where(CreditNotes.note_id.in_(note_ids)))
+        await db.execute(delete(PaymentAllocations).where(PaymentAllocations.invoice_id.in_(invoice_ids)))
+        await db.execute(delete(InvoiceItems).where(InvoiceItems.invoice_id.in_(invoice_ids)))
+        await db.execute(delete(Invoices).where(Invoices.invoice_id.in_(invoice_ids)))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        os.remove(archive_path)
+        raise
+
+
+async def archive_closed_invoices(db: AsyncSession) -> int:
+    """
+    Scheduled job: move settled invoices of closed financial years out of the
+    database into compressed archive files, one file per company, year and batch.
+    Returns the number of invoices archived.
+    """
+    hot_from, _ = financial_year_bounds(
+        financial_year_for(datetime.utcnow()) - settings.INVOICE_HOT_FINANCIAL_YEARS + 1
+    )
+    company_result = await db.execute(select(Companies.company_id))
+    company_ids = company_result.scalars().all()
+
+    archived = 0
+    for company_id in company_ids:
+        while True:
+            # Left alone while it is moved between shards, which can start between batches
+            if company_id in await moving_company_ids():
+                break
+            # The (owner_company, invoice_date) index serves this range, oldest first
+            result = await db.execute(
+                select(Invoices.__table__)
+                .where(
+                    Invoices.owner_company == company_id,
+                    Invoices.invoice_date < hot_from,
+                    Invoices.invoice_status.in_(ARCHIVABLE_INVOICE_STATUSES),
+                    Invoices.invoice_balance_due == 0
+                )
+                .order_by(Invoices.invoice_date, Invoices.invoice_id)
+                .limit(settings.INVOICE_ARCHIVE_MAX_INVOICES)
+                .with_for_update(skip_locked=True)
+            )
+            invoices = [dict(row) for row in result.mappings()]
+            if not invoices:
+                await db.rollback()
+                break
+            # A file holds a single financial year; the rest of the batch is picked up next round
+            financial_year = financial_year_for(invoices[0]["invoice_date"])
+            invoices = [invoice for invoice in invoices if financial_year_for(invoice["invoice_date"]) == financial_year]
+            await _archive_invoice_batch(db, company_id, invoices)
+            archived += len(invoices)
+            logger.info(
+                "Archived %s invoices of company %s for %s", len(invoices), company_id, financial_year_label(financial_year)
+            )
+    return archived
+
+
+async def list_invoice_archives(db: AsyncSession, current_company: Companies) -> List[InvoiceArchives]:
+    result = await db.execute(
+        select(InvoiceArchives)
+        .where(InvoiceArchives.company_id == current_company.company_id)
+        .order_by(InvoiceArchives.financial_year, InvoiceArchives.first_invoice_date)
+    )
+    return result.scalars().all()
+
+
+async def get_invoice_archive(archive_id: str, db: AsyncSession, current_company: Companies) -> InvoiceArchives:
+    result = await db.execute(
+        select(InvoiceArchives).where(
+            InvoiceArchives.archive_id == archive_id,
+            InvoiceArchives.company_id == current_company.company_id
+        )
+    )
+    archive = result.scalar_one_or_none()
+    if not archive:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=ARCHIVE_NOT_FOUND)
+    return archive
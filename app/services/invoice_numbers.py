@@ -0,0 +1,106 @@
+# app/services/invoice_numbers.py
+import asyncio
+from typing import Dict, List, Tuple
+
+from sqlalchemy import update, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.financial_year import financial_year_label
+from app.database import AsyncSessionLocal
+from app.models.invoice_sequences import InvoiceNumberSequences
+
+# Numbers reserved in blocks by this worker, keyed by (company_id, financial_year).
+# Each entry is [next number to hand out, end of the reserved block (exclusive)].
+_reserved_blocks: Dict[Tuple[str, int], List[int]] = {}
+_block_locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+
+
+def format_invoice_number(financial_year: int, sequence: int) -> str:
+    return settings.INVOICE_NUMBER_FORMAT.format(
+        financial_year=financial_year_label(financial_year),
+        sequence=sequence
+    )
+
+
+async def _reserve_sequence_range(
+    db: AsyncSession,
+    company_id: str,
+    financial_year: int,
+    count: int
+) -> int:
+    """
+    Advance the company's counter by `count` in the session's transaction and
+    return the first reserved number. The counter row stays locked until that
+    transaction ends, which serialises allocations per company and year.
+    """
+    while True:
+        result = await db.execute(
+            update(InvoiceNumberSequences)
+            .where(
+                InvoiceNumberSequences.company_id == company_id,
+                InvoiceNumberSequences.financial_year == financial_year
+            )
+            .values(next_number=InvoiceNumberSequences.next_number + count)
+            .returning(InvoiceNumberSequences.next_number)
+        )
+        next_number = result.scalar_one_or_none()
+        if next_number is not None:
+            return next_number - count
+
+        # First invoice of the year: create the counter. A concurrent request may
+        # create it first, in which case the savepoint is discarded and we retry the update.
+        try:
+            async with db.begin_nested():
+                await db.execute(
+                    insert(InvoiceNumberSequences).values(
+                        company_id=company_id,
+                        financial_year=financial_year,
+                        next_number=1 + count
+                    )
+                )
+            return 1
+        except IntegrityError:
+            continue
+
+
+async def _take_from_reserved_block(company_id: str, financial_year: int, count: int) -> int:
+    """Hand out numbers from this worker's reserved block, reserving a new block when it runs out."""
+    key = (company_id, financial_year)
+    lock = _block_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        block = _reserved_blocks.get(key)
+        if block is None or block[1] - block[0] < count:
+            block_size = max(settings.INVOICE_NUMBER_BLOCK_SIZE, count)
+            # Reserve in a short transaction of its own so the counter row is not
+            # held locked for the duration of the caller's invoice transaction.
+            async with AsyncSessionLocal() as reserve_session:
+                first = await _reserve_sequence_range(reserve_session, company_id, financial_year, block_size)
+                await reserve_session.commit()
+            block = [first, first + block_size]
+            _reserved_blocks[key] = block
+        first = block[0]
+        block[0] += count
+        return first
+
+
+async def allocate_invoice_numbers(
+    db: AsyncSession,
+    company_id: str,
+    financial_year: int,
+    count: int = 1
+) -> List[str]:
+    """
+    Allocate `count` consecutive invoice numbers for a company's financial year.
+
+    With INVOICE_NUMBER_BLOCK_SIZE == 1 the counter is advanced inside the caller's
+    transaction, so a rolled back invoice gives its number back and the sequence stays
+    gapless. With larger block sizes numbers come from a block reserved up front by
+    this worker; numbers left in a block when the worker stops are never issued.
+    """
+    if settings.INVOICE_NUMBER_BLOCK_SIZE <= 1:
+        first = await _reserve_sequence_range(db, company_id, financial_year, count)
+    else:
+        first = await _take_from_reserved_block(company_id, financial_year, count)
+    return [format_invoice_number(financial_year, first + offset) for offset in range(count)]
@@ -0,0 +1,270 @@
+# app/services/invoice_status.py
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, insert, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.invoice_status import InvoiceStatus, RECEIVABLE_INVOICE_STATUSES, can_transition, statuses_allowing
+from app.core.sharding import moving_company_ids
+from app.models.companies import Companies
+from app.models.invoices import Invoices
+from app.models.payments import Payments, PaymentAllocations
+from app.services.ledger import ADJUSTMENT_ENTRY, INVOICE_ENTRY, PAYMENT_ENTRY, LedgerPosting, post_ledger_entries
+from app.schemas.changes import ChangeEntityType
+from app.schemas.webhooks import WebhookEventType
+from app.services.changes import record_changes, record_invoice_changes
+from app.services.sales_rollups import record_invoice_sales
+from app.services.webhooks import record_invoice_events
+
+# Statuses that can be set by hand; partially_paid is only ever set by recording a payment
+MANUAL_TARGET_STATUSES = frozenset({InvoiceStatus.issued, InvoiceStatus.paid, InvoiceStatus.cancelled})
+
+INVOICE_NOT_FOUND = "Invoice not found or does not belong to your company."
+PAID_INVOICE_NOT_CANCELLABLE = "Invoices with payments can't be cancelled; raise a credit note instead."
+
+# Payment method of the settlements recorded when invoices are marked paid by hand
+SETTLEMENT_PAYMENT_METHOD = "manual"
+
+
+def _transition_posting(invoice: Row, target: InvoiceStatus) -> LedgerPosting | None:
+    """Ledger posting that keeps the customer's balance in step with issuing or cancelling an invoice."""
+    if target == InvoiceStatus.issued:
+        # Drafts are not receivable until issued
+        return LedgerPosting(
+            entry_type=INVOICE_ENTRY,
+            reference_id=invoice.invoice_id,
+            entry_date=invoice.invoice_date or datetime.utcnow(),
+            description=f"Invoice {invoice.invoice_number}",
+            debit=invoice.invoice_total
+        )
+    if invoice.invoice_status == InvoiceStatus.draft or not invoice.invoice_balance_due:
+        return None
+    return LedgerPosting(
+        entry_type=ADJUSTMENT_ENTRY,
+        reference_id=invoice.invoice_id,
+        entry_date=datetime.utcnow(),
+        description=f"Invoice {invoice.invoice_number} cancelled",
+        credit=invoice.invoice_balance_due
+    )
+
+
+def _settlement(invoice: Row, company_id: str) -> Tuple[dict, dict, LedgerPosting]:
+    """
+    Payment, allocation and ledger posting that settle the remaining balance of an
+    invoice marked paid by hand, so its amount_paid is backed by a payment like any other.
+    """
+    payment_id = str(uuid.uuid4())
+    payment_date = datetime.utcnow()
+    description = f"Invoice {invoice.invoice_number} marked paid"
+    payment = {
+        "payment_id": payment_id,
+        "company_id": company_id,
+        "customer_id": invoice.customer_company,
+        "payment_date": payment_date,
+        "payment_amount": invoice.invoice_balance_due,
+        "payment_method": SETTLEMENT_PAYMENT_METHOD,
+        "payment_reference": None,
+        "payment_notes": description,
+        "amount_allocated": invoice.invoice_balance_due,
+        "amount_unallocated": 0,
+    }
+    allocation = {
+        "payment_id": payment_id,
+        "invoice_id": invoice.invoice_id,
+        "allocation_amount": invoice.invoice_balance_due,
+    }
+    posting = LedgerPosting(
+        entry_type=PAYMENT_ENTRY,
+        reference_id=payment_id,
+        entry_date=payment_date,
+        description=description,
+        credit=invoice.invoice_balance_due
+    )
+    return payment, allocation, posting
+
+
+async def transition_invoice_statuses(
+    invoice_ids: List[str],
+    target: InvoiceStatus,
+    db: AsyncSession,
+    current_company: Companies
+) -> Tuple[List[Row], List[Tuple[str, str]]]:
+    """
+    Move the company's invoices to `target`, enforcing the status state machine.
+    All valid invoices are updated by a single UPDATE statement; invoices that are
+    missing or can't make the transition are returned as (invoice_id, reason).
+
+    Marking an invoice paid records a payment settling its remaining balance, and
+    cancelling it writes the balance off; both are recorded in the customer's
+    ledger. Only invoices nothing has been paid on can be cancelled.
+    """
+    if target not in MANUAL_TARGET_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invoices become {target.value} by recording payments, not by changing their status."
+        )
+    if len(invoice_ids) > settings.INVOICE_STATUS_BULK_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.INVOICE_STATUS_BULK_MAX_SIZE} invoices can be transitioned at once."
+        )
+
+    unique_ids = list(dict.fromkeys(invoice_ids))
+    try:
+        result = await db.execute(
+            select(
+                Invoices.invoice_id,
+                Invoices.customer_company,
+                Invoices.invoice_number,
+                Invoices.invoice_date,
+                Invoices.invoice_status,
+                Invoices.invoice_total,
+                Invoices.invoice_amount_paid,
+                Invoices.invoice_balance_due
+            )
+            .where(
+                Invoices.owner_company == current_company.company_id,
+                Invoices.invoice_id.in_(unique_ids)
+            )
+            .with_for_update()
+        )
+        invoices = {row.invoice_id: row for row in result}
+
+        failures = []
+        valid_ids = []
+        payment_rows = []
+        allocation_rows = []
+        postings: Dict[str, List[LedgerPosting]] = defaultdict(list)
+        for invoice_id in unique_ids:
+            invoice = invoices.get(invoice_id)
+            if invoice is None:
+                failures.append((invoice_id, INVOICE_NOT_FOUND))
+                continue
+            if not can_transition(invoice.invoice_status, target):
+                failures.append((
+                    invoice_id,
+                    f"Cannot change an invoice from {invoice.invoice_status.value} to {target.value}."
+                ))
+                continue
+            if target == InvoiceStatus.cancelled and invoice.invoice_amount_paid:
+                failures.append((invoice_id, PAID_INVOICE_NOT_CANCELLABLE))
+                continue
+            valid_ids.append(invoice_id)
+            if target == InvoiceStatus.paid:
+                if invoice.invoice_balance_due > 0:
+                    payment, allocation, posting = _settlement(invoice, current_company.company_id)
+                    payment_rows.append(payment)
+                    allocation_rows.append(allocation)
+                    postings[invoice.customer_company].append(posting)
+                continue
+            posting = _transition_posting(invoice, target)
+            if posting:
+                postings[invoice.customer_company].append(posting)
+
+        if not valid_ids:
+            await db.rollback()
+            return [], failures
+
+        values = {"invoice_status": target, "invoice_version": Invoices.invoice_version + 1}
+        if target == InvoiceStatus.paid:
+            values["invoice_amount_paid"] = Invoices.invoice_amount_paid + Invoices.invoice_balance_due
+            values["invoice_balance_due"] = 0
+        elif target == InvoiceStatus.cancelled:
+            values["invoice_balance_due"] = 0
+            values["invoice_cancelled_at"] = datetime.utcnow()
+
+        updated_result = await db.execute(
+            update(Invoices)
+            .where(Invoices.invoice_id.in_(valid_ids))
+            .values(**values)
+            .returning(
+                Invoices.invoice_id,
+                Invoices.invoice_status,
+                Invoices.invoice_balance_due,
+                Invoices.invoice_version
+            )
+            .execution_options(synchronize_session=False)
+        )
+        updated = updated_result.all()
+
+        if payment_rows:
+            await db.execute(insert(Payments), payment_rows)
+            await db.execute(insert(PaymentAllocations), allocation_rows)
+        # Issuing a draft makes it a sale; cancelling takes the sale (and its notes) back out
+        if target == InvoiceStatus.cancelled:
+            await record_invoice_sales(db, [
+                invoice_id for invoice_id in valid_ids
+                if invoices[invoice_id].invoice_status in RECEIVABLE_INVOICE_STATUSES
+            ], sign=-1, include_notes=True)
+        else:
+            await record_invoice_sales(db, [
+                invoice_id for invoice_id in valid_ids
+                if invoices[invoice_id].invoice_status not in RECEIVABLE_INVOICE_STATUSES
+            ])
+        await record_invoice_events(
+            db,
+            WebhookEventType.invoice_cancelled if target == InvoiceStatus.cancelled else WebhookEventType.invoice_status_changed,
+            valid_ids,
+            previous_statuses={invoice_id: invoices[invoice_id].invoice_status for invoice_id in valid_ids}
+        )
+        await record_changes(db, current_company.company_id, ChangeEntityType.invoice, valid_ids)
+
+        for customer_id, customer_postings in postings.items():
+            await post_ledger_entries(db, current_company.company_id, customer_id, customer_postings)
+        await db.commit()
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error changing invoice status: {str(e)}"
+        )
+    return updated, failures
+
+
+async def mark_overdue_invoices(db: AsyncSession) -> int:
+    """
+    Scheduled job: mark every company's unpaid invoices past their due date overdue.
+    Works through the (invoice_status, invoice_due_date) index in batches, committing
+    each batch so locks are held briefly. Returns the number of invoices marked.
+    """
+    now = datetime.utcnow()
+    open_statuses = statuses_allowing(InvoiceStatus.overdue)
+    marked = 0
+    while True:
+        result = await db.execute(
+            select(Invoices.invoice_id, Invoices.invoice_status)
+            .where(
+                Invoices.invoice_status.in_(open_statuses),
+                Invoices.invoice_due_date < now,
+                Invoices.invoice_balance_due > 0,
+                Invoices.owner_company.notin_(await moving_company_ids())
+            )
+            .limit(settings.OVERDUE_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        previous_statuses = dict(result.all())
+        invoice_ids = list(previous_statuses)
+        if not invoice_ids:
+            break
+        await db.execute(
+            update(Invoices)
+            .where(Invoices.invoice_id.in_(invoice_ids))
+            .values(invoice_status=InvoiceStatus.overdue, invoice_version=Invoices.invoice_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        await record_invoice_events(db, WebhookEventType.invoice_status_changed, invoice_ids, previous_statuses)
+        await record_invoice_changes(db, invoice_ids)
+        await db.commit()
+        marked += len(invoice_ids)
+        if len(invoice_ids) < settings.OVERDUE_BATCH_SIZE:
+            break
+    return marked
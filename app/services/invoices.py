@@ -1,17 +1,35 @@
 # app/services/invoices.py
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_, delete
+from sqlalchemy import select, or_, and_, delete, func
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import selectinload
-from app.models.invoices import Invoices
+from sqlalchemy.exc import IntegrityError
+from app.models.invoices import Invoices, ACTIVE_INVOICES, INVOICE_NOTES_DOCUMENT
 from app.models.invoice_items import InvoiceItems
 from app.models.products import Products
 from app.models.companies import Companies
 from app.models.customers import Customers
-from app.schemas.invoices import CreateInvoiceWithItems, UpdateInvoice, InvoiceItemOut
+from app.models.credit_notes import CreditNotes
+from app.models.payments import PaymentAllocations
+from app.schemas.invoices import CreateInvoiceWithItems, UpdateInvoice, InvoiceItemInput
+from app.services.tax import InvoiceTotals, LineAmounts, calculate_product_line, sum_lines
+from app.services.invoice_numbers import allocate_invoice_numbers
+from app.core.financial_year import financial_year_for, financial_year_bounds
+from app.services.search import escape_like
+from app.services.invoice_status import transition_invoice_statuses, INVOICE_NOT_FOUND
+from app.services.sales_rollups import record_invoice_sales
+from app.services.webhooks import record_invoice_events
+from app.services.changes import record_changes
+from app.schemas.changes import ChangeEntityType
+from app.schemas.webhooks import WebhookEventType
+from app.services.ledger import INVOICE_ENTRY, LedgerPosting, post_ledger_entries
+from app.core.money import ZERO
+from app.core.invoice_status import InvoiceStatus, RECEIVABLE_INVOICE_STATUSES
 from fastapi import HTTPException, status
 from datetime import datetime
-from typing import List, Union
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
 
 # Import dependencies for authentication and company context
 from app.services.users import get_current_active_user # Assuming this exists
@@ -23,6 +41,98 @@ def _to_naive_datetime(dt_obj: datetime) -> datetime:
         return dt_obj.replace(tzinfo=None)
     return dt_obj
 
+def _financial_year_filter(financial_year: Optional[int], all_years: bool) -> list:
+    """
+    Invoice date range for listings: the given financial year, the current one by
+    default, or no range when all years are asked for. The range is served by the
+    (company, invoice_date) indexes, so listing cost doesn't grow with history.
+    """
+    if all_years:
+        return []
+    if financial_year is None:
+        financial_year = financial_year_for(datetime.utcnow())
+    start, end = financial_year_bounds(financial_year)
+    return [Invoices.invoice_date >= start, Invoices.invoice_date < end]
+
+async def _get_products_map(
+    product_ids: List[str],
+    db: AsyncSession,
+    current_company: Companies
+) -> Dict[str, Products]:
+    """
+    Fetch all products referenced by invoice items in one query,
+    ensuring every product belongs to the current company.
+    """
+    unique_product_ids = set(product_ids)
+    products_result = await db.execute(
+        select(Products).where(
+            Products.product_id.in_(unique_product_ids),
+            Products.company_id == current_company.company_id # Ensure product belongs to the current company
+        )
+    )
+    products_map = {p.product_id: p for p in products_result.scalars().all()}
+
+    if len(products_map) != len(unique_product_ids):
+        missing_products = [pid for pid in unique_product_ids if pid not in products_map]
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Some products not found or do not belong to your company: {', '.join(missing_products)}"
+        )
+    return products_map
+
+def invoice_item_values(product_id: str, line: LineAmounts) -> dict:
+    """Column values of an invoice item row for a calculated line."""
+    return dict(
+        product_id=product_id,
+        invoice_item_quantity=line.quantity,
+        invoice_item_cgst_rate=line.cgst_rate,
+        invoice_item_sgst_rate=line.sgst_rate,
+        invoice_item_igst_rate=line.igst_rate,
+        invoice_item_unit_price=line.unit_price,
+        invoice_item_taxable_value=line.taxable_value,
+        invoice_item_cgst_amount=line.cgst_amount,
+        invoice_item_sgst_amount=line.sgst_amount,
+        invoice_item_igst_amount=line.igst_amount,
+        invoice_item_total_amount=line.total_amount,
+    )
+
+def _build_invoice_items(
+    invoice_items_input: List[InvoiceItemInput],
+    products_map: Dict[str, Products],
+    is_intrastate: bool
+) -> Tuple[List[InvoiceItems], InvoiceTotals]:
+    """
+    Build invoice item rows with their tax amounts snapshotted from the current
+    product prices, and the invoice totals they add up to.
+    """
+    new_invoice_items = []
+    lines = []
+    for item_input in invoice_items_input:
+        product = products_map[item_input.product_id]
+        line = calculate_product_line(product, item_input.invoice_item_quantity, is_intrastate)
+        lines.append(line)
+        new_invoice_items.append(InvoiceItems(**invoice_item_values(product.product_id, line)))
+    return new_invoice_items, sum_lines(lines)
+
+def _apply_invoice_totals(invoice: Invoices, totals: InvoiceTotals) -> None:
+    invoice.invoice_subtotal = totals.subtotal
+    invoice.invoice_total_cgst = totals.total_cgst
+    invoice.invoice_total_sgst = totals.total_sgst
+    invoice.invoice_total_igst = totals.total_igst
+    invoice.invoice_total = totals.total
+    invoice.invoice_balance_due = max(
+        totals.total
+        + (invoice.invoice_amount_debited or ZERO)
+        - (invoice.invoice_amount_credited or ZERO)
+        - (invoice.invoice_amount_paid or ZERO),
+        ZERO
+    )
+
+def _is_invoice_number_conflict(error: IntegrityError) -> bool:
+    """Whether the error is the per-company unique invoice number, as PostgreSQL or SQLite reports it."""
+    message = str(error.orig)
+    return "uq_invoices_owner_company_invoice_number" in message or "invoices.invoice_number" in message
+
 async def create_invoice_with_items(
     invoice_data_with_items: CreateInvoiceWithItems,
     db: AsyncSession,
@@ -60,85 +170,27 @@ async def create_invoice_with_items(
     invoice_dict['invoice_date'] = _to_naive_datetime(invoice_dict.get('invoice_date'))
     invoice_dict['invoice_due_date'] = _to_naive_datetime(invoice_dict.get('invoice_due_date'))
 
-    # Initialize totals for calculation
-    calculated_subtotal = 0.0
-    calculated_total_cgst = 0.0
-    calculated_total_sgst = 0.0
-    calculated_total_igst = 0.0
-    new_invoice_items = []
-
     try:
-        # Fetch all products in one go to reduce database roundtrips
-        product_ids = [item.product_id for item in invoice_items_input]
-        products_result = await db.execute(
-            select(Products).where(
-                Products.product_id.in_(product_ids),
-                Products.company_id == current_company.company_id # Ensure product belongs to the current company
-            )
+        products_map = await _get_products_map(
+            [item.product_id for item in invoice_items_input], db, current_company
         )
-        products_map = {p.product_id: p for p in products_result.scalars().all()}
-
-        if len(products_map) != len(product_ids):
-            found_product_ids = set(products_map.keys())
-            missing_products = [pid for pid in product_ids if pid not in found_product_ids]
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Some products not found or do not belong to your company: {', '.join(missing_products)}"
-            )
-
-        for item_input in invoice_items_input:
-            product = products_map.get(item_input.product_id)
-            if not product:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Product with ID {item_input.product_id} not found or does not belong to your company."
-                )
-
-            quantity = item_input.invoice_item_quantity
-            item_base_total = product.product_unit_price * quantity
-
-            item_cgst_amount = 0.0
-            item_sgst_amount = 0.0
-            item_igst_amount = 0.0
-            item_cgst_rate_to_store = 0.0
-            item_sgst_rate_to_store = 0.0
-            item_igst_rate_to_store = 0.0
-
-            if is_intrastate:
-                item_cgst_rate_to_store = product.product_default_cgst_rate
-                item_sgst_rate_to_store = product.product_default_sgst_rate
-                item_cgst_amount = (item_base_total * item_cgst_rate_to_store) / 100
-                item_sgst_amount = (item_base_total * item_sgst_rate_to_store) / 100
-            else:
-                item_igst_rate_to_store = product.product_default_igst_rate
-                item_igst_amount = (item_base_total * item_igst_rate_to_store) / 100
-
-            new_invoice_item = InvoiceItems(
-                product_id=product.product_id,
-                invoice_item_quantity=quantity,
-                invoice_item_cgst_rate=item_cgst_rate_to_store,
-                invoice_item_sgst_rate=item_sgst_rate_to_store,
-                invoice_item_igst_rate=item_igst_rate_to_store,
-            )
-            new_invoice_items.append(new_invoice_item)
-
-            calculated_subtotal += item_base_total
-            calculated_total_cgst += item_cgst_amount
-            calculated_total_sgst += item_sgst_amount
-            calculated_total_igst += item_igst_amount
+        new_invoice_items, totals = _build_invoice_items(invoice_items_input, products_map, is_intrastate)
 
         # Set calculated totals and new fields on the invoice object
         new_invoice = Invoices(**invoice_dict)
-        new_invoice.invoice_subtotal = calculated_subtotal
-        new_invoice.invoice_total_cgst = calculated_total_cgst
-        new_invoice.invoice_total_sgst = calculated_total_sgst
-        new_invoice.invoice_total_igst = calculated_total_igst
-        new_invoice.invoice_total = calculated_subtotal + calculated_total_cgst + calculated_total_sgst + calculated_total_igst
+        _apply_invoice_totals(new_invoice, totals)
 
         # New fields from CreateInvoiceWithItems
         new_invoice.invoice_status = invoice_data_with_items.invoice_status
         new_invoice.user_reference_notes = invoice_data_with_items.user_reference_notes
 
+        # Allocate the next number in the company's financial year sequence unless the client supplied one.
+        # This is done last so the sequence row is locked for as short a time as possible.
+        if not new_invoice.invoice_number:
+            new_invoice.invoice_number = (await allocate_invoice_numbers(
+                db, current_company.company_id, financial_year_for(new_invoice.invoice_date)
+            ))[0]
+
         # Add invoice and its items
         db.add(new_invoice)
         await db.flush() # Flush to get new_invoice.invoice_id
@@ -146,6 +198,21 @@ async def create_invoice_with_items(
             item.invoice_id = new_invoice.invoice_id
             db.add(item)
 
+        # Drafts reach the customer's ledger when they are issued
+        if new_invoice.invoice_status != InvoiceStatus.draft:
+            await post_ledger_entries(db, current_company.company_id, new_invoice.customer_company, [
+                LedgerPosting(
+                    entry_type=INVOICE_ENTRY,
+                    reference_id=new_invoice.invoice_id,
+                    entry_date=new_invoice.invoice_date or datetime.utcnow(),
+                    description=f"Invoice {new_invoice.invoice_number}",
+                    debit=new_invoice.invoice_total
+                )
+            ])
+            await record_invoice_sales(db, [new_invoice.invoice_id])
+        await record_invoice_events(db, WebhookEventType.invoice_created, [new_invoice.invoice_id])
+        await record_changes(db, current_company.company_id, ChangeEntityType.invoice, [new_invoice.invoice_id])
+
         await db.commit()
         await db.refresh(new_invoice)
 
@@ -164,6 +231,17 @@ async def create_invoice_with_items(
     except HTTPException:
         await db.rollback()
         raise
+    except IntegrityError as e:
+        await db.rollback()
+        if _is_invoice_number_conflict(e):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Invoice number {new_invoice.invoice_number} already exists for your company."
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Invoice conflicts with existing data: {e.orig}"
+        )
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -171,12 +249,19 @@ async def create_invoice_with_items(
             detail=f"Error creating invoice with items: {str(e)}"
         )
 
-async def show_all_invoices(db: AsyncSession, current_company: Companies) -> List[Invoices]:
+async def show_all_invoices(
+    db: AsyncSession,
+    current_company: Companies,
+    include_cancelled: bool = False,
+    financial_year: Optional[int] = None,
+    all_years: bool = False
+) -> List[Invoices]:
     """
-    Get all invoices relevant to the current authenticated company
-    (either as owner or customer).
+    Get the invoices of one financial year (the current one by default) relevant to
+    the current authenticated company (either as owner or customer).
+    Cancelled invoices are left out unless asked for.
     """
-    result = await db.execute(
+    query = (
         select(Invoices)
         .options(
             selectinload(Invoices.owner_company_rel),
@@ -187,9 +272,13 @@ async def show_all_invoices(db: AsyncSession, current_company: Companies) -> Lis
             or_(
                 Invoices.owner_company == current_company.company_id,
                 Invoices.customer_company == current_company.company_id
-            )
+            ),
+            *_financial_year_filter(financial_year, all_years)
         )
     )
+    if not include_cancelled:
+        query = query.where(ACTIVE_INVOICES)
+    result = await db.execute(query)
     invoices = result.scalars().all()
     return invoices
 
@@ -224,54 +313,20 @@ async def get_invoice_by_id(
         )
     return invoice
 
-async def _recalculate_invoice_totals(
-    invoice: Invoices, 
-    db: AsyncSession, 
-    current_company: Companies
-) -> None:
+async def _items_replaceable(invoice: Invoices, db: AsyncSession) -> bool:
     """
-    Recalculate invoice totals based on current items.
+    Whether the invoice's items may be replaced: only on drafts that no credit or
+    debit note or payment refers to, as those point at the existing lines and totals.
     """
-    # Get customer to determine if intrastate or interstate
-    customer_result = await db.execute(
-        select(Customers).where(Customers.customer_id == invoice.customer_company)
+    if invoice.invoice_status != InvoiceStatus.draft:
+        return False
+    notes = await db.execute(select(CreditNotes.note_id).where(CreditNotes.invoice_id == invoice.invoice_id).limit(1))
+    if notes.first() is not None:
+        return False
+    allocations = await db.execute(
+        select(PaymentAllocations.allocation_id).where(PaymentAllocations.invoice_id == invoice.invoice_id).limit(1)
     )
-    customer = customer_result.scalar_one_or_none()
-    if not customer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Customer not found."
-        )
-
-    is_intrastate = (customer.customer_state == current_company.company_state)
-
-    # Initialize totals
-    calculated_subtotal = 0.0
-    calculated_total_cgst = 0.0
-    calculated_total_sgst = 0.0
-    calculated_total_igst = 0.0
-
-    # Calculate totals from invoice items
-    for item in invoice.invoice_items:
-        item_base_total = item.product.product_unit_price * item.invoice_item_quantity
-        
-        if is_intrastate:
-            item_cgst_amount = (item_base_total * item.invoice_item_cgst_rate) / 100
-            item_sgst_amount = (item_base_total * item.invoice_item_sgst_rate) / 100
-            calculated_total_cgst += item_cgst_amount
-            calculated_total_sgst += item_sgst_amount
-        else:
-            item_igst_amount = (item_base_total * item.invoice_item_igst_rate) / 100
-            calculated_total_igst += item_igst_amount
-
-        calculated_subtotal += item_base_total
-
-    # Update invoice totals
-    invoice.invoice_subtotal = calculated_subtotal
-    invoice.invoice_total_cgst = calculated_total_cgst
-    invoice.invoice_total_sgst = calculated_total_sgst
-    invoice.invoice_total_igst = calculated_total_igst
-    invoice.invoice_total = calculated_subtotal + calculated_total_cgst + calculated_total_sgst + calculated_total_igst
+    return allocations.first() is None
 
 async def update_invoice_details(
     invoice_id: str,
@@ -291,6 +346,17 @@ async def update_invoice_details(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only update invoices that your company owns."
         )
+    if invoice.invoice_status == InvoiceStatus.cancelled:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Cancelled invoices can't be changed."
+        )
+    if updated_details.invoice_items is not None and not await _items_replaceable(invoice, db):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Items can only be changed on draft invoices without notes or payments; "
+                   "raise a credit or debit note instead."
+        )
 
     update_data = updated_details.dict(exclude_unset=True, exclude={'invoice_items'})
 
@@ -300,10 +366,19 @@ async def update_invoice_details(
     if 'invoice_due_date' in update_data:
         update_data['invoice_due_date'] = _to_naive_datetime(update_data['invoice_due_date'])
 
+    # Sales are re-dated or re-itemised by taking the invoice out of the rollups and adding it back
+    resales = invoice.invoice_status in RECEIVABLE_INVOICE_STATUSES and (
+        'invoice_date' in update_data or updated_details.invoice_items is not None
+    )
+
     try:
+        if resales:
+            await record_invoice_sales(db, [invoice_id], sign=-1)
+
         # Update invoice header fields
         for key, value in update_data.items():
             setattr(invoice, key, value)
+        invoice.invoice_version = invoice.invoice_version + 1
 
         # Handle invoice items update if provided
         if updated_details.invoice_items is not None:
@@ -326,63 +401,24 @@ async def update_invoice_details(
 
             is_intrastate = (customer.customer_state == current_company.company_state)
 
-            # Fetch all products for the new items
-            product_ids = [item.product_id for item in updated_details.invoice_items]
-            products_result = await db.execute(
-                select(Products).where(
-                    Products.product_id.in_(product_ids),
-                    Products.company_id == current_company.company_id
-                )
+            # Create new items and recalculate totals from them
+            products_map = await _get_products_map(
+                [item.product_id for item in updated_details.invoice_items], db, current_company
             )
-            products_map = {p.product_id: p for p in products_result.scalars().all()}
-
-            if len(products_map) != len(product_ids):
-                found_product_ids = set(products_map.keys())
-                missing_products = [pid for pid in product_ids if pid not in found_product_ids]
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Some products not found or do not belong to your company: {', '.join(missing_products)}"
-                )
-
-            # Create new items
-            new_invoice_items = []
-            for item_input in updated_details.invoice_items:
-                product = products_map.get(item_input.product_id)
-                if not product:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"Product with ID {item_input.product_id} not found."
-                    )
-
-                # Calculate tax rates based on transaction type
-                item_cgst_rate_to_store = 0.0
-                item_sgst_rate_to_store = 0.0
-                item_igst_rate_to_store = 0.0
-
-                if is_intrastate:
-                    item_cgst_rate_to_store = product.product_default_cgst_rate
-                    item_sgst_rate_to_store = product.product_default_sgst_rate
-                else:
-                    item_igst_rate_to_store = product.product_default_igst_rate
-
-                new_invoice_item = InvoiceItems(
-                    invoice_id=invoice_id,
-                    product_id=product.product_id,
-                    invoice_item_quantity=item_input.invoice_item_quantity,
-                    invoice_item_cgst_rate=item_cgst_rate_to_store,
-                    invoice_item_sgst_rate=item_sgst_rate_to_store,
-                    invoice_item_igst_rate=item_igst_rate_to_store,
-                )
-                new_invoice_items.append(new_invoice_item)
+            new_invoice_items, totals = _build_invoice_items(
+                updated_details.invoice_items, products_map, is_intrastate
+            )
+            for new_invoice_item in new_invoice_items:
+                new_invoice_item.invoice_id = invoice_id
                 db.add(new_invoice_item)
+            _apply_invoice_totals(invoice, totals)
 
             await db.flush()
 
-            # Refresh the invoice to get the new items
-            await db.refresh(invoice)
-
-            # Recalculate totals
-            await _recalculate_invoice_totals(invoice, db, current_company)
+        if resales:
+            await record_invoice_sales(db, [invoice_id])
+        await record_invoice_events(db, WebhookEventType.invoice_updated, [invoice_id])
+        await record_changes(db, current_company.company_id, ChangeEntityType.invoice, [invoice_id])
 
         await db.commit()
         await db.refresh(invoice)
@@ -402,6 +438,17 @@ async def update_invoice_details(
     except HTTPException:
         await db.rollback()
         raise
+    except IntegrityError as e:
+        await db.rollback()
+        if _is_invoice_number_conflict(e):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Invoice number {updated_details.invoice_number} already exists for your company."
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Invoice conflicts with existing data: {e.orig}"
+        )
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -409,36 +456,41 @@ async def update_invoice_details(
             detail=f"Error updating invoice: {str(e)}"
         )
 
-async def delete_invoice(
+async def cancel_invoice(
     invoice_id: str,
     db: AsyncSession,
     current_company: Companies
-) -> dict:
+) -> Row:
     """
-    Delete an invoice and its related items, ensuring it belongs to the current company.
+    Cancel an invoice. Cancelled invoices are kept with their items for the record;
+    their balance is written off in the customer's ledger. Invoices that have been
+    part paid are corrected with a credit note instead.
     """
-    invoice = await get_invoice_by_id(invoice_id, db, current_company)
-
-    try:
-        await db.delete(invoice)
-        await db.commit()
-        return {"message": "Invoice successfully deleted"}
-    except Exception as e:
-        await db.rollback()
+    updated, failures = await transition_invoice_statuses(
+        [invoice_id], InvoiceStatus.cancelled, db, current_company
+    )
+    if failures:
+        _, error = failures[0]
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error deleting invoice: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND if error == INVOICE_NOT_FOUND else status.HTTP_409_CONFLICT,
+            detail=error
         )
+    return updated[0]
 
 async def get_invoices_by_specific_company_role(
     company_id_param: str,
     db: AsyncSession,
     current_company: Companies,
-    role: str # 'owner' or 'customer'
+    role: str, # 'owner' or 'customer'
+    include_cancelled: bool = False,
+    financial_year: Optional[int] = None,
+    all_years: bool = False
 ) -> List[Invoices]:
     """
-    Get invoices where the current company plays a specific role (owner or customer).
+    Get invoices where the current company plays a specific role (owner or customer),
+    from one financial year (the current one by default).
     Ensures that the company_id_param matches the current_company's ID.
+    Cancelled invoices are left out unless asked for.
     """
     if company_id_param != current_company.company_id:
         raise HTTPException(
@@ -453,14 +505,89 @@ async def get_invoices_by_specific_company_role(
     else:
         raise ValueError("Role must be 'owner' or 'customer'")
 
-    result = await db.execute(
+    query = (
         select(Invoices)
         .options(
             selectinload(Invoices.owner_company_rel),
             selectinload(Invoices.client),
             selectinload(Invoices.invoice_items).selectinload(InvoiceItems.product)
         )
-        .where(query_clause)
+        .where(query_clause, *_financial_year_filter(financial_year, all_years))
     )
+    if not include_cancelled:
+        query = query.where(ACTIVE_INVOICES)
+    result = await db.execute(query)
     invoices = result.scalars().all()
-    return invoices
\ No newline at end of file
+    return invoices
+
+async def search_invoices(
+    db: AsyncSession,
+    current_company: Companies,
+    invoice_number: Optional[str] = None,
+    customer_name: Optional[str] = None,
+    min_total: Optional[Decimal] = None,
+    max_total: Optional[Decimal] = None,
+    notes: Optional[str] = None,
+    invoice_status: Optional[InvoiceStatus] = None,
+    include_cancelled: bool = False,
+    financial_year: Optional[int] = None,
+    all_years: bool = False,
+    limit: int = 10,
+    offset: int = 0
+) -> List[Row]:
+    """
+    Search the invoices issued by the current company in one financial year (the
+    current one by default, or all years), newest first.
+    Only the summary columns and the client's name are selected, so no
+    company, customer or item objects are loaded for the results.
+    """
+    if min_total is not None and max_total is not None and min_total > max_total:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_total must not be greater than max_total."
+        )
+
+    conditions = [
+        Invoices.owner_company == current_company.company_id,
+        *_financial_year_filter(financial_year, all_years)
+    ]
+    if invoice_number:
+        conditions.append(Invoices.invoice_number.like(f"{escape_like(invoice_number.strip())}%", escape="\\"))
+    if customer_name:
+        conditions.append(Customers.customer_name.ilike(f"%{escape_like(customer_name.strip())}%", escape="\\"))
+    if min_total is not None:
+        conditions.append(Invoices.invoice_total >= min_total)
+    if max_total is not None:
+        conditions.append(Invoices.invoice_total <= max_total)
+    if invoice_status:
+        conditions.append(Invoices.invoice_status == invoice_status)
+    elif not include_cancelled:
+        conditions.append(ACTIVE_INVOICES)
+    if notes:
+        if db.get_bind().dialect.name == "postgresql":
+            conditions.append(
+                INVOICE_NOTES_DOCUMENT.op('@@')(func.plainto_tsquery('simple', notes))
+            )
+        else:
+            conditions.append(Invoices.invoice_notes.ilike(f"%{escape_like(notes.strip())}%", escape="\\"))
+
+    result = await db.execute(
+        select(
+            Invoices.invoice_id,
+            Invoices.invoice_number,
+            Invoices.invoice_date,
+            Invoices.invoice_due_date,
+            Invoices.customer_company,
+            Customers.customer_name,
+            Invoices.invoice_total,
+            Invoices.invoice_balance_due,
+            Invoices.invoice_status,
+            Invoices.created_at
+        )
+        .join(Customers, Customers.customer_id == Invoices.customer_company)
+        .where(*conditions)
+        .order_by(Invoices.invoice_date.desc(), Invoices.invoice_id)
+        .limit(limit)
+        .offset(offset)
+    )
+    return result.all()
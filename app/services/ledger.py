@@ -0,0 +1,216 @@
+# app/services/ledger.py
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, insert, case, func
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.money import ZERO
+from app.core.invoice_status import RECEIVABLE_INVOICE_STATUSES
+from app.models.companies import Companies
+from app.models.customer_ledger import CustomerLedgerEntries, CustomerBalances
+from app.models.customers import Customers
+from app.models.invoices import Invoices
+
+# Ledger entry types
+INVOICE_ENTRY = "invoice"
+PAYMENT_ENTRY = "payment"
+CREDIT_NOTE_ENTRY = "credit_note"
+DEBIT_NOTE_ENTRY = "debit_note"
+ADJUSTMENT_ENTRY = "adjustment"
+
+
+class LedgerPosting(NamedTuple):
+    entry_type: str
+    reference_id: Optional[str]
+    entry_date: datetime
+    description: Optional[str]
+    debit: Decimal = ZERO
+    credit: Decimal = ZERO
+
+
+async def _advance_balance(
+    db: AsyncSession,
+    company_id: str,
+    customer_id: str,
+    amount: Decimal,
+    count: int
+) -> Tuple[Decimal, int]:
+    """
+    Add `amount` to the customer's materialized balance and reserve `count` entry
+    sequence numbers in the session's transaction. Returns the balance and last
+    sequence from before the change. The balance row stays locked until the
+    transaction ends, so postings for one customer are serialised.
+    """
+    while True:
+        result = await db.execute(
+            update(CustomerBalances)
+            .where(
+                CustomerBalances.company_id == company_id,
+                CustomerBalances.customer_id == customer_id
+            )
+            .values(
+                balance=CustomerBalances.balance + amount,
+                last_sequence=CustomerBalances.last_sequence + count
+            )
+            .returning(CustomerBalances.balance, CustomerBalances.last_sequence)
+        )
+        row = result.one_or_none()
+        if row is not None:
+            return row.balance - amount, row.last_sequence - count
+
+        # First posting for this customer. A concurrent posting may create the
+        # row first, in which case the savepoint is discarded and we retry the update.
+        try:
+            async with db.begin_nested():
+                await db.execute(
+                    insert(CustomerBalances).values(
+                        company_id=company_id,
+                        customer_id=customer_id,
+                        balance=amount,
+                        last_sequence=count
+                    )
+                )
+            return ZERO, 0
+        except IntegrityError:
+            continue
+
+
+async def post_ledger_entries(
+    db: AsyncSession,
+    company_id: str,
+    customer_id: str,
+    postings: List[LedgerPosting]
+) -> None:
+    """
+    Append postings to a customer's ledger with their running balances, in the
+    caller's transaction. The caller commits (or rolls back) together with the
+    change that caused the postings.
+    """
+    if not postings:
+        return
+
+    net_change = sum((p.debit - p.credit for p in postings), ZERO)
+    balance, sequence = await _advance_balance(db, company_id, customer_id, net_change, len(postings))
+
+    entries = []
+    for posting in postings:
+        balance += posting.debit - posting.credit
+        sequence += 1
+        entries.append({
+            "company_id": company_id,
+            "customer_id": customer_id,
+            "entry_sequence": sequence,
+            "entry_type": posting.entry_type,
+            "reference_id": posting.reference_id,
+            "entry_date": posting.entry_date,
+            "description": posting.description,
+            "debit": posting.debit,
+            "credit": posting.credit,
+            "running_balance": balance,
+        })
+    await db.execute(insert(CustomerLedgerEntries), entries)
+
+
+async def _get_customer(customer_id: str, db: AsyncSession, current_company: Companies) -> Customers:
+    result = await db.execute(
+        select(Customers).where(
+            Customers.customer_id == customer_id,
+            Customers.customer_to == current_company.company_id
+        )
+    )
+    customer = result.scalar_one_or_none()
+    if not customer:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Customer not found or does not belong to your company."
+        )
+    return customer
+
+
+async def get_customer_ledger(
+    customer_id: str,
+    db: AsyncSession,
+    current_company: Companies,
+    before_sequence: Optional[int] = None,
+    limit: int = 50
+) -> Tuple[Customers, Decimal, List[CustomerLedgerEntries]]:
+    """
+    Return the customer, their current balance and a page of ledger entries, newest first.
+    Pass the lowest entry_sequence of a page as before_sequence to fetch the next page.
+    """
+    customer = await _get_customer(customer_id, db, current_company)
+
+    balance_result = await db.execute(
+        select(CustomerBalances.balance).where(
+            CustomerBalances.company_id == current_company.company_id,
+            CustomerBalances.customer_id == customer_id
+        )
+    )
+    balance = balance_result.scalar_one_or_none() or ZERO
+
+    conditions = [
+        CustomerLedgerEntries.company_id == current_company.company_id,
+        CustomerLedgerEntries.customer_id == customer_id
+    ]
+    if before_sequence is not None:
+        conditions.append(CustomerLedgerEntries.entry_sequence < before_sequence)
+    entries_result = await db.execute(
+        select(CustomerLedgerEntries)
+        .where(*conditions)
+        .order_by(CustomerLedgerEntries.entry_sequence.desc())
+        .limit(limit)
+    )
+    return customer, balance, entries_result.scalars().all()
+
+
+async def get_aging_report(
+    db: AsyncSession,
+    current_company: Companies,
+    as_of: date,
+    customer_id: Optional[str] = None
+) -> List[Row]:
+    """
+    Outstanding invoice balances per customer, bucketed by days past invoice_due_date
+    as of the given date. Aggregated in the database over the
+    (owner_company, customer_company, invoice_due_date) index.
+    """
+    end_of_day = datetime.combine(as_of + timedelta(days=1), time.min)
+    due_30 = datetime.combine(as_of - timedelta(days=30), time.min)
+    due_60 = datetime.combine(as_of - timedelta(days=60), time.min)
+    due_90 = datetime.combine(as_of - timedelta(days=90), time.min)
+    balance_due = Invoices.invoice_balance_due
+
+    def bucket(condition):
+        return func.coalesce(func.sum(case((condition, balance_due), else_=0)), 0)
+
+    conditions = [
+        Invoices.owner_company == current_company.company_id,
+        Invoices.invoice_balance_due > 0,
+        Invoices.invoice_status.in_(RECEIVABLE_INVOICE_STATUSES)
+    ]
+    if customer_id:
+        conditions.append(Invoices.customer_company == customer_id)
+
+    result = await db.execute(
+        select(
+            Invoices.customer_company.label("customer_id"),
+            Customers.customer_name,
+            bucket(Invoices.invoice_due_date >= end_of_day).label("not_due"),
+            bucket((Invoices.invoice_due_date >= due_30) & (Invoices.invoice_due_date < end_of_day)).label("days_0_30"),
+            bucket((Invoices.invoice_due_date >= due_60) & (Invoices.invoice_due_date < due_30)).label("days_31_60"),
+            bucket((Invoices.invoice_due_date >= due_90) & (Invoices.invoice_due_date < due_60)).label("days_61_90"),
+            bucket(Invoices.invoice_due_date < due_90).label("days_over_90"),
+            func.coalesce(func.sum(balance_due), 0).label("total"),
+            func.count(Invoices.invoice_id).label("open_invoices")
+        )
+        .join(Customers, Customers.customer_id == Invoices.customer_company)
+        .where(*conditions)
+        .group_by(Invoices.customer_company, Customers.customer_name)
+        .order_by(Customers.customer_name)
+    )
+    return result.all()
@@ -0,0 +1,406 @@
+# app/services/payments.py
+import time
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.invoice_status import InvoiceStatus, RECEIVABLE_INVOICE_STATUSES
+from app.core.money import ZERO
+from app.models.companies import Companies
+from app.models.customers import Customers
+from app.models.invoices import Invoices
+from app.models.payments import Payments, PaymentAllocations
+from app.schemas.payments import (
+    CreatePayment,
+    CreatePaymentBatch,
+    PaymentAllocationInput,
+    PaymentBatchLineResult,
+    PaymentBatchReport,
+)
+from app.schemas.changes import ChangeEntityType
+from app.schemas.webhooks import WebhookEventType
+from app.services.changes import record_changes
+from app.services.ledger import PAYMENT_ENTRY, LedgerPosting, post_ledger_entries
+from app.services.webhooks import record_invoice_events
+
+
+class _OpenInvoice:
+    __slots__ = ("invoice_id", "invoice_status", "balance_due", "amount_paid", "invoice_version", "original_balance_due")
+
+    def __init__(
+        self,
+        invoice_id: str,
+        invoice_status: InvoiceStatus,
+        balance_due: Decimal,
+        amount_paid: Decimal,
+        invoice_version: int
+    ):
+        self.invoice_id = invoice_id
+        self.invoice_status = invoice_status
+        self.balance_due = balance_due
+        self.amount_paid = amount_paid
+        self.invoice_version = invoice_version
+        self.original_balance_due = balance_due
+
+    def apply(self, amount: Decimal) -> None:
+        self.balance_due -= amount
+        self.amount_paid += amount
+
+    @property
+    def changed(self) -> bool:
+        return self.balance_due != self.original_balance_due
+
+    @property
+    def status_after_payment(self) -> InvoiceStatus:
+        if self.balance_due <= 0:
+            return InvoiceStatus.paid
+        if self.invoice_status == InvoiceStatus.overdue:
+            return InvoiceStatus.overdue
+        return InvoiceStatus.partially_paid
+
+
+class _OpenInvoiceQueue:
+    """
+    A customer's open invoices, oldest due first. Balances are tracked in memory
+    while a batch is allocated, so the whole batch needs only one read of the
+    invoices and one bulk update at the end.
+    """
+
+    def __init__(self):
+        self.invoices: List[_OpenInvoice] = []
+        self.by_id: Dict[str, _OpenInvoice] = {}
+        self._position = 0 # Invoices before this one are fully paid
+
+    def add(self, invoice: _OpenInvoice) -> None:
+        self.invoices.append(invoice)
+        self.by_id[invoice.invoice_id] = invoice
+
+    def allocate_fifo(self, amount: Decimal) -> List[Tuple[_OpenInvoice, Decimal]]:
+        """Apply an amount to the oldest open invoices first; whatever is left stays unallocated."""
+        allocations = []
+        remaining = amount
+        while remaining > 0 and self._position < len(self.invoices):
+            invoice = self.invoices[self._position]
+            if invoice.balance_due <= 0:
+                self._position += 1
+                continue
+            applied = min(remaining, invoice.balance_due)
+            invoice.apply(applied)
+            allocations.append((invoice, applied))
+            remaining -= applied
+        return allocations
+
+    def allocate_explicit(
+        self,
+        requested: List[PaymentAllocationInput],
+        amount: Decimal
+    ) -> Tuple[List[Tuple[_OpenInvoice, Decimal]], List[str]]:
+        """Apply the requested amounts to the named invoices, or return errors and apply nothing."""
+        errors = []
+        per_invoice: Dict[str, Decimal] = defaultdict(lambda: ZERO)
+        for allocation in requested:
+            per_invoice[allocation.invoice_id] += allocation.allocation_amount
+
+        for invoice_id, allocation_amount in per_invoice.items():
+            invoice = self.by_id.get(invoice_id)
+            if invoice is None or invoice.balance_due <= 0:
+                errors.append(f"allocations: invoice {invoice_id} is not an open invoice of this customer")
+            elif allocation_amount > invoice.balance_due:
+                errors.append(
+                    f"allocations: {allocation_amount} exceeds the {invoice.balance_due} due on invoice {invoice_id}"
+                )
+        if sum(per_invoice.values(), ZERO) > amount:
+            errors.append("allocations: allocated total exceeds the payment amount")
+        if errors:
+            return [], errors
+
+        allocations = []
+        for invoice_id, allocation_amount in per_invoice.items():
+            invoice = self.by_id[invoice_id]
+            invoice.apply(allocation_amount)
+            allocations.append((invoice, allocation_amount))
+        return allocations, []
+
+
+async def _load_open_invoice_queues(
+    db: AsyncSession,
+    company_id: str,
+    customer_ids: List[str]
+) -> Dict[str, _OpenInvoiceQueue]:
+    """Read and lock the open invoices of the given customers, in allocation order."""
+    queues: Dict[str, _OpenInvoiceQueue] = defaultdict(_OpenInvoiceQueue)
+    if not customer_ids:
+        return queues
+    result = await db.execute(
+        select(
+            Invoices.invoice_id,
+            Invoices.customer_company,
+            Invoices.invoice_status,
+            Invoices.invoice_balance_due,
+            Invoices.invoice_amount_paid,
+            Invoices.invoice_version
+        )
+        .where(
+            Invoices.owner_company == company_id,
+            Invoices.customer_company.in_(customer_ids),
+            Invoices.invoice_balance_due > 0,
+            Invoices.invoice_status.in_(RECEIVABLE_INVOICE_STATUSES)
+        )
+        .order_by(Invoices.customer_company, Invoices.invoice_due_date, Invoices.invoice_date, Invoices.invoice_id)
+        .with_for_update()
+    )
+    for row in result:
+        queues[row.customer_company].add(
+            _OpenInvoice(
+                row.invoice_id, row.invoice_status, row.invoice_balance_due, row.invoice_amount_paid, row.invoice_version
+            )
+        )
+    return queues
+
+
+async def _apply_payments(
+    payments: List[CreatePayment],
+    db: AsyncSession,
+    current_company: Companies
+) -> Tuple[List[PaymentBatchLineResult], int]:
+    """
+    Record payments and allocate them in the session's transaction, using a fixed
+    number of statements however many payments there are. Returns a result per
+    payment (rejected ones carry errors) and the number of invoices updated.
+    """
+    company_id = current_company.company_id
+    customer_ids = list({payment.customer_id for payment in payments})
+    references = {payment.payment_reference for payment in payments if payment.payment_reference}
+
+    customers_result = await db.execute(
+        select(Customers.customer_id).where(
+            Customers.customer_to == company_id,
+            Customers.customer_id.in_(customer_ids)
+        )
+    )
+    known_customers = set(customers_result.scalars().all())
+
+    recorded_references = set()
+    if references:
+        references_result = await db.execute(
+            select(Payments.payment_reference).where(
+                Payments.company_id == company_id,
+                Payments.payment_reference.in_(references)
+            )
+        )
+        recorded_references = set(references_result.scalars().all())
+
+    queues = await _load_open_invoice_queues(db, company_id, list(known_customers))
+
+    results = []
+    payment_rows = []
+    allocation_rows = []
+    postings: Dict[str, List[LedgerPosting]] = defaultdict(list)
+    for line, payment in enumerate(payments, start=1):
+        result = PaymentBatchLineResult(line=line)
+        results.append(result)
+
+        if payment.customer_id not in known_customers:
+            result.errors.append("customer_id: customer not found or does not belong to your company")
+        if payment.payment_reference and payment.payment_reference in recorded_references:
+            result.errors.append(f"payment_reference: {payment.payment_reference} has already been recorded")
+        if result.errors:
+            continue
+
+        queue = queues[payment.customer_id]
+        if payment.allocations:
+            allocations, result.errors = queue.allocate_explicit(payment.allocations, payment.payment_amount)
+            if result.errors:
+                continue
+        else:
+            allocations = queue.allocate_fifo(payment.payment_amount)
+
+        if payment.payment_reference:
+            recorded_references.add(payment.payment_reference)
+        payment_id = str(uuid.uuid4())
+        payment_date = payment.payment_date.replace(tzinfo=None)
+        amount_allocated = sum((amount for _, amount in allocations), ZERO)
+        result.payment_id = payment_id
+        result.amount_allocated = amount_allocated
+        result.amount_unallocated = payment.payment_amount - amount_allocated
+
+        payment_rows.append({
+            "payment_id": payment_id,
+            "company_id": company_id,
+            "customer_id": payment.customer_id,
+            "payment_date": payment_date,
+            "payment_amount": payment.payment_amount,
+            "payment_method": payment.payment_method,
+            "payment_reference": payment.payment_reference,
+            "payment_notes": payment.payment_notes,
+            "amount_allocated": result.amount_allocated,
+            "amount_unallocated": result.amount_unallocated,
+        })
+        allocation_rows.extend(
+            {"payment_id": payment_id, "invoice_id": invoice.invoice_id, "allocation_amount": amount}
+            for invoice, amount in allocations
+        )
+        postings[payment.customer_id].append(LedgerPosting(
+            entry_type=PAYMENT_ENTRY,
+            reference_id=payment_id,
+            entry_date=payment_date,
+            description=f"Payment {payment.payment_reference}" if payment.payment_reference else "Payment received",
+            credit=payment.payment_amount
+        ))
+
+    changed_invoices = [invoice for queue in queues.values() for invoice in queue.invoices if invoice.changed]
+    if payment_rows:
+        await db.execute(insert(Payments), payment_rows)
+    if allocation_rows:
+        await db.execute(insert(PaymentAllocations), allocation_rows)
+    if changed_invoices:
+        await db.execute(
+            update(Invoices),
+            [
+                {
+                    "invoice_id": invoice.invoice_id,
+                    "invoice_amount_paid": invoice.amount_paid,
+                    "invoice_balance_due": invoice.balance_due,
+                    "invoice_status": invoice.status_after_payment,
+                    "invoice_version": invoice.invoice_version + 1,
+                }
+                for invoice in changed_invoices
+            ]
+        )
+    for customer_id, customer_postings in postings.items():
+        await post_ledger_entries(db, company_id, customer_id, customer_postings)
+
+    status_changes = {
+        invoice.invoice_id: invoice.invoice_status
+        for invoice in changed_invoices if invoice.status_after_payment != invoice.invoice_status
+    }
+    await record_invoice_events(db, WebhookEventType.invoice_status_changed, status_changes, status_changes)
+    await record_invoice_events(db, WebhookEventType.invoice_updated, [
+        invoice.invoice_id for invoice in changed_invoices if invoice.invoice_id not in status_changes
+    ])
+    await record_changes(db, company_id, ChangeEntityType.invoice, [invoice.invoice_id for invoice in changed_invoices])
+
+    return results, len(changed_invoices)
+
+
+async def get_payment_by_id(payment_id: str, db: AsyncSession, current_company: Companies) -> Payments:
+    result = await db.execute(
+        select(Payments).where(
+            Payments.payment_id == payment_id,
+            Payments.company_id == current_company.company_id
+        )
+    )
+    payment = result.scalar_one_or_none()
+    if not payment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Payment not found or does not belong to your company."
+        )
+    return payment
+
+
+async def list_payments(
+    db: AsyncSession,
+    current_company: Companies,
+    customer_id: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0
+) -> List[Payments]:
+    conditions = [Payments.company_id == current_company.company_id]
+    if customer_id:
+        conditions.append(Payments.customer_id == customer_id)
+    result = await db.execute(
+        select(Payments)
+        .where(*conditions)
+        .order_by(Payments.payment_date.desc(), Payments.payment_id)
+        .limit(limit)
+        .offset(offset)
+    )
+    return result.scalars().all()
+
+
+async def record_payment(payment_data: CreatePayment, db: AsyncSession, current_company: Companies) -> Payments:
+    """
+    Record a payment and apply it to the named invoices, or to the customer's oldest
+    open invoices first. Invoice balances and statuses, the payment and the customer
+    ledger are all updated in one transaction.
+    """
+    try:
+        (result,), _ = await _apply_payments([payment_data], db, current_company)
+        if result.errors:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="; ".join(result.errors)
+            )
+        await db.commit()
+    except HTTPException:
+        await db.rollback()
+        raise
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This payment reference has already been recorded."
+        )
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to record payment: {e}"
+        )
+    return await get_payment_by_id(result.payment_id, db, current_company)
+
+
+async def record_payment_batch(
+    batch_data: CreatePaymentBatch,
+    db: AsyncSession,
+    current_company: Companies
+) -> PaymentBatchReport:
+    """
+    Record a bank statement batch of payments in one transaction. Invalid lines are
+    rejected and reported; the rest are allocated in order, so earlier lines are
+    applied to a customer's invoices before later ones.
+    """
+    if len(batch_data.payments) > settings.PAYMENT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can contain at most {settings.PAYMENT_BATCH_MAX_SIZE} payments."
+        )
+
+    started = time.perf_counter()
+    try:
+        results, invoices_updated = await _apply_payments(batch_data.payments, db, current_company)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A payment reference in this batch was recorded concurrently; retry the batch."
+        )
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to record payment batch: {e}"
+        )
+    duration = time.perf_counter() - started
+
+    recorded = [result for result in results if result.payment_id]
+    return PaymentBatchReport(
+        total_payments=len(results),
+        recorded_payments=len(recorded),
+        rejected_payments=len(results) - len(recorded),
+        amount_allocated=sum((result.amount_allocated for result in recorded), ZERO),
+        amount_unallocated=sum((result.amount_unallocated for result in recorded), ZERO),
+        invoices_updated=invoices_updated,
+        duration_seconds=round(duration, 3),
+        payments_per_second=round(len(results) / duration, 1) if duration > 0 else float(len(results)),
+        results=results
+    )
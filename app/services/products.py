@@ -2,16 +2,31 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.products import Products
 from sqlalchemy import select, delete, update
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from app.schemas.products import CreateProduct, UpdateProduct, ProductOut
 from app.models.companies import Companies # Import Companies model
 from typing import List
+from app.services.search import invalidate_search_index, PRODUCTS
+from app.services.changes import record_changes
+from app.schemas.changes import ChangeEntityType, ChangeOperation
 
 # Assuming get_current_company is defined in app.services.customers or a common location
 # If not, you might need to import it from app.services.customers or define it here.
 # For consistency, let's assume it's imported for now.
 from app.services.customers import get_current_company # Reusing get_current_company dependency
 
+DUPLICATE_PRODUCT_NAME = "Product with this name already exists for this company."
+
+async def _product_name_taken(product_name: str, db: AsyncSession, current_company: Companies) -> bool:
+    result = await db.execute(
+        select(Products.product_id).where(
+            Products.company_id == current_company.company_id,
+            Products.product_name == product_name
+        )
+    )
+    return result.first() is not None
+
 async def show_products(db: AsyncSession, current_company: Companies) -> List[Products]:
     """
     Service function to list all products belonging to a specific company,
@@ -38,21 +53,31 @@ async def create_products(
             detail="Product must belong to the specified company."
         )
 
-    # Optional: Check for duplicate product name or HSN/SAC code within this company if unique
-    # This example assumes uniqueness is handled at the database level or not enforced.
+    if await _product_name_taken(product_data.product_name, db, current_company):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DUPLICATE_PRODUCT_NAME
+        )
 
     new_product_dict = product_data.dict() # Use dict for Pydantic v2
     new_product = Products(**new_product_dict)
     db.add(new_product)
     try:
+        await db.flush()
+        await record_changes(db, current_company.company_id, ChangeEntityType.product, [new_product.product_id])
         await db.commit()
         await db.refresh(new_product)
+    except IntegrityError:
+        # Another request created a product of the same name first
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=DUPLICATE_PRODUCT_NAME)
     except Exception as e:
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create product: {e}"
         )
+    invalidate_search_index(PRODUCTS, current_company.company_id)
     return new_product
 
 async def get_product_by_id(product_id: str, db: AsyncSession, current_company: Companies) -> Products | None:
@@ -81,19 +106,30 @@ async def modify_product_details(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found or does not belong to your company.")
 
     update_data = updated_details.dict(exclude_unset=True) # Use dict for Pydantic v2
+    new_name = update_data.get('product_name')
+    if new_name and new_name != product.product_name and await _product_name_taken(new_name, db, current_company):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DUPLICATE_PRODUCT_NAME
+        )
 
     for key, value in update_data.items():
         setattr(product, key, value)
 
     try:
+        await record_changes(db, current_company.company_id, ChangeEntityType.product, [product.product_id])
         await db.commit()
         await db.refresh(product)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=DUPLICATE_PRODUCT_NAME)
     except Exception as e:
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update product: {e}"
         )
+    invalidate_search_index(PRODUCTS, current_company.company_id)
     return product
 
 async def remove_products(
@@ -110,11 +146,21 @@ async def remove_products(
 
     await db.delete(product)
     try:
+        await record_changes(
+            db, current_company.company_id, ChangeEntityType.product, [product_id], ChangeOperation.delete
+        )
         await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This product is on invoices and can't be deleted."
+        )
     except Exception as e:
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete product: {e}"
         )
+    invalidate_search_index(PRODUCTS, current_company.company_id)
     return True
\ No newline at end of file
@@ -0,0 +1,431 @@
+# app/services/recurring_invoices.py
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+from fastapi import HTTPException, status
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+
+from app.core.config import settings
+from app.core.financial_year import financial_year_for
+from app.core.invoice_status import InvoiceStatus
+from app.core.money import ZERO
+from app.core.sharding import moving_company_ids
+from app.models.companies import Companies
+from app.models.customers import Customers
+from app.models.invoice_items import InvoiceItems
+from app.models.invoices import Invoices
+from app.models.products import Products
+from app.models.recurring_invoices import RecurringInvoiceTemplates, RecurringInvoiceTemplateItems
+from app.schemas.recurring_invoices import (
+    CreateRecurringInvoiceTemplate,
+    RecurrenceFrequency,
+    RecurringGenerationReport,
+    RecurringInvoiceItemInput,
+    UpdateRecurringInvoiceTemplate,
+)
+from app.schemas.webhooks import WebhookEventType
+from app.services.invoice_numbers import allocate_invoice_numbers
+from app.services.invoices import _to_naive_datetime, invoice_item_values
+from app.services.ledger import INVOICE_ENTRY, LedgerPosting, post_ledger_entries
+from app.services.changes import record_invoice_changes
+from app.services.sales_rollups import record_invoice_sales
+from app.services.webhooks import record_invoice_events
+from app.services.tax import calculate_product_line, sum_lines
+
+logger = logging.getLogger(__name__)
+
+_FREQUENCY_STEPS = {
+    RecurrenceFrequency.weekly.value: relativedelta(weeks=1),
+    RecurrenceFrequency.monthly.value: relativedelta(months=1),
+    RecurrenceFrequency.quarterly.value: relativedelta(months=3),
+    RecurrenceFrequency.yearly.value: relativedelta(years=1),
+}
+
+TEMPLATE_NOT_FOUND = "Recurring invoice template not found or does not belong to your company."
+
+
+def period_date(template: RecurringInvoiceTemplates, index: int) -> datetime:
+    """
+    Date of the template's `index`-th invoice (0 is the first). Always counted from
+    start_date, so a schedule starting on the 31st bills on the last day of shorter
+    months and returns to the 31st afterwards.
+    """
+    return template.start_date + _FREQUENCY_STEPS[template.frequency] * (index * template.interval_count)
+
+
+def _schedule_next_run(template: RecurringInvoiceTemplates) -> None:
+    next_run = period_date(template, template.periods_generated)
+    if template.end_date is not None and next_run > template.end_date:
+        next_run = None # Schedule has ended
+    template.next_run_date = next_run
+
+
+async def _validate_template_references(
+    db: AsyncSession,
+    current_company: Companies,
+    customer_id: Optional[str],
+    items: Optional[List[RecurringInvoiceItemInput]]
+) -> None:
+    if customer_id is not None:
+        result = await db.execute(
+            select(Customers.customer_id).where(
+                Customers.customer_id == customer_id,
+                Customers.customer_to == current_company.company_id
+            )
+        )
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Customer not found or does not belong to your company."
+            )
+    if items:
+        product_ids = {item.product_id for item in items}
+        result = await db.execute(
+            select(Products.product_id).where(
+                Products.product_id.in_(product_ids),
+                Products.company_id == current_company.company_id
+            )
+        )
+        missing_products = product_ids - set(result.scalars().all())
+        if missing_products:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Some products not found or do not belong to your company: {', '.join(sorted(missing_products))}"
+            )
+
+
+async def create_recurring_template(
+    template_data: CreateRecurringInvoiceTemplate,
+    db: AsyncSession,
+    current_company: Companies
+) -> RecurringInvoiceTemplates:
+    """
+    Create a recurring invoice template. Its first invoice is generated on start_date,
+    or by the next generation run if start_date is in the past.
+    """
+    await _validate_template_references(db, current_company, template_data.customer_id, template_data.items)
+
+    template_dict = template_data.dict(exclude={'items'})
+    template_dict['frequency'] = template_data.frequency.value
+    template_dict['start_date'] = _to_naive_datetime(template_data.start_date)
+    template_dict['end_date'] = _to_naive_datetime(template_data.end_date)
+
+    template = RecurringInvoiceTemplates(**template_dict, company_id=current_company.company_id, periods_generated=0)
+    template.items = [
+        RecurringInvoiceTemplateItems(product_id=item.product_id, quantity=item.quantity)
+        for item in template_data.items
+    ]
+    _schedule_next_run(template)
+    try:
+        db.add(template)
+        await db.commit()
+        await db.refresh(template)
+        return template
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating recurring invoice template: {str(e)}"
+        )
+
+
+async def list_recurring_templates(
+    db: AsyncSession,
+    current_company: Companies,
+    is_active: Optional[bool] = None
+) -> List[RecurringInvoiceTemplates]:
+    query = select(RecurringInvoiceTemplates).where(
+        RecurringInvoiceTemplates.company_id == current_company.company_id
+    )
+    if is_active is not None:
+        query = query.where(RecurringInvoiceTemplates.is_active.is_(is_active))
+    result = await db.execute(query.order_by(RecurringInvoiceTemplates.created_at))
+    return result.scalars().all()
+
+
+async def get_recurring_template_by_id(
+    template_id: str,
+    db: AsyncSession,
+    current_company: Companies
+) -> RecurringInvoiceTemplates:
+    result = await db.execute(
+        select(RecurringInvoiceTemplates).where(
+            RecurringInvoiceTemplates.template_id == template_id,
+            RecurringInvoiceTemplates.company_id == current_company.company_id
+        )
+    )
+    template = result.scalar_one_or_none()
+    if not template:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=TEMPLATE_NOT_FOUND)
+    return template
+
+
+async def update_recurring_template(
+    template_id: str,
+    updated_details: UpdateRecurringInvoiceTemplate,
+    db: AsyncSession,
+    current_company: Companies
+) -> RecurringInvoiceTemplates:
+    """
+    Update a template. Changes apply to invoices generated from now on; invoices
+    already generated are not touched.
+    """
+    template = await get_recurring_template_by_id(template_id, db, current_company)
+    await _validate_template_references(db, current_company, None, updated_details.items)
+
+    update_data = updated_details.dict(exclude_unset=True, exclude={'items'})
+    if 'end_date' in update_data:
+        update_data['end_date'] = _to_naive_datetime(update_data['end_date'])
+        if update_data['end_date'] is not None and update_data['end_date'] < template.start_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end_date must not be before start_date."
+            )
+
+    try:
+        for key, value in update_data.items():
+            setattr(template, key, value)
+        if updated_details.items is not None:
+            template.items = [
+                RecurringInvoiceTemplateItems(product_id=item.product_id, quantity=item.quantity)
+                for item in updated_details.items
+            ]
+        _schedule_next_run(template)
+        await db.commit()
+        await db.refresh(template)
+        return template
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating recurring invoice template: {str(e)}"
+        )
+
+
+async def delete_recurring_template(
+    template_id: str,
+    db: AsyncSession,
+    current_company: Companies
+) -> dict:
+    """Delete a template. Invoices it generated are kept."""
+    template = await get_recurring_template_by_id(template_id, db, current_company)
+    try:
+        await db.delete(template)
+        await db.commit()
+        return {"message": "Recurring invoice template successfully deleted"}
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error deleting recurring invoice template: {str(e)}"
+        )
+
+
+def _due_periods(template: RecurringInvoiceTemplates, now: datetime) -> List[datetime]:
+    """Schedule dates up to now that have no invoice yet, oldest first."""
+    periods = []
+    index = template.periods_generated
+    while len(periods) < settings.RECURRING_INVOICE_MAX_CATCH_UP:
+        date = period_date(template, index)
+        if date > now or (template.end_date is not None and date > template.end_date):
+            break
+        periods.append(date)
+        index += 1
+    return periods
+
+
+async def _generate_for_templates(
+    db: AsyncSession,
+    templates: List[RecurringInvoiceTemplates],
+    now: datetime
+) -> int:
+    """
+    Generate the due invoices of a batch of locked templates in the session's
+    transaction: one query each for products, customers and companies, then a
+    single multi-row insert for the invoices and one for their items.
+    """
+    product_ids = {item.product_id for template in templates for item in template.items}
+    products_result = await db.execute(
+        select(Products)
+        .options(noload(Products.invoice_items))
+        .where(Products.product_id.in_(product_ids))
+    )
+    products: Dict[str, Products] = {product.product_id: product for product in products_result.scalars().all()}
+
+    customer_result = await db.execute(
+        select(Customers.customer_id, Customers.customer_state).where(
+            Customers.customer_id.in_({template.customer_id for template in templates})
+        )
+    )
+    customer_states = dict(customer_result.all())
+    company_result = await db.execute(
+        select(Companies.company_id, Companies.company_state).where(
+            Companies.company_id.in_({template.company_id for template in templates})
+        )
+    )
+    company_states = dict(company_result.all())
+
+    due: List[Tuple[RecurringInvoiceTemplates, List[datetime]]] = []
+    number_counts: Dict[Tuple[str, int], int] = defaultdict(int)
+    for template in templates:
+        usable = template.items and all(
+            item.product_id in products and products[item.product_id].company_id == template.company_id
+            for item in template.items
+        )
+        if not usable:
+            # Products were removed from under the template; stop it rather than bill a partial invoice
+            logger.warning("Deactivating recurring invoice template %s: its products are no longer available", template.template_id)
+            template.is_active = False
+            continue
+        periods = _due_periods(template, now)
+        due.append((template, periods))
+        for period in periods:
+            number_counts[(template.company_id, financial_year_for(period))] += 1
+
+    # One number allocation per company and financial year for the whole batch
+    numbers: Dict[Tuple[str, int], List[str]] = {}
+    for (company_id, financial_year), count in number_counts.items():
+        numbers[(company_id, financial_year)] = await allocate_invoice_numbers(db, company_id, financial_year, count)
+
+    invoice_rows = []
+    item_rows = []
+    postings: Dict[Tuple[str, str], List[LedgerPosting]] = defaultdict(list)
+    for template, periods in due:
+        is_intrastate = customer_states.get(template.customer_id) == company_states.get(template.company_id)
+        for period in periods:
+            invoice_id = str(uuid.uuid4())
+            invoice_number = numbers[(template.company_id, financial_year_for(period))].pop(0)
+            lines = [
+                calculate_product_line(products[item.product_id], item.quantity, is_intrastate)
+                for item in template.items
+            ]
+            totals = sum_lines(lines)
+            invoice_rows.append(dict(
+                invoice_id=invoice_id,
+                owner_company=template.company_id,
+                customer_company=template.customer_id,
+                invoice_number=invoice_number,
+                invoice_date=period,
+                invoice_due_date=period + timedelta(days=template.due_in_days),
+                invoice_terms=template.invoice_terms,
+                invoice_place_of_supply=template.invoice_place_of_supply,
+                invoice_notes=template.invoice_notes,
+                invoice_subtotal=totals.subtotal,
+                invoice_total_cgst=totals.total_cgst,
+                invoice_total_sgst=totals.total_sgst,
+                invoice_total_igst=totals.total_igst,
+                invoice_total=totals.total,
+                invoice_amount_paid=ZERO,
+                invoice_balance_due=totals.total,
+                invoice_status=template.invoice_status,
+                user_reference_notes=template.user_reference_notes,
+                invoice_version=1,
+                recurring_template_id=template.template_id,
+                recurring_period_date=period,
+            ))
+            for item, line in zip(template.items, lines):
+                item_rows.append(dict(
+                    invoice_item_values(item.product_id, line),
+                    invoice_item_id=str(uuid.uuid4()),
+                    invoice_id=invoice_id
+                ))
+            if template.invoice_status != InvoiceStatus.draft:
+                postings[(template.company_id, template.customer_id)].append(LedgerPosting(
+                    entry_type=INVOICE_ENTRY,
+                    reference_id=invoice_id,
+                    entry_date=period,
+                    description=f"Invoice {invoice_number}",
+                    debit=totals.total
+                ))
+
+        template.periods_generated += len(periods)
+        if periods:
+            template.last_generated_at = now
+        _schedule_next_run(template)
+
+    if invoice_rows:
+        await db.execute(insert(Invoices), invoice_rows)
+        await db.execute(insert(InvoiceItems), item_rows)
+        for (company_id, customer_id), customer_postings in postings.items():
+            await post_ledger_entries(db, company_id, customer_id, customer_postings)
+        await record_invoice_sales(db, [
+            row["invoice_id"] for row in invoice_rows if row["invoice_status"] != InvoiceStatus.draft
+        ])
+        await record_invoice_events(db, WebhookEventType.invoice_created, [row["invoice_id"] for row in invoice_rows])
+        await record_invoice_changes(db, [row["invoice_id"] for row in invoice_rows])
+    return len(invoice_rows)
+
+
+async def generate_recurring_invoices(db: AsyncSession, company_id: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Generate every invoice that is due from active templates, optionally for one
+    company only. Returns (templates processed, invoices generated).
+
+    Templates are locked and processed in batches, each committed on its own. A
+    template's invoices and its advanced schedule are committed together, and the
+    (template, period) unique constraint on invoices backs that up, so a period
+    missed during downtime is generated exactly once by the next run.
+    """
+    now = datetime.utcnow()
+    templates_processed = 0
+    generated = 0
+    while True:
+        query = (
+            select(RecurringInvoiceTemplates)
+            .where(
+                RecurringInvoiceTemplates.is_active.is_(True),
+                RecurringInvoiceTemplates.next_run_date <= now
+            )
+            .order_by(RecurringInvoiceTemplates.next_run_date)
+            .limit(settings.RECURRING_INVOICE_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        if company_id is not None:
+            query = query.where(RecurringInvoiceTemplates.company_id == company_id)
+        else:
+            query = query.where(RecurringInvoiceTemplates.company_id.notin_(await moving_company_ids()))
+        templates = (await db.execute(query)).scalars().all()
+        if not templates:
+            break
+        generated += await _generate_for_templates(db, templates, now)
+        await db.commit()
+        templates_processed += len(templates)
+    return templates_processed, generated
+
+
+async def generate_all_recurring_invoices(db: AsyncSession) -> int:
+    """Scheduled job: generate due recurring invoices for every company."""
+    _, generated = await generate_recurring_invoices(db)
+    return generated
+
+
+async def run_recurring_generation(db: AsyncSession, current_company: Companies) -> RecurringGenerationReport:
+    """Generate the company's due recurring invoices now instead of waiting for the scheduler."""
+    started = time.perf_counter()
+    try:
+        templates_processed, generated = await generate_recurring_invoices(db, current_company.company_id)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Recurring invoices are being generated concurrently; try again shortly."
+        )
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error generating recurring invoices: {str(e)}"
+        )
+    return RecurringGenerationReport(
+        templates_processed=templates_processed,
+        invoices_generated=generated,
+        duration_seconds=round(time.perf_counter() - started, 3)
+    )
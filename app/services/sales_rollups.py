@@ -0,0 +1,262 @@
+# app/services/sales_rollups.py
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, insert, delete, func, literal_column, Date
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.invoice_status import RECEIVABLE_INVOICE_STATUSES
+from app.models.companies import Companies
+from app.models.credit_notes import CreditNotes, CreditNoteItems
+from app.models.invoice_items import InvoiceItems
+from app.models.invoices import Invoices
+from app.models.products import Products
+from app.models.sales_rollups import SalesDailyRollups
+from app.schemas.sales_analytics import SalesGranularity, SalesGroupBy
+
+ROLLUP_KEY = ("company_id", "sales_date", "product_id", "hsn_sac_code", "igst_rate", "cgst_rate", "sgst_rate")
+ROLLUP_MEASURES = (
+    "quantity", "taxable_value", "igst_amount", "cgst_amount", "sgst_amount", "total_amount", "line_count"
+)
+
+
+def _invoice_sales_statement(invoice_ids: List[str]):
+    """Sales of the given invoices, aggregated to rollup rows."""
+    sales_date = func.date(Invoices.invoice_date, type_=Date)
+    rates = (InvoiceItems.invoice_item_igst_rate, InvoiceItems.invoice_item_cgst_rate, InvoiceItems.invoice_item_sgst_rate)
+    return (
+        select(
+            Invoices.owner_company.label("company_id"),
+            sales_date.label("sales_date"),
+            InvoiceItems.product_id,
+            Products.product_hsn_sac_code.label("hsn_sac_code"),
+            InvoiceItems.invoice_item_igst_rate.label("igst_rate"),
+            InvoiceItems.invoice_item_cgst_rate.label("cgst_rate"),
+            InvoiceItems.invoice_item_sgst_rate.label("sgst_rate"),
+            func.sum(InvoiceItems.invoice_item_quantity).label("quantity"),
+            func.sum(InvoiceItems.invoice_item_taxable_value).label("taxable_value"),
+            func.sum(InvoiceItems.invoice_item_igst_amount).label("igst_amount"),
+            func.sum(InvoiceItems.invoice_item_cgst_amount).label("cgst_amount"),
+            func.sum(InvoiceItems.invoice_item_sgst_amount).label("sgst_amount"),
+            func.sum(InvoiceItems.invoice_item_total_amount).label("total_amount"),
+            func.count().label("line_count")
+        )
+        .select_from(InvoiceItems)
+        .join(Invoices, Invoices.invoice_id == InvoiceItems.invoice_id)
+        .join(Products, Products.product_id == InvoiceItems.product_id)
+        .where(InvoiceItems.invoice_id.in_(invoice_ids))
+        .group_by(Invoices.owner_company, sales_date, InvoiceItems.product_id, Products.product_hsn_sac_code, *rates)
+    )
+
+
+def _note_sales_statement(*conditions):
+    """Sales adjustments of credit/debit notes, aggregated to rollup rows (unsigned)."""
+    sales_date = func.date(CreditNotes.note_date, type_=Date)
+    rates = (CreditNoteItems.igst_rate, CreditNoteItems.cgst_rate, CreditNoteItems.sgst_rate)
+    return (
+        select(
+            CreditNotes.company_id,
+            CreditNotes.note_type,
+            sales_date.label("sales_date"),
+            InvoiceItems.product_id,
+            Products.product_hsn_sac_code.label("hsn_sac_code"),
+            CreditNoteItems.igst_rate,
+            CreditNoteItems.cgst_rate,
+            CreditNoteItems.sgst_rate,
+            func.coalesce(func.sum(CreditNoteItems.quantity), 0).label("quantity"),
+            func.sum(CreditNoteItems.taxable_value).label("taxable_value"),
+            func.sum(CreditNoteItems.igst_amount).label("igst_amount"),
+            func.sum(CreditNoteItems.cgst_amount).label("cgst_amount"),
+            func.sum(CreditNoteItems.sgst_amount).label("sgst_amount"),
+            func.sum(CreditNoteItems.total_amount).label("total_amount"),
+            func.count(CreditNoteItems.quantity).label("line_count") # Value adjustments aren't lines sold or returned
+        )
+        .select_from(CreditNoteItems)
+        .join(CreditNotes, CreditNotes.note_id == CreditNoteItems.note_id)
+        .join(InvoiceItems, InvoiceItems.invoice_item_id == CreditNoteItems.invoice_item_id)
+        .join(Products, Products.product_id == InvoiceItems.product_id)
+        .where(*conditions)
+        .group_by(
+            CreditNotes.company_id, CreditNotes.note_type, sales_date,
+            InvoiceItems.product_id, Products.product_hsn_sac_code, *rates
+        )
+    )
+
+
+def _note_sign(note_type: str) -> int:
+    # Credit notes take sales back; debit notes add to them
+    return -1 if note_type == "credit" else 1
+
+
+async def _add_to_rollup(db: AsyncSession, key: dict, delta: dict) -> None:
+    """Add `delta` to a rollup row, creating the row the first time its key is sold."""
+    while True:
+        result = await db.execute(
+            update(SalesDailyRollups)
+            .where(*(getattr(SalesDailyRollups, column) == value for column, value in key.items()))
+            .values(**{measure: getattr(SalesDailyRollups, measure) + value for measure, value in delta.items()})
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return
+
+        # First sale for this key. A concurrent write may create the row first,
+        # in which case the savepoint is discarded and we retry the update.
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(SalesDailyRollups).values(**key, **delta))
+            return
+        except IntegrityError:
+            continue
+
+
+async def _apply_to_rollups(db: AsyncSession, rows: Iterable[Row], sign_of) -> None:
+    # Rows are locked in key order so concurrent writers can't deadlock each other
+    ordered = sorted(rows, key=lambda row: tuple(str(getattr(row, column)) for column in ROLLUP_KEY))
+    for row in ordered:
+        sign = sign_of(row)
+        await _add_to_rollup(
+            db,
+            {column: getattr(row, column) for column in ROLLUP_KEY},
+            {measure: getattr(row, measure) * sign for measure in ROLLUP_MEASURES}
+        )
+
+
+async def record_invoice_sales(
+    db: AsyncSession,
+    invoice_ids: List[str],
+    sign: int = 1,
+    include_notes: bool = False
+) -> None:
+    """
+    Add the invoices' items to the daily sales rollups (or take them out again with
+    sign=-1), in the caller's transaction. Called whenever invoices start or stop
+    counting as sales, or their items or date change. With include_notes, the credit
+    and debit notes raised against the invoices are added or taken out with them.
+    """
+    if not invoice_ids:
+        return
+    result = await db.execute(_invoice_sales_statement(invoice_ids))
+    await _apply_to_rollups(db, result.all(), lambda row: sign)
+    if include_notes:
+        note_result = await db.execute(_note_sales_statement(CreditNotes.invoice_id.in_(invoice_ids)))
+        await _apply_to_rollups(db, note_result.all(), lambda row: _note_sign(row.note_type) * sign)
+
+
+async def record_note_sales(db: AsyncSession, note_id: str) -> None:
+    """Apply a new credit or debit note to the daily sales rollups, in the caller's transaction."""
+    result = await db.execute(_note_sales_statement(CreditNotes.note_id == note_id))
+    await _apply_to_rollups(db, result.all(), lambda row: _note_sign(row.note_type))
+
+
+async def sales_rollup_rows(db: AsyncSession | AsyncConnection, company_id: str) -> List[dict]:
+    """The company's rollup rows, recomputed from its invoices and notes."""
+    invoice_ids = select(Invoices.invoice_id).where(
+        Invoices.owner_company == company_id,
+        Invoices.invoice_status.in_(RECEIVABLE_INVOICE_STATUSES)
+    )
+    totals: Dict[Tuple, Dict[str, object]] = defaultdict(lambda: dict.fromkeys(ROLLUP_MEASURES, 0))
+    invoice_rows = (await db.execute(_invoice_sales_statement(invoice_ids))).all()
+    note_rows = (await db.execute(_note_sales_statement(
+        CreditNotes.company_id == company_id,
+        CreditNotes.invoice_id.in_(invoice_ids)
+    ))).all()
+    for rows, sign_of in ((invoice_rows, lambda row: 1), (note_rows, lambda row: _note_sign(row.note_type))):
+        for row in rows:
+            sign = sign_of(row)
+            measures = totals[tuple(getattr(row, column) for column in ROLLUP_KEY)]
+            for measure in ROLLUP_MEASURES:
+                measures[measure] += getattr(row, measure) * sign
+    return [dict(zip(ROLLUP_KEY, key), **measures) for key, measures in totals.items()]
+
+
+async def rebuild_sales_rollups(db: AsyncSession, current_company: Companies) -> int:
+    """
+    Recompute the company's rollups from its invoices and notes, e.g. for invoices
+    written before rollups existed. Returns the number of rollup rows.
+    Invoices already moved to the archive are no longer in the database, so their
+    sales are only kept if they were rolled up before archival.
+    """
+    company_id = current_company.company_id
+    try:
+        rollup_rows = await sales_rollup_rows(db, company_id)
+        await db.execute(delete(SalesDailyRollups).where(SalesDailyRollups.company_id == company_id))
+        if rollup_rows:
+            await db.execute(insert(SalesDailyRollups), rollup_rows)
+        await db.commit()
+        return len(rollup_rows)
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error rebuilding sales rollups: {str(e)}"
+        )
+
+
+def _period_expression(db: AsyncSession, granularity: SalesGranularity):
+    """Label of the time bucket a rollup row falls in, e.g. "2025-07" for a month."""
+    if db.get_bind().dialect.name == "postgresql":
+        pattern = "'YYYY-MM'" if granularity == SalesGranularity.month else "'YYYY-MM-DD'"
+        return func.to_char(SalesDailyRollups.sales_date, literal_column(pattern))
+    pattern = "'%Y-%m'" if granularity == SalesGranularity.month else "'%Y-%m-%d'"
+    return func.strftime(literal_column(pattern), SalesDailyRollups.sales_date)
+
+
+async def get_sales_analytics(
+    db: AsyncSession,
+    current_company: Companies,
+    date_from: date,
+    date_to: date,
+    group_by: SalesGroupBy = SalesGroupBy.product,
+    granularity: SalesGranularity = SalesGranularity.total,
+    limit: int = 100
+) -> List[Row]:
+    """
+    Sales by product or HSN/SAC code and tax rate slab, per day, per month or for
+    the whole range, best sellers (by taxable value) first within each period.
+    Reads only the daily rollups, never the invoice items.
+    """
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_to must not be before date_from."
+        )
+
+    rates = (SalesDailyRollups.igst_rate, SalesDailyRollups.cgst_rate, SalesDailyRollups.sgst_rate)
+    if group_by == SalesGroupBy.product:
+        dimensions = [SalesDailyRollups.product_id, Products.product_name, SalesDailyRollups.hsn_sac_code]
+    else:
+        dimensions = [SalesDailyRollups.hsn_sac_code]
+    period: Optional[object] = None if granularity == SalesGranularity.total else _period_expression(db, granularity)
+    group_columns = ([period] if period is not None else []) + dimensions + list(rates)
+
+    taxable_value = func.sum(SalesDailyRollups.taxable_value)
+    query = (
+        select(
+            *([period.label("period")] if period is not None else []),
+            *dimensions,
+            *rates,
+            func.sum(SalesDailyRollups.quantity).label("quantity"),
+            taxable_value.label("taxable_value"),
+            func.sum(SalesDailyRollups.igst_amount).label("igst_amount"),
+            func.sum(SalesDailyRollups.cgst_amount).label("cgst_amount"),
+            func.sum(SalesDailyRollups.sgst_amount).label("sgst_amount"),
+            func.sum(SalesDailyRollups.total_amount).label("total_amount")
+        )
+        .where(
+            SalesDailyRollups.company_id == current_company.company_id,
+            SalesDailyRollups.sales_date >= date_from,
+            SalesDailyRollups.sales_date <= date_to
+        )
+        .group_by(*group_columns)
+        .order_by(*([period] if period is not None else []), taxable_value.desc())
+        .limit(limit)
+    )
+    if group_by == SalesGroupBy.product:
+        query = query.join(Products, Products.product_id == SalesDailyRollups.product_id)
+    result = await db.execute(query)
+    return result.all()
@@ -0,0 +1,216 @@
+# app/services/search.py
+import asyncio
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from cachetools import TTLCache
+from sqlalchemy import select, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+
+from app.core.config import settings
+from app.models.companies import Companies
+from app.models.customers import Customers
+from app.models.products import Products
+
+CUSTOMERS = "customers"
+PRODUCTS = "products"
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(*values: Optional[str]) -> Set[str]:
+    tokens = set()
+    for value in values:
+        if value:
+            tokens.update(_TOKEN_PATTERN.findall(value.lower()))
+    return tokens
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards in user input so it matches literally, with backslash as the escape character."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class PrefixIndex:
+    """
+    In-memory prefix index over one company's customers or products, used where the
+    database has no trigram support (SQLite). Tokens are kept in a sorted list so
+    each query term is a binary search instead of a scan over every row.
+    """
+
+    def __init__(self, documents: Iterable[Tuple[str, str, Set[str]]]):
+        pairs = []
+        self._names: Dict[str, str] = {}
+        for document_id, name, tokens in documents:
+            self._names[document_id] = name.lower()
+            pairs.extend((token, document_id) for token in tokens)
+        pairs.sort()
+        self._tokens = [token for token, _ in pairs]
+        self._ids = [document_id for _, document_id in pairs]
+
+    def _ids_with_prefix(self, prefix: str) -> Set[str]:
+        matches = set()
+        position = bisect_left(self._tokens, prefix)
+        while position < len(self._tokens) and self._tokens[position].startswith(prefix):
+            matches.add(self._ids[position])
+            position += 1
+        return matches
+
+    def search(self, query: str, limit: int) -> List[str]:
+        """Return ids whose tokens prefix-match every query term, names starting with the query first."""
+        terms = sorted(_tokenize(query), key=len, reverse=True)
+        if not terms:
+            return []
+        candidates = self._ids_with_prefix(terms[0])
+        for term in terms[1:]:
+            if not candidates:
+                break
+            candidates &= self._ids_with_prefix(term)
+
+        lowered_query = query.strip().lower()
+        ranked = sorted(
+            candidates,
+            key=lambda document_id: (not self._names[document_id].startswith(lowered_query), self._names[document_id])
+        )
+        return ranked[:limit]
+
+
+# Prefix indexes keyed by (kind, company_id), rebuilt after changes or when they expire
+_prefix_indexes: TTLCache = TTLCache(maxsize=settings.SEARCH_INDEX_MAX_COMPANIES, ttl=settings.SEARCH_INDEX_TTL_SECONDS)
+_build_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+
+def invalidate_search_index(kind: str, company_id: str) -> None:
+    """Drop a company's in-memory index after its customers or products change."""
+    _prefix_indexes.pop((kind, company_id), None)
+
+
+async def _get_prefix_index(kind: str, db: AsyncSession, company_id: str) -> PrefixIndex:
+    key = (kind, company_id)
+    index = _prefix_indexes.get(key)
+    if index is not None:
+        return index
+
+    lock = _build_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        index = _prefix_indexes.get(key)
+        if index is not None:
+            return index
+        if kind == CUSTOMERS:
+            result = await db.execute(
+                select(
+                    Customers.customer_id, Customers.customer_name, Customers.customer_gstin,
+                    Customers.customer_city, Customers.customer_email
+                ).where(Customers.customer_to == company_id)
+            )
+            documents = [
+                (row.customer_id, row.customer_name,
+                 _tokenize(row.customer_name, row.customer_gstin, row.customer_city, row.customer_email))
+                for row in result
+            ]
+        else:
+            result = await db.execute(
+                select(
+                    Products.product_id, Products.product_name, Products.product_hsn_sac_code
+                ).where(Products.company_id == company_id)
+            )
+            documents = [
+                (row.product_id, row.product_name, _tokenize(row.product_name, row.product_hsn_sac_code))
+                for row in result
+            ]
+        index = PrefixIndex(documents)
+        _prefix_indexes[key] = index
+        return index
+
+
+def _uses_trigram_search(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _clamp_limit(limit: int) -> int:
+    return max(1, min(limit, settings.SEARCH_MAX_LIMIT))
+
+
+async def search_customers(query: str, limit: int, db: AsyncSession, current_company: Companies) -> List[Customers]:
+    """
+    Find the company's best matching customers by name, GSTIN, city or email.
+    On PostgreSQL this is served by the trigram indexes; elsewhere by the in-memory prefix index.
+    """
+    limit = _clamp_limit(limit)
+    query = query.strip()
+
+    if _uses_trigram_search(db):
+        contains = f"%{escape_like(query)}%"
+        starts_with = f"{escape_like(query)}%"
+        result = await db.execute(
+            select(Customers)
+            .where(
+                Customers.customer_to == current_company.company_id,
+                or_(
+                    Customers.customer_name.ilike(contains, escape="\\"),
+                    Customers.customer_email.ilike(contains, escape="\\"),
+                    Customers.customer_city.ilike(starts_with, escape="\\"),
+                    Customers.customer_gstin.ilike(starts_with, escape="\\")
+                )
+            )
+            .order_by(
+                Customers.customer_name.ilike(starts_with, escape="\\").desc(),
+                func.similarity(Customers.customer_name, query).desc(),
+                Customers.customer_name
+            )
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    index = await _get_prefix_index(CUSTOMERS, db, current_company.company_id)
+    customer_ids = index.search(query, limit)
+    if not customer_ids:
+        return []
+    result = await db.execute(select(Customers).where(Customers.customer_id.in_(customer_ids)))
+    customers_by_id = {c.customer_id: c for c in result.scalars().all()}
+    return [customers_by_id[cid] for cid in customer_ids if cid in customers_by_id]
+
+
+async def search_products(query: str, limit: int, db: AsyncSession, current_company: Companies) -> List[Products]:
+    """
+    Find the company's best matching products by name or HSN/SAC code.
+    On PostgreSQL this is served by the trigram indexes; elsewhere by the in-memory prefix index.
+    """
+    limit = _clamp_limit(limit)
+    query = query.strip()
+
+    if _uses_trigram_search(db):
+        contains = f"%{escape_like(query)}%"
+        starts_with = f"{escape_like(query)}%"
+        result = await db.execute(
+            select(Products)
+            .options(noload(Products.invoice_items))
+            .where(
+                Products.company_id == current_company.company_id,
+                or_(
+                    Products.product_name.ilike(contains, escape="\\"),
+                    Products.product_hsn_sac_code.ilike(starts_with, escape="\\")
+                )
+            )
+            .order_by(
+                Products.product_name.ilike(starts_with, escape="\\").desc(),
+                func.similarity(Products.product_name, query).desc(),
+                Products.product_name
+            )
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    index = await _get_prefix_index(PRODUCTS, db, current_company.company_id)
+    product_ids = index.search(query, limit)
+    if not product_ids:
+        return []
+    result = await db.execute(
+        select(Products)
+        .options(noload(Products.invoice_items))
+        .where(Products.product_id.in_(product_ids))
+    )
+    products_by_id = {p.product_id: p for p in result.scalars().all()}
+    return [products_by_id[pid] for pid in product_ids if pid in products_by_id]
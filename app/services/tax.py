@@ -0,0 +1,97 @@
+# app/services/tax.py
+from decimal import Decimal
+from typing import Iterable, NamedTuple
+
+from app.core.money import ZERO, to_money
+from app.models.products import Products
+
+
+class LineAmounts(NamedTuple):
+    """Tax breakdown of a single invoice line, every amount rounded to paise."""
+    unit_price: Decimal
+    quantity: int
+    cgst_rate: Decimal
+    sgst_rate: Decimal
+    igst_rate: Decimal
+    taxable_value: Decimal
+    cgst_amount: Decimal
+    sgst_amount: Decimal
+    igst_amount: Decimal
+    total_amount: Decimal
+
+
+class InvoiceTotals(NamedTuple):
+    subtotal: Decimal
+    total_cgst: Decimal
+    total_sgst: Decimal
+    total_igst: Decimal
+    total: Decimal
+
+
+def calculate_line(
+    unit_price: Decimal,
+    quantity: int,
+    cgst_rate: Decimal,
+    sgst_rate: Decimal,
+    igst_rate: Decimal
+) -> LineAmounts:
+    """
+    Calculate the taxable value and tax amounts of one line.
+    Each tax component is rounded to paise individually, so the stored line amounts
+    always add up to the stored invoice totals.
+    """
+    unit_price = to_money(unit_price)
+    cgst_rate = to_money(cgst_rate)
+    sgst_rate = to_money(sgst_rate)
+    igst_rate = to_money(igst_rate)
+
+    taxable_value = to_money(unit_price * quantity)
+    cgst_amount = to_money(taxable_value * cgst_rate / 100)
+    sgst_amount = to_money(taxable_value * sgst_rate / 100)
+    igst_amount = to_money(taxable_value * igst_rate / 100)
+
+    return LineAmounts(
+        unit_price=unit_price,
+        quantity=quantity,
+        cgst_rate=cgst_rate,
+        sgst_rate=sgst_rate,
+        igst_rate=igst_rate,
+        taxable_value=taxable_value,
+        cgst_amount=cgst_amount,
+        sgst_amount=sgst_amount,
+        igst_amount=igst_amount,
+        total_amount=taxable_value + cgst_amount + sgst_amount + igst_amount,
+    )
+
+
+def calculate_product_line(product: Products, quantity: int, is_intrastate: bool) -> LineAmounts:
+    """
+    Calculate a line for a product at its current price, applying CGST + SGST
+    for intrastate supplies and IGST for interstate supplies.
+    """
+    if is_intrastate:
+        return calculate_line(
+            product.product_unit_price, quantity,
+            product.product_default_cgst_rate, product.product_default_sgst_rate, ZERO
+        )
+    return calculate_line(
+        product.product_unit_price, quantity,
+        ZERO, ZERO, product.product_default_igst_rate
+    )
+
+
+def sum_lines(lines: Iterable[LineAmounts]) -> InvoiceTotals:
+    """Add up line amounts into invoice totals."""
+    subtotal = total_cgst = total_sgst = total_igst = ZERO
+    for line in lines:
+        subtotal += line.taxable_value
+        total_cgst += line.cgst_amount
+        total_sgst += line.sgst_amount
+        total_igst += line.igst_amount
+    return InvoiceTotals(
+        subtotal=subtotal,
+        total_cgst=total_cgst,
+        total_sgst=total_sgst,
+        total_igst=total_igst,
+        total=subtotal + total_cgst + total_sgst + total_igst,
+    )
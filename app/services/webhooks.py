@@ -0,0 +1,398 @@
+# app/services/webhooks.py
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+from fastapi import HTTPException, status
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.event_bus import LiveEvent, publish_after_commit
+from app.core.http_client import get_http_client, is_public_url
+from app.core.invoice_status import InvoiceStatus
+from app.core.sharding import moving_company_ids
+from app.core.task_queue import enqueue_task, task_handler
+from app.database import AsyncSessionLocal
+from app.models.companies import Companies
+from app.models.invoices import Invoices
+from app.models.webhooks import WebhookSubscriptions, WebhookOutbox
+from app.schemas.webhooks import CreateWebhookSubscription, UpdateWebhookSubscription, WebhookEventType
+from app.services.invoice_archives import _json_default
+
+logger = logging.getLogger(__name__)
+
+DELIVER_WEBHOOKS_TASK = "deliver_webhooks"
+PING_EVENT_TYPE = "webhook.ping"
+SIGNATURE_VERSION = "v1"
+
+SUBSCRIPTION_NOT_FOUND = "Webhook subscription not found."
+PRIVATE_TARGET_URL = "target_url must be an http(s) URL of a host with public addresses only."
+
+# Invoice fields carried by every invoice event
+INVOICE_EVENT_COLUMNS = (
+    Invoices.invoice_id,
+    Invoices.invoice_number,
+    Invoices.owner_company,
+    Invoices.customer_company,
+    Invoices.invoice_date,
+    Invoices.invoice_due_date,
+    Invoices.invoice_status,
+    Invoices.invoice_total,
+    Invoices.invoice_amount_paid,
+    Invoices.invoice_balance_due,
+    Invoices.invoice_version,
+)
+
+
+class WebhookDeliveryError(Exception):
+    """The receiver answered a delivery with a non-2xx status, or can't be delivered to."""
+
+
+async def _check_target_url(target_url: str) -> None:
+    # Deliveries must not reach the app's own network, e.g. internal services or cloud metadata
+    if not await is_public_url(target_url):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=PRIVATE_TARGET_URL)
+
+
+def sign_webhook_body(secret: str, timestamp: int, body: bytes) -> str:
+    """
+    Value of the X-Webhook-Signature header: HMAC-SHA256 of "<timestamp>.<body>" with
+    the subscription's secret. Receivers recompute it, and reject stale timestamps
+    to stop replays.
+    """
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"{SIGNATURE_VERSION}={digest}"
+
+
+def _build_event(event_type: str, company_id: str, data: dict, occurred_at: datetime) -> dict:
+    return {
+        "event_id": str(uuid.uuid4()),
+        "event_type": event_type,
+        "occurred_at": occurred_at,
+        "company_id": company_id,
+        "data": data,
+    }
+
+
+async def record_invoice_events(
+    db: AsyncSession,
+    event_type: WebhookEventType,
+    invoice_ids: Iterable[str],
+    previous_statuses: Optional[Dict[str, InvoiceStatus]] = None
+) -> None:
+    """
+    Record an event per invoice in the caller's transaction: it is written to the
+    webhook outbox for companies subscribed to `event_type`, and sent to live event
+    streams once the transaction commits. Events carry the invoice as it is now, so
+    call this after the change has been applied.
+    """
+    invoice_ids = list(invoice_ids)
+    if not invoice_ids:
+        return
+    result = await db.execute(select(*INVOICE_EVENT_COLUMNS).where(Invoices.invoice_id.in_(invoice_ids)))
+    invoices = result.all()
+
+    subscriptions_result = await db.execute(
+        select(WebhookSubscriptions.company_id, WebhookSubscriptions.event_types).where(
+            WebhookSubscriptions.company_id.in_({invoice.owner_company for invoice in invoices}),
+            WebhookSubscriptions.is_active.is_(True)
+        )
+    )
+    subscribed = {
+        company_id for company_id, event_types in subscriptions_result.all()
+        if event_type.value in event_types.split(",")
+    }
+
+    now = datetime.utcnow()
+    outbox_rows = []
+    live_events = []
+    for invoice in invoices:
+        data = dict(invoice._mapping)
+        if previous_statuses is not None:
+            data["previous_status"] = previous_statuses.get(invoice.invoice_id)
+        event = _build_event(event_type.value, invoice.owner_company, data, now)
+        payload = json.dumps(event, default=_json_default, separators=(",", ":"))
+        live_events.append(LiveEvent(invoice.owner_company, event["event_id"], event_type.value, payload))
+        if invoice.owner_company in subscribed:
+            outbox_rows.append({
+                "event_id": event["event_id"],
+                "company_id": invoice.owner_company,
+                "event_type": event_type.value,
+                "payload": payload,
+                "created_at": now,
+            })
+    if outbox_rows:
+        await db.execute(insert(WebhookOutbox), outbox_rows)
+    await publish_after_commit(db, live_events)
+
+
+async def _enqueue_delivery(db: AsyncSession, company_id: str, subscription_id: str, events: List[dict]) -> str:
+    delivery_id = str(uuid.uuid4())
+    await enqueue_task(
+        db,
+        DELIVER_WEBHOOKS_TASK,
+        {"delivery_id": delivery_id, "subscription_id": subscription_id, "events": events},
+        max_attempts=settings.WEBHOOK_MAX_ATTEMPTS,
+        company_id=company_id
+    )
+    return delivery_id
+
+
+async def relay_webhook_outbox(db: AsyncSession) -> int:
+    """
+    Scheduled job: turn outbox events into delivery tasks, batching up to
+    WEBHOOK_BATCH_SIZE events per subscription, and remove them from the outbox in
+    the same transaction. Returns the number of events relayed.
+    """
+    relayed = 0
+    while True:
+        result = await db.execute(
+            select(WebhookOutbox)
+            .where(WebhookOutbox.company_id.notin_(await moving_company_ids()))
+            .order_by(WebhookOutbox.created_at)
+            .limit(settings.WEBHOOK_RELAY_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        outbox = result.scalars().all()
+        if not outbox:
+            await db.rollback()
+            break
+
+        subscriptions_result = await db.execute(
+            select(
+                WebhookSubscriptions.subscription_id,
+                WebhookSubscriptions.company_id,
+                WebhookSubscriptions.event_types
+            ).where(
+                WebhookSubscriptions.company_id.in_({event.company_id for event in outbox}),
+                WebhookSubscriptions.is_active.is_(True)
+            )
+        )
+        events_by_company: Dict[str, List[WebhookOutbox]] = defaultdict(list)
+        for event in outbox:
+            events_by_company[event.company_id].append(event)
+
+        for subscription in subscriptions_result.all():
+            event_types = set(subscription.event_types.split(","))
+            events = [
+                json.loads(event.payload) for event in events_by_company[subscription.company_id]
+                if event.event_type in event_types
+            ]
+            for start in range(0, len(events), settings.WEBHOOK_BATCH_SIZE):
+                await _enqueue_delivery(
+                    db, subscription.company_id, subscription.subscription_id,
+                    events[start:start + settings.WEBHOOK_BATCH_SIZE]
+                )
+
+        await db.execute(
+            delete(WebhookOutbox).where(WebhookOutbox.event_id.in_([event.event_id for event in outbox]))
+        )
+        await db.commit()
+        relayed += len(outbox)
+        if len(outbox) < settings.WEBHOOK_RELAY_BATCH_SIZE:
+            break
+    return relayed
+
+
+@task_handler(DELIVER_WEBHOOKS_TASK)
+async def _deliver_webhooks(payload: dict) -> None:
+    """
+    POST a batch of events to a subscription, signed with its secret. A non-2xx answer
+    or a network error fails the task, so it is retried with backoff; the delivery id
+    stays the same across retries so receivers can drop duplicates. The target is
+    checked again for public addresses, as its DNS may have changed since it was
+    saved, and redirects are not followed.
+    """
+    async with AsyncSessionLocal() as db:
+        subscription = await db.get(WebhookSubscriptions, payload["subscription_id"])
+        if subscription is None or not subscription.is_active:
+            # Deleted or disabled since the events were relayed
+            return
+
+        body = json.dumps(
+            {"delivery_id": payload["delivery_id"], "events": payload["events"]}, separators=(",", ":")
+        ).encode()
+        timestamp = int(time.time())
+        started = time.perf_counter()
+        try:
+            if not await is_public_url(subscription.target_url):
+                raise WebhookDeliveryError(PRIVATE_TARGET_URL)
+            response = await get_http_client().post(
+                subscription.target_url,
+                content=body,
+                headers={
+                    "Content-Type": "application/json",
+                    "X-Webhook-Id": payload["delivery_id"],
+                    "X-Webhook-Timestamp": str(timestamp),
+                    "X-Webhook-Signature": sign_webhook_body(subscription.secret, timestamp, body),
+                },
+                timeout=settings.WEBHOOK_TIMEOUT_SECONDS,
+                follow_redirects=False
+            )
+            if not response.is_success:
+                raise WebhookDeliveryError(f"Receiver answered {response.status_code}")
+        except (httpx.HTTPError, WebhookDeliveryError) as e:
+            metrics.increment("webhook_deliveries_total", outcome="failed")
+            disable = subscription.consecutive_failures + 1 >= settings.WEBHOOK_DISABLE_AFTER_FAILURES
+            if disable:
+                logger.warning(
+                    "Disabling webhook subscription %s after %s failed deliveries",
+                    subscription.subscription_id, subscription.consecutive_failures + 1
+                )
+            await db.execute(
+                update(WebhookSubscriptions)
+                .where(WebhookSubscriptions.subscription_id == subscription.subscription_id)
+                .values(
+                    consecutive_failures=WebhookSubscriptions.consecutive_failures + 1,
+                    last_failure_at=datetime.utcnow(),
+                    last_error=str(e)[:2000] or type(e).__name__,
+                    is_active=not disable
+                )
+            )
+            await db.commit()
+            raise
+
+        metrics.increment("webhook_deliveries_total", outcome="succeeded")
+        metrics.increment("webhook_events_delivered_total", len(payload["events"]))
+        metrics.observe("webhook_delivery_seconds", time.perf_counter() - started)
+        await db.execute(
+            update(WebhookSubscriptions)
+            .where(WebhookSubscriptions.subscription_id == subscription.subscription_id)
+            .values(consecutive_failures=0, last_delivery_at=datetime.utcnow())
+        )
+        await db.commit()
+
+
+async def create_webhook_subscription(
+    subscription_data: CreateWebhookSubscription,
+    db: AsyncSession,
+    current_company: Companies
+) -> WebhookSubscriptions:
+    await _check_target_url(str(subscription_data.target_url))
+    subscription = WebhookSubscriptions(
+        company_id=current_company.company_id,
+        target_url=str(subscription_data.target_url),
+        secret=secrets.token_hex(32),
+        event_types=",".join(dict.fromkeys(event_type.value for event_type in subscription_data.event_types)),
+        description=subscription_data.description,
+        is_active=True,
+        consecutive_failures=0
+    )
+    db.add(subscription)
+    try:
+        await db.commit()
+        await db.refresh(subscription)
+        return subscription
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating webhook subscription: {str(e)}"
+        )
+
+
+async def list_webhook_subscriptions(db: AsyncSession, current_company: Companies) -> List[WebhookSubscriptions]:
+    result = await db.execute(
+        select(WebhookSubscriptions)
+        .where(WebhookSubscriptions.company_id == current_company.company_id)
+        .order_by(WebhookSubscriptions.created_at)
+    )
+    return result.scalars().all()
+
+
+async def get_webhook_subscription(
+    subscription_id: str,
+    db: AsyncSession,
+    current_company: Companies
+) -> WebhookSubscriptions:
+    result = await db.execute(
+        select(WebhookSubscriptions).where(
+            WebhookSubscriptions.subscription_id == subscription_id,
+            WebhookSubscriptions.company_id == current_company.company_id
+        )
+    )
+    subscription = result.scalar_one_or_none()
+    if not subscription:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=SUBSCRIPTION_NOT_FOUND)
+    return subscription
+
+
+async def update_webhook_subscription(
+    subscription_id: str,
+    updated_details: UpdateWebhookSubscription,
+    db: AsyncSession,
+    current_company: Companies
+) -> WebhookSubscriptions:
+    subscription = await get_webhook_subscription(subscription_id, db, current_company)
+    update_data = updated_details.dict(exclude_unset=True)
+    if update_data.get("target_url") is not None:
+        await _check_target_url(str(update_data["target_url"]))
+    try:
+        if update_data.get("target_url") is not None:
+            subscription.target_url = str(update_data["target_url"])
+        if update_data.get("event_types") is not None:
+            subscription.event_types = ",".join(
+                dict.fromkeys(event_type.value for event_type in updated_details.event_types)
+            )
+        if "description" in update_data:
+            subscription.description = update_data["description"]
+        if update_data.get("is_active") is not None:
+            if update_data["is_active"] and not subscription.is_active:
+                subscription.consecutive_failures = 0
+            subscription.is_active = update_data["is_active"]
+        await db.commit()
+        await db.refresh(subscription)
+        return subscription
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating webhook subscription: {str(e)}"
+        )
+
+
+async def delete_webhook_subscription(subscription_id: str, db: AsyncSession, current_company: Companies) -> None:
+    """Delete a subscription. Deliveries already queued for it are dropped."""
+    subscription = await get_webhook_subscription(subscription_id, db, current_company)
+    try:
+        await db.delete(subscription)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error deleting webhook subscription: {str(e)}"
+        )
+
+
+async def ping_webhook_subscription(subscription_id: str, db: AsyncSession, current_company: Companies) -> str:
+    """Queue a signed test delivery with a single webhook.ping event; returns its delivery id."""
+    subscription = await get_webhook_subscription(subscription_id, db, current_company)
+    if not subscription.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Activate the subscription before sending it a test delivery."
+        )
+    event = _build_event(PING_EVENT_TYPE, current_company.company_id, {}, datetime.utcnow())
+    try:
+        delivery_id = await _enqueue_delivery(
+            db, current_company.company_id, subscription.subscription_id, [json.loads(json.dumps(event, default=_json_default))]
+        )
+        await db.commit()
+        return delivery_id
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error queueing test delivery: {str(e)}"
+        )
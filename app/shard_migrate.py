@@ -0,0 +1,50 @@
+# app/shard_migrate.py
+"""
+Move companies between database shards:
+
+    python -m app.shard_migrate move <company_id> <shard>
+    python -m app.shard_migrate rebalance [--max-moves N] [--dry-run]
+
+`rebalance` evens out the number of companies per shard. Requests about a company
+get 503 while it is moved, which takes at least SHARD_DIRECTORY_CACHE_TTL_SECONDS.
+"""
+import argparse
+import asyncio
+import logging
+
+from app.main import app  # noqa: F401 -- loads every model
+from app.core.sharding import migrate_company, plan_rebalance
+from app.database import shard_engines
+
+logger = logging.getLogger(__name__)
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        if args.command == "move":
+            copied = await migrate_company(args.company_id, args.shard)
+            logger.info("Copied %s rows", sum(copied.values()))
+            return
+        moves = await plan_rebalance(args.max_moves)
+        if not moves:
+            logger.info("Shards are balanced")
+        for move in moves:
+            logger.info("Move company %s from %s to %s", move.company_id, move.source_shard, move.target_shard)
+            if not args.dry_run:
+                await migrate_company(move.company_id, move.target_shard)
+    finally:
+        for shard_engine in shard_engines.values():
+            await shard_engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(prog="python -m app.shard_migrate")
+    commands = parser.add_subparsers(dest="command", required=True)
+    move_parser = commands.add_parser("move", help="Move one company to a shard")
+    move_parser.add_argument("company_id")
+    move_parser.add_argument("shard", choices=list(shard_engines))
+    rebalance_parser = commands.add_parser("rebalance", help="Even out the companies per shard")
+    rebalance_parser.add_argument("--max-moves", type=int, default=None)
+    rebalance_parser.add_argument("--dry-run", action="store_true")
+    asyncio.run(run(parser.parse_args()))
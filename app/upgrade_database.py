@@ -0,0 +1,445 @@
+# app/upgrade_database.py
+"""
+Upgrade a database created by an earlier release to the current models:
+
+    python -m app.upgrade_database
+
+create_all at startup only creates missing tables and never changes existing ones,
+so run this with the application stopped, before starting the new release. It
+upgrades the default database and every shard in SHARD_DATABASE_URLS, each in a
+single transaction. Every step looks at the schema before changing anything,
+so running it again, or on a database the current release created, does nothing.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+
+from sqlalchemy import bindparam, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.main import app  # noqa: F401 -- loads every model
+from app.core.invoice_status import InvoiceStatus, RECEIVABLE_INVOICE_STATUSES
+from app.database import Base, shard_engines
+from app.models.invoices import Invoices
+from app.models.sales_rollups import SalesDailyRollups
+from app.services.document_batches import RENDER_DOCUMENT_BATCH_TASK
+from app.services.sales_rollups import sales_rollup_rows
+from app.services.webhooks import DELIVER_WEBHOOKS_TASK
+
+logger = logging.getLogger(__name__)
+
+UpgradeStep = Callable[[AsyncConnection], Awaitable[bool]]
+
+# Columns that held rupees and percentages as double precision before amounts were
+# stored as integer paise and rates as integer hundredths of a percent
+_MONEY_COLUMNS = {
+    "invoices": ("invoice_subtotal", "invoice_total_cgst", "invoice_total_sgst", "invoice_total_igst", "invoice_total"),
+    "products": ("product_unit_price",),
+}
+_RATE_COLUMNS = {
+    "invoice_items": ("invoice_item_cgst_rate", "invoice_item_sgst_rate", "invoice_item_igst_rate"),
+    "products": ("product_default_cgst_rate", "product_default_sgst_rate", "product_default_igst_rate"),
+}
+# Free-form invoice statuses of older releases that map onto the status state machine
+_LEGACY_INVOICE_STATUSES = {"pending": InvoiceStatus.issued, "partially paid": InvoiceStatus.partially_paid}
+_ITEM_AMOUNT_COLUMNS = (
+    "invoice_item_unit_price",
+    "invoice_item_taxable_value",
+    "invoice_item_cgst_amount",
+    "invoice_item_sgst_amount",
+    "invoice_item_igst_amount",
+    "invoice_item_total_amount",
+)
+
+
+async def _column_types(conn: AsyncConnection, table_name: str) -> Dict[str, str]:
+    result = await conn.execute(
+        text(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table_name"
+        ),
+        {"table_name": table_name}
+    )
+    return dict(result.all())
+
+
+async def _add_columns(conn: AsyncConnection, table_name: str, columns: Dict[str, str]) -> List[str]:
+    """
+    Add those of `columns` (name -> type and constraints) the table lacks, returning
+    their names. A DEFAULT fills in existing rows and is then dropped again, as the
+    models only have Python-side defaults.
+    """
+    existing = await _column_types(conn, table_name)
+    added = [column_name for column_name in columns if column_name not in existing]
+    for column_name in added:
+        await conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {columns[column_name]}"))
+        if " DEFAULT " in f" {columns[column_name]} ":
+            await conn.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} DROP DEFAULT"))
+    return added
+
+
+async def _constraint_names(conn: AsyncConnection, table_name: str) -> Set[str]:
+    result = await conn.execute(
+        text(
+            "SELECT constraint_name FROM information_schema.table_constraints "
+            "WHERE table_schema = current_schema() AND table_name = :table_name"
+        ),
+        {"table_name": table_name}
+    )
+    return set(result.scalars().all())
+
+
+async def _add_unique_constraint(conn: AsyncConnection, table_name: str, name: str, columns: Tuple[str, ...]) -> bool:
+    """Add a unique constraint unless it exists, refusing with the clashing values if rows break it."""
+    if name in await _constraint_names(conn, table_name):
+        return False
+    column_list = ", ".join(columns)
+    result = await conn.execute(text(
+        f"SELECT {column_list}, count(*) FROM {table_name} WHERE {' AND '.join(f'{column} IS NOT NULL' for column in columns)} "
+        f"GROUP BY {column_list} HAVING count(*) > 1 LIMIT 20"
+    ))
+    duplicates = result.all()
+    if duplicates:
+        raise RuntimeError(
+            f"Can't add {name}: {table_name} has rows sharing ({column_list}), e.g. "
+            + "; ".join(", ".join(str(value) for value in row[:-1]) + f" ({row[-1]} rows)" for row in duplicates)
+            + ". Resolve them and run the upgrade again."
+        )
+    await conn.execute(text(f"ALTER TABLE {table_name} ADD CONSTRAINT {name} UNIQUE ({column_list})"))
+    return True
+
+
+async def _store_money_as_minor_units(conn: AsyncConnection) -> bool:
+    """
+    Convert rupee amounts to paise and percentages to hundredths, rounding half-up as
+    the app does, and snapshot the amounts of existing invoice lines. Older releases
+    showed lines at the product's current price, so that is what is stored, and the
+    invoice totals are recomputed from those lines so they add up exactly.
+    """
+    changed = False
+    for table_name in _MONEY_COLUMNS.keys() | _RATE_COLUMNS.keys():
+        column_types = await _column_types(conn, table_name)
+        for column_name in _MONEY_COLUMNS.get(table_name, ()) + _RATE_COLUMNS.get(table_name, ()):
+            if column_types.get(column_name) != "double precision":
+                continue
+            new_type = "BIGINT" if column_name in _MONEY_COLUMNS.get(table_name, ()) else "INTEGER"
+            await conn.execute(text(
+                f"ALTER TABLE {table_name} ALTER COLUMN {column_name} TYPE {new_type} "
+                f"USING round({column_name}::numeric * 100)"
+            ))
+            changed = True
+
+    item_columns = await _column_types(conn, "invoice_items")
+    missing = [column_name for column_name in _ITEM_AMOUNT_COLUMNS if column_name not in item_columns]
+    if not missing:
+        return changed
+    for column_name in missing:
+        await conn.execute(text(f"ALTER TABLE invoice_items ADD COLUMN {column_name} BIGINT NOT NULL DEFAULT 0"))
+    # Same arithmetic as app.services.tax.calculate_line, in paise and hundredths of a percent
+    await conn.execute(text(
+        "UPDATE invoice_items AS item SET "
+        "invoice_item_unit_price = product.product_unit_price, "
+        "invoice_item_taxable_value = product.product_unit_price * item.invoice_item_quantity, "
+        "invoice_item_cgst_amount = round(product.product_unit_price * item.invoice_item_quantity "
+        "* coalesce(item.invoice_item_cgst_rate, 0) / 10000.0), "
+        "invoice_item_sgst_amount = round(product.product_unit_price * item.invoice_item_quantity "
+        "* coalesce(item.invoice_item_sgst_rate, 0) / 10000.0), "
+        "invoice_item_igst_amount = round(product.product_unit_price * item.invoice_item_quantity "
+        "* coalesce(item.invoice_item_igst_rate, 0) / 10000.0) "
+        "FROM products AS product WHERE product.product_id = item.product_id"
+    ))
+    await conn.execute(text(
+        "UPDATE invoice_items SET invoice_item_total_amount = invoice_item_taxable_value "
+        "+ invoice_item_cgst_amount + invoice_item_sgst_amount + invoice_item_igst_amount"
+    ))
+    for column_name in missing:
+        # The models give these Python-side defaults only
+        await conn.execute(text(f"ALTER TABLE invoice_items ALTER COLUMN {column_name} DROP DEFAULT"))
+    await conn.execute(text(
+        "UPDATE invoices SET "
+        "invoice_subtotal = lines.subtotal, "
+        "invoice_total_cgst = lines.total_cgst, "
+        "invoice_total_sgst = lines.total_sgst, "
+        "invoice_total_igst = lines.total_igst, "
+        "invoice_total = lines.subtotal + lines.total_cgst + lines.total_sgst + lines.total_igst "
+        "FROM (SELECT invoice_id, "
+        "sum(invoice_item_taxable_value) AS subtotal, "
+        "sum(invoice_item_cgst_amount) AS total_cgst, "
+        "sum(invoice_item_sgst_amount) AS total_sgst, "
+        "sum(invoice_item_igst_amount) AS total_igst "
+        "FROM invoice_items GROUP BY invoice_id) AS lines "
+        "WHERE lines.invoice_id = invoices.invoice_id"
+    ))
+    return True
+
+
+async def _unique_invoice_numbers(conn: AsyncConnection) -> bool:
+    return await _add_unique_constraint(
+        conn, "invoices", "uq_invoices_owner_company_invoice_number", ("owner_company", "invoice_number")
+    )
+
+
+async def _invoice_versions(conn: AsyncConnection) -> bool:
+    return bool(await _add_columns(conn, "invoices", {"invoice_version": "INTEGER NOT NULL DEFAULT 1"}))
+
+
+async def _unique_product_names(conn: AsyncConnection) -> bool:
+    # The unique constraint's index replaces the plain (company_id, product_name) index
+    await conn.execute(text("DROP INDEX IF EXISTS ix_products_company_id_product_name"))
+    return await _add_unique_constraint(
+        conn, "products", "uq_products_company_id_product_name", ("company_id", "product_name")
+    )
+
+
+async def _receivables(conn: AsyncConnection) -> bool:
+    """
+    Add the paid and due amounts of invoices and open each customer's ledger with
+    their invoices. Older releases kept only a status: "paid" invoices count as
+    fully paid, with a payment entry, and cancelled ones as owing nothing; how much
+    of a "partially paid" invoice was paid was never recorded, so it stays fully due
+    until payments are recorded against it.
+    """
+    added = await _add_columns(conn, "invoices", {
+        "invoice_amount_paid": "BIGINT NOT NULL DEFAULT 0",
+        "invoice_balance_due": "BIGINT NOT NULL DEFAULT 0",
+    })
+    if not added:
+        return False
+    await conn.execute(text(
+        "UPDATE invoices SET "
+        "invoice_amount_paid = CASE WHEN invoice_status = 'paid' THEN invoice_total ELSE 0 END, "
+        "invoice_balance_due = CASE WHEN invoice_status IN ('paid', 'cancelled') THEN 0 ELSE invoice_total END"
+    ))
+    # Entries in invoice date order, each payment straight after its invoice
+    await conn.execute(text(
+        "INSERT INTO customer_ledger_entries (entry_id, company_id, customer_id, entry_sequence, entry_type, "
+        "reference_id, entry_date, description, debit, credit, running_balance) "
+        "SELECT gen_random_uuid()::text, company_id, customer_id, row_number() OVER entries, entry_type, "
+        "reference_id, entry_date, description, debit, credit, "
+        "sum(debit - credit) OVER (entries ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) "
+        "FROM ("
+        "SELECT owner_company AS company_id, customer_company AS customer_id, 'invoice' AS entry_type, "
+        "invoice_id AS reference_id, coalesce(invoice_date, created_at AT TIME ZONE 'UTC') AS entry_date, "
+        "'Invoice ' || invoice_number AS description, invoice_total AS debit, 0 AS credit, 0 AS position "
+        "FROM invoices WHERE invoice_status <> 'cancelled' "
+        "UNION ALL "
+        "SELECT owner_company, customer_company, 'payment', invoice_id, "
+        "coalesce(invoice_date, created_at AT TIME ZONE 'UTC'), "
+        "'Invoice ' || invoice_number || ' paid', 0, invoice_total, 1 "
+        "FROM invoices WHERE invoice_status = 'paid'"
+        ") AS postings "
+        "WINDOW entries AS (PARTITION BY company_id, customer_id ORDER BY entry_date, reference_id, position)"
+    ))
+    await conn.execute(text(
+        "INSERT INTO customer_balances (company_id, customer_id, balance, last_sequence) "
+        "SELECT company_id, customer_id, sum(debit - credit), count(*) "
+        "FROM customer_ledger_entries GROUP BY company_id, customer_id"
+    ))
+    return True
+
+
+async def _invoice_status_values(conn: AsyncConnection) -> bool:
+    """
+    Move invoices onto the statuses of the state machine and shorten the column to
+    match. Statuses with no known meaning are refused rather than guessed at.
+    """
+    changed = False
+    for legacy_status, invoice_status in _LEGACY_INVOICE_STATUSES.items():
+        result = await conn.execute(
+            text("UPDATE invoices SET invoice_status = :invoice_status WHERE invoice_status = :legacy_status"),
+            {"invoice_status": invoice_status.value, "legacy_status": legacy_status}
+        )
+        changed = changed or bool(result.rowcount)
+    result = await conn.execute(
+        text("SELECT DISTINCT invoice_status FROM invoices WHERE invoice_status NOT IN :statuses LIMIT 20")
+        .bindparams(bindparam("statuses", expanding=True)),
+        {"statuses": [invoice_status.value for invoice_status in InvoiceStatus]}
+    )
+    unknown = result.scalars().all()
+    if unknown:
+        raise RuntimeError(
+            f"Invoices have statuses with no known meaning: {', '.join(unknown)}. "
+            "Set them to one of " + ", ".join(invoice_status.value for invoice_status in InvoiceStatus)
+            + " and run the upgrade again."
+        )
+    result = await conn.execute(text(
+        "SELECT character_maximum_length FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = 'invoices' AND column_name = 'invoice_status'"
+    ))
+    if result.scalar_one() != 20:
+        await conn.execute(text("ALTER TABLE invoices ALTER COLUMN invoice_status TYPE VARCHAR(20)"))
+        changed = True
+    # Replaced by ix_invoices_owner_company_invoice_status_invoice_due_date
+    await conn.execute(text("DROP INDEX IF EXISTS ix_invoices_owner_company_invoice_status_invoice_date"))
+    return changed
+
+
+async def _recurring_invoices(conn: AsyncConnection) -> bool:
+    added = await _add_columns(conn, "invoices", {
+        "recurring_template_id": "VARCHAR(36) REFERENCES recurring_invoice_templates (template_id) ON DELETE SET NULL",
+        "recurring_period_date": "TIMESTAMP WITHOUT TIME ZONE",
+    })
+    constraint_added = await _add_unique_constraint(
+        conn, "invoices", "uq_invoices_recurring_template_period", ("recurring_template_id", "recurring_period_date")
+    )
+    return bool(added) or constraint_added
+
+
+async def _credit_notes(conn: AsyncConnection) -> bool:
+    """
+    Add the note and cancellation columns of invoices, and make products that
+    invoice lines use undeletable: their foreign key cascaded, so deleting a
+    product took its lines off every invoice.
+    """
+    added = await _add_columns(conn, "invoices", {
+        "invoice_amount_credited": "BIGINT NOT NULL DEFAULT 0",
+        "invoice_amount_debited": "BIGINT NOT NULL DEFAULT 0",
+        "invoice_cancelled_at": "TIMESTAMP WITHOUT TIME ZONE",
+    })
+    result = await conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE contype = 'f' AND confdeltype <> 'r' "
+        "AND conrelid = 'invoice_items'::regclass AND confrelid = 'products'::regclass"
+    ))
+    cascading = result.scalars().all()
+    for constraint_name in cascading:
+        await conn.execute(text(f"ALTER TABLE invoice_items DROP CONSTRAINT {constraint_name}"))
+    if cascading:
+        await conn.execute(text(
+            "ALTER TABLE invoice_items ADD CONSTRAINT invoice_items_product_id_fkey "
+            "FOREIGN KEY (product_id) REFERENCES products (product_id) ON DELETE RESTRICT"
+        ))
+    return bool(added or cascading)
+
+
+async def _sales_rollups(conn: AsyncConnection) -> bool:
+    """Roll up the sales of existing invoices, when nothing has been rolled up yet."""
+    result = await conn.execute(text("SELECT EXISTS (SELECT 1 FROM sales_daily_rollups)"))
+    if result.scalar_one():
+        return False
+    result = await conn.execute(
+        select(Invoices.owner_company).distinct().where(Invoices.invoice_status.in_(RECEIVABLE_INVOICE_STATUSES))
+    )
+    company_ids = result.scalars().all()
+    for company_id in company_ids:
+        rollup_rows = await sales_rollup_rows(conn, company_id)
+        if rollup_rows:
+            await conn.execute(insert(SalesDailyRollups), rollup_rows)
+    return bool(company_ids)
+
+
+async def _change_log(conn: AsyncConnection) -> bool:
+    """
+    Record every existing entity as changed, when nothing has been recorded yet, so a
+    full sync from since=0 returns what companies had before the change feed existed.
+    """
+    result = await conn.execute(text("SELECT EXISTS (SELECT 1 FROM change_log)"))
+    if result.scalar_one():
+        return False
+    result = await conn.execute(text(
+        "INSERT INTO change_log (company_id, entity_type, entity_id, sequence, operation, changed_at) "
+        "SELECT company_id, entity_type, entity_id, "
+        "ROW_NUMBER() OVER (PARTITION BY company_id ORDER BY entity_order, entity_id), "
+        "'upsert', timezone('utc', now()) "
+        "FROM ("
+        "SELECT company_id, 'company' AS entity_type, company_id AS entity_id, 0 AS entity_order FROM companies "
+        "UNION ALL SELECT customer_to, 'customer', customer_id, 1 FROM customers "
+        "UNION ALL SELECT company_id, 'product', product_id, 2 FROM products "
+        "UNION ALL SELECT owner_company, 'invoice', invoice_id, 3 FROM invoices"
+        ") AS entities"
+    ))
+    await conn.execute(text(
+        "INSERT INTO company_change_counters (company_id, last_sequence) "
+        "SELECT company_id, MAX(sequence) FROM change_log GROUP BY company_id"
+    ))
+    return result.rowcount > 0
+
+
+async def _task_companies(conn: AsyncConnection) -> bool:
+    """Link unfinished tasks to their company, so they wait while it is moved between shards."""
+    added = await _add_columns(conn, "queued_tasks", {
+        "company_id": "VARCHAR(36) REFERENCES companies (company_id) ON DELETE CASCADE",
+    })
+    if added:
+        await conn.execute(
+            text(
+                "UPDATE queued_tasks SET company_id = document_batch_jobs.company_id FROM document_batch_jobs "
+                "WHERE queued_tasks.task_name = :task_name AND queued_tasks.task_status IN ('queued', 'running') "
+                "AND document_batch_jobs.job_id = queued_tasks.payload::json ->> 'job_id'"
+            ),
+            {"task_name": RENDER_DOCUMENT_BATCH_TASK}
+        )
+        await conn.execute(
+            text(
+                "UPDATE queued_tasks SET company_id = webhook_subscriptions.company_id FROM webhook_subscriptions "
+                "WHERE queued_tasks.task_name = :task_name AND queued_tasks.task_status IN ('queued', 'running') "
+                "AND webhook_subscriptions.subscription_id = queued_tasks.payload::json ->> 'subscription_id'"
+            ),
+            {"task_name": DELIVER_WEBHOOKS_TASK}
+        )
+    return bool(added)
+
+
+async def _create_extensions(conn: AsyncConnection) -> None:
+    # Trigram search indexes on customers and products need pg_trgm
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
+async def _create_missing_indexes(conn: AsyncConnection) -> bool:
+    """Create the indexes the models declare that existing tables don't have yet."""
+    result = await conn.execute(text("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"))
+    existing = set(result.scalars().all())
+    missing = [
+        index for table in Base.metadata.sorted_tables for index in table.indexes
+        if index.name not in existing
+    ]
+    for index in missing:
+        await conn.run_sync(index.create)
+    return bool(missing)
+
+
+# Applied in order; each returns whether it changed anything
+UPGRADE_STEPS: List[Tuple[str, UpgradeStep]] = [
+    ("store amounts as paise and tax rates as hundredths", _store_money_as_minor_units),
+    ("invoice numbers unique per company", _unique_invoice_numbers),
+    ("invoice versions", _invoice_versions),
+    ("product names unique per company", _unique_product_names),
+    ("invoice balances and customer ledgers", _receivables),
+    ("invoice status values", _invoice_status_values),
+    ("recurring invoice links", _recurring_invoices),
+    ("credit and debit notes", _credit_notes),
+    ("sales rollups", _sales_rollups),
+    ("change log of existing entities", _change_log),
+    ("companies of queued tasks", _task_companies),
+]
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    if conn.dialect.name != "postgresql":
+        raise RuntimeError("Upgrades are written for PostgreSQL; create other databases afresh")
+    await _create_extensions(conn)
+    # Tables added by this release, so steps can fill them in
+    await conn.run_sync(Base.metadata.create_all)
+    for description, step in UPGRADE_STEPS:
+        if await step(conn):
+            logger.info("Upgraded: %s", description)
+        else:
+            logger.info("Already up to date: %s", description)
+    # Last, as indexes may cover columns the steps added
+    if await _create_missing_indexes(conn):
+        logger.info("Upgraded: indexes")
+
+
+async def run() -> None:
+    try:
+        for shard_name, shard_engine in shard_engines.items():
+            logger.info("Upgrading shard %s", shard_name)
+            async with shard_engine.begin() as conn:
+                await upgrade(conn)
+    finally:
+        for shard_engine in shard_engines.values():
+            await shard_engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run())
@@ -0,0 +1,36 @@
+# app/worker.py
+"""
+Standalone task queue worker, for running background tasks outside the API
+processes: `python -m app.worker`. Set TASK_WORKER_ENABLED to False in the API
+processes to leave all tasks to standalone workers.
+"""
+import asyncio
+import logging
+import signal
+
+from app.main import app  # noqa: F401 -- loads every model and registers the task handlers
+from app.core.http_client import close_http_client
+from app.core.task_queue import task_worker
+from app.services.documents import shutdown_render_pool
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker() -> None:
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stopping.set)
+
+    task_worker.start()
+    logger.info("Task worker %s started", task_worker.worker_id)
+    await stopping.wait()
+    logger.info("Task worker %s stopping", task_worker.worker_id)
+    await task_worker.stop()
+    await close_http_client()
+    shutdown_render_pool()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker())
@@ -0,0 +1,151 @@
+# scripts/benchmark_compression.py
+"""
+Size and CPU time of each response encoding and level on an invoice list response:
+
+    python -m scripts.benchmark_compression [--invoices N] [--items-per-invoice N] [--database-url URL]
+
+Seeds one company with invoices created through the invoice service, renders the
+GET /invoices/ response body for them, and compresses it with every encoding
+this install supports (zstd and brotli only when their packages are present).
+Times are CPU seconds in this thread, the median of --repeats runs. Runs on a
+temporary SQLite file unless --database-url is given; that database's tables are dropped.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi import status
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+import app.database
+from app.main import app as _app  # noqa: F401 -- loads every model
+from app.api.endpoints.invoices import _build_invoice_out
+from app.core.compression import SUPPORTED_ENCODINGS, _timed_compress, compression_level
+from app.database import AsyncSessionLocal, Base, DEFAULT_SHARD, shard_engines
+from app.models.companies import Companies
+from app.models.customers import Customers
+from app.models.products import Products
+from app.models.users import Users
+from app.schemas.invoices import CreateInvoiceWithItems, InvoiceItemInput, ListInvoiceResponse
+from app.services.invoices import create_invoice_with_items, show_all_invoices
+
+logger = logging.getLogger(__name__)
+
+# Levels tried per encoding; the configured level for JSON is always included
+LEVELS = {"gzip": (1, 3, 6, 9), "br": (1, 4, 5, 7, 9, 11), "zstd": (1, 3, 6, 9, 12, 19)}
+CONTENT_TYPE = "application/json"
+
+
+async def seed(database: AsyncEngine, args: argparse.Namespace) -> Companies:
+    async with database.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    user = Users(user_id=str(uuid.uuid4()), user_name=f"benchmark-{uuid.uuid4().hex[:8]}", hashed_password="!")
+    company = Companies(
+        company_id=str(uuid.uuid4()), company_owner=user.user_id, company_name="Benchmark Traders",
+        company_address="1 Main Road", company_city="Chennai", company_state="Tamil Nadu",
+        company_gstin=f"33{uuid.uuid4().hex[:13].upper()}", company_email="accounts@benchmark.example",
+        company_bank_account_no="000123456789", company_bank_name="Benchmark Bank",
+        company_account_holder="Benchmark Traders", company_branch="Chennai", company_ifsc_code="BENC0000001"
+    )
+    customer_ids = [str(uuid.uuid4()) for _ in range(args.customers)]
+    product_ids = [str(uuid.uuid4()) for _ in range(args.products)]
+    async with AsyncSessionLocal() as db:
+        db.add_all([user, company])
+        await db.flush()
+        await db.execute(insert(Customers), [{
+            "customer_id": customer_id, "customer_to": company.company_id, "customer_name": f"Customer {number}",
+            "customer_address_line1": "2 Market Street", "customer_address_line2": "", "customer_city": "Chennai",
+            "customer_state": "Tamil Nadu", "customer_postal_code": "600001", "customer_country": "India",
+            "customer_gstin": f"33CUST{number:09d}", "customer_email": "buyer@customer.example",
+            "customer_phone": "9999999999"
+        } for number, customer_id in enumerate(customer_ids)])
+        await db.execute(insert(Products), [{
+            "product_id": product_id, "company_id": company.company_id, "product_name": f"Product {number}",
+            "product_description": "Benchmark product", "product_hsn_sac_code": f"84{number:04d}",
+            "product_unit_of_measure": "set", "product_unit_price": Decimal("100.00") + number,
+            "product_default_cgst_rate": Decimal("9"), "product_default_sgst_rate": Decimal("9"),
+            "product_default_igst_rate": Decimal("18")
+        } for number, product_id in enumerate(product_ids)])
+        await db.commit()
+
+    issued_at = datetime.utcnow() - timedelta(days=args.invoices)
+    for number in range(args.invoices):
+        async with AsyncSessionLocal() as db:
+            await create_invoice_with_items(CreateInvoiceWithItems(
+                owner_company=company.company_id,
+                customer_company=customer_ids[number % len(customer_ids)],
+                invoice_date=issued_at + timedelta(days=number),
+                invoice_due_date=issued_at + timedelta(days=number + 30),
+                invoice_terms="Net 30",
+                invoice_place_of_supply="Tamil Nadu",
+                invoice_notes="",
+                invoice_items=[
+                    InvoiceItemInput(
+                        product_id=product_ids[(number + line) % len(product_ids)], invoice_item_quantity=line + 1
+                    )
+                    for line in range(args.items_per_invoice)
+                ]
+            ), db, company)
+    logger.info("Seeded %s invoices with %s lines each", args.invoices, args.items_per_invoice)
+    return company
+
+
+async def list_response_body(company: Companies) -> bytes:
+    async with AsyncSessionLocal() as db:
+        invoices = await show_all_invoices(db, company, all_years=True)
+    response = ListInvoiceResponse(
+        status_code=status.HTTP_200_OK,
+        message="Invoices retrieved successfully",
+        data=[_build_invoice_out(invoice) for invoice in invoices]
+    )
+    return response.json().encode()
+
+
+def measure(body: bytes, repeats: int) -> None:
+    for encoding in SUPPORTED_ENCODINGS:
+        configured = compression_level(CONTENT_TYPE, encoding)
+        for level in sorted({*LEVELS[encoding], configured}):
+            runs = [_timed_compress(body, encoding, level) for _ in range(repeats)]
+            size = len(runs[0][0])
+            cpu_seconds = statistics.median(cpu for _, cpu in runs)
+            logger.info(
+                "%-4s level %2s: %8.1f KiB, ratio %5.1f, %7.2f ms%s", encoding, level, size / 1024,
+                len(body) / size, cpu_seconds * 1000, " (configured)" if level == configured else ""
+            )
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(directory, 'benchmark.db')}"
+        database = create_async_engine(database_url)
+        # Point the default shard, and so AsyncSessionLocal(), at the benchmark database
+        app.database.engine = database
+        shard_engines[DEFAULT_SHARD] = database
+        try:
+            company = await seed(database, args)
+            body = await list_response_body(company)
+        finally:
+            await database.dispose()
+    logger.info("Invoice list response: %.1f KiB of JSON", len(body) / 1024)
+    measure(body, args.repeats)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(prog="python -m scripts.benchmark_compression")
+    parser.add_argument("--invoices", type=int, default=500)
+    parser.add_argument("--items-per-invoice", type=int, default=3)
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="Scratch database to use; its tables are dropped")
+    asyncio.run(run(parser.parse_args()))
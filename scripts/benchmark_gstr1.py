@@ -0,0 +1,172 @@
+# scripts/benchmark_gstr1.py
+"""
+GSTR-1 generation time for a large tenant, as JSON with every section and as CSV per section:
+
+    python -m scripts.benchmark_gstr1 [--invoices N] [--items-per-invoice N] [--database-url URL]
+
+Seeds one company with a year of issued invoices to a mix of registered and
+unregistered customers in and out of its state, then streams the return for the
+whole year. No notes are seeded, so cdnr stays empty. Runs on a temporary SQLite
+file unless --database-url is given; that database's tables are dropped.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import AsyncIterator
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+import app.database
+from app.main import app as _app  # noqa: F401 -- loads every model
+from app.core.invoice_status import InvoiceStatus
+from app.database import AsyncSessionLocal, Base, DEFAULT_SHARD, shard_engines
+from app.models.companies import Companies
+from app.models.customers import Customers
+from app.models.invoice_items import InvoiceItems
+from app.models.invoices import Invoices
+from app.models.products import Products
+from app.models.users import Users
+from app.schemas.gst_returns import Gstr1Section
+from app.services.gst_returns import ReturnScope, stream_gstr1_csv, stream_gstr1_json
+
+logger = logging.getLogger(__name__)
+
+COMPANY_STATE = "Tamil Nadu"
+PERIOD_START = date(2025, 4, 1)
+PERIOD_END = date(2026, 3, 31)
+UNIT_PRICE = Decimal("100.00")
+TAX_RATES = (Decimal("5"), Decimal("12"), Decimal("18"))
+INSERT_CHUNK_SIZE = 5000
+
+
+async def seed(database: AsyncEngine, args: argparse.Namespace) -> Companies:
+    async with database.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    user = Users(user_id=str(uuid.uuid4()), user_name=f"benchmark-{uuid.uuid4().hex[:8]}", hashed_password="!")
+    company = Companies(
+        company_id=str(uuid.uuid4()), company_owner=user.user_id, company_name="Benchmark Traders",
+        company_address="1 Main Road", company_city="Chennai", company_state=COMPANY_STATE,
+        company_gstin=f"33{uuid.uuid4().hex[:13].upper()}", company_email="accounts@benchmark.example",
+        company_bank_account_no="000123456789", company_bank_name="Benchmark Bank",
+        company_account_holder="Benchmark Traders", company_branch="Chennai", company_ifsc_code="BENC0000001"
+    )
+    # Every other customer is registered, and every third is out of state
+    customers = [{
+        "customer_id": str(uuid.uuid4()), "customer_to": company.company_id, "customer_name": f"Customer {number}",
+        "customer_address_line1": "2 Market Street", "customer_address_line2": "", "customer_city": "City",
+        "customer_state": "Karnataka" if number % 3 == 0 else COMPANY_STATE, "customer_postal_code": "600001",
+        "customer_country": "India", "customer_gstin": f"33CUST{number:09d}" if number % 2 == 0 else "",
+        "customer_email": "buyer@customer.example", "customer_phone": "9999999999"
+    } for number in range(args.customers)]
+    products = [{
+        "product_id": str(uuid.uuid4()), "company_id": company.company_id, "product_name": f"Product {number}",
+        "product_description": "Benchmark product", "product_hsn_sac_code": f"84{number:04d}",
+        "product_unit_of_measure": "set", "product_unit_price": UNIT_PRICE,
+        "product_default_cgst_rate": TAX_RATES[number % len(TAX_RATES)] / 2,
+        "product_default_sgst_rate": TAX_RATES[number % len(TAX_RATES)] / 2,
+        "product_default_igst_rate": TAX_RATES[number % len(TAX_RATES)]
+    } for number in range(args.products)]
+
+    invoices, items = [], []
+    days = (PERIOD_END - PERIOD_START).days + 1
+    for number in range(args.invoices):
+        customer = customers[number % len(customers)]
+        intrastate = customer["customer_state"] == COMPANY_STATE
+        invoice_id = str(uuid.uuid4())
+        invoice_date = datetime.combine(PERIOD_START + timedelta(days=number % days), datetime.min.time())
+        subtotal = cgst = sgst = igst = Decimal("0")
+        for line in range(args.items_per_invoice):
+            product = products[(number + line) % len(products)]
+            quantity = line + 1
+            taxable_value = UNIT_PRICE * quantity
+            rate = product["product_default_igst_rate"]
+            cgst_amount = sgst_amount = (taxable_value * rate / 200).quantize(Decimal("0.01")) if intrastate else Decimal("0")
+            igst_amount = Decimal("0") if intrastate else (taxable_value * rate / 100).quantize(Decimal("0.01"))
+            items.append({
+                "invoice_id": invoice_id, "product_id": product["product_id"], "invoice_item_quantity": quantity,
+                "invoice_item_cgst_rate": rate / 2 if intrastate else 0,
+                "invoice_item_sgst_rate": rate / 2 if intrastate else 0,
+                "invoice_item_igst_rate": 0 if intrastate else rate,
+                "invoice_item_unit_price": UNIT_PRICE, "invoice_item_taxable_value": taxable_value,
+                "invoice_item_cgst_amount": cgst_amount, "invoice_item_sgst_amount": sgst_amount,
+                "invoice_item_igst_amount": igst_amount,
+                "invoice_item_total_amount": taxable_value + cgst_amount + sgst_amount + igst_amount
+            })
+            subtotal += taxable_value
+            cgst += cgst_amount
+            sgst += sgst_amount
+            igst += igst_amount
+        total = subtotal + cgst + sgst + igst
+        invoices.append({
+            "invoice_id": invoice_id, "owner_company": company.company_id, "customer_company": customer["customer_id"],
+            "invoice_number": f"BENCH/{number:07d}", "invoice_date": invoice_date,
+            "invoice_due_date": invoice_date + timedelta(days=30), "invoice_terms": "Net 30",
+            "invoice_place_of_supply": customer["customer_state"], "invoice_notes": "",
+            "invoice_subtotal": subtotal, "invoice_total_cgst": cgst, "invoice_total_sgst": sgst,
+            "invoice_total_igst": igst, "invoice_total": total, "invoice_balance_due": total,
+            "invoice_status": InvoiceStatus.issued
+        })
+
+    async with AsyncSessionLocal() as db:
+        db.add_all([user, company])
+        await db.flush()
+        for model, rows in ((Customers, customers), (Products, products), (Invoices, invoices), (InvoiceItems, items)):
+            for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                await db.execute(insert(model), rows[start:start + INSERT_CHUNK_SIZE])
+        await db.commit()
+    logger.info("Seeded %s invoices with %s lines", len(invoices), len(items))
+    return company
+
+
+async def consume(stream: AsyncIterator[bytes]) -> int:
+    size = 0
+    async for chunk in stream:
+        size += len(chunk)
+    return size
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(directory, 'benchmark.db')}"
+        database = create_async_engine(database_url)
+        # Point the default shard, and so the return streams' sessions, at the benchmark database
+        app.database.engine = database
+        shard_engines[DEFAULT_SHARD] = database
+        try:
+            company = await seed(database, args)
+            scope = ReturnScope(
+                company_id=company.company_id,
+                company_gstin=company.company_gstin,
+                company_state=company.company_state,
+                date_from=PERIOD_START,
+                date_to=PERIOD_END
+            )
+            runs = [("json", stream_gstr1_json(scope))] + [
+                (f"csv {section.value}", stream_gstr1_csv(scope, section.value)) for section in Gstr1Section
+            ]
+            for name, stream in runs:
+                started = time.perf_counter()
+                size = await consume(stream)
+                logger.info("%s: %.1f KiB in %.2fs", name, size / 1024, time.perf_counter() - started)
+        finally:
+            await database.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(prog="python -m scripts.benchmark_gstr1")
+    parser.add_argument("--invoices", type=int, default=20000)
+    parser.add_argument("--items-per-invoice", type=int, default=3)
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--database-url", default=None, help="Scratch database to use; its tables are dropped")
+    asyncio.run(run(parser.parse_args()))
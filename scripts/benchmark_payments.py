@@ -0,0 +1,138 @@
+# scripts/benchmark_payments.py
+"""
+Payment recording throughput, one payment per request against bank statement batches:
+
+    python -m scripts.benchmark_payments [--payments N] [--batch-size N] [--database-url URL]
+
+Each mode starts from the same freshly seeded company: customers with issued invoices,
+paid oldest first by payments that don't name their invoices. Runs on a temporary
+SQLite file unless --database-url is given; that database's tables are dropped.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+import app.database
+from app.main import app as _app  # noqa: F401 -- loads every model
+from app.core.invoice_status import InvoiceStatus
+from app.database import AsyncSessionLocal, Base, DEFAULT_SHARD, shard_engines
+from app.models.companies import Companies
+from app.models.customers import Customers
+from app.models.invoices import Invoices
+from app.models.users import Users
+from app.schemas.payments import CreatePayment, CreatePaymentBatch
+from app.services.payments import record_payment, record_payment_batch
+
+logger = logging.getLogger(__name__)
+
+INVOICE_TOTAL = Decimal("1000.00")
+PAYMENT_AMOUNT = Decimal("1500.00") # Settles one invoice and part of the next
+
+
+async def seed(database: AsyncEngine, customers: int, invoices_per_customer: int) -> Tuple[Companies, List[str]]:
+    async with database.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    user = Users(user_id=str(uuid.uuid4()), user_name=f"benchmark-{uuid.uuid4().hex[:8]}", hashed_password="!")
+    company = Companies(
+        company_id=str(uuid.uuid4()), company_owner=user.user_id, company_name="Benchmark Traders",
+        company_address="1 Main Road", company_city="Chennai", company_state="Tamil Nadu",
+        company_gstin=f"33{uuid.uuid4().hex[:13].upper()}", company_email="accounts@benchmark.example",
+        company_bank_account_no="000123456789", company_bank_name="Benchmark Bank",
+        company_account_holder="Benchmark Traders", company_branch="Chennai", company_ifsc_code="BENC0000001"
+    )
+    customer_ids = [str(uuid.uuid4()) for _ in range(customers)]
+    issued_at = datetime(2025, 4, 1)
+    async with AsyncSessionLocal() as db:
+        db.add_all([user, company])
+        await db.flush()
+        await db.execute(insert(Customers), [{
+            "customer_id": customer_id, "customer_to": company.company_id, "customer_name": f"Customer {number}",
+            "customer_address_line1": "2 Market Street", "customer_address_line2": "", "customer_city": "Chennai",
+            "customer_state": "Tamil Nadu", "customer_postal_code": "600001", "customer_country": "India",
+            "customer_gstin": "33AAAAA0000A1Z5", "customer_email": "buyer@customer.example",
+            "customer_phone": "9999999999"
+        } for number, customer_id in enumerate(customer_ids)])
+        await db.execute(insert(Invoices), [{
+            "invoice_id": str(uuid.uuid4()), "owner_company": company.company_id, "customer_company": customer_id,
+            "invoice_number": f"BENCH/{number:03d}/{sequence:05d}",
+            "invoice_date": issued_at + timedelta(days=sequence),
+            "invoice_due_date": issued_at + timedelta(days=sequence + 30),
+            "invoice_terms": "Net 30", "invoice_place_of_supply": "Tamil Nadu", "invoice_notes": "",
+            "invoice_subtotal": INVOICE_TOTAL, "invoice_total": INVOICE_TOTAL, "invoice_balance_due": INVOICE_TOTAL,
+            "invoice_status": InvoiceStatus.issued
+        } for number, customer_id in enumerate(customer_ids) for sequence in range(invoices_per_customer)])
+        await db.commit()
+    return company, customer_ids
+
+
+def make_payments(customer_ids: List[str], count: int) -> List[CreatePayment]:
+    return [
+        CreatePayment(
+            customer_id=customer_ids[number % len(customer_ids)],
+            payment_date=datetime(2025, 6, 1),
+            payment_amount=PAYMENT_AMOUNT,
+            payment_reference=f"UTR{number:08d}"
+        )
+        for number in range(count)
+    ]
+
+
+async def record_one_by_one(company: Companies, payments: List[CreatePayment], batch_size: int) -> None:
+    for payment in payments:
+        async with AsyncSessionLocal() as db:
+            await record_payment(payment, db, company)
+
+
+async def record_in_batches(company: Companies, payments: List[CreatePayment], batch_size: int) -> None:
+    for start in range(0, len(payments), batch_size):
+        async with AsyncSessionLocal() as db:
+            report = await record_payment_batch(
+                CreatePaymentBatch(payments=payments[start:start + batch_size]), db, company
+            )
+            if report.rejected_payments:
+                raise RuntimeError(f"{report.rejected_payments} payments were rejected: {report.results}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(directory, 'benchmark.db')}"
+        database = create_async_engine(database_url)
+        # Point the default shard, and so AsyncSessionLocal(), at the benchmark database
+        app.database.engine = database
+        shard_engines[DEFAULT_SHARD] = database
+        try:
+            for mode, record in (("single", record_one_by_one), ("batch", record_in_batches)):
+                company, customer_ids = await seed(database, args.customers, args.invoices_per_customer)
+                payments = make_payments(customer_ids, args.payments)
+                started = time.perf_counter()
+                await record(company, payments, args.batch_size)
+                duration = time.perf_counter() - started
+                logger.info(
+                    "%s: %s payments in %.2fs, %.0f payments/s",
+                    mode, len(payments), duration, len(payments) / duration
+                )
+        finally:
+            await database.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(prog="python -m scripts.benchmark_payments")
+    parser.add_argument("--payments", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=500, help="Payments per batch; at most PAYMENT_BATCH_MAX_SIZE")
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--invoices-per-customer", type=int, default=40)
+    parser.add_argument("--database-url", default=None, help="Scratch database to use; its tables are dropped")
+    asyncio.run(run(parser.parse_args()))
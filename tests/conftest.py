@@ -0,0 +1,121 @@
+# tests/conftest.py
+# Tests run against SQLite files in a temporary directory, standing in for the
+# PostgreSQL databases, or against TEST_DATABASE_URL when set (its tables are
+# dropped and recreated). Async tests use the anyio pytest plugin.
+import os
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+import app.database
+import app.main  # noqa: F401 -- loads every model
+from app.database import Base, DEFAULT_SHARD, shard_engines
+from app.models.companies import Companies
+from app.models.customers import Customers
+from app.models.products import Products
+from app.models.users import Users
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def sqlite_engine(path) -> AsyncEngine:
+    """
+    Engine on a SQLite file. Transactions begin with BEGIN IMMEDIATE, so concurrent
+    ones queue for the write lock instead of failing to upgrade a read lock, much as
+    PostgreSQL row locks make them wait.
+    """
+    sqlite = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 30})
+
+    @event.listens_for(sqlite.sync_engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None # Let the begin event below start transactions
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    @event.listens_for(sqlite.sync_engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return sqlite
+
+
+async def create_tables(test_engine: AsyncEngine) -> None:
+    async with test_engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+@pytest.fixture
+async def database(tmp_path, monkeypatch):
+    """A fresh default database; sessions from AsyncSessionLocal() use it."""
+    test_database_url = os.environ.get("TEST_DATABASE_URL")
+    test_engine = create_async_engine(test_database_url) if test_database_url else sqlite_engine(tmp_path / "default.db")
+    monkeypatch.setattr(app.database, "engine", test_engine)
+    monkeypatch.setitem(shard_engines, DEFAULT_SHARD, test_engine)
+    await create_tables(test_engine)
+    yield test_engine
+    await test_engine.dispose()
+
+
+def new_user() -> Users:
+    return Users(user_id=str(uuid.uuid4()), user_name=f"user-{uuid.uuid4().hex[:8]}", hashed_password="!")
+
+
+def new_company(owner: Users, **fields) -> Companies:
+    company_id = str(uuid.uuid4())
+    return Companies(**{
+        "company_id": company_id,
+        "company_owner": owner.user_id,
+        "company_name": "Test Traders",
+        "company_address": "1 Main Road",
+        "company_city": "Chennai",
+        "company_state": "Tamil Nadu",
+        "company_gstin": f"33{company_id[:13].upper()}",
+        "company_email": "accounts@test-traders.example",
+        "company_bank_account_no": "000123456789",
+        "company_bank_name": "Test Bank",
+        "company_account_holder": "Test Traders",
+        "company_branch": "Chennai",
+        "company_ifsc_code": "TEST0000001",
+        **fields
+    })
+
+
+def new_customer(company: Companies) -> Customers:
+    return Customers(
+        customer_id=str(uuid.uuid4()),
+        customer_to=company.company_id,
+        customer_name="Test Customer",
+        customer_address_line1="2 Market Street",
+        customer_address_line2="",
+        customer_city="Chennai",
+        customer_state="Tamil Nadu",
+        customer_postal_code="600001",
+        customer_country="India",
+        customer_gstin="33AAAAA0000A1Z5",
+        customer_email="buyer@customer.example",
+        customer_phone="9999999999"
+    )
+
+
+def new_product(company: Companies) -> Products:
+    return Products(
+        product_id=str(uuid.uuid4()),
+        company_id=company.company_id,
+        product_name="Widget",
+        product_description="A widget",
+        product_hsn_sac_code="8479",
+        product_unit_price=Decimal("100.00"),
+        product_default_cgst_rate=Decimal("9"),
+        product_default_sgst_rate=Decimal("9"),
+        product_default_igst_rate=Decimal("18")
+    )
@@ -0,0 +1,26 @@
+# tests/test_compression.py
+from app.core.compression import _with_encoding, etag_matches
+
+
+def test_compressed_responses_get_a_weak_etag():
+    headers = _with_encoding([(b"etag", b'"invoice-1-html"'), (b"content-length", b"2048")], "gzip", 512)
+
+    assert (b"etag", b'W/"invoice-1-html"') in headers
+    assert (b"content-encoding", b"gzip") in headers
+    assert (b"content-length", b"512") in headers
+
+
+def test_weak_etag_is_kept_weak():
+    headers = _with_encoding([(b"etag", b'W/"invoice-1-html"')], "br", None)
+
+    assert (b"etag", b'W/"invoice-1-html"') in headers
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = '"invoice-1-html"'
+
+    assert etag_matches('W/"invoice-1-html"', etag)
+    assert etag_matches('"other", "invoice-1-html"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"invoice-2-html"', etag)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,160 @@
+# tests/test_documents.py
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from app.core import http_client
+from app.core.config import settings
+from app.core.http_client import PublicHTTPTransport, is_public_url
+from app.core.invoice_status import InvoiceStatus
+from app.models.invoice_items import InvoiceItems
+from app.models.invoices import Invoices
+from app.schemas.documents import DocumentFormat
+from app.services import documents
+from app.services.documents import document_fingerprint, get_company_logo
+from tests.conftest import new_company, new_customer, new_product, new_user
+
+pytestmark = pytest.mark.anyio
+
+PUBLIC_LOGO_URL = "http://93.184.216.34/logo.png"
+
+
+@pytest.mark.parametrize("url", [
+    "file:///etc/passwd",
+    "ftp://93.184.216.34/logo.png",
+    "http://127.0.0.1/logo.png",
+    "http://10.0.0.5/logo.png",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]/logo.png",
+    "http://[::ffff:127.0.0.1]/logo.png",
+])
+async def test_private_and_non_http_urls_are_not_public(url):
+    assert not await is_public_url(url)
+
+
+async def test_public_address_is_public():
+    assert await is_public_url(PUBLIC_LOGO_URL)
+
+
+def _invoice() -> Invoices:
+    company = new_company(new_user())
+    item = InvoiceItems(
+        product=new_product(company),
+        invoice_item_quantity=1,
+        invoice_item_unit_price=Decimal("100.00"),
+        invoice_item_taxable_value=Decimal("100.00"),
+        invoice_item_total_amount=Decimal("100.00")
+    )
+    return Invoices(
+        invoice_id="invoice-1",
+        invoice_number="INV/2025-26/1",
+        invoice_date=datetime(2025, 5, 1),
+        invoice_terms="Net 30",
+        invoice_place_of_supply="Tamil Nadu",
+        invoice_notes="",
+        invoice_status=InvoiceStatus.issued,
+        invoice_total=Decimal("100.00"),
+        invoice_version=1,
+        owner_company_rel=company,
+        client=new_customer(company),
+        invoice_items=[item]
+    )
+
+
+def test_fingerprint_changes_with_what_the_document_shows():
+    invoice = _invoice()
+    fingerprint = document_fingerprint(invoice, DocumentFormat.html)
+    assert document_fingerprint(invoice, DocumentFormat.html) == fingerprint
+    assert document_fingerprint(invoice, DocumentFormat.pdf) != fingerprint
+
+    # Edits to the company, customer, product or logo don't bump the invoice version
+    for record, field, value in [
+        (invoice.owner_company_rel, "company_address", "2 New Road"),
+        (invoice.owner_company_rel, "company_logo", "https://cdn.example/new-logo.png"),
+        (invoice.client, "customer_name", "Renamed Customer"),
+        (invoice.invoice_items[0].product, "product_name", "Renamed Widget"),
+    ]:
+        setattr(record, field, value)
+        changed = document_fingerprint(invoice, DocumentFormat.html)
+        assert changed != fingerprint, field
+        fingerprint = changed
+
+
+@pytest.fixture
+def logo_server(monkeypatch):
+    """Serves logo requests from `routes` (url -> response) and records the URLs fetched."""
+    routes, fetched = {}, []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        fetched.append(str(request.url))
+        return routes[str(request.url)]
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    monkeypatch.setattr(documents, "get_http_client", lambda: client)
+    monkeypatch.setattr(documents, "_logo_cache", {})
+    return routes, fetched
+
+
+async def test_logo_is_fetched_as_data_uri(logo_server):
+    routes, _ = logo_server
+    routes[PUBLIC_LOGO_URL] = httpx.Response(200, headers={"content-type": "image/png"}, content=b"png")
+
+    assert await get_company_logo(PUBLIC_LOGO_URL) == "data:image/png;base64,cG5n"
+
+
+async def test_redirects_to_private_addresses_are_not_followed(logo_server):
+    routes, fetched = logo_server
+    routes[PUBLIC_LOGO_URL] = httpx.Response(302, headers={"location": "http://127.0.0.1:8000/admin"})
+
+    assert await get_company_logo(PUBLIC_LOGO_URL) is None
+    assert fetched == [PUBLIC_LOGO_URL]
+
+
+async def test_oversized_logos_are_not_read_in_full(logo_server, monkeypatch):
+    routes, _ = logo_server
+    monkeypatch.setattr(settings, "LOGO_MAX_BYTES", 4)
+
+    async def chunks():
+        for _ in range(3):
+            yield b"png"
+
+    # No Content-Length: the size is only known by reading the stream
+    routes[PUBLIC_LOGO_URL] = httpx.Response(200, headers={"content-type": "image/png"}, content=chunks())
+
+    assert await get_company_logo(PUBLIC_LOGO_URL) is None
+
+
+async def test_transport_refuses_hosts_that_resolve_to_private_addresses():
+    async with httpx.AsyncClient(transport=PublicHTTPTransport()) as client:
+        with pytest.raises(httpx.ConnectError):
+            await client.get("http://localhost:9/logo.png")
+
+
+async def test_transport_connects_to_the_address_it_checked(monkeypatch):
+    received = []
+
+    async def serve(reader, writer):
+        received.append(await reader.readuntil(b"\r\n\r\n"))
+        writer.write(b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    checked = []
+
+    async def resolve(host, port):
+        checked.append(host)
+        return ["127.0.0.1"] # Stands in for the public address the check saw
+
+    monkeypatch.setattr(http_client, "public_addresses", resolve)
+    server = await asyncio.start_server(serve, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server, httpx.AsyncClient(transport=PublicHTTPTransport()) as client:
+        response = await client.get(f"http://logo.example:{port}/logo.png")
+
+    assert response.status_code == 204
+    assert checked == ["logo.example"]
+    # The connection went to the checked address without re-resolving, Host unchanged
+    assert f"host: logo.example:{port}".encode() in received[0].lower()
@@ -0,0 +1,49 @@
+# tests/test_idempotency.py
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from app.database import AsyncSessionLocal
+from app.models.idempotency_keys import IdempotencyKeys
+from app.services.idempotency import claim_idempotency_key, complete_idempotent_request
+from tests.conftest import new_company, new_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def _claim(company):
+    async with AsyncSessionLocal() as db:
+        return await claim_idempotency_key("key-1", "POST", "/api/invoices/", "{}", db, company)
+
+
+async def test_expired_claim_is_taken_over_by_a_retry(database):
+    async with AsyncSessionLocal() as db:
+        user = new_user()
+        company = new_company(user)
+        db.add_all([user, company])
+        await db.commit()
+
+    record = await _claim(company)
+    with pytest.raises(HTTPException) as error:
+        await _claim(company)
+    assert error.value.status_code == 409
+
+    # The claiming worker died: its lease runs out without a response being stored
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(IdempotencyKeys)
+            .where(IdempotencyKeys.idempotency_key_id == record.idempotency_key_id)
+            .values(locked_until=datetime.utcnow() - timedelta(seconds=1))
+        )
+        await db.commit()
+    retry = await _claim(company)
+    assert retry.idempotency_key_id == record.idempotency_key_id
+    assert retry.response_status is None
+    with pytest.raises(HTTPException):
+        await _claim(company)
+
+    async with AsyncSessionLocal() as db:
+        await complete_idempotent_request(record.idempotency_key_id, 201, '{"ok": true}', db)
+    assert (await _claim(company)).response_status == 201
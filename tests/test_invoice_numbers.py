@@ -0,0 +1,54 @@
+# tests/test_invoice_numbers.py
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.invoices import Invoices
+from app.schemas.invoices import CreateInvoiceWithItems, InvoiceItemInput
+from app.services.invoices import create_invoice_with_items
+from tests.conftest import new_company, new_customer, new_product, new_user
+
+pytestmark = pytest.mark.anyio
+
+CONCURRENT_INVOICES = 20
+
+
+async def _create_invoice(company, customer_id: str, product_id: str) -> str:
+    async with AsyncSessionLocal() as db:
+        invoice = await create_invoice_with_items(CreateInvoiceWithItems(
+            owner_company=company.company_id,
+            customer_company=customer_id,
+            invoice_date=datetime(2025, 5, 1),
+            invoice_due_date=datetime(2025, 5, 31),
+            invoice_terms="Net 30",
+            invoice_place_of_supply="Tamil Nadu",
+            invoice_notes="",
+            invoice_items=[InvoiceItemInput(product_id=product_id, invoice_item_quantity=1)]
+        ), db, company)
+        return invoice.invoice_number
+
+
+async def test_concurrent_invoices_get_unique_gapless_numbers(database, monkeypatch):
+    monkeypatch.setattr(settings, "INVOICE_NUMBER_BLOCK_SIZE", 1)
+    async with AsyncSessionLocal() as db:
+        user = new_user()
+        company = new_company(user)
+        customer = new_customer(company)
+        product = new_product(company)
+        db.add_all([user, company, customer, product])
+        await db.commit()
+
+    numbers = await asyncio.gather(*(
+        _create_invoice(company, customer.customer_id, product.product_id) for _ in range(CONCURRENT_INVOICES)
+    ))
+
+    assert len(set(numbers)) == CONCURRENT_INVOICES
+    sequences = sorted(int(number.rsplit("/", 1)[1]) for number in numbers)
+    assert sequences == list(range(1, CONCURRENT_INVOICES + 1))
+    async with AsyncSessionLocal() as db:
+        stored = (await db.execute(select(Invoices.invoice_number))).scalars().all()
+    assert sorted(stored) == sorted(numbers)
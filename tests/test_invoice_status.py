@@ -0,0 +1,87 @@
+# tests/test_invoice_status.py
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.invoice_status import InvoiceStatus
+from app.database import AsyncSessionLocal
+from app.models.customer_ledger import CustomerLedgerEntries
+from app.models.invoices import Invoices
+from app.models.payments import Payments
+from app.schemas.invoices import CreateInvoiceWithItems, InvoiceItemInput
+from app.services.invoice_status import PAID_INVOICE_NOT_CANCELLABLE, transition_invoice_statuses
+from app.services.invoices import create_invoice_with_items
+from tests.conftest import new_company, new_customer, new_product, new_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def _invoice(status: InvoiceStatus, amount_paid: Decimal):
+    async with AsyncSessionLocal() as db:
+        user = new_user()
+        company = new_company(user)
+        customer, product = new_customer(company), new_product(company)
+        db.add_all([user, company, customer, product])
+        await db.commit()
+        invoice = await create_invoice_with_items(CreateInvoiceWithItems(
+            owner_company=company.company_id,
+            customer_company=customer.customer_id,
+            invoice_date=datetime(2025, 5, 1),
+            invoice_due_date=datetime(2025, 5, 31),
+            invoice_terms="Net 30",
+            invoice_place_of_supply="Tamil Nadu",
+            invoice_notes="",
+            invoice_items=[InvoiceItemInput(product_id=product.product_id, invoice_item_quantity=1)]
+        ), db, company)
+        await db.execute(
+            update(Invoices)
+            .where(Invoices.invoice_id == invoice.invoice_id)
+            .values(
+                invoice_status=status,
+                invoice_amount_paid=amount_paid,
+                invoice_balance_due=Invoices.invoice_total - amount_paid
+            )
+        )
+        await db.commit()
+    return company, invoice.invoice_id
+
+
+async def test_unpaid_invoice_can_be_cancelled(database):
+    company, invoice_id = await _invoice(InvoiceStatus.issued, Decimal("0"))
+    async with AsyncSessionLocal() as db:
+        updated, failures = await transition_invoice_statuses([invoice_id], InvoiceStatus.cancelled, db, company)
+    assert failures == []
+    assert updated[0].invoice_status == InvoiceStatus.cancelled
+
+
+async def test_part_paid_overdue_invoice_cannot_be_cancelled(database):
+    company, invoice_id = await _invoice(InvoiceStatus.overdue, Decimal("10.00"))
+    async with AsyncSessionLocal() as db:
+        updated, failures = await transition_invoice_statuses([invoice_id], InvoiceStatus.cancelled, db, company)
+    assert updated == []
+    assert failures == [(invoice_id, PAID_INVOICE_NOT_CANCELLABLE)]
+
+
+async def test_marking_paid_records_a_payment_for_the_balance(database):
+    company, invoice_id = await _invoice(InvoiceStatus.partially_paid, Decimal("10.00"))
+    async with AsyncSessionLocal() as db:
+        updated, failures = await transition_invoice_statuses([invoice_id], InvoiceStatus.paid, db, company)
+    assert failures == []
+    assert updated[0].invoice_balance_due == 0
+
+    async with AsyncSessionLocal() as db:
+        invoice = await db.get(Invoices, invoice_id)
+        assert invoice.invoice_amount_paid == invoice.invoice_total
+        payment = (await db.execute(select(Payments).where(Payments.company_id == company.company_id))).scalar_one()
+        assert payment.payment_amount == invoice.invoice_total - Decimal("10.00")
+        assert payment.amount_allocated == payment.payment_amount
+        assert [(a.invoice_id, a.allocation_amount) for a in payment.allocations] == [
+            (invoice_id, payment.payment_amount)
+        ]
+        entry = (await db.execute(
+            select(CustomerLedgerEntries)
+            .where(CustomerLedgerEntries.reference_id == payment.payment_id)
+        )).scalar_one()
+        assert (entry.entry_type, entry.credit) == ("payment", payment.payment_amount)
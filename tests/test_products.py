@@ -0,0 +1,96 @@
+# tests/test_products.py
+import io
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.database import AsyncSessionLocal
+from app.models.companies import Companies
+from app.models.invoice_items import InvoiceItems
+from app.models.products import Products
+from app.schemas.invoices import CreateInvoiceWithItems, InvoiceItemInput
+from app.schemas.products import CreateProduct
+from app.services.companies import delete_company
+from app.services.imports import import_products
+from app.services.invoices import create_invoice_with_items
+from app.services.products import create_products, remove_products
+from tests.conftest import new_company, new_customer, new_product, new_user
+
+pytestmark = pytest.mark.anyio
+
+PRODUCT_CSV = (
+    "product_name,product_description,product_hsn_sac_code,product_unit_of_measure,product_unit_price,"
+    "product_default_cgst_rate,product_default_sgst_rate,product_default_igst_rate\n"
+    "Widget,A widget,8479,set,100,9,9,18\n"
+    "Gadget,A gadget,8479,set,50,9,9,18\n"
+)
+
+
+def _product(company, name: str) -> CreateProduct:
+    return CreateProduct(
+        company_id=company.company_id,
+        product_name=name,
+        product_description="A widget",
+        product_hsn_sac_code="8479",
+        product_unit_of_measure="set",
+        product_unit_price="100",
+        product_default_cgst_rate="9",
+        product_default_sgst_rate="9",
+        product_default_igst_rate="18"
+    )
+
+
+async def test_product_names_are_unique_when_created_and_imported(database):
+    async with AsyncSessionLocal() as db:
+        user = new_user()
+        company = new_company(user)
+        db.add_all([user, company])
+        await db.commit()
+
+        await create_products(_product(company, "Widget"), db, company)
+        with pytest.raises(HTTPException) as error:
+            await create_products(_product(company, "Widget"), db, company)
+        assert error.value.status_code == 400
+
+        report = await import_products(UploadFile(io.BytesIO(PRODUCT_CSV.encode()), filename="products.csv"), db, company)
+        assert report.imported_rows == 1
+        assert report.errors[0].errors == ["product_name: already exists for this company"]
+
+        with pytest.raises(HTTPException):
+            await create_products(_product(company, "Gadget"), db, company)
+
+
+async def test_products_on_invoices_cannot_be_deleted(database):
+    async with AsyncSessionLocal() as db:
+        user = new_user()
+        company = new_company(user)
+        customer, product = new_customer(company), new_product(company)
+        db.add_all([user, company, customer, product])
+        await db.commit()
+        invoice = await create_invoice_with_items(CreateInvoiceWithItems(
+            owner_company=company.company_id,
+            customer_company=customer.customer_id,
+            invoice_date=datetime(2025, 5, 1),
+            invoice_due_date=datetime(2025, 5, 31),
+            invoice_terms="Net 30",
+            invoice_place_of_supply="Tamil Nadu",
+            invoice_notes="",
+            invoice_items=[InvoiceItemInput(product_id=product.product_id, invoice_item_quantity=1)]
+        ), db, company)
+
+    async with AsyncSessionLocal() as db:
+        with pytest.raises(HTTPException) as error:
+            await remove_products(product.product_id, db, company)
+        assert error.value.status_code == 409
+
+    async with AsyncSessionLocal() as db:
+        assert await db.get(Products, product.product_id) is not None
+        assert (await db.get(InvoiceItems, invoice.invoice_items[0].invoice_item_id)).product_id == product.product_id
+
+    # Deleting the whole company still takes its products along with its invoices
+    async with AsyncSessionLocal() as db:
+        assert await delete_company(company.company_id, db, user)
+    async with AsyncSessionLocal() as db:
+        assert await db.get(Companies, company.company_id) is None
+        assert await db.get(Products, product.product_id) is None
@@ -0,0 +1,28 @@
+# tests/test_scheduler.py
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.scheduler import Scheduler
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_lease_is_renewed_while_a_job_outlasts_it(database, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_LEASE_SECONDS", 0.3)
+    leader, rival = Scheduler("test"), Scheduler("test")
+    rival_took_over = []
+
+    async def slow_job(db) -> int:
+        await asyncio.sleep(1.0)
+        rival_took_over.append(await rival._acquire_lease())
+        return 0
+
+    leader.add_job("slow", 3600, slow_job)
+    leader.is_leader = await leader._acquire_lease()
+    assert leader.is_leader
+    await leader._run_due_jobs()
+
+    assert rival_took_over == [False]
+    assert leader.is_leader
@@ -0,0 +1,200 @@
+# tests/test_sharding.py
+from datetime import datetime
+
+import pytest
+from cachetools import TTLCache
+from fastapi import HTTPException
+from sqlalchemy import select, func, update
+
+from app.core import metrics, sharding
+from app.core.config import settings
+from app.core.task_queue import TaskWorker, enqueue_task
+from app.core.invoice_status import InvoiceStatus
+from app.core.sharding import (
+    ensure_user_on_shard,
+    migrate_company,
+    moving_company_ids,
+    plan_rebalance,
+    register_company_shard,
+    resolve_company_shard,
+)
+from app.database import AsyncSessionLocal, DEFAULT_SHARD, current_shard, shard_engines, use_shard
+from app.models.companies import Companies
+from app.models.company_shards import CompanyShards
+from app.models.invoice_items import InvoiceItems
+from app.models.invoices import Invoices
+from app.models.queued_tasks import QueuedTasks
+from app.models.users import Users
+from app.schemas.invoices import CreateInvoiceWithItems, InvoiceItemInput
+from app.services.invoice_status import mark_overdue_invoices
+from app.services.invoices import create_invoice_with_items
+from tests.conftest import create_tables, new_company, new_customer, new_product, new_user, sqlite_engine
+
+pytestmark = pytest.mark.anyio
+
+EAST = "east"
+
+
+@pytest.fixture
+async def east_shard(database, tmp_path, monkeypatch):
+    """A second shard next to the default database, with an empty directory cache."""
+    east = sqlite_engine(tmp_path / "east.db")
+    monkeypatch.setitem(shard_engines, EAST, east)
+    monkeypatch.setattr(sharding, "_directory_cache", TTLCache(maxsize=100, ttl=60))
+    monkeypatch.setattr(settings, "SHARD_DIRECTORY_CACHE_TTL_SECONDS", 0)
+    await create_tables(east)
+    yield east
+    await east.dispose()
+
+
+async def _add_user() -> Users:
+    user = new_user()
+    async with AsyncSessionLocal(DEFAULT_SHARD) as db:
+        db.add(user)
+        await db.commit()
+    return user
+
+
+async def _add_company(user: Users, shard_name: str) -> Companies:
+    company = new_company(user)
+    async with AsyncSessionLocal(shard_name) as db:
+        await ensure_user_on_shard(db, shard_name, user)
+        db.add(company)
+        await db.commit()
+    await register_company_shard(company.company_id, user.user_id, shard_name)
+    return company
+
+
+async def _add_invoice(company: Companies) -> str:
+    """An issued invoice, past due, with one item; also queues a task for the company."""
+    customer, product = new_customer(company), new_product(company)
+    async with AsyncSessionLocal() as db:
+        db.add_all([customer, product])
+        await db.commit()
+        invoice = await create_invoice_with_items(CreateInvoiceWithItems(
+            owner_company=company.company_id,
+            customer_company=customer.customer_id,
+            invoice_date=datetime(2025, 5, 1),
+            invoice_due_date=datetime(2025, 5, 31),
+            invoice_terms="Net 30",
+            invoice_place_of_supply="Tamil Nadu",
+            invoice_notes="",
+            invoice_items=[InvoiceItemInput(product_id=product.product_id, invoice_item_quantity=2)]
+        ), db, company)
+        await enqueue_task(db, "test_task", company_id=company.company_id)
+        await db.commit()
+    return invoice.invoice_id
+
+
+async def _set_moving(company_id: str, is_moving: bool) -> None:
+    async with AsyncSessionLocal(DEFAULT_SHARD) as db:
+        await db.execute(update(CompanyShards).where(CompanyShards.company_id == company_id).values(is_moving=is_moving))
+        await db.commit()
+
+
+async def _count(shard_name: str, model) -> int:
+    async with AsyncSessionLocal(shard_name) as db:
+        return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+def _directory_lookups() -> float:
+    return metrics.snapshot()["counters"].get("shard_directory_lookups_total", 0)
+
+
+async def test_sessions_follow_the_current_shard(east_shard):
+    company = await _add_company(await _add_user(), EAST)
+
+    assert current_shard.get() == DEFAULT_SHARD
+    async with AsyncSessionLocal() as db:
+        assert await db.get(Companies, company.company_id) is None
+    with use_shard(EAST):
+        async with AsyncSessionLocal() as db:
+            assert (await db.get(Companies, company.company_id)) is not None
+            # Directory tables stay on the default database from any shard's session
+            entry = await db.get(CompanyShards, company.company_id)
+            assert entry.shard_name == EAST
+    assert current_shard.get() == DEFAULT_SHARD
+    async with east_shard.connect() as conn:
+        assert (await conn.execute(select(func.count()).select_from(CompanyShards))).scalar_one() == 0
+
+
+async def test_directory_lookups_are_cached(east_shard):
+    company = await _add_company(await _add_user(), EAST)
+
+    lookups = _directory_lookups()
+    assert await resolve_company_shard(company.company_id) == EAST
+    assert await resolve_company_shard(company.company_id) == EAST
+    assert _directory_lookups() == lookups + 1
+
+    # Unknown companies predate sharding and live on the default shard
+    assert await resolve_company_shard("no-such-company") == DEFAULT_SHARD
+
+
+async def test_moving_or_unknown_shards_are_refused(east_shard):
+    user = await _add_user()
+    moving = await _add_company(user, EAST)
+    await _set_moving(moving.company_id, True)
+    await register_company_shard("elsewhere", user.user_id, "west")
+
+    for company_id in (moving.company_id, "elsewhere"):
+        with pytest.raises(HTTPException) as error:
+            await resolve_company_shard(company_id)
+        assert error.value.status_code == 503
+        assert company_id not in sharding._directory_cache
+
+
+async def test_migrate_company_moves_its_rows(east_shard):
+    user = await _add_user()
+    company = await _add_company(user, DEFAULT_SHARD)
+    await _add_invoice(company)
+    assert await resolve_company_shard(company.company_id) == DEFAULT_SHARD
+
+    copied = await migrate_company(company.company_id, EAST)
+
+    assert copied["companies"] == 1 and copied["invoices"] == 1 and copied["invoice_items"] == 1
+    # Queued tasks go along, to run on the company's new shard
+    for model in (Companies, Invoices, InvoiceItems, QueuedTasks):
+        assert await _count(EAST, model) == 1
+        assert await _count(DEFAULT_SHARD, model) == 0
+    # The cached entry was dropped with the move
+    assert await resolve_company_shard(company.company_id) == EAST
+    async with AsyncSessionLocal(DEFAULT_SHARD) as db:
+        entry = await db.get(CompanyShards, company.company_id)
+        assert entry.shard_name == EAST and not entry.is_moving
+        # The owner is still a user of the default database, where logins are checked
+        assert (await db.get(Users, user.user_id)).hashed_password == "!"
+
+
+async def test_background_work_skips_moving_companies(east_shard):
+    user = await _add_user()
+    moving, staying = await _add_company(user, DEFAULT_SHARD), await _add_company(user, DEFAULT_SHARD)
+    moving_invoice_id, staying_invoice_id = await _add_invoice(moving), await _add_invoice(staying)
+    await _set_moving(moving.company_id, True)
+    assert await moving_company_ids() == [moving.company_id]
+
+    async with AsyncSessionLocal() as db:
+        assert await mark_overdue_invoices(db) == 1
+    claimed = await TaskWorker()._claim(10)
+    async with AsyncSessionLocal() as db:
+        assert (await db.get(Invoices, moving_invoice_id)).invoice_status == InvoiceStatus.issued
+        assert (await db.get(Invoices, staying_invoice_id)).invoice_status == InvoiceStatus.overdue
+        claimed_companies = await db.execute(
+            select(QueuedTasks.company_id).where(QueuedTasks.task_id.in_([task.task_id for task in claimed]))
+        )
+        assert claimed_companies.scalars().all() == [staying.company_id]
+
+    # Picked up once the move is over
+    await _set_moving(moving.company_id, False)
+    async with AsyncSessionLocal() as db:
+        assert await mark_overdue_invoices(db) == 1
+    assert len(await TaskWorker()._claim(10)) == 1
+
+
+async def test_plan_rebalance_evens_out_companies(east_shard):
+    user = await _add_user()
+    for _ in range(3):
+        await _add_company(user, DEFAULT_SHARD)
+
+    moves = await plan_rebalance()
+
+    assert [(move.source_shard, move.target_shard) for move in moves] == [(DEFAULT_SHARD, EAST)]
@@ -0,0 +1,100 @@
+# tests/test_webhooks.py
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.database import AsyncSessionLocal
+from app.models.webhooks import WebhookSubscriptions
+from app.schemas.webhooks import CreateWebhookSubscription, UpdateWebhookSubscription, WebhookEventType
+from app.services import webhooks
+from app.services.webhooks import (
+    PRIVATE_TARGET_URL,
+    WebhookDeliveryError,
+    _deliver_webhooks,
+    create_webhook_subscription,
+    update_webhook_subscription,
+)
+from tests.conftest import new_company, new_user
+
+pytestmark = pytest.mark.anyio
+
+PUBLIC_TARGET_URL = "http://93.184.216.34/hooks"
+
+
+@pytest.fixture
+def receiver(monkeypatch):
+    """Answers deliveries with `responses` (url -> response) and records the URLs posted to."""
+    responses, posted = {}, []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        posted.append(str(request.url))
+        return responses[str(request.url)]
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    monkeypatch.setattr(webhooks, "get_http_client", lambda: client)
+    return responses, posted
+
+
+async def _company():
+    async with AsyncSessionLocal() as db:
+        user = new_user()
+        company = new_company(user)
+        db.add_all([user, company])
+        await db.commit()
+    return company
+
+
+@pytest.mark.parametrize("target_url", ["http://127.0.0.1:8000/admin", "http://169.254.169.254/latest/meta-data/"])
+async def test_private_targets_are_refused(database, target_url):
+    company = await _company()
+    async with AsyncSessionLocal() as db:
+        with pytest.raises(HTTPException) as error:
+            await create_webhook_subscription(CreateWebhookSubscription(
+                target_url=target_url, event_types=[WebhookEventType.invoice_created]
+            ), db, company)
+        assert (error.value.status_code, error.value.detail) == (400, PRIVATE_TARGET_URL)
+
+        subscription = await create_webhook_subscription(CreateWebhookSubscription(
+            target_url=PUBLIC_TARGET_URL, event_types=[WebhookEventType.invoice_created]
+        ), db, company)
+        with pytest.raises(HTTPException) as error:
+            await update_webhook_subscription(
+                subscription.subscription_id, UpdateWebhookSubscription(target_url=target_url), db, company
+            )
+        assert error.value.status_code == 400
+
+
+async def _subscription(target_url: str) -> str:
+    company = await _company()
+    async with AsyncSessionLocal() as db:
+        # Saved directly, as if the host resolved to a public address when it was saved
+        subscription = WebhookSubscriptions(
+            company_id=company.company_id, target_url=target_url, secret="s" * 64,
+            event_types=WebhookEventType.invoice_created.value, is_active=True, consecutive_failures=0
+        )
+        db.add(subscription)
+        await db.commit()
+        return subscription.subscription_id
+
+
+async def test_deliveries_to_private_targets_fail_without_a_request(database, receiver):
+    _, posted = receiver
+    subscription_id = await _subscription("http://127.0.0.1:8000/hooks")
+
+    with pytest.raises(WebhookDeliveryError):
+        await _deliver_webhooks({"subscription_id": subscription_id, "delivery_id": "d1", "events": []})
+
+    assert posted == []
+    async with AsyncSessionLocal() as db:
+        assert (await db.get(WebhookSubscriptions, subscription_id)).consecutive_failures == 1
+
+
+async def test_redirects_are_not_followed(database, receiver):
+    responses, posted = receiver
+    responses[PUBLIC_TARGET_URL] = httpx.Response(307, headers={"location": "http://127.0.0.1:8000/admin"})
+    subscription_id = await _subscription(PUBLIC_TARGET_URL)
+
+    with pytest.raises(WebhookDeliveryError):
+        await _deliver_webhooks({"subscription_id": subscription_id, "delivery_id": "d1", "events": []})
+
+    assert posted == [PUBLIC_TARGET_URL]